@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, session, abort, send_from_directory, make_response, g
+from flask import Flask, request, jsonify, session, abort, send_from_directory, make_response, g, Response
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flask_wtf.csrf import CSRFProtect, generate_csrf
@@ -10,20 +10,38 @@ from werkzeug.utils import secure_filename
 from werkzeug.exceptions import HTTPException
 from datetime import datetime, timedelta, date, timezone
 from functools import wraps, lru_cache
-from sqlalchemy import func, text, Index
+from sqlalchemy import func, select, text, Index
 from sqlalchemy.orm import joinedload, selectinload
 import os
 import json
 import logging
-import time
-from logging.handlers import RotatingFileHandler
+import threading
+import atexit
 from PIL import Image as PILImage
 import qrcode
 import html
 import re
+import hmac
 
 # Import image storage service
 import image_storage
+import auction_scheduler
+import settlement_queue
+import realtime
+import event_bus
+import auction_cache
+import pagination
+import search_index
+import proxy_bidding
+import bid_book
+import idempotency
+import notification_queue
+import unread_counts
+import push_delivery
+import outbound_messages
+import email_templates
+import structured_logging
+import request_metrics
 
 # Load environment variables
 try:
@@ -235,8 +253,8 @@ if cors_origins == '*':
     CORS(app,
          supports_credentials=True,
          origins=development_origins,
-         allow_headers=['Content-Type', 'X-CSRFToken', 'Authorization'],
-         expose_headers=['Set-Cookie'],
+         allow_headers=['Content-Type', 'X-CSRFToken', 'Authorization', 'Idempotency-Key'],
+         expose_headers=['Set-Cookie', 'X-Next-Cursor', 'Idempotent-Replayed'],
          methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH'])
 else:
     # Production mode with specific origins - restrict to specific origins
@@ -244,8 +262,8 @@ else:
     CORS(app,
          supports_credentials=True,
          origins=allowed_origins,
-         allow_headers=['Content-Type', 'X-CSRFToken', 'Authorization'],
-         expose_headers=['Set-Cookie'],
+         allow_headers=['Content-Type', 'X-CSRFToken', 'Authorization', 'Idempotency-Key'],
+         expose_headers=['Set-Cookie', 'X-Next-Cursor', 'Idempotent-Replayed'],
          methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH'])
 
 # Session cleanup to prevent connection leaks
@@ -427,134 +445,57 @@ def sanitize_filename(filename):
 # EMAIL & SMS SENDING FUNCTIONS
 # ==========================================
 
+# Queued and sent by a background thread over one reused SMTP session / Twilio client
+outbound = outbound_messages.OutboundQueue()
+atexit.register(outbound.stop)
+
 def send_email(to_email, subject, body):
     """
-    Send email using SMTP
+    Send email now using SMTP (over the pooled session)
     Requires environment variables:
     - SMTP_HOST: SMTP server hostname
     - SMTP_PORT: SMTP server port (usually 587 for TLS)
     - SMTP_USER: SMTP username/email
     - SMTP_PASSWORD: SMTP password
     - SMTP_FROM: From email address
+    - SMTP_USE_TLS: STARTTLS before login (default true)
     """
-    import smtplib
-    from email.mime.text import MIMEText
-    from email.mime.multipart import MIMEMultipart
-
-    smtp_host = os.getenv('SMTP_HOST')
-    smtp_port = int(os.getenv('SMTP_PORT', '587'))
-    smtp_user = os.getenv('SMTP_USER')
-    smtp_password = os.getenv('SMTP_PASSWORD')
-    smtp_from = os.getenv('SMTP_FROM', smtp_user)
-
-    if not all([smtp_host, smtp_user, smtp_password]):
+    if not outbound.smtp.configured:
         app.logger.warning("SMTP not configured. Email not sent.")
         return False
-
-    try:
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = f"ZUBID Auction <{smtp_from}>"
-        msg['To'] = to_email
-
-        # Plain text version
-        text_part = MIMEText(body, 'plain')
-
-        # HTML version
-        html_body = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background: linear-gradient(135deg, #f97316, #ea580c); color: white; padding: 20px; text-align: center; border-radius: 8px 8px 0 0; }}
-                .content {{ background: #f8fafc; padding: 30px; border-radius: 0 0 8px 8px; }}
-                .code {{ font-size: 32px; font-weight: bold; color: #f97316; letter-spacing: 8px; text-align: center; padding: 20px; background: white; border-radius: 8px; margin: 20px 0; }}
-                .footer {{ text-align: center; color: #64748b; font-size: 12px; margin-top: 20px; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>🔐 ZUBID Auction</h1>
-                </div>
-                <div class="content">
-                    {body.replace(chr(10), '<br>')}
-                </div>
-                <div class="footer">
-                    <p>This is an automated message from ZUBID Auction Platform.</p>
-                    <p>If you didn't request this, please ignore this email.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        html_part = MIMEText(html_body, 'html')
-
-        msg.attach(text_part)
-        msg.attach(html_part)
-
-        # Connect and send
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_password)
-            server.send_message(msg)
-
-        app.logger.info(f"Email sent successfully to {to_email}")
-        return True
-
-    except Exception as e:
-        app.logger.error(f"Failed to send email to {to_email}: {str(e)}")
-        return False
+    return outbound.send_now(outbound_messages.OutboundMessage(outbound_messages.EMAIL, to_email, body, subject))
 
 
 def send_sms(to_phone, message):
     """
-    Send SMS using Twilio
+    Send SMS now using Twilio
     Requires environment variables:
     - TWILIO_ACCOUNT_SID: Twilio Account SID
     - TWILIO_AUTH_TOKEN: Twilio Auth Token
     - TWILIO_PHONE_NUMBER: Twilio phone number (from)
     """
-    account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-    auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-    from_phone = os.getenv('TWILIO_PHONE_NUMBER')
-
-    if not all([account_sid, auth_token, from_phone]):
+    if not outbound.sms.configured:
         app.logger.warning("Twilio not configured. SMS not sent.")
         return False
+    return outbound.send_now(outbound_messages.OutboundMessage(outbound_messages.SMS, to_phone, message))
 
-    try:
-        from twilio.rest import Client
-        client = Client(account_sid, auth_token)
-
-        # Ensure phone number has country code
-        if not to_phone.startswith('+'):
-            # Default to Iraq country code if not provided
-            to_phone = '+964' + to_phone.lstrip('0')
-
-        sms = client.messages.create(
-            body=message,
-            from_=from_phone,
-            to=to_phone
-        )
 
-        app.logger.info(f"SMS sent successfully to {to_phone}, SID: {sms.sid}")
-        return True
+def queue_email(to_email, subject, body, html_body=None):
+    """Queue an email for the outbound worker. Returns False if SMTP isn't configured."""
+    return outbound.enqueue(outbound_messages.OutboundMessage(outbound_messages.EMAIL, to_email, body, subject, html_body))
 
-    except ImportError:
-        app.logger.warning("Twilio library not installed. Run: pip install twilio")
-        return False
-    except Exception as e:
-        app.logger.error(f"Failed to send SMS to {to_phone}: {str(e)}")
-        return False
+
+def queue_sms(to_phone, message):
+    """Queue an SMS for the outbound worker. Returns False if Twilio isn't configured."""
+    return outbound.enqueue(outbound_messages.OutboundMessage(outbound_messages.SMS, to_phone, message))
+
+
+PASSWORD_RESET_CODE_MINUTES = 15
 
 
 def send_verification_code(user, code, method='email'):
     """
-    Send verification code via email or SMS
+    Send verification code via email or SMS, in the user's preferred language
 
     Args:
         user: User object
@@ -562,30 +503,19 @@ def send_verification_code(user, code, method='email'):
         method: 'email' or 'phone'
 
     Returns:
-        bool: True if sent successfully
+        bool: True if queued for sending (False if the channel isn't configured)
     """
-    if method == 'email' and user.email:
-        subject = "🔐 ZUBID - Password Reset Code"
-        body = f"""Hello {user.username},
-
-You requested to reset your password for your ZUBID Auction account.
-
-Your verification code is:
-
-{code}
-
-This code will expire in 15 minutes.
-
-If you didn't request this, please ignore this email and your password will remain unchanged.
-
-Best regards,
-ZUBID Auction Team"""
+    language = user.preferences.language if user.preferences else None
+    message = email_templates.render(
+        'password_reset', language,
+        username=user.username, code=code, minutes=PASSWORD_RESET_CODE_MINUTES,
+    )
 
-        return send_email(user.email, subject, body)
+    if method == 'email' and user.email:
+        return queue_email(user.email, message.subject, message.text, message.html)
 
     elif method == 'phone' and user.phone:
-        message = f"ZUBID: Your password reset code is {code}. This code expires in 15 minutes."
-        return send_sms(user.phone, message)
+        return queue_sms(user.phone, message.sms)
 
     return False
 
@@ -639,42 +569,19 @@ def rate_limit_exceeded(error):
 
 # Configure Logging
 def setup_logging():
-    """Configure application logging"""
-    log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
-    log_dir = os.getenv('LOG_DIR', 'logs')
-    
-    # Create logs directory if it doesn't exist
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    
-    # Configure file handler with rotation
-    file_handler = RotatingFileHandler(
-        os.path.join(log_dir, 'zubid.log'),
-        maxBytes=10240000,  # 10MB
-        backupCount=10
-    )
-    file_handler.setFormatter(logging.Formatter(
-        '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-    ))
-    file_handler.setLevel(getattr(logging, log_level))
-    
-    # Configure console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(logging.Formatter(
-        '%(asctime)s %(levelname)s: %(message)s'
-    ))
-    console_handler.setLevel(getattr(logging, log_level))
-    
-    # Set app logger
-    app.logger.addHandler(file_handler)
-    app.logger.addHandler(console_handler)
-    app.logger.setLevel(getattr(logging, log_level))
-    
-    # Suppress Flask default logging
-    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    """Configure application logging (queued, structured; see structured_logging.py)"""
+    handler = structured_logging.configure(app)
+    atexit.register(handler.stop)
+    return handler
 
 # Initialize logging
-setup_logging()
+log_handler = setup_logging()
+auth_logger = logging.getLogger('zubid.auth')
+
+# Per-endpoint latency and SQL metrics, served on /api/metrics (see request_metrics.py)
+app_metrics = request_metrics.RequestMetrics()
+if request_metrics.METRICS_ENABLED:
+    app_metrics.init_app(app)
 
 # Database Models
 class User(db.Model):
@@ -792,9 +699,15 @@ class Auction(db.Model):
     featured_image_url = db.Column(db.String(500), nullable=True)  # Separate image for featured display (carousel/homepage)
     qr_code_url = db.Column(db.String(500), nullable=True)  # QR code image URL
     video_url = db.Column(db.String(500), nullable=True)  # Video URL (YouTube, Vimeo, or direct video link)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # Bumped on every change to the detail view (cache key / ETag)
+    # Denormalized from Bid, maintained by place_bid/buy_now (rebuild with migrate_bid_counters.py)
+    bid_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Total bids
+    unique_bidder_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Distinct bidders
+    highest_bidder_id = db.Column(db.Integer, nullable=True)  # User holding the highest bid
     
     images = db.relationship('Image', backref='auction', lazy=True, cascade='all, delete-orphan')
     bids = db.relationship('Bid', backref='auction', lazy=True, order_by='Bid.timestamp.desc()', cascade='all, delete-orphan')
+    proxy_bids = db.relationship('ProxyBid', backref='auction', lazy=True, cascade='all, delete-orphan')
     
     # Database indexes for performance optimization
     __table_args__ = (
@@ -832,6 +745,20 @@ class Bid(db.Model):
         Index('idx_bid_auction_amount', 'auction_id', 'amount'),
     )
 
+class ProxyBid(db.Model):
+    """A bidder's maximum on an auction; the proxy-bidding engine bids on their behalf up to it"""
+    id = db.Column(db.Integer, primary_key=True)
+    auction_id = db.Column(db.Integer, db.ForeignKey('auction.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    max_amount = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))  # When max_amount was last raised (tie priority)
+
+    __table_args__ = (
+        db.UniqueConstraint('auction_id', 'user_id', name='unique_proxy_bid'),
+        Index('idx_proxy_bid_auction_max', 'auction_id', 'max_amount'),
+    )
+
 class Invoice(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     auction_id = db.Column(db.Integer, db.ForeignKey('auction.id'), nullable=False)
@@ -981,14 +908,38 @@ class Notification(db.Model):
         Index('idx_notification_created', 'created_at'),
     )
 
+class BroadcastNotification(db.Model):
+    """Admin broadcast stored once and merged into each recipient's notifications at read time"""
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    type = db.Column(db.String(50), default='info')
+    audience_role = db.Column(db.String(20), default='user')  # sent to users with this role
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index('idx_broadcast_role_created', 'audience_role', 'created_at'),
+    )
+
+class BroadcastWatermark(db.Model):
+    """Per-user read watermark: broadcasts with id <= read_through_id are read"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    read_through_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
+                           onupdate=lambda: datetime.now(timezone.utc))
+
+class BroadcastDismissal(db.Model):
+    """A broadcast a user deleted from their notification list"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    broadcast_id = db.Column(db.Integer, db.ForeignKey('broadcast_notification.id'), primary_key=True)
+
 # Authentication decorator
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        app.logger.info(f"[AUTH_CHECK] Session data: {dict(session)}")
-        app.logger.info(f"[AUTH_CHECK] Session keys: {list(session.keys())}")
         if 'user_id' not in session:
-            app.logger.warning(f"[AUTH_CHECK] No user_id in session, returning 401")
+            auth_logger.info("Unauthenticated request to %s", request.path)
             return jsonify({'error': 'Authentication required'}), 401
         return f(*args, **kwargs)
     return decorated_function
@@ -997,35 +948,68 @@ def login_required(f):
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        app.logger.info(f"[ADMIN_CHECK] Session data: {dict(session)}")
-        app.logger.info(f"[ADMIN_CHECK] Session keys: {list(session.keys())}")
-
         if 'user_id' not in session:
-            app.logger.warning(f"[ADMIN_CHECK] No user_id in session, returning 401")
+            auth_logger.info("Unauthenticated request to %s", request.path)
             return jsonify({'error': 'Authentication required'}), 401
 
         user_id = session['user_id']
-        app.logger.info(f"[ADMIN_CHECK] Checking admin status for user_id: {user_id}")
-
         user = User.query.get(user_id)
         if not user:
-            app.logger.warning(f"[ADMIN_CHECK] User not found for user_id: {user_id}")
+            auth_logger.warning("Admin check: user %s not found", user_id)
             return jsonify({'error': 'User not found'}), 404
 
-        app.logger.info(f"[ADMIN_CHECK] User found: {user.username}, role: {user.role}, active: {user.is_active}")
-
         if user.role != 'admin':
-            app.logger.warning(f"[ADMIN_CHECK] User {user.username} is not admin (role: {user.role})")
+            auth_logger.warning("Admin check: user %s is not admin (role: %s)", user.username, user.role)
             return jsonify({'error': 'Admin access required'}), 403
 
         if not user.is_active:
-            app.logger.warning(f"[ADMIN_CHECK] Admin user {user.username} is not active")
+            auth_logger.warning("Admin check: admin user %s is not active", user.username)
             return jsonify({'error': 'Account is deactivated'}), 403
 
-        app.logger.info(f"[ADMIN_CHECK] Admin access granted for user: {user.username}")
+        auth_logger.debug("Admin access granted for user %s", user.username)
         return f(*args, **kwargs)
     return decorated_function
 
+# Retried POSTs carrying the same Idempotency-Key get the first response back (see idempotency.py)
+idempotency_keys = idempotency.IdempotencyStore()
+
+def idempotent(f):
+    """Honor an Idempotency-Key header; use after login_required so keys are scoped per user"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return f(*args, **kwargs)
+        if len(key) > idempotency.MAX_KEY_LENGTH:
+            return jsonify({'error': 'Idempotency-Key is too long'}), 400
+
+        scope = f"{session.get('user_id')}:{key}"
+        request_fingerprint = idempotency.fingerprint(request.method, request.path, request.get_data())
+        outcome, stored = idempotency_keys.begin(scope, request_fingerprint)
+        if outcome == idempotency.REPLAY:
+            response = Response(stored.body, status=stored.status, mimetype=stored.mimetype)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        if outcome == idempotency.IN_PROGRESS:
+            return jsonify({'error': 'A request with this Idempotency-Key is still being processed'}), 409
+        if outcome == idempotency.MISMATCH:
+            return jsonify({'error': 'This Idempotency-Key was already used for a different request'}), 422
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            idempotency_keys.release(scope)
+            raise
+        if response.status_code >= 500:
+            # Server errors aren't final: let the retry run again
+            idempotency_keys.release(scope)
+        else:
+            idempotency_keys.complete(scope, request_fingerprint, idempotency.StoredResponse(
+                response.status_code, response.get_data(as_text=True), response.mimetype
+            ))
+        return response
+    return decorated_function
+
 # Helper function to ensure datetime is timezone-aware
 def ensure_timezone_aware(dt):
     """Ensure datetime is timezone-aware (UTC). If naive, assume UTC."""
@@ -1652,9 +1636,6 @@ def login():
         session.modified = True  # Force Flask to send the Set-Cookie header
 
         app.logger.info(f"[LOGIN] User {user.username} (ID: {user.id}) logged in successfully")
-        app.logger.info(f"[LOGIN] Session user_id set to: {session.get('user_id')}")
-        app.logger.info(f"[LOGIN] Full session data: {dict(session)}")
-        app.logger.info(f"[LOGIN] User role: {user.role}, active: {user.is_active}")
 
         # Create default preferences if they don't exist
         if not user.preferences:
@@ -1715,49 +1696,94 @@ def get_current_user():
     }), 200
 
 # ==========================================
-# WISHLIST ENDPOINTS
+# AUCTION CARDS
 # ==========================================
+# The Android card shape shared by the listing, wishlist, my-bids and my-auctions endpoints.
+# Cards come from one column projection per page (primary image as a correlated subquery,
+# bid counts from the denormalized columns), so no Auction objects are hydrated and
+# images/bids are never lazy-loaded per row.
+
+CARD_COLUMNS = (
+    Auction.id, Auction.item_name, Auction.starting_bid, Auction.current_bid,
+    Auction.end_time, Auction.category_id, Auction.seller_id, Auction.bid_count,
+    Auction.unique_bidder_count, Auction.real_price, Auction.market_price,
+    Auction.featured_image_url,
+)
+
+def primary_image_url():
+    """Correlated subquery: the auction's primary image, else its first image"""
+    return (
+        select(Image.url)
+        .where(Image.auction_id == Auction.id)
+        .order_by(func.coalesce(Image.is_primary, False).desc(), Image.id.asc())
+        .limit(1)
+        .correlate(Auction)
+        .scalar_subquery()
+    )
+
+def auction_card_query(*extra_columns, description_length=None):
+    """Projection query yielding card rows; description_length truncates the description in SQL"""
+    description = Auction.description
+    if description_length:
+        # One extra character tells the serializer whether to add an ellipsis
+        description = func.substr(Auction.description, 1, description_length + 1)
+    return db.session.query(
+        *CARD_COLUMNS,
+        description.label('description'),
+        primary_image_url().label('image_url'),
+        *extra_columns
+    )
+
+def serialize_auction_card(row, wishlisted=False, description_length=None):
+    """Android card dict for a row from auction_card_query()"""
+    end_time = ensure_timezone_aware(row.end_time) if row.end_time else None
+    description = row.description
+    if description_length and description and len(description) > description_length:
+        description = description[:description_length] + '...'
+    return {
+        # Android-compatible field names
+        'id': str(row.id),
+        'title': row.item_name,
+        'description': description,
+        'imageUrl': row.image_url or row.featured_image_url,
+        'currentPrice': row.current_bid or row.starting_bid,
+        'startingPrice': row.starting_bid,
+        'endTime': int(end_time.timestamp() * 1000) if end_time else 0,
+        'categoryId': str(row.category_id) if row.category_id else '',
+        'sellerId': str(row.seller_id),
+        'bidCount': row.bid_count,
+        'isWishlisted': wishlisted,
+        'realPrice': row.real_price,
+        'marketPrice': row.market_price
+    }
+
+def wishlisted_auction_ids(user_id, auction_ids):
+    """Which of these auctions the user has wishlisted, in one lookup on unique_wishlist_item"""
+    if not user_id or not auction_ids:
+        return set()
+    return {
+        auction_id for (auction_id,) in db.session.query(Wishlist.auction_id)
+        .filter(Wishlist.user_id == user_id, Wishlist.auction_id.in_(auction_ids))
+    }
 
-def get_auction_image(auction):
-    """Get primary image URL for an auction"""
-    if auction.images:
-        primary = next((img for img in auction.images if img.is_primary), None)
-        if primary:
-            return primary.url
-        return auction.images[0].url if auction.images else None
-    return auction.featured_image_url
+# ==========================================
+# WISHLIST ENDPOINTS
+# ==========================================
 
 @app.route('/api/wishlist', methods=['GET'])
 @login_required
 def get_wishlist():
     """Get user's wishlist"""
     user_id = session['user_id']
-    wishlist_items = Wishlist.query.filter_by(user_id=user_id).all()
-
-    auctions = []
-    for item in wishlist_items:
-        auction = item.auction
-        if auction:
-            end_time = ensure_timezone_aware(auction.end_time) if auction.end_time else None
-            end_time_ms = int(end_time.timestamp() * 1000) if end_time else 0
-            auctions.append({
-                # Android-compatible field names
-                'id': str(auction.id),
-                'title': auction.item_name,
-                'description': auction.description,
-                'imageUrl': get_auction_image(auction),
-                'currentPrice': auction.current_bid or auction.starting_bid,
-                'startingPrice': auction.starting_bid,
-                'endTime': end_time_ms,
-                'categoryId': str(auction.category_id) if auction.category_id else '',
-                'sellerId': str(auction.seller_id),
-                'bidCount': len(auction.bids) if auction.bids else 0,
-                'isWishlisted': True,
-                'realPrice': auction.real_price,
-                'marketPrice': auction.market_price
-            })
+    rows = (
+        auction_card_query()
+        .join(Wishlist, Wishlist.auction_id == Auction.id)
+        .filter(Wishlist.user_id == user_id)
+        .order_by(Wishlist.id)
+        .all()
+    )
 
-    return jsonify(auctions), 200
+    return jsonify([serialize_auction_card(row, wishlisted=True) for row in rows]), 200
 
 @app.route('/api/wishlist/<int:auction_id>', methods=['POST'])
 @login_required
@@ -1805,33 +1831,11 @@ def get_my_bids():
     user_id = session['user_id']
 
     # Get all auctions where user has placed bids
-    user_bids = Bid.query.filter_by(user_id=user_id).all()
-    auction_ids = list(set([bid.auction_id for bid in user_bids]))
-
-    auctions = Auction.query.filter(Auction.id.in_(auction_ids)).all()
-
-    result = []
-    for auction in auctions:
-        end_time = ensure_timezone_aware(auction.end_time) if auction.end_time else None
-        end_time_ms = int(end_time.timestamp() * 1000) if end_time else 0
-        result.append({
-            # Android-compatible field names
-            'id': str(auction.id),
-            'title': auction.item_name,
-            'description': auction.description,
-            'imageUrl': get_auction_image(auction),
-            'currentPrice': auction.current_bid or auction.starting_bid,
-            'startingPrice': auction.starting_bid,
-            'endTime': end_time_ms,
-            'categoryId': str(auction.category_id) if auction.category_id else '',
-            'sellerId': str(auction.seller_id),
-            'bidCount': len(auction.bids) if auction.bids else 0,
-            'isWishlisted': False,
-            'realPrice': auction.real_price,
-            'marketPrice': auction.market_price
-        })
+    bid_auction_ids = select(Bid.auction_id).where(Bid.user_id == user_id)
+    rows = auction_card_query().filter(Auction.id.in_(bid_auction_ids)).order_by(Auction.id).all()
+    wishlisted = wishlisted_auction_ids(user_id, [row.id for row in rows])
 
-    return jsonify(result), 200
+    return jsonify([serialize_auction_card(row, wishlisted=row.id in wishlisted) for row in rows]), 200
 
 @app.route('/api/my-auctions', methods=['GET'])
 @login_required
@@ -1840,70 +1844,167 @@ def get_my_auctions():
     user_id = session['user_id']
 
     # Get all auctions where user is the winner
-    won_auctions = Auction.query.filter_by(winner_id=user_id, status='ended').all()
-
-    result = []
-    for auction in won_auctions:
-        end_time = ensure_timezone_aware(auction.end_time) if auction.end_time else None
-        end_time_ms = int(end_time.timestamp() * 1000) if end_time else 0
-        result.append({
-            # Android-compatible field names
-            'id': str(auction.id),
-            'title': auction.item_name,
-            'description': auction.description,
-            'imageUrl': get_auction_image(auction),
-            'currentPrice': auction.current_bid or auction.starting_bid,
-            'startingPrice': auction.starting_bid,
-            'endTime': end_time_ms,
-            'categoryId': str(auction.category_id) if auction.category_id else '',
-            'sellerId': str(auction.seller_id),
-            'bidCount': len(auction.bids) if auction.bids else 0,
-            'isWishlisted': False,
-            'realPrice': auction.real_price,
-            'marketPrice': auction.market_price
-        })
+    rows = (
+        auction_card_query()
+        .filter(Auction.winner_id == user_id, Auction.status == 'ended')
+        .order_by(Auction.id)
+        .all()
+    )
+    wishlisted = wishlisted_auction_ids(user_id, [row.id for row in rows])
 
-    return jsonify(result), 200
+    return jsonify([serialize_auction_card(row, wishlisted=row.id in wishlisted) for row in rows]), 200
 
 # ==========================================
 # NOTIFICATIONS ENDPOINTS
 # ==========================================
 
+# Broadcast notification ids are prefixed so they can't collide with personal ones
+BROADCAST_ID_PREFIX = 'b'
+
+def parse_notification_id(value):
+    """Split a notification id from the API into (is_broadcast, int id), or None if malformed"""
+    is_broadcast = value.startswith(BROADCAST_ID_PREFIX)
+    raw = value[len(BROADCAST_ID_PREFIX):] if is_broadcast else value
+    if not raw.isdigit():
+        return None
+    return is_broadcast, int(raw)
+
+def session_user():
+    """The logged-in User, or None (with the session cleared) when the account no longer exists"""
+    user = db.session.get(User, session['user_id'])
+    if user is None:
+        auth_logger.info("Session user %s no longer exists", session['user_id'])
+        session.clear()
+    return user
+
+def session_user_gone():
+    return jsonify({'error': 'Authentication required'}), 401
+
+def visible_broadcasts(user):
+    """Query of the broadcasts a user receives and hasn't dismissed"""
+    query = BroadcastNotification.query.filter(
+        BroadcastNotification.audience_role == (user.role or 'user'),
+        ~select(BroadcastDismissal.broadcast_id).where(
+            BroadcastDismissal.user_id == user.id,
+            BroadcastDismissal.broadcast_id == BroadcastNotification.id
+        ).exists()
+    )
+    if user.created_at is not None:
+        # Like the per-user rows they replace, broadcasts reach only users who existed when sent
+        query = query.filter(BroadcastNotification.created_at >= user.created_at)
+    return query
+
+def broadcast_read_through(user_id):
+    """Scalar subquery: the user's broadcast read watermark (0 if they never read one)"""
+    return func.coalesce(
+        select(BroadcastWatermark.read_through_id).where(BroadcastWatermark.user_id == user_id).scalar_subquery(),
+        0
+    )
+
+def advance_broadcast_watermark(user_id, broadcast_id):
+    """Mark broadcasts up to broadcast_id read (the watermark never moves back)"""
+    watermark = db.session.get(BroadcastWatermark, user_id)
+    if watermark is None:
+        db.session.add(BroadcastWatermark(user_id=user_id, read_through_id=broadcast_id))
+    elif watermark.read_through_id < broadcast_id:
+        watermark.read_through_id = broadcast_id
+
+def notifications_page(user, cursor=None, limit=50):
+    """Personal notifications and broadcasts merged newest first.
+    Returns ([(item, is_broadcast, is_read)], next_cursor); raises pagination.CursorError."""
+    # Merged order is (created_at, source, id) descending with personal rows (source 1) before
+    # broadcasts (source 0) at equal timestamps, so one cursor resumes both streams
+    personal = Notification.query.filter_by(user_id=user.id)
+    broadcasts = visible_broadcasts(user).add_columns(
+        BroadcastNotification.id <= broadcast_read_through(user.id)
+    )
+    if cursor:
+        created_at, source, last_id = pagination.decode_cursor(cursor, sort='notifications', size=3)
+        if source == 1:
+            personal = personal.filter(pagination.after_cursor(
+                [Notification.created_at, Notification.id], [created_at, last_id], descending=True))
+            broadcasts = broadcasts.filter(BroadcastNotification.created_at <= created_at)
+        else:
+            personal = personal.filter(Notification.created_at < created_at)
+            broadcasts = broadcasts.filter(pagination.after_cursor(
+                [BroadcastNotification.created_at, BroadcastNotification.id], [created_at, last_id], descending=True))
+
+    personal = personal.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit + 1).all()
+    broadcasts = broadcasts.order_by(
+        BroadcastNotification.created_at.desc(), BroadcastNotification.id.desc()
+    ).limit(limit + 1).all()
+
+    merged = [(n, False, n.is_read) for n in personal] + [(b, True, bool(read)) for b, read in broadcasts]
+    merged.sort(key=lambda entry: (entry[0].created_at, 0 if entry[1] else 1, entry[0].id), reverse=True)
+    page = merged[:limit]
+    next_cursor = None
+    if len(merged) > limit and page:
+        last, is_broadcast, _ = page[-1]
+        next_cursor = pagination.encode_cursor(
+            [last.created_at, 0 if is_broadcast else 1, last.id], sort='notifications'
+        )
+    return page, next_cursor
+
 @app.route('/api/notifications', methods=['GET'])
 @login_required
 def get_notifications():
     """Get user's notifications"""
-    user_id = session['user_id']
+    user = session_user()
+    if user is None:
+        return session_user_gone()
+    limit = max(1, min(request.args.get('limit', 50, type=int), MAX_PAGE_SIZE))
 
-    notifications = Notification.query.filter_by(user_id=user_id)\
-        .order_by(Notification.created_at.desc())\
-        .limit(50).all()
+    # The response is a bare list (Android), so the next page's cursor travels in a header
+    try:
+        page, next_cursor = notifications_page(user, cursor=request.args.get('cursor') or None, limit=limit)
+    except pagination.CursorError as e:
+        return jsonify({'error': str(e)}), 400
 
     result = []
-    for notif in notifications:
+    for notif, is_broadcast, is_read in page:
         result.append({
-            'id': str(notif.id),
+            'id': f'{BROADCAST_ID_PREFIX}{notif.id}' if is_broadcast else str(notif.id),
             'title': notif.title,
             'message': notif.message,
             'timestamp': int(notif.created_at.timestamp() * 1000) if notif.created_at else 0,
             'type': notif.type,
-            'isRead': notif.is_read
+            'isRead': is_read
         })
 
-    return jsonify(result), 200
+    headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
+    return jsonify(result), 200, headers
 
-@app.route('/api/notifications/<int:notification_id>/read', methods=['PUT'])
+@app.route('/api/notifications/<notification_id>/read', methods=['PUT'])
 @login_required
 def mark_notification_read(notification_id):
     """Mark notification as read"""
     user_id = session['user_id']
+    parsed = parse_notification_id(notification_id)
+    if parsed is None:
+        return jsonify({'error': 'Notification not found'}), 404
+    is_broadcast, notification_id = parsed
+
+    if is_broadcast:
+        user = session_user()
+        if user is None:
+            return session_user_gone()
+        if not visible_broadcasts(user).filter(BroadcastNotification.id == notification_id).first():
+            return jsonify({'error': 'Notification not found'}), 404
+        # Reading a broadcast also reads the older ones below it
+        advance_broadcast_watermark(user_id, notification_id)
+        db.session.commit()
+        publish_unread_change(user_id)
+        return jsonify({'message': 'Notification marked as read'}), 200
 
     notification = Notification.query.filter_by(id=notification_id, user_id=user_id).first()
     if not notification:
         return jsonify({'error': 'Notification not found'}), 404
 
-    notification.is_read = True
+    # Conditional update, so two concurrent reads of one notification decrement the badge once
+    updated = Notification.query.filter_by(id=notification_id, is_read=False).update({'is_read': True})
     db.session.commit()
+    if updated:
+        publish_unread_change(user_id, delta=-1)
 
     return jsonify({'message': 'Notification marked as read'}), 200
 
@@ -1912,9 +2013,15 @@ def mark_notification_read(notification_id):
 def mark_all_notifications_read():
     """Mark all notifications as read for current user"""
     user_id = session['user_id']
+    if session_user() is None:
+        return session_user_gone()
 
     Notification.query.filter_by(user_id=user_id, is_read=False).update({'is_read': True})
+    latest_broadcast = db.session.query(func.max(BroadcastNotification.id)).scalar()
+    if latest_broadcast:
+        advance_broadcast_watermark(user_id, latest_broadcast)
     db.session.commit()
+    publish_unread_change(user_id, count=0)
 
     return jsonify({'message': 'All notifications marked as read'}), 200
 
@@ -1922,30 +2029,65 @@ def mark_all_notifications_read():
 @login_required
 def get_unread_notification_count():
     """Get count of unread notifications"""
-    user_id = session['user_id']
-
-    count = Notification.query.filter_by(user_id=user_id, is_read=False).count()
+    return jsonify({'count': get_unread_count(session['user_id'])}), 200
 
-    return jsonify({'count': count}), 200
-
-@app.route('/api/notifications/<int:notification_id>', methods=['DELETE'])
+@app.route('/api/notifications/stream', methods=['GET'])
+@login_required
+def stream_notifications():
+    """Server-Sent Events stream of the user's notifications, broadcasts and unread badge count"""
+    user_id = session['user_id']
+    user = session_user()
+    if user is None:
+        return session_user_gone()
+    snapshot = realtime.format_sse('snapshot', {'unread_count': get_unread_count(user_id)})
+    if not event_hub.open_stream():
+        return stream_busy_response()
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    subscriber = event_hub.subscribe(f'user:{user_id}', last_event_id,
+                                     extra_channels=[f"broadcast:{user.role or 'user'}"])
+    return stream_response(subscriber, snapshot)
+
+@app.route('/api/notifications/<notification_id>', methods=['DELETE'])
 @login_required
 def delete_notification(notification_id):
     """Delete a notification"""
     user_id = session['user_id']
+    parsed = parse_notification_id(notification_id)
+    if parsed is None:
+        return jsonify({'error': 'Notification not found'}), 404
+    is_broadcast, notification_id = parsed
+
+    if is_broadcast:
+        user = session_user()
+        if user is None:
+            return session_user_gone()
+        if not visible_broadcasts(user).filter(BroadcastNotification.id == notification_id).first():
+            return jsonify({'error': 'Notification not found'}), 404
+        watermark = db.session.get(BroadcastWatermark, user_id)
+        was_unread = notification_id > (watermark.read_through_id if watermark else 0)
+        # The broadcast itself is shared; only hide it for this user
+        db.session.add(BroadcastDismissal(user_id=user_id, broadcast_id=notification_id))
+        db.session.commit()
+        if was_unread:
+            publish_unread_change(user_id, delta=-1)
+        return jsonify({'message': 'Notification deleted'}), 200
 
     notification = Notification.query.filter_by(id=notification_id, user_id=user_id).first()
     if not notification:
         return jsonify({'error': 'Notification not found'}), 404
 
+    was_unread = not notification.is_read
     db.session.delete(notification)
     db.session.commit()
+    if was_unread:
+        publish_unread_change(user_id, delta=-1)
 
     return jsonify({'message': 'Notification deleted'}), 200
 
 # Helper function to create notifications
-def create_notification(user_id, title, message, notification_type='info', auction_id=None):
-    """Helper function to create a notification for a user"""
+def create_notification(user_id, title, message, notification_type='info', auction_id=None, commit=True):
+    """Helper function to create a notification for a user (commit=False leaves it in the caller's transaction)"""
     try:
         notification = Notification(
             user_id=user_id,
@@ -1955,13 +2097,50 @@ def create_notification(user_id, title, message, notification_type='info', aucti
             auction_id=auction_id
         )
         db.session.add(notification)
-        db.session.commit()
+        if commit:
+            db.session.commit()
+            publish_notification_event(notification_event_data(notification))
         return notification
     except Exception as e:
         app.logger.error(f"Failed to create notification: {e}")
-        db.session.rollback()
+        if commit:
+            db.session.rollback()
         return None
 
+def write_notification_batch(rows):
+    """Notification worker: insert one batch in a single statement, then push it to live channels"""
+    from sqlalchemy import insert
+    columns = (Notification.id, Notification.user_id, Notification.title, Notification.message,
+               Notification.type, Notification.auction_id)
+    try:
+        # Multi-row INSERT ... RETURNING (insertmanyvalues); the returned rows are the pushed events
+        written = db.session.execute(insert(Notification).returning(*columns), rows).all()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    for notification_id, user_id, title, message, notification_type, auction_id in written:
+        publish_notification_event({
+            'id': notification_id,
+            'user_id': user_id,
+            'title': title,
+            'message': message,
+            'type': notification_type,
+            'auction_id': auction_id
+        })
+
+# Notifications outside a settlement transaction are queued and written in bulk off the request
+notifications_outbox = notification_queue.NotificationQueue(app, write_notification_batch)
+atexit.register(notifications_outbox.stop)
+
+def queue_notification(user_ids, title, message, notification_type='info', auction_id=None):
+    """Queue a notification for one user id or a list of them. Returns the number of recipients."""
+    try:
+        return notifications_outbox.enqueue(user_ids, title, message, notification_type, auction_id)
+    except Exception as e:
+        app.logger.error(f"Failed to queue notification: {e}")
+        return 0
+
 # ==========================================
 # PASSWORD MANAGEMENT ENDPOINTS
 # ==========================================
@@ -2021,7 +2200,7 @@ def forgot_password():
         token = PasswordResetToken(
             user_id=user.id,
             token=reset_code,
-            expires_at=datetime.now(timezone.utc) + timedelta(minutes=15)
+            expires_at=datetime.now(timezone.utc) + timedelta(minutes=PASSWORD_RESET_CODE_MINUTES)
         )
         db.session.add(token)
         db.session.commit()
@@ -2034,7 +2213,7 @@ def forgot_password():
             return jsonify({
                 'message': f'Reset code sent successfully via {method}',
                 'method': method,
-                'expires_in': 15  # minutes
+                'expires_in': PASSWORD_RESET_CODE_MINUTES  # minutes
             }), 200
         else:
             # If sending failed, still log it but don't expose the code
@@ -2045,7 +2224,7 @@ def forgot_password():
                     'message': 'Reset code generated (email/SMS not configured)',
                     'reset_code': reset_code,  # Only for development
                     'method': method,
-                    'expires_in': 15
+                    'expires_in': PASSWORD_RESET_CODE_MINUTES
                 }), 200
             else:
                 return jsonify({
@@ -2345,20 +2524,12 @@ def debug_session():
 @login_required
 def get_profile():
     user_id = session.get('user_id')
-    app.logger.info(f"[PROFILE] get_profile called. Session user_id: {user_id}")
-    app.logger.info(f"[PROFILE] Full session data: {dict(session)}")
-    app.logger.info(f"[PROFILE] Request cookies: {dict(request.cookies)}")
-    app.logger.info(f"[PROFILE] Request headers: {dict(request.headers)}")
-
     user = User.query.get(user_id)
 
     if not user:
         app.logger.error(f"[PROFILE] User not found for ID: {user_id}")
         return jsonify({'error': 'User not found'}), 404
 
-    app.logger.info(f"[PROFILE] User found: {user.username}, role: {user.role}, active: {user.is_active}")
-    app.logger.info(f"[PROFILE] Returning profile data with role: {user.role}")
-
     # Get user preferences
     preferences = user.preferences
 
@@ -2470,6 +2641,8 @@ def update_profile():
             existing_user = User.query.filter(User.email == email, User.id != user.id).first()
             if existing_user:
                 return jsonify({'error': 'Email is already registered'}), 400
+            if email != user.email:
+                bump_auction_versions(Auction.seller_id == user.id)
             user.email = email
         
         # Update address with validation and sanitization
@@ -2859,6 +3032,7 @@ def create_category():
         category = Category(name=category_name, description=category_description)
         db.session.add(category)
         db.session.commit()
+        publish_category_event(category.id, 'created', category)
         return jsonify({'message': 'Category created', 'id': category.id}), 201
     except Exception as e:
         db.session.rollback()
@@ -2867,6 +3041,651 @@ def create_category():
         traceback.print_exc()
         return jsonify({'error': f'Failed to create category: {str(e)}'}), 500
 
+# Full-text auction search (see search_index.py); set up by init_db for the active database
+auction_search = search_index.AuctionSearch()
+
+# ==========================================
+# LISTING PAGINATION
+# ==========================================
+# Listings accept ?cursor= (keyset paging, see pagination.py) and still honour the legacy
+# ?page= numbers. Totals are optional (?include_total=) and come from a short-lived cache.
+
+MAX_PAGE_SIZE = 100
+PAGING_ARGS = {'page', 'per_page', 'limit', 'cursor', 'include_total'}
+
+listing_counts = pagination.CountCache()
+
+def paginate_listing(query, columns, per_page, descending=False, sort=None, order=None):
+    """Page a listing query ordered by columns (last one unique). Returns (items, paging metadata).
+    Raises pagination.CursorError for a bad cursor."""
+    cursor = request.args.get('cursor') or None
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = max(1, min(per_page, MAX_PAGE_SIZE))
+    # Cursor clients (infinite scroll) don't need totals; page-number clients get them by default
+    include_total = request.args.get('include_total', 'false' if cursor else 'true').lower() == 'true'
+
+    result = pagination.keyset_page(
+        query, columns, cursor=cursor, limit=per_page, descending=descending, sort=sort,
+        offset=0 if cursor else (page - 1) * per_page, order=order
+    )
+
+    total = None
+    if include_total:
+        filters = tuple(sorted((k, v) for k, v in request.args.items() if k not in PAGING_ARGS))
+        count_key = (request.path, session.get('user_id'), filters)
+        total = listing_counts.get(count_key, lambda: query.order_by(None).count())
+    return result.items, {
+        'next_cursor': result.next_cursor,
+        'has_more': result.has_more,
+        'total': total,
+        'pages': (total + per_page - 1) // per_page if total is not None else None
+    }
+
+# ==========================================
+# BID COUNTERS
+# ==========================================
+# Auction.bid_count / unique_bidder_count / highest_bidder_id are maintained in the same
+# transaction as the bids themselves, so listings never load the bids relationship.
+
+def record_new_bids(auction, bids):
+    """Update an auction's bid counters for bids added in the current transaction"""
+    user_ids = {bid.user_id for bid in bids}
+    # Bids may already be flushed by an earlier query in the request; exclude them explicitly
+    new_bid_ids = [bid.id for bid in bids if bid.id is not None]
+    query = db.session.query(Bid.user_id).filter(Bid.auction_id == auction.id, Bid.user_id.in_(user_ids))
+    if new_bid_ids:
+        query = query.filter(Bid.id.notin_(new_bid_ids))
+    with db.session.no_autoflush:
+        returning_bidders = {row[0] for row in query.distinct().all()}
+
+    # SQL-side increments: assigned once per transaction so they compose with concurrent writers
+    auction.bid_count = Auction.bid_count + len(bids)
+    auction.unique_bidder_count = Auction.unique_bidder_count + len(user_ids - returning_bidders)
+    auction.highest_bidder_id = max(bids, key=lambda bid: bid.amount).user_id
+
+def refresh_auction_bid_stats(auction_ids=None):
+    """Recompute bid counters from the Bid table (backfill, or after bids were deleted). Returns rows updated."""
+    from sqlalchemy import update
+    if auction_ids is None:
+        auction_ids = [row[0] for row in db.session.query(Auction.id).all()]
+    auction_ids = list(auction_ids)
+    if not auction_ids:
+        return 0
+
+    counts = {
+        auction_id: (total, unique)
+        for auction_id, total, unique in db.session.query(
+            Bid.auction_id, func.count(Bid.id), func.count(func.distinct(Bid.user_id))
+        ).filter(Bid.auction_id.in_(auction_ids)).group_by(Bid.auction_id).all()
+    }
+    highest = get_highest_bids(auction_ids)
+    rows = []
+    for auction_id in auction_ids:
+        total, unique = counts.get(auction_id, (0, 0))
+        rows.append({
+            'id': auction_id,
+            'bid_count': total,
+            'unique_bidder_count': unique,
+            'highest_bidder_id': highest[auction_id][0] if auction_id in highest else None,
+        })
+    # Bulk UPDATE by primary key (executemany)
+    db.session.execute(update(Auction), rows)
+    bump_auction_versions(Auction.id.in_(auction_ids))
+    return len(rows)
+
+# ==========================================
+# PROXY BIDDING
+# ==========================================
+# Maximum bids live in ProxyBid (one row per bidder per auction). A new bid is resolved
+# against every competing maximum while the auction row is locked, so a bidding war
+# settles in the request that starts it rather than one counter-bid per request.
+
+def _proxy_priority(proxy_bid):
+    # Equal maximums go to whoever set theirs first
+    return (ensure_timezone_aware(proxy_bid.updated_at).timestamp(), proxy_bid.id or float('inf'))
+
+def resolve_proxy_bids(auction, user_id, amount, max_amount, now):
+    """Store the bidder's maximum (if given) and resolve their bid against competing proxies.
+    Returns a proxy_bidding.Resolution; the caller holds the auction row lock."""
+    from sqlalchemy import or_
+    # Exhausted proxies are skipped by the (auction_id, max_amount) index
+    proxy_bids = ProxyBid.query.filter(
+        ProxyBid.auction_id == auction.id,
+        or_(ProxyBid.max_amount >= amount + auction.bid_increment, ProxyBid.user_id == user_id)
+    ).all()
+    own = next((proxy_bid for proxy_bid in proxy_bids if proxy_bid.user_id == user_id), None)
+    if max_amount is not None:
+        if own is None:
+            own = ProxyBid(auction_id=auction.id, user_id=user_id, max_amount=max_amount,
+                           created_at=now, updated_at=now)
+            db.session.add(own)
+        elif max_amount > own.max_amount:
+            own.max_amount = max_amount
+            own.updated_at = now
+
+    if own is not None and own.max_amount > amount:
+        bidder = proxy_bidding.Proxy(user_id, own.max_amount, _proxy_priority(own))
+    else:
+        bidder = proxy_bidding.Proxy(user_id, amount, (now.timestamp(), float('inf')))
+    competitors = [
+        proxy_bidding.Proxy(proxy_bid.user_id, proxy_bid.max_amount, _proxy_priority(proxy_bid))
+        for proxy_bid in proxy_bids if proxy_bid.user_id != user_id
+    ]
+    return proxy_bidding.resolve(bidder, amount, auction.bid_increment, competitors, bidder_max=max_amount)
+
+def backfill_proxy_bids():
+    """Create ProxyBid rows from the auto-bid maximums recorded on active auctions' bids. Returns rows added."""
+    rows = db.session.query(
+        Bid.auction_id, Bid.user_id, func.max(Bid.max_auto_bid), func.min(Bid.timestamp)
+    ).join(Auction, Auction.id == Bid.auction_id).filter(
+        Auction.status == 'active', Bid.is_auto_bid, Bid.max_auto_bid.isnot(None)
+    ).group_by(Bid.auction_id, Bid.user_id).all()
+    db.session.add_all(
+        ProxyBid(auction_id=auction_id, user_id=user_id, max_amount=max_amount, created_at=first_bid, updated_at=first_bid)
+        for auction_id, user_id, max_amount, first_bid in rows
+    )
+    return len(rows)
+
+# ==========================================
+# AUCTION DETAIL CACHE
+# ==========================================
+# Serialized auction detail is cached per (auction id, version). Every write that changes
+# the detail view bumps Auction.version in the same transaction, so ETags stay valid until
+# the auction actually changes and a cached entry can never be served after a write.
+
+auction_detail_cache = auction_cache.VersionedCache()
+
+def bump_auction_version(auction):
+    """Invalidate cached detail and ETags for one auction (takes effect on commit)"""
+    # SQL-side increment so concurrent writers never produce the same version twice
+    auction.version = Auction.version + 1
+
+def bump_auction_versions(*criteria):
+    """Invalidate cached detail for every auction matching criteria (e.g. a renamed category)"""
+    Auction.query.filter(*criteria).update(
+        {Auction.version: Auction.version + 1}, synchronize_session=False
+    )
+
+def auction_etag(auction_id, version, ended=False):
+    # An active auction past its end_time reads as ended before the scheduler settles it
+    suffix = '-ended' if ended else ''
+    return f'"auction-{auction_id}-v{version}{suffix}"'
+
+def load_auction_detail(auction_id):
+    """Serialize the cacheable part of an auction's detail view (time-dependent fields excluded)"""
+    auction = Auction.query.options(
+        joinedload(Auction.seller),
+        joinedload(Auction.category),
+        selectinload(Auction.images)
+    ).filter(Auction.id == auction_id).first()
+    if not auction:
+        return None
+    end_time = ensure_timezone_aware(auction.end_time)
+    return {
+        'id': auction.id,
+        'version': auction.version,
+        'item_name': auction.item_name,
+        'description': auction.description,
+        'item_condition': auction.item_condition,
+        'starting_bid': auction.starting_bid,
+        'current_bid': auction.current_bid or auction.starting_bid,
+        'bid_increment': auction.bid_increment,
+        'market_price': auction.market_price,
+        'real_price': auction.real_price,  # Buy It Now / Real Price
+        'start_time': ensure_timezone_aware(auction.start_time).isoformat() if auction.start_time else None,
+        'end_time': end_time.isoformat() if end_time else None,
+        'seller_id': auction.seller_id,
+        'seller_name': auction.seller.username,
+        'seller_email': auction.seller.email,
+        'category_id': auction.category_id,
+        'category_name': auction.category.name if auction.category else None,
+        'status': auction.status,
+        'featured': auction.featured,
+        'images': [{'id': img.id, 'url': img.url, 'is_primary': img.is_primary} for img in auction.images],
+        'featured_image_url': auction.featured_image_url,  # Separate featured image
+        'bid_count': auction.unique_bidder_count,  # Count unique bidders, not total bids
+        'winner_id': auction.winner_id,
+        'qr_code_url': auction.qr_code_url,
+        'video_url': auction.video_url
+    }
+
+# ==========================================
+# REAL-TIME AUCTION EVENTS
+# ==========================================
+# Pushed to /api/auctions/<id>/stream subscribers. Payloads are built once per event
+# and shared by every viewer, replacing per-viewer polling of detail and bid history.
+# Events travel over the cross-worker bus (event_bus.py) so every worker's SSE hub,
+# settlement heap and caches see changes made in any other worker.
+
+event_hub = realtime.EventHub()
+
+def stream_response(subscriber, snapshot):
+    """SSE response for a subscriber holding a stream slot (from event_hub.open_stream)"""
+    response = Response(
+        event_hub.stream(subscriber, snapshot),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Stop nginx from buffering the stream
+        }
+    )
+    # Runs even when the client leaves before the generator starts
+    response.call_on_close(event_hub.close_stream)
+    response.call_on_close(lambda: event_hub.unsubscribe(subscriber))
+    return response
+
+def stream_busy_response():
+    """Every stream slot in this worker is taken: the page polls instead"""
+    response = jsonify({'error': 'Too many live viewers, falling back to polling', 'poll': True})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(realtime.SSE_BUSY_RETRY_AFTER)
+    return response
+
+# Socket bus directory private to this deployment (two checkouts on one host don't share events)
+message_bus = event_bus.create_event_bus(
+    namespace=event_bus.deployment_id(os.path.abspath(app.instance_path), app.config['SECRET_KEY'])
+)
+
+def auction_event_payload(auction, include_bids=True, up_to_bid_id=None):
+    """Auction state carried by real-time events; auction may also be a RETURNING row with the same columns"""
+    end_time = ensure_timezone_aware(auction.end_time)
+    payload = {
+        'auction_id': auction.id,
+        'item_name': auction.item_name,
+        'status': auction.status,
+        'current_bid': auction.current_bid or auction.starting_bid,
+        'bid_increment': auction.bid_increment,
+        'end_time': end_time.isoformat() if end_time else None,
+        'time_left': max(0, int((end_time - datetime.now(timezone.utc)).total_seconds())) if end_time else 0,
+        'winner_id': auction.winner_id,
+        'version': auction.version
+    }
+    if include_bids:
+        payload['bid_count'] = auction.unique_bidder_count
+        payload['bids'] = serialize_bid_history(auction, up_to_bid_id=up_to_bid_id)
+    return payload
+
+def publish_auction_event(auction_id, event_type, payload):
+    """Publish an auction event to all workers; never fails the caller"""
+    try:
+        message_bus.publish('auction', {
+            'auction_id': auction_id,
+            'type': event_type,
+            'event_id': event_hub.next_event_id(),  # same SSE id in every worker for Last-Event-ID replay
+            'payload': payload
+        })
+    except Exception as e:
+        app.logger.warning(f"Failed to publish {event_type} for auction {auction_id}: {e}")
+
+def publish_notification_event(notification_data):
+    """Publish a newly created notification to all workers, and queue its device push here (once)"""
+    try:
+        message_bus.publish('notification', notification_data)
+    except Exception as e:
+        app.logger.warning(f"Failed to publish notification event: {e}")
+    try:
+        push_dispatcher.enqueue(push_delivery.PushMessage.from_event(notification_data))
+    except Exception as e:
+        app.logger.warning(f"Failed to queue push notification: {e}")
+
+def publish_category_event(category_id, action, category=None):
+    """Publish a category change (created/updated/deleted) to all workers"""
+    data = {'category_id': category_id, 'action': action}
+    if category is not None:
+        data['name'] = category.name
+        data['is_active'] = category.is_active
+    try:
+        message_bus.publish('category', data)
+    except Exception as e:
+        app.logger.warning(f"Failed to publish category event: {e}")
+
+def notification_event_data(notification):
+    return {
+        'id': notification.id,
+        'user_id': notification.user_id,
+        'title': notification.title,
+        'message': notification.message,
+        'type': notification.type,
+        'auction_id': notification.auction_id
+    }
+
+def on_auction_event(message):
+    """Bus subscriber (every worker): fan out to SSE viewers and keep the settlement heap current"""
+    auction_id = message['auction_id']
+    payload = message.get('payload') or {}
+    event_hub.publish(f'auction:{auction_id}', message['type'], payload, event_id=message.get('event_id'))
+    if payload.get('status', 'active') == 'active' and payload.get('end_time'):
+        settlement_timers.schedule(auction_id, datetime.fromisoformat(payload['end_time']))
+    else:
+        settlement_timers.cancel(auction_id)
+
+def broadcast_event_data(broadcast):
+    return {
+        'id': f'{BROADCAST_ID_PREFIX}{broadcast.id}',
+        'user_id': None,
+        'audience_role': broadcast.audience_role,
+        'title': broadcast.title,
+        'message': broadcast.message,
+        'type': broadcast.type,
+        'auction_id': None
+    }
+
+def on_notification_event(notification_data):
+    """Bus subscriber (every worker): push the notification to the user's live channel"""
+    user_id = notification_data.get('user_id')
+    if user_id is None:
+        # Broadcasts go out once on the audience's channel instead of once per user
+        audience_role = notification_data.get('audience_role', 'user')
+        unread_counter.add_role(audience_role, 1)
+        event_hub.publish(f"broadcast:{audience_role}", 'notification', notification_data)
+        return
+    event_hub.publish(f"user:{user_id}", 'notification', notification_data)
+    push_unread_count(user_id, unread_counter.add(user_id, 1))
+
+# ==========================================
+# UNREAD COUNTERS
+# ==========================================
+# The badge count the mobile app polls is served from unread_counts.UnreadCounter.
+# New notifications arrive as bus events on every worker; reads and deletes publish
+# 'unread' changes, so each worker keeps the same counts without querying.
+
+unread_counter = unread_counts.UnreadCounter()
+
+def load_unread_count(user_id):
+    """Unread personal notifications plus broadcasts above the read watermark: (count, role)"""
+    user = db.session.get(User, user_id)
+    if user is None:
+        return 0, None
+    count = Notification.query.filter_by(user_id=user_id, is_read=False).count()
+    count += visible_broadcasts(user).filter(BroadcastNotification.id > broadcast_read_through(user_id)).count()
+    return count, user.role
+
+def get_unread_count(user_id):
+    return unread_counter.get(user_id, lambda: load_unread_count(user_id))
+
+def publish_unread_change(user_id, delta=None, count=None):
+    """Tell every worker a user's unread count changed by delta, is now count, or (neither) must be reloaded"""
+    try:
+        message_bus.publish('unread', {'user_id': user_id, 'delta': delta, 'count': count})
+    except Exception as e:
+        app.logger.warning(f"Failed to publish unread count change: {e}")
+
+def push_unread_count(user_id, count):
+    if count is not None:
+        event_hub.publish(f'user:{user_id}', 'unread_count', {'count': count})
+
+def on_unread_event(data):
+    """Bus subscriber (every worker): apply an unread count change and push the new badge"""
+    user_id = data['user_id']
+    if data.get('count') is not None:
+        unread_counter.set(user_id, data['count'])
+        push_unread_count(user_id, data['count'])
+    elif data.get('delta'):
+        push_unread_count(user_id, unread_counter.add(user_id, data['delta']))
+    else:
+        unread_counter.discard(user_id)
+
+message_bus.subscribe('auction', on_auction_event)
+message_bus.subscribe('notification', on_notification_event)
+message_bus.subscribe('unread', on_unread_event)
+
+# ==========================================
+# PUSH NOTIFICATIONS
+# ==========================================
+# Notifications are pushed to devices through FCM (push_delivery.py) by the process that
+# created them, using the tokens registered at /api/user/fcm-token. Off unless FCM_PROJECT_ID is set.
+
+def load_push_tokens(message):
+    """FCM tokens of the message's recipients who have notifications enabled"""
+    query = db.session.query(User.fcm_token).outerjoin(
+        UserPreference, UserPreference.user_id == User.id
+    ).filter(
+        User.fcm_token.isnot(None),
+        func.coalesce(User.is_active, True),
+        func.coalesce(UserPreference.notifications_enabled, True)
+    )
+    if message.data.get('type') == 'outbid':
+        query = query.filter(func.coalesce(UserPreference.bid_alerts, True))
+    if message.user_ids is not None:
+        query = query.filter(User.id.in_(message.user_ids))
+    else:
+        query = query.filter(User.role == message.audience_role)
+    return [token for (token,) in query.all()]
+
+def clear_push_tokens(tokens):
+    """Forget tokens FCM reports as unregistered (a token re-registered meanwhile is a different value)"""
+    try:
+        User.query.filter(User.fcm_token.in_(tokens)).update({'fcm_token': None}, synchronize_session=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+push_dispatcher = push_delivery.PushDispatcher(app, load_push_tokens, clear_push_tokens)
+atexit.register(push_dispatcher.stop)
+
+# ==========================================
+# SEARCH SUGGESTIONS
+# ==========================================
+# Autocomplete served from an in-memory prefix index of active auction titles and
+# category names (search_index.SuggestionIndex). Each worker loads it once from the
+# database and keeps it current from auction/category events on the bus.
+
+search_suggestions = search_index.SuggestionIndex()
+_suggestions_lock = threading.Lock()
+
+def load_search_suggestions():
+    """(Re)load the suggestion index from the database"""
+    search_suggestions.begin_rebuild()
+    now = datetime.now(timezone.utc)
+    auctions = db.session.query(Auction.id, Auction.item_name, Auction.unique_bidder_count).filter(
+        Auction.status == 'active', Auction.end_time > now
+    ).all()
+    categories = db.session.query(Category.id, Category.name).filter(Category.is_active == True).all()
+    search_suggestions.rebuild(
+        [('category', category_id, name, search_index.CATEGORY_SCORE) for category_id, name in categories] +
+        [('auction', auction_id, name, bidders or 0) for auction_id, name, bidders in auctions]
+    )
+
+def on_auction_suggestion_event(message):
+    """Bus subscriber (every worker): keep auction titles in the suggestion index current"""
+    auction_id = message['auction_id']
+    payload = message.get('payload') or {}
+    if 'status' not in payload:
+        # e.g. time_extended: nothing a suggestion shows has changed
+        return
+    if payload['status'] != 'active':
+        search_suggestions.remove('auction', auction_id)
+    elif payload.get('item_name'):
+        search_suggestions.upsert('auction', auction_id, payload['item_name'], payload.get('bid_count'))
+
+def on_category_suggestion_event(data):
+    """Bus subscriber (every worker): keep category names in the suggestion index current"""
+    if data.get('action') == 'deleted' or not data.get('is_active', True):
+        search_suggestions.remove('category', data['category_id'])
+    elif data.get('name'):
+        search_suggestions.upsert('category', data['category_id'], data['name'], search_index.CATEGORY_SCORE)
+
+message_bus.subscribe('auction', on_auction_suggestion_event)
+message_bus.subscribe('category', on_category_suggestion_event)
+
+@app.route('/api/search/suggest', methods=['GET'])
+@limiter.limit("120 per minute")  # Called on every keystroke
+def search_suggest():
+    """Autocomplete suggestions for the search box"""
+    try:
+        query = request.args.get('q', '').strip()
+        limit = max(1, min(request.args.get('limit', search_index.SUGGEST_LIMIT, type=int), 20))
+        if search_suggestions.needs_rebuild():
+            # One request per worker (and per rebuild interval) pays for the load
+            with _suggestions_lock:
+                if search_suggestions.needs_rebuild():
+                    load_search_suggestions()
+        return jsonify({
+            'query': query,
+            'suggestions': search_suggestions.suggest(query, limit) if query else []
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error in search_suggest: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Failed to fetch suggestions'}), 500
+
+# ==========================================
+# AUCTION SETTLEMENT
+# ==========================================
+# Ended auctions are closed by the background scheduler (auction_scheduler.py),
+# never by read endpoints. Settlement runs in batches inside a single transaction.
+
+SETTLEMENT_BATCH_SIZE = int(os.getenv('SETTLEMENT_BATCH_SIZE', '100'))
+
+def get_highest_bids(auction_ids):
+    """Return {auction_id: (user_id, amount)} for the highest bid of each auction in one query"""
+    if not auction_ids:
+        return {}
+    from sqlalchemy import and_
+    top = db.session.query(
+        Bid.auction_id.label('auction_id'),
+        func.max(Bid.amount).label('amount')
+    ).filter(Bid.auction_id.in_(auction_ids)).group_by(Bid.auction_id).subquery()
+    rows = db.session.query(Bid.auction_id, Bid.user_id, Bid.amount).join(
+        top, and_(Bid.auction_id == top.c.auction_id, Bid.amount == top.c.amount)
+    ).order_by(Bid.timestamp.asc(), Bid.id.asc()).all()
+    highest = {}
+    for auction_id, user_id, amount in rows:
+        # Earliest bid wins a tie at the same amount
+        highest.setdefault(auction_id, (user_id, amount))
+    return highest
+
+def settle_auction(auction, highest_bid=None, invoiced_user_ids=None):
+    """Mark an auction ended and settle its winner (invoice + notification) without committing.
+    Returns the winner's notification, or None if there were no bids."""
+    auction.status = 'ended'
+    bump_auction_version(auction)
+    if highest_bid is None:
+        highest_bid = get_highest_bids([auction.id]).get(auction.id)
+    if not highest_bid:
+        return None
+
+    user_id, amount = highest_bid
+    auction.winner_id = user_id
+    auction.current_bid = amount
+
+    # Create invoice for the winner (check if doesn't exist to avoid duplicates)
+    if invoiced_user_ids is None:
+        invoiced_user_ids = {
+            row[0] for row in db.session.query(Invoice.user_id).filter_by(auction_id=auction.id).all()
+        }
+    if user_id not in invoiced_user_ids:
+        item_price = auction.current_bid
+        bid_fee = item_price * 0.01
+        delivery_fee = calculate_delivery_fee(user_id)
+
+        # Generate QR code if auction doesn't have one
+        if not auction.qr_code_url:
+            qr_code_url = generate_qr_code(auction.id, auction.item_name, item_price)
+            if qr_code_url:
+                auction.qr_code_url = qr_code_url
+
+        db.session.add(Invoice(
+            auction_id=auction.id,
+            user_id=user_id,
+            item_price=item_price,
+            bid_fee=bid_fee,
+            delivery_fee=delivery_fee,
+            total_amount=item_price + bid_fee + delivery_fee,
+            payment_status='pending'
+        ))
+
+    return create_notification(
+        user_id=user_id,
+        title='🎉 Congratulations! You Won!',
+        message=f'You won the auction for "{auction.item_name}" with a bid of ${auction.current_bid:.2f}. Please complete your payment.',
+        notification_type='won',
+        auction_id=auction.id,
+        commit=False
+    )
+
+def settle_ended_auctions(now=None, limit=None, auction_ids=None):
+    """Close one batch of ended auctions in a single transaction. Returns the number settled."""
+    now = now or datetime.now(timezone.utc)
+    limit = limit or SETTLEMENT_BATCH_SIZE
+    try:
+        # Served by idx_auction_status_end_time
+        query = Auction.query.filter(
+            Auction.status == 'active',
+            Auction.end_time <= now
+        )
+        if auction_ids is not None:
+            query = query.filter(Auction.id.in_(auction_ids))
+        query = query.order_by(Auction.end_time.asc()).limit(limit)
+        if db.engine.dialect.name != 'sqlite':
+            # Rows locked by an in-flight bid are picked up on the next tick
+            query = query.with_for_update(skip_locked=True)
+        auctions = query.all()
+        if not auctions:
+            db.session.rollback()
+            return 0
+
+        auction_ids = [auction.id for auction in auctions]
+        highest_bids = get_highest_bids(auction_ids)
+        invoiced = {}
+        for auction_id, user_id in db.session.query(Invoice.auction_id, Invoice.user_id).filter(
+            Invoice.auction_id.in_(auction_ids)
+        ).all():
+            invoiced.setdefault(auction_id, set()).add(user_id)
+
+        notifications = [
+            settle_auction(auction, highest_bids.get(auction.id), invoiced.get(auction.id, set()))
+            for auction in auctions
+        ]
+        db.session.flush()
+        events = [(auction.id, auction_event_payload(auction, include_bids=False)) for auction in auctions]
+        notification_events = [notification_event_data(n) for n in notifications if n is not None]
+
+        db.session.commit()
+        for auction_id, payload in events:
+            publish_auction_event(auction_id, 'auction_ended', payload)
+        for notification_data in notification_events:
+            publish_notification_event(notification_data)
+        return len(auctions)
+    except Exception:
+        db.session.rollback()
+        raise
+
+def load_auction_deadlines(auction_ids=None, horizon=None):
+    """Return [(auction_id, end_time)] for active auctions, optionally only those ending before horizon (epoch seconds)"""
+    query = db.session.query(Auction.id, Auction.end_time).filter(Auction.status == 'active')
+    if auction_ids is not None:
+        query = query.filter(Auction.id.in_(auction_ids))
+    if horizon is not None:
+        query = query.filter(Auction.end_time <= datetime.fromtimestamp(horizon, timezone.utc))
+    return [(auction_id, end_time) for auction_id, end_time in query.all()]
+
+# Deadline heap used by the scheduler leader; kept current by auction events from every worker
+settlement_timers = settlement_queue.SettlementQueue()
+
+_auction_scheduler = None
+
+def start_auction_scheduler():
+    """Start the background settlement scheduler in this process (one leader across workers)"""
+    global _auction_scheduler
+    if _auction_scheduler is None:
+        _auction_scheduler = auction_scheduler.AuctionScheduler(
+            app, settle_ended_auctions, load_auction_deadlines, queue=settlement_timers, engine=db.engine
+        )
+    _auction_scheduler.start()
+    return _auction_scheduler
+
+@app.before_request
+def ensure_background_services():
+    # Started lazily per worker: gunicorn forks after import, and threads don't survive a fork
+    if app.config.get('TESTING'):
+        return
+    if not message_bus.started:
+        message_bus.start()
+    if _auction_scheduler is None and auction_scheduler.AUCTION_SCHEDULER_ENABLED:
+        start_auction_scheduler()
+
 # Auction Management APIs
 @app.route('/api/auctions', methods=['GET'])
 def get_auctions():
@@ -2878,196 +3697,101 @@ def get_auctions():
         sort_by = request.args.get('sort_by', 'end_time')
         featured_only = request.args.get('featured', 'false').lower() == 'true'
         status = request.args.get('status', 'active')
-        
-        # Build base query
-        query = Auction.query
-        
-        if category_id:
-            query = query.filter_by(category_id=category_id)
-        if search:
-            query = query.filter(Auction.item_name.contains(search) | Auction.description.contains(search))
-        if featured_only:
-            query = query.filter_by(featured=True)
-        if status:
-            query = query.filter_by(status=status)
-        
-        # Update auction status based on end_time
-        # Use database-level update to avoid race conditions
         now = datetime.now(timezone.utc)
-        from sqlalchemy import and_
-        # Update ended auctions atomically - optimize with eager loading
-        ended_auctions = Auction.query.filter(
-            and_(Auction.status == 'active', Auction.end_time < now)
-        ).options(selectinload(Auction.bids)).all()
-        
-        for auction in ended_auctions:
-            # Ensure end_time is timezone-aware for comparison
-            end_time = ensure_timezone_aware(auction.end_time)
-            if end_time and end_time < now and auction.status == 'active':
-                auction.status = 'ended'
-                if auction.bids:
-                    highest_bid = max(auction.bids, key=lambda b: b.amount)
-                    auction.winner_id = highest_bid.user_id
-                    auction.current_bid = highest_bid.amount
-                    
-                    # Create invoice for the winner (check if doesn't exist to avoid duplicates)
-                    user_id = highest_bid.user_id
-                    existing_invoice = Invoice.query.filter_by(auction_id=auction.id, user_id=user_id).first()
-                    if not existing_invoice:
-                        item_price = auction.current_bid
-                        bid_fee = item_price * 0.01
-                        delivery_fee = calculate_delivery_fee(user_id)
-                        total_amount = item_price + bid_fee + delivery_fee
-                        
-                        # Generate QR code if auction doesn't have one
-                        if not auction.qr_code_url:
-                            qr_code_url = generate_qr_code(auction.id, auction.item_name, item_price)
-                            if qr_code_url:
-                                auction.qr_code_url = qr_code_url
-                                db.session.flush()
-                        
-                        invoice = Invoice(
-                            auction_id=auction.id,
-                            user_id=user_id,
-                            item_price=item_price,
-                            bid_fee=bid_fee,
-                            delivery_fee=delivery_fee,
-                            total_amount=total_amount,
-                            payment_status='pending'
-                        )
-                        db.session.add(invoice)
-
-                    # Create winner notification
-                    try:
-                        create_notification(
-                            user_id=highest_bid.user_id,
-                            title='🎉 Congratulations! You Won!',
-                            message=f'You won the auction for "{auction.item_name}" with a bid of ${auction.current_bid:.2f}. Please complete your payment.',
-                            notification_type='won',
-                            auction_id=auction.id
-                        )
-                    except Exception as notif_error:
-                        app.logger.warning(f"Failed to create winner notification: {notif_error}")
-
-        if ended_auctions:
-            db.session.commit()
         
-        # Rebuild query with all filters (status may have changed after update)
-        query = Auction.query
+        # Build base query (read-only: ended auctions are closed by the scheduler)
+        query = auction_card_query(
+            Auction.item_condition, Auction.bid_increment, Auction.start_time, Auction.status,
+            Auction.featured, Auction.qr_code_url, Auction.video_url,
+            User.username.label('seller_name'), Category.name.label('category_name'),
+            description_length=100
+        ).outerjoin(User, User.id == Auction.seller_id).outerjoin(Category, Category.id == Auction.category_id)
         
         if category_id:
-            query = query.filter_by(category_id=category_id)
+            query = query.filter(Auction.category_id == category_id)
+        search_rank = None
         if search:
-            query = query.filter(Auction.item_name.contains(search) | Auction.description.contains(search))
+            query, search_rank = auction_search.apply(query, search)
+            if 'sort_by' not in request.args and search_rank is not None:
+                sort_by = 'relevance'
         if featured_only:
-            query = query.filter_by(featured=True)
-        if status:
-            query = query.filter_by(status=status)
-        
-        # Sorting
-        if sort_by == 'price':
-            query = query.order_by(Auction.current_bid.desc())
-        elif sort_by == 'time_left':
-            query = query.order_by(Auction.end_time.asc())
-        elif sort_by == 'bids':
-            # Sort by bid count using subquery to avoid conflicts with eager loading
-            from sqlalchemy import select
-            bid_count_subq = select(
-                Bid.auction_id,
-                func.count(Bid.id).label('bid_count')
-            ).group_by(Bid.auction_id).subquery()
-            
-            query = query.outerjoin(bid_count_subq, Auction.id == bid_count_subq.c.auction_id)
-            query = query.order_by(bid_count_subq.c.bid_count.desc().nullslast())
-            # For bid sorting, we can't use selectinload for bids since we're already joining
-            # Apply eager loading for other relationships
-            query = query.options(
-                joinedload(Auction.seller),
-                joinedload(Auction.category),
-                selectinload(Auction.images)
+            query = query.filter(Auction.featured == True)
+        if status == 'active':
+            # Hide auctions that ended but haven't been settled yet
+            query = query.filter(Auction.status == 'active', Auction.end_time > now)
+        elif status == 'ended':
+            query = query.filter(
+                (Auction.status == 'ended') | ((Auction.status == 'active') & (Auction.end_time <= now))
             )
+        elif status:
+            query = query.filter(Auction.status == status)
+        
+        # Sorting: keyset columns, always ending in the primary key so cursors are unambiguous
+        sort_order = None
+        if sort_by == 'relevance' and search_rank is not None:
+            # Rank is computed per query, so relevance pages by number only
+            sort_columns, descending = [Auction.id], False
+            sort_order = [search_rank.asc(), Auction.id.asc()]
+        elif sort_by == 'price':
+            sort_columns, descending = [Auction.current_bid, Auction.id], True
+        elif sort_by == 'bids':
+            sort_columns, descending = [Auction.bid_count, Auction.id], True
         else:
-            query = query.order_by(Auction.end_time.asc())
-        
-        # Optimize query with eager loading to prevent N+1 queries (for non-bid-sorting)
-        if sort_by != 'bids':
-            query = query.options(
-                joinedload(Auction.seller),
-                joinedload(Auction.category),
-                selectinload(Auction.images),
-                selectinload(Auction.bids)
-            )
+            # end_time / time_left
+            sort_by = 'end_time'
+            sort_columns, descending = [Auction.end_time, Auction.id], False
         
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        items, paging = paginate_listing(query, sort_columns, per_page, descending=descending, sort=sort_by, order=sort_order)
+        
+        # Wishlist membership for the whole page in one query (anonymous visitors skip it)
+        wishlisted = wishlisted_auction_ids(session.get('user_id'), [row.id for row in items])
         
         auctions = []
-        for auction in pagination.items:
-            # Ensure end_time is timezone-aware for calculation
-            end_time = ensure_timezone_aware(auction.end_time)
-            time_left = (end_time - now).total_seconds() if end_time else 0
-            
-            # Count unique bidders (users who have placed bids) - optimized
-            unique_bidders = set()
-            try:
-                if auction.bids:
-                    unique_bidders = {bid.user_id for bid in auction.bids}
-            except Exception:
-                # If bids relationship fails to load, query directly
-                try:
-                    bid_user_ids = db.session.query(Bid.user_id).filter_by(auction_id=auction.id).distinct().all()
-                    unique_bidders = {bid[0] for bid in bid_user_ids}
-                except Exception:
-                    unique_bidders = set()
-            
+        for row in items:
             # Return both old field names (for web) and new field names (for Android)
-            end_time_ms = int(end_time.timestamp() * 1000) if end_time else 0
-            auctions.append({
-                # Android-compatible field names
-                'id': str(auction.id),
-                'title': auction.item_name,
-                'description': auction.description[:100] + '...' if len(auction.description) > 100 else auction.description,
-                'imageUrl': auction.images[0].url if auction.images else None,
-                'currentPrice': auction.current_bid or auction.starting_bid,
-                'startingPrice': auction.starting_bid,
-                'endTime': end_time_ms,
-                'categoryId': str(auction.category_id) if auction.category_id else '',
-                'sellerId': str(auction.seller_id),
-                'bidCount': len(unique_bidders),
-                'isWishlisted': False,  # TODO: Check if user has wishlisted
-                'realPrice': auction.real_price,
-                'marketPrice': auction.market_price,
+            end_time = ensure_timezone_aware(row.end_time)
+            time_left = (end_time - now).total_seconds() if end_time else 0
+            card = serialize_auction_card(row, wishlisted=row.id in wishlisted, description_length=100)
+            card.update({
+                # Listings count distinct bidders rather than total bids
+                'bidCount': row.unique_bidder_count,
                 # Legacy field names (for web compatibility)
-                'item_name': auction.item_name,
-                'item_condition': auction.item_condition,
-                'starting_bid': auction.starting_bid,
-                'current_bid': auction.current_bid or auction.starting_bid,
-                'bid_increment': auction.bid_increment,
-                'market_price': auction.market_price,
-                'real_price': auction.real_price,
-                'start_time': ensure_timezone_aware(auction.start_time).isoformat() if auction.start_time else None,
+                'item_name': row.item_name,
+                'item_condition': row.item_condition,
+                'starting_bid': row.starting_bid,
+                'current_bid': row.current_bid or row.starting_bid,
+                'bid_increment': row.bid_increment,
+                'market_price': row.market_price,
+                'real_price': row.real_price,
+                'start_time': ensure_timezone_aware(row.start_time).isoformat() if row.start_time else None,
                 'end_time': end_time.isoformat() if end_time else None,
                 'time_left': max(0, int(time_left)),
-                'seller_id': auction.seller_id,
-                'seller_name': auction.seller.username if auction.seller else None,
-                'category_id': auction.category_id,
-                'category_name': auction.category.name if auction.category else None,
-                'status': auction.status,
-                'featured': auction.featured,
-                'image_url': auction.images[0].url if auction.images else None,
-                'featured_image_url': auction.featured_image_url,
-                'bid_count': len(unique_bidders),
-                'qr_code_url': auction.qr_code_url,
-                'video_url': auction.video_url
+                'seller_id': row.seller_id,
+                'seller_name': row.seller_name,
+                'category_id': row.category_id,
+                'category_name': row.category_name,
+                'status': row.status,
+                'featured': row.featured,
+                'image_url': row.image_url,
+                'featured_image_url': row.featured_image_url,
+                'bid_count': row.unique_bidder_count,
+                'qr_code_url': row.qr_code_url,
+                'video_url': row.video_url
             })
+            auctions.append(card)
         
         return jsonify({
             'auctions': auctions,
-            'total': pagination.total,
+            'total': paging['total'],
             'page': page,
             'per_page': per_page,
-            'pages': pagination.pages
+            'pages': paging['pages'],
+            'next_cursor': paging['next_cursor'],
+            'has_more': paging['has_more']
         }), 200
     
+    except pagination.CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         app.logger.error(f"Error in get_auctions: {str(e)}", exc_info=True)
@@ -3083,63 +3807,43 @@ def get_auctions():
 @limiter.limit("300 per hour")  # More generous limit for auction detail polling
 def get_auction(auction_id):
     try:
-        # Add cache headers to reduce unnecessary requests
+        # Primary-key lookup of the fields that decide freshness; the full detail comes from the cache
+        row = db.session.query(Auction.version, Auction.status, Auction.end_time).filter(
+            Auction.id == auction_id
+        ).first()
+        if not row:
+            return jsonify({'error': 'Auction not found'}), 404
+
+        version, status, end_time = row
+        now = datetime.now(timezone.utc)
+        end_time = ensure_timezone_aware(end_time)
+        # Report ended auctions as ended; the scheduler settles them shortly
+        ended = bool(end_time and end_time < now and status == 'active')
+
+        # Clients revalidate every time; an unchanged auction costs one indexed lookup and a 304
         response_headers = {
-            'Cache-Control': 'public, max-age=5',  # Cache for 5 seconds
-            'ETag': f'auction-{auction_id}-{int(time.time() // 5)}'  # ETag changes every 5 seconds
+            'Cache-Control': 'private, no-cache',
+            'ETag': auction_etag(auction_id, version, ended)
         }
-
-        # Check if client has cached version
         if request.headers.get('If-None-Match') == response_headers['ETag']:
             return '', 304, response_headers
 
-        auction = Auction.query.get_or_404(auction_id)
-        now = datetime.now(timezone.utc)
-        # Ensure end_time is timezone-aware for comparison
-        end_time = ensure_timezone_aware(auction.end_time)
-        time_left = (end_time - now).total_seconds() if end_time else 0
-        
-        # Update status if ended
-        if end_time and end_time < now and auction.status == 'active':
-            auction.status = 'ended'
-            if auction.bids:
-                highest_bid = max(auction.bids, key=lambda b: b.amount)
-                auction.winner_id = highest_bid.user_id
-                auction.current_bid = highest_bid.amount
-            db.session.commit()
-        
-        # Count unique bidders (users who have placed bids)
-        unique_bidders = set()
-        if auction.bids:
-            unique_bidders = {bid.user_id for bid in auction.bids}
-        
-        return jsonify({
-            'id': auction.id,
-            'item_name': auction.item_name,
-            'description': auction.description,
-            'item_condition': auction.item_condition,
-            'starting_bid': auction.starting_bid,
-            'current_bid': auction.current_bid or auction.starting_bid,
-            'bid_increment': auction.bid_increment,
-            'market_price': auction.market_price,
-            'real_price': auction.real_price,  # Buy It Now / Real Price
-            'start_time': ensure_timezone_aware(auction.start_time).isoformat() if auction.start_time else None,
-            'end_time': end_time.isoformat() if end_time else None,
-            'time_left': max(0, int(time_left)),
-            'seller_id': auction.seller_id,
-            'seller_name': auction.seller.username,
-            'seller_email': auction.seller.email,
-            'category_id': auction.category_id,
-            'category_name': auction.category.name if auction.category else None,
-            'status': auction.status,
-            'featured': auction.featured,
-            'images': [{'id': img.id, 'url': img.url, 'is_primary': img.is_primary} for img in auction.images],
-            'featured_image_url': auction.featured_image_url,  # Separate featured image
-            'bid_count': len(unique_bidders),  # Count unique bidders, not total bids
-            'winner_id': auction.winner_id,
-            'qr_code_url': auction.qr_code_url,
-            'video_url': auction.video_url
-        }), 200, response_headers
+        detail = auction_detail_cache.get(auction_id, version)
+        if detail is None:
+            detail = load_auction_detail(auction_id)
+            if detail is None:
+                return jsonify({'error': 'Auction not found'}), 404
+            # Keyed on the version the detail was read at, which may be newer than `version`
+            auction_detail_cache.set(auction_id, detail['version'], detail)
+
+        data = dict(detail)
+        detail_end_time = datetime.fromisoformat(data['end_time']) if data['end_time'] else None
+        data['time_left'] = max(0, int((detail_end_time - now).total_seconds())) if detail_end_time else 0
+        ended = bool(detail_end_time and detail_end_time < now and data['status'] == 'active')
+        if ended:
+            data['status'] = 'ended'
+        response_headers['ETag'] = auction_etag(auction_id, data['version'], ended)
+        return jsonify(data), 200, response_headers
     except Exception as e:
         db.session.rollback()
         print(f"Error in get_auction: {str(e)}")
@@ -3299,6 +4003,7 @@ def create_auction():
             auction.qr_code_url = qr_code_url
         
         db.session.commit()
+        publish_auction_event(auction.id, 'auction_created', auction_event_payload(auction, include_bids=False))
         return jsonify({'message': 'Auction created', 'id': auction.id, 'qr_code_url': qr_code_url}), 201
     
     except Exception as e:
@@ -3374,7 +4079,9 @@ def update_auction(auction_id):
         if 'video_url' in data:
             auction.video_url = data['video_url'] if data['video_url'] else None
         
+        bump_auction_version(auction)
         db.session.commit()
+        publish_auction_event(auction.id, 'auction_updated', auction_event_payload(auction, include_bids=False))
         return jsonify({'message': 'Auction updated'}), 200
     
     except Exception as e:
@@ -3388,49 +4095,346 @@ def update_auction(auction_id):
 def get_bids(auction_id):
     try:
         auction = Auction.query.get_or_404(auction_id)
-        # Optimize query with eager loading
-        bids = Bid.query.filter_by(auction_id=auction_id).options(
-            joinedload(Bid.bidder)
-        ).order_by(Bid.amount.desc(), Bid.timestamp.desc()).limit(50).all()
-        
-        # Find the highest bid amount
-        highest_bid_amount = max([bid.amount for bid in bids]) if bids else 0
-        current_bid = auction.current_bid or auction.starting_bid
-        
-        # Determine winning logic based on auction status
-        result = []
-        for bid in bids:
-            is_winning = False
-            
-            if auction.status == 'active':
-                # For active auctions, check if this is the current highest bid
-                is_winning = bid.amount == highest_bid_amount and bid.amount == current_bid
-            elif auction.status == 'ended':
-                # For ended auctions, check if this user is the winner
-                is_winning = auction.winner_id is not None and bid.user_id == auction.winner_id and bid.amount == highest_bid_amount
-            
-            result.append({
-                'id': bid.id,
-                'user_id': bid.user_id,
-                'username': bid.bidder.username,
-                'amount': bid.amount,
-                'timestamp': bid.timestamp.isoformat(),
-                'is_auto_bid': bid.is_auto_bid,
-                'is_winning': is_winning,
-                'is_highest': bid.amount == highest_bid_amount,
-                'auction_status': auction.status,
-                'winner_id': auction.winner_id
-            })
-        
-        return jsonify(result), 200
+        return jsonify(serialize_bid_history(auction)), 200
     except Exception as e:
         print(f"Error in get_bids: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': f'Failed to get bids: {str(e)}'}), 500
 
+def serialize_bid_history(auction, limit=50, up_to_bid_id=None):
+    """Highest bids of an auction with winning flags, as returned by GET /bids
+    (only bids up to up_to_bid_id, when given, so history matches a RETURNING snapshot)"""
+    # Optimize query with eager loading
+    query = Bid.query.filter_by(auction_id=auction.id)
+    if up_to_bid_id is not None:
+        query = query.filter(Bid.id <= up_to_bid_id)
+    bids = query.options(
+        joinedload(Bid.bidder)
+    ).order_by(Bid.amount.desc(), Bid.timestamp.desc()).limit(limit).all()
+    
+    # Find the highest bid amount
+    highest_bid_amount = max([bid.amount for bid in bids]) if bids else 0
+    current_bid = auction.current_bid or auction.starting_bid
+    
+    # Determine winning logic based on auction status
+    result = []
+    for bid in bids:
+        is_winning = False
+        
+        if auction.status == 'active':
+            # For active auctions, check if this is the current highest bid
+            is_winning = bid.amount == highest_bid_amount and bid.amount == current_bid
+        elif auction.status == 'ended':
+            # For ended auctions, check if this user is the winner
+            is_winning = auction.winner_id is not None and bid.user_id == auction.winner_id and bid.amount == highest_bid_amount
+        
+        result.append({
+            'id': bid.id,
+            'user_id': bid.user_id,
+            'username': bid.bidder.username,
+            'amount': bid.amount,
+            'timestamp': bid.timestamp.isoformat(),
+            'is_auto_bid': bid.is_auto_bid,
+            'is_winning': is_winning,
+            'is_highest': bid.amount == highest_bid_amount,
+            'auction_status': auction.status,
+            'winner_id': auction.winner_id
+        })
+    return result
+
+@app.route('/api/auctions/<int:auction_id>/stream', methods=['GET'])
+@limiter.limit("120 per hour")  # Each connection lasts minutes; EventSource reconnects on its own
+def stream_auction_events(auction_id):
+    """Server-Sent Events stream of bid_placed / time_extended / auction_ended for one auction"""
+    channel = f'auction:{auction_id}'
+
+    def load_snapshot():
+        auction = db.session.get(Auction, auction_id)
+        return auction_event_payload(auction) if auction else None
+
+    # Shared by every viewer until the next event; the DB session is released before streaming
+    snapshot = event_hub.snapshot(channel, load_snapshot)
+    if snapshot is None:
+        return jsonify({'error': 'Auction not found'}), 404
+
+    if not event_hub.open_stream():
+        return stream_busy_response()
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    subscriber = event_hub.subscribe(channel, last_event_id)
+    return stream_response(subscriber, snapshot)
+
+# ANTI-SNIPE: a bid in the last ANTI_SNIPE_THRESHOLD seconds moves the end to ANTI_SNIPE_EXTENSION
+# seconds from now, so last-second bids can't win without giving others a chance to respond
+ANTI_SNIPE_THRESHOLD = 120  # 2 minutes
+ANTI_SNIPE_EXTENSION = 120  # 2 minutes
+
+def notify_outbid(user_id, auction_id, item_name, price):
+    """Tell a bidder they lost the lead (queued after commit, so the bid request doesn't wait for it)"""
+    queue_notification(
+        user_id,
+        title='You\'ve been outbid! 🔔',
+        message=f'Someone placed a higher bid of ${price:.2f} on "{item_name}". Place a new bid to stay in the lead!',
+        notification_type='outbid',
+        auction_id=auction_id
+    )
+
+def bid_response(auction_id, user_id, bid, current_bid, end_time, time_extended, is_winning):
+    """Response body for an accepted bid; bid is a dict with id, amount, timestamp, is_auto_bid, max_auto_bid"""
+    updated_end_time = ensure_timezone_aware(end_time)
+    updated_time_left = max(0, int((updated_end_time - datetime.now(timezone.utc)).total_seconds()))
+
+    # Get user info for the bid response
+    user = User.query.get(user_id)
+
+    return {
+        'message': 'Bid placed successfully',
+        'current_bid': current_bid,
+        'bid_id': bid['id'],
+        'time_extended': time_extended,
+        'new_end_time': updated_end_time.isoformat(),
+        'time_left': updated_time_left,
+        # Return full bid object for Flutter app compatibility
+        'bid': {
+            'id': bid['id'],
+            'auction_id': auction_id,
+            'user_id': user_id,
+            'amount': bid['amount'],
+            'created_at': bid['timestamp'],
+            'updated_at': bid['timestamp'],
+            'is_winning': is_winning,  # A higher proxy may have outbid it at once
+            'is_auto_bid': bid['is_auto_bid'] or False,
+            'max_bid_amount': bid['max_auto_bid'],
+            'user_username': user.username if user else 'Unknown',
+            'user_avatar': user.profile_photo if user else None,
+            'user_rating': user.rating if user and hasattr(user, 'rating') else None
+        }
+    }
+
+# ==========================================
+# OPTIMISTIC BIDS
+# ==========================================
+# A plain bid (no auto-bid maximum, no proxy that could answer it, outside the anti-snipe
+# window) is accepted with one conditional UPDATE ... RETURNING instead of SELECT ... FOR
+# UPDATE plus proxy resolution. The row is locked only for that UPDATE and the bid INSERT,
+# and the WHERE clause re-checks every rule against the row as it is at that moment, so
+# concurrent bidders never accept two bids against the same price (also on SQLite, where
+# FOR UPDATE is a no-op). The first bid to commit at a price wins; a bid the UPDATE doesn't
+# match goes through the locked path, which reports why or resolves proxies.
+
+BID_OPTIMISTIC_FAST_PATH = os.getenv('BID_OPTIMISTIC_FAST_PATH', 'true').lower() == 'true'
+
+def effective_current_bid():
+    """SQL for auction.current_bid or auction.starting_bid (0 means no bids yet)"""
+    return func.coalesce(func.nullif(Auction.current_bid, 0), Auction.starting_bid)
+
+def check_bid_unlocked(auction_id, user_id, amount, now):
+    """Validate a bid against a plain read, outside any lock.
+    Returns (error, status) when the bid can be rejected now, ('ended', None) when the auction
+    needs settling, or (None, None). Prices only go up and bids can't reopen an auction, so a
+    rejection from a stale read is still correct."""
+    row = db.session.query(
+        Auction.status, Auction.end_time, Auction.seller_id, effective_current_bid(), Auction.bid_increment
+    ).filter(Auction.id == auction_id).first()
+    if row is None:
+        return 'Auction not found', 404
+    status, end_time, seller_id, current_bid, bid_increment = row
+    if status != 'active':
+        return 'Auction is not active', 400
+    end_time = ensure_timezone_aware(end_time)
+    if end_time and end_time < now:
+        return 'ended', None
+    if seller_id == user_id:
+        return 'Cannot bid on your own auction', 400
+    min_bid = current_bid + bid_increment
+    if amount < min_bid:
+        return f'Bid must be at least ${min_bid:.2f}', 400
+    return None, None
+
+def place_bid_optimistic(auction_id, user_id, amount, now):
+    """Accept a plain bid with a single conditional UPDATE. Returns (bid, row) where row holds the
+    auction as this UPDATE left it, or None when the locked path has to decide (outbid meanwhile,
+    proxies, anti-snipe window, ...)."""
+    from sqlalchemy import update, case, exists, or_
+    if not db.engine.dialect.update_returning:
+        return None
+    answering_proxy = exists().where(
+        ProxyBid.auction_id == Auction.id,
+        or_(ProxyBid.user_id == user_id, ProxyBid.max_amount >= amount + Auction.bid_increment)
+    )
+    returning_bidder = exists().where(Bid.auction_id == Auction.id, Bid.user_id == user_id)
+    statement = (
+        update(Auction)
+        .where(
+            Auction.id == auction_id,
+            Auction.status == 'active',
+            Auction.seller_id != user_id,
+            Auction.end_time > now + timedelta(seconds=ANTI_SNIPE_THRESHOLD),
+            effective_current_bid() + Auction.bid_increment <= amount,
+            ~answering_proxy,
+        )
+        .values(
+            current_bid=amount,
+            highest_bidder_id=user_id,
+            bid_count=Auction.bid_count + 1,
+            unique_bidder_count=Auction.unique_bidder_count + case((returning_bidder, 0), else_=1),
+            version=Auction.version + 1,
+        )
+        .returning(
+            Auction.id, Auction.item_name, Auction.status, Auction.current_bid, Auction.bid_increment,
+            Auction.end_time, Auction.winner_id, Auction.version, Auction.bid_count,
+            Auction.unique_bidder_count,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    row = db.session.execute(statement).first()
+    if row is None:
+        db.session.rollback()
+        return None
+    bid = Bid(auction_id=auction_id, user_id=user_id, amount=amount, is_auto_bid=False, timestamp=now)
+    db.session.add(bid)
+    db.session.commit()
+    return bid, row
+
+def previous_leader(auction_id, amount):
+    """Who held the lead just before a bid of amount was accepted (the next lower bid)"""
+    row = db.session.query(Bid.user_id).filter(
+        Bid.auction_id == auction_id, Bid.amount < amount
+    ).order_by(Bid.amount.desc(), Bid.id.desc()).first()
+    return row[0] if row else None
+
+# ==========================================
+# BID BOOK
+# ==========================================
+# Optional (BID_BOOK_ENABLED): bids are applied by the worker owning the auction's partition
+# against an in-memory book and written behind in batches - see bid_book.py.
+
+def load_bid_book(auction_id):
+    """Build an auction's bid book from the database (runs in the partition thread)"""
+    auction = db.session.get(Auction, auction_id)
+    if auction is None:
+        return None
+    proxies = [
+        proxy_bidding.Proxy(proxy_bid.user_id, proxy_bid.max_amount, _proxy_priority(proxy_bid))
+        for proxy_bid in ProxyBid.query.filter_by(auction_id=auction_id).all()
+    ]
+    top_bids = db.session.query(Bid.user_id, Bid.amount).filter_by(auction_id=auction_id).order_by(
+        Bid.amount.desc(), Bid.id.desc()
+    ).limit(bid_book.BID_BOOK_TOP_BIDS).all()
+    return bid_book.BidBook(
+        auction_id,
+        price=auction.current_bid or auction.starting_bid,
+        increment=auction.bid_increment,
+        seller_id=auction.seller_id,
+        end_time=ensure_timezone_aware(auction.end_time),
+        status=auction.status,
+        leader_id=auction.highest_bidder_id,
+        proxies=proxies,
+        top_bids=[(user_id, amount) for user_id, amount in top_bids]
+    )
+
+def persist_bid_book_batch(placements):
+    """Write a batch of bids accepted by bid books in one transaction, then publish events.
+    Returns {auction_id: reason} for auctions whose bids the database refused."""
+    auction_ids = sorted({placement.auction_id for placement in placements})
+    # Row locks in id order, so concurrent batches and buy-now can't deadlock
+    auctions = {
+        auction.id: auction for auction in
+        Auction.query.filter(Auction.id.in_(auction_ids)).order_by(Auction.id).with_for_update().all()
+    }
+    refused = {
+        auction_id: 'Auction is not active' for auction_id in auction_ids
+        if auction_id not in auctions or auctions[auction_id].status != 'active'
+    }
+    accepted = [placement for placement in placements if placement.auction_id not in refused]
+    if not accepted:
+        db.session.rollback()
+        return refused
+
+    new_bids = {}
+    for placement in accepted:
+        placement.bids = [
+            Bid(
+                auction_id=placement.auction_id,
+                user_id=step.user_id,
+                amount=step.amount,
+                is_auto_bid=step.is_auto_bid,
+                max_auto_bid=step.max_auto_bid,
+                timestamp=placement.placed_at + timedelta(microseconds=position)
+            )
+            for position, step in enumerate(placement.resolution.ladder)
+        ]
+        new_bids.setdefault(placement.auction_id, []).extend(placement.bids)
+    db.session.add_all(bid for bids in new_bids.values() for bid in bids)
+
+    # Maximums set or raised in this batch; the latest per bidder wins
+    maximums = {(placement.auction_id, placement.user_id): placement.proxy for placement in accepted if placement.proxy}
+    if maximums:
+        existing = {
+            (proxy_bid.auction_id, proxy_bid.user_id): proxy_bid for proxy_bid in ProxyBid.query.filter(
+                ProxyBid.auction_id.in_({key[0] for key in maximums}),
+                ProxyBid.user_id.in_({key[1] for key in maximums})
+            ).all()
+        }
+        for (auction_id, user_id), (max_amount, set_at) in maximums.items():
+            proxy_bid = existing.get((auction_id, user_id))
+            if proxy_bid is None:
+                db.session.add(ProxyBid(auction_id=auction_id, user_id=user_id, max_amount=max_amount,
+                                        created_at=set_at, updated_at=set_at))
+            else:
+                proxy_bid.max_amount = max_amount
+                proxy_bid.updated_at = set_at
+
+    latest = {placement.auction_id: placement for placement in accepted}
+    for auction_id, bids in new_bids.items():
+        auction = auctions[auction_id]
+        auction.current_bid = latest[auction_id].resolution.price
+        auction.end_time = latest[auction_id].end_time
+        record_new_bids(auction, bids)
+        bump_auction_version(auction)
+    db.session.commit()
+
+    for placement in accepted:
+        placement.bid_ids = [bid.id for bid in placement.bids]
+    # One event per auction per batch, however many bids it carried
+    for auction_id in new_bids:
+        auction = auctions[auction_id]
+        placements_here = [placement for placement in accepted if placement.auction_id == auction_id]
+        last = latest[auction_id]
+        event_payload = auction_event_payload(auction)
+        event_payload['bid'] = {'id': last.bid_ids[0], 'user_id': last.user_id, 'amount': last.resolution.ladder[0].amount}
+        publish_auction_event(auction_id, 'bid_placed', event_payload)
+        if any(placement.time_extended for placement in placements_here):
+            publish_auction_event(auction_id, 'time_extended', {
+                'auction_id': auction_id,
+                'end_time': event_payload['end_time'],
+                'time_left': event_payload['time_left']
+            })
+        outbid = {
+            placement.previous_leader_id for placement in placements_here
+            if placement.previous_leader_id not in (None, placement.user_id, placement.resolution.winner_id)
+        }
+        for user_id in outbid - {last.resolution.winner_id}:
+            notify_outbid(user_id, auction_id, auction.item_name, last.resolution.price)
+    return refused
+
+bid_books = bid_book.BidBookManager(
+    app, load_bid_book, persist_bid_book_batch, lambda: db.engine, bus=message_bus,
+    anti_snipe_threshold=ANTI_SNIPE_THRESHOLD, anti_snipe_extension=ANTI_SNIPE_EXTENSION
+)
+# Flush written-behind bids when the worker exits
+atexit.register(bid_books.stop)
+
+def on_auction_bid_book_event(data):
+    # Bought, settled, edited or deleted elsewhere: the owner drops its book after flushing it
+    if bid_books.enabled and data.get('type') not in ('bid_placed', 'time_extended'):
+        bid_books.evict(data.get('auction_id'))
+
+message_bus.subscribe('auction', on_auction_bid_book_event)
+
 @app.route('/api/auctions/<int:auction_id>/bids', methods=['POST'])
 @login_required
+@idempotent
 @limiter.limit("30 per minute")  # Rate limit bid placement
 def place_bid(auction_id):
     try:
@@ -3440,9 +4444,70 @@ def place_bid(auction_id):
         data = request.json
         user_id = session['user_id']
         
-        # Use database lock to prevent race conditions
-        # Lock the auction row for update to prevent concurrent modifications
-        # Start transaction with row-level locking
+        # Validate bid amount
+        if 'amount' not in data:
+            return jsonify({'error': 'Bid amount is required'}), 400
+        
+        try:
+            bid_amount = float(data['amount'])
+            if bid_amount <= 0:
+                return jsonify({'error': 'Bid amount must be greater than 0'}), 400
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid bid amount'}), 400
+        
+        # Check auto-bid logic
+        auto_bid_amount = data.get('auto_bid_amount')
+        if auto_bid_amount:
+            try:
+                auto_bid_amount = float(auto_bid_amount)
+                if auto_bid_amount < bid_amount:
+                    return jsonify({'error': 'Auto-bid limit must be higher than initial bid'}), 400
+                if auto_bid_amount <= 0:
+                    return jsonify({'error': 'Auto-bid limit must be greater than 0'}), 400
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid auto-bid amount'}), 400
+        
+        now = datetime.now(timezone.utc)
+        if bid_books.ready():
+            # Hot path: the partition owning this auction validates and resolves the bid in memory
+            result = bid_books.place(auction_id, user_id, bid_amount, auto_bid_amount or None, now)
+            if result.get('pending'):
+                # Not a 5xx: the bid may still be accepted, so its Idempotency-Key must stay used
+                return jsonify({'message': result['message'], 'pending': True}), 202
+            if not result['ok']:
+                return jsonify({'error': result['error']}), result['status']
+            return jsonify(bid_response(
+                auction_id, user_id, result['bid'], result['current_bid'],
+                datetime.fromisoformat(result['end_time']), result['time_extended'],
+                result['winner_id'] == user_id
+            )), 201
+        
+        # Validate outside the lock; most losing bids under contention end here
+        error, status = check_bid_unlocked(auction_id, user_id, bid_amount, now)
+        if error and error != 'ended':
+            return jsonify({'error': error}), status
+
+        if BID_OPTIMISTIC_FAST_PATH and not auto_bid_amount and not error:
+            accepted = place_bid_optimistic(auction_id, user_id, bid_amount, now)
+            if accepted is not None:
+                bid, auction_row = accepted
+                # Everything below runs after commit, outside the row lock. The event is built from
+                # the UPDATE's RETURNING values; a fresh read could already show a later bid.
+                event_payload = auction_event_payload(auction_row, up_to_bid_id=bid.id)
+                event_payload['bid'] = {'id': bid.id, 'user_id': user_id, 'amount': bid.amount}
+                publish_auction_event(auction_id, 'bid_placed', event_payload)
+                previous_leader_id = previous_leader(auction_id, bid.amount)
+                if previous_leader_id and previous_leader_id != user_id:
+                    notify_outbid(previous_leader_id, auction_id, auction_row.item_name, bid.amount)
+                return jsonify(bid_response(
+                    auction_id, user_id,
+                    {'id': bid.id, 'amount': bid.amount, 'timestamp': now.isoformat(),
+                     'is_auto_bid': False, 'max_auto_bid': None},
+                    bid.amount, auction_row.end_time, False, True
+                )), 201
+
+        # Locked path: auto-bid maximums, proxies that answer the bid, the anti-snipe window,
+        # settling an auction that has ended, and bids the fast path lost a race on
         auction = db.session.query(Auction).filter_by(id=auction_id).with_for_update().first()
         if not auction:
             return jsonify({'error': 'Auction not found'}), 404
@@ -3451,32 +4516,19 @@ def place_bid(auction_id):
             db.session.rollback()
             return jsonify({'error': 'Auction is not active'}), 400
         
-        now = datetime.now(timezone.utc)
         # Ensure end_time is timezone-aware for comparison
         end_time = ensure_timezone_aware(auction.end_time)
         if end_time and end_time < now:
-            auction.status = 'ended'
+            settle_auction(auction)
+            event_payload = auction_event_payload(auction, include_bids=False)
             db.session.commit()
+            publish_auction_event(auction.id, 'auction_ended', event_payload)
             return jsonify({'error': 'Auction has ended'}), 400
         
         if auction.seller_id == user_id:
             db.session.rollback()
             return jsonify({'error': 'Cannot bid on your own auction'}), 400
         
-        # Validate bid amount
-        if 'amount' not in data:
-            db.session.rollback()
-            return jsonify({'error': 'Bid amount is required'}), 400
-        
-        try:
-            bid_amount = float(data['amount'])
-            if bid_amount <= 0:
-                db.session.rollback()
-                return jsonify({'error': 'Bid amount must be greater than 0'}), 400
-        except (ValueError, TypeError):
-            db.session.rollback()
-            return jsonify({'error': 'Invalid bid amount'}), 400
-        
         # Re-check current bid after lock (may have changed)
         min_bid = (auction.current_bid or auction.starting_bid) + auction.bid_increment
         
@@ -3484,134 +4536,58 @@ def place_bid(auction_id):
             db.session.rollback()
             return jsonify({'error': f'Bid must be at least ${min_bid:.2f}'}), 400
         
-        # Check auto-bid logic
-        auto_bid_amount = data.get('auto_bid_amount')
-        if auto_bid_amount:
-            try:
-                auto_bid_amount = float(auto_bid_amount)
-                if auto_bid_amount < bid_amount:
-                    db.session.rollback()
-                    return jsonify({'error': 'Auto-bid limit must be higher than initial bid'}), 400
-                if auto_bid_amount <= 0:
-                    db.session.rollback()
-                    return jsonify({'error': 'Auto-bid limit must be greater than 0'}), 400
-            except (ValueError, TypeError):
-                db.session.rollback()
-                return jsonify({'error': 'Invalid auto-bid amount'}), 400
+        previous_leader_id = auction.highest_bidder_id
+        resolution = resolve_proxy_bids(auction, user_id, bid_amount, auto_bid_amount or None, now)
         
-        bid = Bid(
-            auction_id=auction_id,
-            user_id=user_id,
-            amount=bid_amount,
-            is_auto_bid=bool(auto_bid_amount),
-            max_auto_bid=auto_bid_amount if auto_bid_amount else None
-        )
-        db.session.add(bid)
+        # The whole bid ladder is flushed together (one multi-row INSERT ... RETURNING on PostgreSQL)
+        new_bids = [
+            Bid(
+                auction_id=auction_id,
+                user_id=step.user_id,
+                amount=step.amount,
+                is_auto_bid=step.is_auto_bid,
+                max_auto_bid=step.max_auto_bid,
+                # Distinct timestamps keep the ladder's order in bid history
+                timestamp=now + timedelta(microseconds=position)
+            )
+            for position, step in enumerate(resolution.ladder)
+        ]
+        db.session.add_all(new_bids)
+        bid = new_bids[0]
         
-        auction.current_bid = bid_amount
+        auction.current_bid = resolution.price
         
-        # ANTI-SNIPE: Only extend if bid is placed in the last 2 minutes
-        # This prevents last-second bids from winning without giving others a chance to respond
-        end_time = ensure_timezone_aware(auction.end_time)
+        # Only extend if less than 2 minutes remain; auctions with plenty of time left are untouched
         time_until_end = (end_time - now).total_seconds() if end_time else 0
-
-        # Only extend if less than 2 minutes (120 seconds) remaining
-        # This prevents extending auctions that have plenty of time left
-        ANTI_SNIPE_THRESHOLD = 120  # 2 minutes
-        EXTENSION_AMOUNT = 120  # 2 minutes
-
         time_extended = False
         if 0 < time_until_end < ANTI_SNIPE_THRESHOLD:
-            new_end_time = now + timedelta(seconds=EXTENSION_AMOUNT)  # Set to 2 minutes from now
-            auction.end_time = new_end_time
+            auction.end_time = now + timedelta(seconds=ANTI_SNIPE_EXTENSION)
             time_extended = True
-        
-        # Check for auto-bids from other users that should counter-bid
-        # Only check active auto-bids that can still bid higher
-        other_auto_bids = Bid.query.filter(
-            Bid.auction_id == auction_id,
-            Bid.user_id != user_id,
-            Bid.is_auto_bid,
-            Bid.max_auto_bid >= bid_amount + auction.bid_increment
-        ).order_by(Bid.max_auto_bid.desc()).all()
-        
-        # Process auto-bids to create counter-bids
-        # Only the highest auto-bid should counter, then process recursively
-        current_bid_amount = bid_amount
-        for auto_bid in other_auto_bids:
-            # Calculate counter-bid amount
-            new_amount = min(current_bid_amount + auction.bid_increment, auto_bid.max_auto_bid)
-            
-            # Only create counter-bid if it's higher than current bid
-            if new_amount > auction.current_bid and new_amount <= auto_bid.max_auto_bid:
-                counter_bid = Bid(
-                    auction_id=auction_id,
-                    user_id=auto_bid.user_id,
-                    amount=new_amount,
-                    is_auto_bid=True,
-                    max_auto_bid=auto_bid.max_auto_bid
-                )
-                db.session.add(counter_bid)
-                auction.current_bid = new_amount
-                current_bid_amount = new_amount
-                
-                # Only process first counter-bid in this iteration to avoid infinite loops
-                # Other auto-bids will be processed on next bid
-                break
-        
-        # Find previous highest bidder to notify them they've been outbid
-        previous_bid = Bid.query.filter(
-            Bid.auction_id == auction_id,
-            Bid.user_id != user_id
-        ).order_by(Bid.amount.desc()).first()
-
-        previous_bidder_id = previous_bid.user_id if previous_bid else None
 
+        record_new_bids(auction, new_bids)
+        bump_auction_version(auction)
         db.session.commit()
 
-        # Create notification for outbid user (after commit to ensure bid is saved)
-        if previous_bidder_id:
-            try:
-                create_notification(
-                    user_id=previous_bidder_id,
-                    title='You\'ve been outbid! 🔔',
-                    message=f'Someone placed a higher bid of ${bid_amount:.2f} on "{auction.item_name}". Place a new bid to stay in the lead!',
-                    notification_type='outbid',
-                    auction_id=auction_id
-                )
-            except Exception as notif_error:
-                app.logger.warning(f"Failed to create outbid notification: {notif_error}")
-
-        # Calculate updated time_left for response
-        updated_end_time = ensure_timezone_aware(auction.end_time)
-        updated_time_left = max(0, int((updated_end_time - datetime.now(timezone.utc)).total_seconds()))
+        # Push to live viewers (and the settlement heap, via the bus): one payload shared by every subscriber
+        event_payload = auction_event_payload(auction)
+        event_payload['bid'] = {'id': bid.id, 'user_id': user_id, 'amount': bid.amount}
+        publish_auction_event(auction_id, 'bid_placed', event_payload)
+        if time_extended:
+            publish_auction_event(auction_id, 'time_extended', {
+                'auction_id': auction_id,
+                'end_time': event_payload['end_time'],
+                'time_left': event_payload['time_left']
+            })
 
-        # Get user info for the bid response
-        user = User.query.get(user_id)
+        if previous_leader_id and previous_leader_id not in (user_id, resolution.winner_id):
+            notify_outbid(previous_leader_id, auction_id, auction.item_name, resolution.price)
 
-        return jsonify({
-            'message': 'Bid placed successfully',
-            'current_bid': auction.current_bid,
-            'bid_id': bid.id,
-            'time_extended': time_extended,
-            'new_end_time': updated_end_time.isoformat(),
-            'time_left': updated_time_left,
-            # Return full bid object for Flutter app compatibility
-            'bid': {
-                'id': bid.id,
-                'auction_id': auction_id,
-                'user_id': user_id,
-                'amount': bid.amount,
-                'created_at': bid.timestamp.isoformat() if bid.timestamp else datetime.now(timezone.utc).isoformat(),
-                'updated_at': bid.timestamp.isoformat() if bid.timestamp else datetime.now(timezone.utc).isoformat(),
-                'is_winning': True,  # New bid is always the winning bid
-                'is_auto_bid': bid.is_auto_bid or False,
-                'max_bid_amount': bid.max_auto_bid,
-                'user_username': user.username if user else 'Unknown',
-                'user_avatar': user.profile_photo if user else None,
-                'user_rating': user.rating if user and hasattr(user, 'rating') else None
-            }
-        }), 201
+        return jsonify(bid_response(
+            auction_id, user_id,
+            {'id': bid.id, 'amount': bid.amount, 'timestamp': now.isoformat(),
+             'is_auto_bid': bid.is_auto_bid, 'max_auto_bid': bid.max_auto_bid},
+            auction.current_bid, auction.end_time, time_extended, resolution.winner_id == user_id
+        )), 201
 
     except Exception as e:
         db.session.rollback()
@@ -3622,6 +4598,7 @@ def place_bid(auction_id):
 
 @app.route('/api/auctions/<int:auction_id>/buy-now', methods=['POST'])
 @login_required
+@idempotent
 def buy_now(auction_id):
     """Buy It Now - Purchase item at real price instantly"""
     try:
@@ -3644,8 +4621,10 @@ def buy_now(auction_id):
         now = datetime.now(timezone.utc)
         end_time = ensure_timezone_aware(auction.end_time)
         if end_time and end_time < now:
-            auction.status = 'ended'
+            settle_auction(auction)
+            event_payload = auction_event_payload(auction, include_bids=False)
             db.session.commit()
+            publish_auction_event(auction.id, 'auction_ended', event_payload)
             return jsonify({'error': 'Auction has ended'}), 400
 
         if auction.seller_id == user_id:
@@ -3687,19 +4666,21 @@ def buy_now(auction_id):
             )
             db.session.add(invoice)
 
+        record_new_bids(auction, [buy_now_bid])
+        bump_auction_version(auction)
         db.session.commit()
+        event_payload = auction_event_payload(auction)
+        event_payload['buy_now'] = True
+        publish_auction_event(auction_id, 'auction_ended', event_payload)
 
         # Create notification for buyer
-        try:
-            create_notification(
-                user_id=user_id,
-                title='Purchase Complete! 🎉',
-                message=f'Congratulations! You purchased "{auction.item_name}" for ${auction.real_price:.2f}.',
-                notification_type='won',
-                auction_id=auction_id
-            )
-        except Exception as notif_error:
-            app.logger.warning(f"Failed to create purchase notification: {notif_error}")
+        queue_notification(
+            user_id,
+            title='Purchase Complete! 🎉',
+            message=f'Congratulations! You purchased "{auction.item_name}" for ${auction.real_price:.2f}.',
+            notification_type='won',
+            auction_id=auction_id
+        )
 
         return jsonify({
             'message': 'Purchase successful! You bought this item.',
@@ -3717,29 +4698,40 @@ def buy_now(auction_id):
 @app.route('/api/user/bids', methods=['GET'])
 @login_required
 def get_user_bids():
-    bids = Bid.query.filter_by(user_id=session['user_id']).order_by(Bid.timestamp.desc()).all()
+    # Auctions and their bids are loaded for all rows at once, not per bid
+    bids = (
+        Bid.query.filter_by(user_id=session['user_id'])
+        .options(joinedload(Bid.auction).selectinload(Auction.bids))
+        .order_by(Bid.timestamp.desc())
+        .all()
+    )
     
     result = []
+    auction_summaries = {}
     for bid in bids:
         auction = bid.auction
         if not auction:
             continue
             
-        # Get all bids for this auction
-        all_bids = auction.bids if auction.bids else []
-        highest_bid_amount = max([b.amount for b in all_bids]) if all_bids else 0
+        if auction.id not in auction_summaries:
+            # Get all bids for this auction
+            all_bids = auction.bids if auction.bids else []
+            highest_bid_amount = max([b.amount for b in all_bids]) if all_bids else 0
+            
+            # Get user's bids for this auction
+            user_bids = [b for b in all_bids if b.user_id == session['user_id']]
+            user_highest_bid = max([b.amount for b in user_bids]) if user_bids else 0
+            
+            # Find the highest bidder (user with highest bid)
+            highest_bidder_id = None
+            if all_bids:
+                highest_bid = max(all_bids, key=lambda b: b.amount)
+                highest_bidder_id = highest_bid.user_id
+            auction_summaries[auction.id] = (highest_bid_amount, user_highest_bid, highest_bidder_id)
+        
+        highest_bid_amount, user_highest_bid, highest_bidder_id = auction_summaries[auction.id]
         current_bid = auction.current_bid or auction.starting_bid
         
-        # Get user's bids for this auction
-        user_bids = [b for b in all_bids if b.user_id == session['user_id']]
-        user_highest_bid = max([b.amount for b in user_bids]) if user_bids else 0
-        
-        # Find the highest bidder (user with highest bid)
-        highest_bidder_id = None
-        if all_bids:
-            highest_bid = max(all_bids, key=lambda b: b.amount)
-            highest_bidder_id = highest_bid.user_id
-        
         # Determine if user is winning or won
         if auction.status == 'active':
             # For active auctions, check if user is the current highest bidder
@@ -3786,24 +4778,16 @@ def get_user_bids():
 @app.route('/api/user/auctions', methods=['GET'])
 @login_required
 def get_user_auctions():
-    # Optimize query with eager loading
-    auctions = Auction.query.filter_by(seller_id=session['user_id']).options(
-        selectinload(Auction.bids)
-    ).all()
+    auctions = Auction.query.filter_by(seller_id=session['user_id']).all()
     result = []
     for auction in auctions:
-        # Count unique bidders (users who have placed bids)
-        unique_bidders = set()
-        if auction.bids:
-            unique_bidders = {bid.user_id for bid in auction.bids}
-        
         result.append({
             'id': auction.id,
             'item_name': auction.item_name,
             'current_bid': auction.current_bid or auction.starting_bid,
             'status': auction.status,
             'end_time': auction.end_time.isoformat(),
-            'bid_count': len(unique_bidders)  # Count unique bidders, not total bids
+            'bid_count': auction.unique_bidder_count  # Count unique bidders, not total bids
         })
     return jsonify(result), 200
 
@@ -3900,11 +4884,8 @@ def get_transactions():
             elif status == 'failed':
                 query = query.filter_by(payment_status='failed')
 
-        # Order by creation date (newest first)
-        query = query.order_by(Invoice.created_at.desc())
-
-        # Paginate
-        invoices = query.offset((page - 1) * limit).limit(limit).all()
+        # Newest first; ?cursor= pages by (created_at, id), ?page= is still accepted
+        invoices, paging = paginate_listing(query, [Invoice.created_at, Invoice.id], limit, descending=True)
 
         # Convert invoices to transaction format
         transactions = []
@@ -3951,9 +4932,13 @@ def get_transactions():
             'data': transactions,
             'page': page,
             'limit': limit,
-            'total': len(transactions)
+            'total': paging['total'] if paging['total'] is not None else len(transactions),
+            'next_cursor': paging['next_cursor'],
+            'has_more': paging['has_more']
         }), 200
 
+    except pagination.CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error in get_transactions: {str(e)}")
         import traceback
@@ -4037,27 +5022,41 @@ def get_all_users():
             (User.email.contains(search))
         )
     
-    pagination = query.order_by(User.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
+    try:
+        users, paging = paginate_listing(query, [User.created_at, User.id], per_page, descending=True)
+    except pagination.CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Per-user counts for this page only, in two grouped queries
+    user_ids = [user.id for user in users]
+    auction_counts = dict(db.session.query(Auction.seller_id, func.count(Auction.id)).filter(
+        Auction.seller_id.in_(user_ids)
+    ).group_by(Auction.seller_id).all()) if user_ids else {}
+    bid_counts = dict(db.session.query(Bid.user_id, func.count(Bid.id)).filter(
+        Bid.user_id.in_(user_ids)
+    ).group_by(Bid.user_id).all()) if user_ids else {}
     
     # Build user list
     users_list = []
-    for user in pagination.items:
+    for user in users:
         users_list.append({
             'id': user.id,
             'username': user.username,
             'email': user.email,
             'role': user.role,
             'created_at': user.created_at.isoformat(),
-            'auction_count': len(user.auctions),
-            'bid_count': len(user.bids)
+            'auction_count': auction_counts.get(user.id, 0),
+            'bid_count': bid_counts.get(user.id, 0)
         })
     
     return jsonify({
         'users': users_list,
-        'total': pagination.total,
+        'total': paging['total'],
         'page': page,
         'per_page': per_page,
-        'pages': pagination.pages
+        'pages': paging['pages'],
+        'next_cursor': paging['next_cursor'],
+        'has_more': paging['has_more']
     }), 200
 
 @app.route('/api/admin/users/<int:user_id>', methods=['PUT'])
@@ -4082,6 +5081,8 @@ def update_user(user_id):
             existing = User.query.filter_by(email=data['email'].strip()).first()
             if existing and existing.id != user_id:
                 return jsonify({'error': 'Email already in use by another user'}), 400
+            if data['email'].strip() != user.email:
+                bump_auction_versions(Auction.seller_id == user_id)
             user.email = data['email'].strip()
 
         # Support is_active for suspend/activate functionality
@@ -4144,8 +5145,12 @@ def delete_user(user_id):
         # Step 1: Delete all bids made by this user (must be done first to avoid foreign key constraint)
         # This includes bids on auctions they created and bids on other auctions
         bids = Bid.query.filter_by(user_id=user_id).all()
+        bid_auction_ids = {bid.auction_id for bid in bids}
         for bid in bids:
             db.session.delete(bid)
+        ProxyBid.query.filter_by(user_id=user_id).delete()
+        BroadcastWatermark.query.filter_by(user_id=user_id).delete()
+        BroadcastDismissal.query.filter_by(user_id=user_id).delete()
         
         # Step 2: Handle auctions where user is the seller
         # Delete images and auctions they created
@@ -4165,6 +5170,12 @@ def delete_user(user_id):
         for auction in auctions_as_winner:
             auction.winner_id = None
         
+        # Step 4: Recount bids on the remaining auctions this user had bid on
+        bid_auction_ids -= {seller_auction.id for seller_auction in auctions_as_seller}
+        if bid_auction_ids:
+            db.session.flush()
+            refresh_auction_bid_stats(bid_auction_ids)
+        
         # Now delete the user
         db.session.delete(user)
         db.session.commit()
@@ -4282,16 +5293,17 @@ def get_all_auctions_admin():
     if status:
         query = query.filter_by(status=status)
     
-    pagination = query.order_by(Auction.start_time.desc()).paginate(page=page, per_page=per_page, error_out=False)
+    try:
+        auctions, paging = paginate_listing(query.options(
+            joinedload(Auction.seller),
+            joinedload(Auction.winner)
+        ), [Auction.start_time, Auction.id], per_page, descending=True)
+    except pagination.CursorError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Build auction list with unique bidder counts
     auctions_list = []
-    for auction in pagination.items:
-        # Count unique bidders (users who have placed bids)
-        unique_bidders = set()
-        if auction.bids:
-            unique_bidders = {bid.user_id for bid in auction.bids}
-        
+    for auction in auctions:
         # Get winner name if auction has ended and has a winner
         winner_name = None
         if auction.winner_id and auction.winner:
@@ -4309,17 +5321,19 @@ def get_all_auctions_admin():
             'current_bid': auction.current_bid,
             'status': auction.status,
             'end_time': auction.end_time.isoformat(),
-            'bid_count': len(unique_bidders),  # Count unique bidders, not total bids
+            'bid_count': auction.unique_bidder_count,  # Count unique bidders, not total bids
             'featured': auction.featured,
             'winner_name': winner_name
         })
     
     return jsonify({
         'auctions': auctions_list,
-        'total': pagination.total,
+        'total': paging['total'],
         'page': page,
         'per_page': per_page,
-        'pages': pagination.pages
+        'pages': paging['pages'],
+        'next_cursor': paging['next_cursor'],
+        'has_more': paging['has_more']
     }), 200
 
 @app.route('/api/admin/auctions/<int:auction_id>', methods=['PUT'])
@@ -4365,7 +5379,9 @@ def update_auction_admin(auction_id):
         if 'description' in data:
             auction.description = data['description']
 
+        bump_auction_version(auction)
         db.session.commit()
+        publish_auction_event(auction.id, 'auction_updated', auction_event_payload(auction, include_bids=False))
         return jsonify({
             'message': 'Auction updated successfully',
             'auction': {
@@ -4391,10 +5407,12 @@ def delete_auction_admin(auction_id):
         
         # Delete all related bids first (cascade should handle this, but explicit deletion ensures it works)
         Bid.query.filter_by(auction_id=auction_id).delete()
+        ProxyBid.query.filter_by(auction_id=auction_id).delete()
         
         # Delete the auction
         db.session.delete(auction)
         db.session.commit()
+        publish_auction_event(auction_id, 'auction_deleted', {'auction_id': auction_id, 'status': 'deleted'})
         return jsonify({'message': 'Auction deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
@@ -4423,6 +5441,47 @@ def get_admin_stats():
         'recent_users': recent_users
     }), 200
 
+@app.route('/api/admin/scheduler', methods=['GET'])
+@admin_required
+def get_scheduler_stats():
+    """Settlement scheduler status: leadership, heap depth and settlement lag"""
+    stats = settlement_timers.stats()
+    stats['running'] = bool(_auction_scheduler and _auction_scheduler.running)
+    stats['is_leader'] = bool(_auction_scheduler and _auction_scheduler.is_leader)
+    stats['last_run_at'] = _auction_scheduler.last_run_at if _auction_scheduler else None
+    return jsonify(stats), 200
+
+@app.route('/api/admin/bid-books', methods=['GET'])
+@admin_required
+def get_bid_book_stats():
+    """Bid book status: owned partitions, loaded books and write-behind progress"""
+    return jsonify(bid_books.stats()), 200
+
+app_metrics.register_gauge('zubid_notification_queue_jobs', 'Notification jobs waiting to be written.',
+                           lambda: notifications_outbox.depth)
+app_metrics.register_gauge('zubid_outbound_queue_messages', 'Emails and SMS waiting to be sent.',
+                           lambda: outbound.stats()['queued'])
+app_metrics.register_gauge('zubid_settlement_timers', 'Auctions waiting for their settlement timer.',
+                           lambda: settlement_timers.depth)
+app_metrics.register_gauge('zubid_unread_counter_users', 'Users with a cached unread count.',
+                           lambda: len(unread_counter))
+app_metrics.register_gauge('zubid_sse_streams', 'Open SSE streams in this worker (capped at SSE_MAX_STREAMS).',
+                           lambda: event_hub.open_streams)
+app_metrics.register_gauge('zubid_log_records_dropped', 'Log records dropped because the log queue was full.',
+                           lambda: log_handler.dropped)
+
+@app.route('/api/metrics', methods=['GET'])
+@csrf.exempt
+def get_metrics():
+    """Prometheus metrics for this worker; METRICS_TOKEN as a bearer token, or an admin session"""
+    token = os.getenv('METRICS_TOKEN')
+    authorization = request.headers.get('Authorization', '')
+    if not (token and hmac.compare_digest(authorization, f'Bearer {token}')):
+        user = db.session.get(User, session['user_id']) if 'user_id' in session else None
+        if user is None or user.role != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+    return Response(app_metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 # ==========================================
 # ADMIN NOTIFICATIONS ENDPOINTS
 # ==========================================
@@ -4434,11 +5493,17 @@ def get_admin_notifications():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
 
-    notifications = Notification.query.order_by(Notification.created_at.desc()).paginate(page=page, per_page=per_page)
+    try:
+        notifications, paging = paginate_listing(
+            Notification.query.options(joinedload(Notification.user)),
+            [Notification.created_at, Notification.id], per_page, descending=True
+        )
+    except pagination.CursorError as e:
+        return jsonify({'error': str(e)}), 400
 
     result = []
-    for notif in notifications.items:
-        user = User.query.get(notif.user_id)
+    for notif in notifications:
+        user = notif.user
         result.append({
             'id': str(notif.id),
             'user_id': notif.user_id,
@@ -4453,9 +5518,11 @@ def get_admin_notifications():
 
     return jsonify({
         'notifications': result,
-        'total': notifications.total,
-        'pages': notifications.pages,
-        'current_page': page
+        'total': paging['total'],
+        'pages': paging['pages'],
+        'current_page': page,
+        'next_cursor': paging['next_cursor'],
+        'has_more': paging['has_more']
     }), 200
 
 @app.route('/api/admin/notifications/send', methods=['POST'])
@@ -4481,25 +5548,21 @@ def send_admin_notification():
             if not user:
                 return jsonify({'error': 'User not found'}), 404
 
-            create_notification(
-                user_id=user_id,
+            queue_notification(user.id, title, message, notification_type)
+            return jsonify({'message': f'Notification sent to {user.username}'}), 200
+        else:
+            # Send to all users: stored once and merged into each user's notifications when read
+            broadcast = BroadcastNotification(
                 title=title,
                 message=message,
-                notification_type=notification_type
+                type=notification_type,
+                audience_role='user',
+                created_by=session.get('user_id')
             )
-            return jsonify({'message': f'Notification sent to {user.username}'}), 200
-        else:
-            # Send to all users
-            users = User.query.filter_by(role='user').all()
-            count = 0
-            for user in users:
-                create_notification(
-                    user_id=user.id,
-                    title=title,
-                    message=message,
-                    notification_type=notification_type
-                )
-                count += 1
+            db.session.add(broadcast)
+            db.session.commit()
+            publish_notification_event(broadcast_event_data(broadcast))
+            count = User.query.filter_by(role='user').count()
 
             return jsonify({'message': f'Notification sent to {count} users'}), 200
 
@@ -4525,7 +5588,11 @@ def get_notification_stats():
         'total': total,
         'unread': unread,
         'today': today_count,
-        'by_type': type_counts
+        'by_type': type_counts,
+        'broadcasts': BroadcastNotification.query.count(),
+        'queue': notifications_outbox.stats(),
+        'unread_counters': unread_counter.stats(),
+        'push': push_dispatcher.stats()
     }), 200
 
 @app.route('/api/admin/scan-images', methods=['GET'])
@@ -4640,6 +5707,7 @@ def fix_corrupted_image(source_type, source_id):
             else:
                 return jsonify({'error': f'Unknown field: {field}'}), 400
 
+            bump_auction_version(auction)
             db.session.commit()
             return jsonify({'message': f'Auction {source_id} {field} updated'}), 200
 
@@ -4648,6 +5716,7 @@ def fix_corrupted_image(source_type, source_id):
             if not image:
                 return jsonify({'error': 'Image not found'}), 404
 
+            bump_auction_versions(Auction.id == image.auction_id)
             if new_url:
                 image.url = new_url
                 db.session.commit()
@@ -4706,22 +5775,29 @@ def delete_all_corrupted_images():
     fixed_count = 0
 
     # Fix/clear corrupted auction URLs
+    changed_auction_ids = set()
     auctions = Auction.query.all()
     for auction in auctions:
         if is_corrupted(auction.featured_image_url):
             auction.featured_image_url = None
+            changed_auction_ids.add(auction.id)
             fixed_count += 1
         if is_corrupted(auction.qr_code_url):
             auction.qr_code_url = None
+            changed_auction_ids.add(auction.id)
             fixed_count += 1
 
     # Delete corrupted image records
     images = Image.query.all()
     for img in images:
         if is_corrupted(img.url):
+            changed_auction_ids.add(img.auction_id)
             db.session.delete(img)
             deleted_count += 1
 
+    if changed_auction_ids:
+        bump_auction_versions(Auction.id.in_(changed_auction_ids))
+
     # Clear corrupted user profile images
     users = User.query.all()
     for user in users:
@@ -4756,6 +5832,7 @@ def create_category_admin():
         category = Category(name=category_name, description=category_description)
         db.session.add(category)
         db.session.commit()
+        publish_category_event(category.id, 'created', category)
         return jsonify({'message': 'Category created', 'id': category.id}), 201
     except Exception as e:
         db.session.rollback()
@@ -4783,12 +5860,15 @@ def update_category_admin(category_id):
             if existing and existing.id != category_id:
                 return jsonify({'error': 'Category name already exists'}), 400
             
+            if data['name'].strip() != category.name:
+                bump_auction_versions(Auction.category_id == category_id)
             category.name = data['name'].strip()
         
         if 'description' in data:
             category.description = data.get('description', '').strip()
 
         db.session.commit()
+        publish_category_event(category_id, 'updated', category)
         return jsonify({'message': 'Category updated successfully'}), 200
     except Exception as e:
         db.session.rollback()
@@ -4812,6 +5892,7 @@ def delete_category_admin(category_id):
         
         db.session.delete(category)
         db.session.commit()
+        publish_category_event(category_id, 'deleted')
         return jsonify({'message': 'Category deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
@@ -4823,6 +5904,8 @@ def delete_category_admin(category_id):
 # Initialize database
 def init_db():
     with app.app_context():
+        from sqlalchemy import inspect
+        had_proxy_bids = 'proxy_bid' in inspect(db.engine).get_table_names()
         db.create_all()
         print("Database tables created/verified successfully!")
         
@@ -4957,6 +6040,10 @@ def init_db():
                 'item_condition': 'VARCHAR(50)',
                 'qr_code_url': 'VARCHAR(500)',
                 'video_url': 'VARCHAR(500)',
+                'version': 'INTEGER NOT NULL DEFAULT 1',
+                'bid_count': 'INTEGER NOT NULL DEFAULT 0',
+                'unique_bidder_count': 'INTEGER NOT NULL DEFAULT 0',
+                'highest_bidder_id': 'INTEGER',
             }
 
             added_auction_cols = 0
@@ -4974,9 +6061,35 @@ def init_db():
                 print(f"[OK] Added {added_auction_cols} new columns to Auction table")
             else:
                 print("[OK] Auction table columns up to date")
+
+            # One-time backfill when the bid counter columns are first added
+            # (large databases: run migrate_bid_counters.py beforehand instead)
+            if 'bid_count' not in auction_columns:
+                try:
+                    refreshed = refresh_auction_bid_stats()
+                    db.session.commit()
+                    print(f"[OK] Backfilled bid counters for {refreshed} auctions")
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[WARNING] Could not backfill bid counters: {e}")
         except Exception as e:
             print(f"Note: Could not check/add additional Auction columns: {e}")
 
+        # One-time copy of standing auto-bid maximums into ProxyBid when the table is first created
+        if not had_proxy_bids:
+            try:
+                copied = backfill_proxy_bids()
+                db.session.commit()
+                if copied:
+                    print(f"[OK] Copied {copied} auto-bid maximums into ProxyBid")
+            except Exception as e:
+                db.session.rollback()
+                print(f"[WARNING] Could not backfill proxy bids: {e}")
+
+        # Full-text search index (GIN on PostgreSQL, FTS5 on SQLite)
+        backend = auction_search.setup(db.engine, Auction)
+        print(f"[OK] Auction search index ready ({backend})")
+
         # Check and add new User table columns if missing
         try:
             inspector = inspect(db.engine)
@@ -5471,6 +6584,7 @@ def get_user_payments():
 
 @app.route('/api/payments/<int:invoice_id>/pay', methods=['POST'])
 @login_required
+@idempotent
 def process_payment(invoice_id):
     """Process payment for an invoice"""
     try:
@@ -6372,6 +7486,11 @@ def reset_database():
         if secret != expected_secret:
             return jsonify({'error': 'Unauthorized'}), 401
 
+        # Delete standing maximum bids and broadcast read state (they reference users)
+        ProxyBid.query.delete()
+        BroadcastWatermark.query.delete()
+        BroadcastDismissal.query.delete()
+
         # Delete all users except admin
         deleted_users = User.query.filter(User.role != 'admin').delete()
 
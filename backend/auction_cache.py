@@ -0,0 +1,131 @@
+"""
+Auction Detail Cache for ZUBID
+Read-through cache of serialized auction detail keyed on the auction's version
+counter. Every write that changes what the detail endpoint returns bumps
+Auction.version, so a cached entry is valid exactly as long as its version
+matches the database - no TTL guessing and no cross-worker invalidation needed.
+
+In-process LRU bounded by entry count, optionally backed by a shared Redis store
+(AUCTION_CACHE_URL) so a detail serialized by one worker is reused by the others.
+"""
+
+import os
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+AUCTION_CACHE_ENABLED = os.getenv('AUCTION_CACHE_ENABLED', 'true').lower() == 'true'
+AUCTION_CACHE_SIZE = int(os.getenv('AUCTION_CACHE_SIZE', '2000'))
+AUCTION_CACHE_URL = os.getenv('AUCTION_CACHE_URL', '')
+# Shared-store entries are immutable per version; the TTL only reclaims memory
+AUCTION_CACHE_TTL = int(os.getenv('AUCTION_CACHE_TTL', '3600'))
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class VersionedCache:
+    """LRU of key -> (version, value); a lookup only hits when the versions match"""
+
+    def __init__(self, max_entries=AUCTION_CACHE_SIZE, shared_url=AUCTION_CACHE_URL,
+                 namespace='zubid:auction', enabled=AUCTION_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.namespace = namespace
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self._shared = None
+        if shared_url:
+            if redis is None:
+                logger.warning("AUCTION_CACHE_URL is set but the redis package is not installed. Using in-process cache only.")
+            else:
+                try:
+                    self._shared = redis.Redis.from_url(shared_url)
+                except Exception as e:
+                    logger.warning(f"Auction cache shared store unavailable: {e}")
+
+    def get(self, key, version):
+        """Return the cached value for this exact version, or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        value = self._shared_get(key, version)
+        if value is not None:
+            self.shared_hits += 1
+            self._store_local(key, version, value)
+            return value
+        self.misses += 1
+        return None
+
+    def set(self, key, version, value):
+        if not self.enabled:
+            return
+        self._store_local(key, version, value)
+        self._shared_set(key, version, value)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'hit_ratio': round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            'shared_store': self._shared is not None,
+        }
+
+    def _store_local(self, key, version, value):
+        with self._lock:
+            # One slot per key: a newer version replaces the old one
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _shared_key(self, key, version):
+        return f'{self.namespace}:{key}:v{version}'
+
+    def _shared_get(self, key, version):
+        if self._shared is None:
+            return None
+        try:
+            raw = self._shared.get(self._shared_key(key, version))
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"Auction cache shared get failed: {e}")
+            return None
+
+    def _shared_set(self, key, version, value):
+        if self._shared is None:
+            return
+        try:
+            self._shared.setex(self._shared_key(key, version), AUCTION_CACHE_TTL, json.dumps(value, default=str))
+        except Exception as e:
+            logger.warning(f"Auction cache shared set failed: {e}")
@@ -0,0 +1,267 @@
+"""
+Auction Scheduler for ZUBID
+Closes ended auctions in the background so read endpoints never write.
+Deadlines are kept in an in-memory min-heap (settlement_queue.py) so auctions
+are settled right as they end instead of on a polling interval.
+Only one process runs the settlement sweep at a time (leader election via a
+PostgreSQL advisory lock, or a local lock file for SQLite/single-node setups).
+
+Run standalone as a dedicated worker:
+    python auction_scheduler.py
+"""
+
+import os
+import sys
+import logging
+import threading
+import time
+
+from settlement_queue import SettlementQueue
+
+logger = logging.getLogger(__name__)
+
+# Scheduler configuration
+AUCTION_SCHEDULER_ENABLED = os.getenv('AUCTION_SCHEDULER_ENABLED', 'true').lower() == 'true'
+# Reconcile interval: how often upcoming deadlines are reloaded from the database
+AUCTION_SCHEDULER_INTERVAL = float(os.getenv('AUCTION_SCHEDULER_INTERVAL', '30'))
+# Only auctions ending within this many seconds are kept in the in-memory heap
+AUCTION_SCHEDULER_HORIZON = float(os.getenv('AUCTION_SCHEDULER_HORIZON', '3600'))
+AUCTION_SCHEDULER_LEADER_RETRY = float(os.getenv('AUCTION_SCHEDULER_LEADER_RETRY', '30'))
+AUCTION_SCHEDULER_LOCK_FILE = os.getenv(
+    'AUCTION_SCHEDULER_LOCK_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'auction_scheduler.lock')
+)
+
+# Arbitrary but stable key for pg_try_advisory_lock
+ADVISORY_LOCK_KEY = 482_163_001
+
+try:
+    import fcntl
+except ImportError:
+    # Windows - fall back to msvcrt byte-range locking
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+
+class LeaderLock:
+    """Cross-process lock deciding which process runs the settlement sweep (or owns a bid-book partition)"""
+
+    def __init__(self, engine=None, lock_file=AUCTION_SCHEDULER_LOCK_FILE, key=ADVISORY_LOCK_KEY):
+        self.engine = engine
+        self.lock_file = lock_file
+        self.key = key
+        self._connection = None
+        self._handle = None
+
+    @property
+    def held(self):
+        return self._connection is not None or self._handle is not None
+
+    def acquire(self):
+        """Try to become leader without blocking. Returns True on success."""
+        if self.held:
+            return True
+        if self.engine is not None and self.engine.dialect.name == 'postgresql':
+            return self._acquire_advisory()
+        return self._acquire_file()
+
+    def release(self):
+        if self._connection is not None:
+            try:
+                from sqlalchemy import text
+                self._connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': self.key})
+                self._connection.close()
+            except Exception as e:
+                logger.warning(f"Failed to release scheduler advisory lock: {e}")
+            self._connection = None
+        if self._handle is not None:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._handle, fcntl.LOCK_UN)
+                self._handle.close()
+            except Exception:
+                pass
+            self._handle = None
+
+    def _acquire_advisory(self):
+        from sqlalchemy import text
+        connection = None
+        try:
+            # Session-level advisory lock lives as long as this dedicated connection
+            connection = self.engine.connect()
+            acquired = connection.execute(
+                text('SELECT pg_try_advisory_lock(:key)'), {'key': self.key}
+            ).scalar()
+            connection.commit()
+            if acquired:
+                self._connection = connection
+                return True
+            connection.close()
+        except Exception as e:
+            logger.warning(f"Scheduler advisory lock unavailable: {e}")
+            if connection is not None:
+                connection.close()
+        return False
+
+    def _acquire_file(self):
+        try:
+            os.makedirs(os.path.dirname(self.lock_file), exist_ok=True)
+            handle = open(self.lock_file, 'a+')
+        except OSError as e:
+            logger.warning(f"Scheduler lock file unavailable ({self.lock_file}): {e}")
+            return False
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            elif msvcrt is not None:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            handle.close()
+            return False
+        self._handle = handle
+        return True
+
+
+class AuctionScheduler:
+    """Background thread that settles auctions as their deadlines pass while it holds leadership.
+
+    Deadlines live in a SettlementQueue (min-heap on end_time) that bid/buy-now paths update
+    in-process. A periodic reconcile pass reloads upcoming deadlines from the database and
+    sweeps anything overdue, covering auctions created or extended by other workers.
+    """
+
+    def __init__(self, app, settle_fn, load_deadlines_fn=None, queue=None,
+                 interval=AUCTION_SCHEDULER_INTERVAL, engine=None):
+        self.app = app
+        self.settle_fn = settle_fn
+        self.load_deadlines_fn = load_deadlines_fn
+        self.queue = queue if queue is not None else SettlementQueue()
+        self.interval = interval
+        self.lock = LeaderLock(engine=engine)
+        self._stop = threading.Event()
+        self._thread = None
+        self._next_reconcile = 0.0
+        self.last_run_at = None
+        self.settled_total = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def is_leader(self):
+        return self.lock.held
+
+    def start(self):
+        """Start the scheduler thread (idempotent)"""
+        if self.running:
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='auction-scheduler', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self.queue.wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        self.queue.enabled = False
+        self.lock.release()
+
+    def run_once(self):
+        """Settle every auction that has ended. Returns the number of auctions closed."""
+        settled = 0
+        with self.app.app_context():
+            # Drain in batches so a backlog (e.g. after downtime) is cleared in one tick
+            while not self._stop.is_set():
+                count = self.settle_fn()
+                settled += count
+                if not count:
+                    break
+        self.last_run_at = time.time()
+        self.settled_total += settled
+        return settled
+
+    def reconcile(self, rebuild=False):
+        """Sweep overdue auctions and reload upcoming deadlines from the database"""
+        settled = self.run_once()
+        if self.load_deadlines_fn is not None:
+            horizon = time.time() + AUCTION_SCHEDULER_HORIZON
+            with self.app.app_context():
+                deadlines = self.load_deadlines_fn(horizon=horizon)
+            if rebuild:
+                self.queue.rebuild(deadlines)
+            else:
+                for auction_id, end_time in deadlines:
+                    self.queue.schedule(auction_id, end_time)
+        self._next_reconcile = time.time() + self.interval
+        return settled
+
+    def process_due(self, now=None):
+        """Settle auctions whose heap deadline has passed. Returns the number settled."""
+        due = self.queue.pop_due(now)
+        if not due:
+            return 0
+        auction_ids = list(due)
+        with self.app.app_context():
+            settled = self.settle_fn(auction_ids=auction_ids)
+            # Extended elsewhere (anti-snipe in another worker) - put back with the real deadline
+            still_open = dict(self.load_deadlines_fn(auction_ids=auction_ids)) if self.load_deadlines_fn else {}
+        settled_at = time.time()
+        for auction_id, deadline in due.items():
+            if auction_id in still_open:
+                self.queue.schedule(auction_id, still_open[auction_id])
+            else:
+                self.queue.record_settlement(deadline, settled_at)
+        self.settled_total += settled
+        self.last_run_at = settled_at
+        return settled
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.lock.acquire():
+                # Another process is leader - check again later in case it goes away
+                self._stop.wait(AUCTION_SCHEDULER_LEADER_RETRY)
+                continue
+            try:
+                if not self.queue.enabled:
+                    # Just became leader: rebuild the heap from the database
+                    self.queue.enabled = True
+                    self.reconcile(rebuild=True)
+                elif time.time() >= self._next_reconcile:
+                    self.reconcile()
+                settled = self.process_due()
+                if settled:
+                    logger.info(f"Auction scheduler settled {settled} ended auction(s)")
+            except Exception as e:
+                logger.error(f"Auction scheduler tick failed: {e}", exc_info=True)
+                self._stop.wait(1)
+            self.queue.wait_until_due(self._next_reconcile - time.time())
+
+
+if __name__ == '__main__':
+    # Dedicated scheduler process: web workers then only need to serve reads
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    os.environ['AUCTION_SCHEDULER_ENABLED'] = 'false'  # don't let the imported app start its own thread
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app import app, db, settle_ended_auctions, load_auction_deadlines, settlement_timers, message_bus
+
+    with app.app_context():
+        engine = db.engine
+    # Hear about anti-snipe extensions and new auctions from the web workers
+    message_bus.start()
+    scheduler = AuctionScheduler(app, settle_ended_auctions, load_auction_deadlines,
+                                 queue=settlement_timers, engine=engine)
+    logger.info("Auction scheduler started (dedicated process)")
+    scheduler.start()
+    try:
+        while scheduler.running:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        scheduler.stop()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""
+Auction card serializer benchmark for ZUBID
+Compares the per-row ORM path the wishlist / my-bids / my-auctions endpoints used
+(hydrate Auction objects, lazy-load images per row) with the shared column
+projection (auction_card_query + serialize_auction_card).
+
+Runs against a throwaway SQLite database by default; point BENCH_DATABASE_URL at
+a PostgreSQL copy for production-like numbers.
+
+    python benchmarks/bench_auction_cards.py [auctions] [images_per_auction] [rounds]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_db_dir = tempfile.mkdtemp(prefix='zubid-bench-')
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', f"sqlite:///{os.path.join(_db_dir, 'bench.db')}")
+os.environ.setdefault('AUCTION_SCHEDULER_ENABLED', 'false')
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from app import (app, db, User, Category, Auction, Image, Bid, Wishlist,
+                 ensure_timezone_aware, auction_card_query, serialize_auction_card)
+
+
+def seed(auction_count, images_per_auction):
+    """Create a buyer who wishlisted and bid on every auction. Returns the buyer's id."""
+    now = datetime.now(timezone.utc)
+    seller = User(username='bench_seller', email='bench_seller@example.com', password_hash='x',
+                  id_number='BENCH-SELLER', birth_date=now.date(), address='-', phone='+10000000001')
+    buyer = User(username='bench_buyer', email='bench_buyer@example.com', password_hash='x',
+                 id_number='BENCH-BUYER', birth_date=now.date(), address='-', phone='+10000000002')
+    category = Category(name='Bench Category')
+    db.session.add_all([seller, buyer, category])
+    db.session.flush()
+
+    auctions = [
+        Auction(item_name=f'Bench item {i}', description='Benchmark item ' * 20, starting_bid=10.0,
+                current_bid=10.0 + i, end_time=now + timedelta(days=1, minutes=i), seller_id=seller.id,
+                category_id=category.id, status='active', bid_count=1, unique_bidder_count=1)
+        for i in range(auction_count)
+    ]
+    db.session.add_all(auctions)
+    db.session.flush()
+    for auction in auctions:
+        db.session.add_all(
+            Image(auction_id=auction.id, url=f'https://img.example.com/{auction.id}/{n}.jpg', is_primary=(n == 1))
+            for n in range(images_per_auction)
+        )
+        db.session.add(Bid(auction_id=auction.id, user_id=buyer.id, amount=auction.current_bid))
+        db.session.add(Wishlist(user_id=buyer.id, auction_id=auction.id))
+    db.session.commit()
+    return buyer.id
+
+
+def orm_cards(user_id):
+    """The previous wishlist implementation: one Wishlist query, then per-row lazy loads"""
+    cards = []
+    for item in Wishlist.query.filter_by(user_id=user_id).all():
+        auction = item.auction
+        if auction.images:
+            primary = next((img for img in auction.images if img.is_primary), None)
+            image_url = primary.url if primary else auction.images[0].url
+        else:
+            image_url = auction.featured_image_url
+        end_time = ensure_timezone_aware(auction.end_time) if auction.end_time else None
+        cards.append({
+            'id': str(auction.id),
+            'title': auction.item_name,
+            'description': auction.description,
+            'imageUrl': image_url,
+            'currentPrice': auction.current_bid or auction.starting_bid,
+            'startingPrice': auction.starting_bid,
+            'endTime': int(end_time.timestamp() * 1000) if end_time else 0,
+            'categoryId': str(auction.category_id) if auction.category_id else '',
+            'sellerId': str(auction.seller_id),
+            'bidCount': auction.bid_count,
+            'isWishlisted': True,
+            'realPrice': auction.real_price,
+            'marketPrice': auction.market_price
+        })
+    return cards
+
+
+def projection_cards(user_id):
+    """The shared card path used by the endpoints now"""
+    rows = (
+        auction_card_query()
+        .join(Wishlist, Wishlist.auction_id == Auction.id)
+        .filter(Wishlist.user_id == user_id)
+        .order_by(Wishlist.id)
+        .all()
+    )
+    return [serialize_auction_card(row, wishlisted=True) for row in rows]
+
+
+def measure(label, build, user_id, rounds):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    timings = []
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        for _ in range(rounds):
+            statements.clear()
+            # Fresh identity map each round, as in a new request
+            db.session.expunge_all()
+            started = time.perf_counter()
+            cards = build(user_id)
+            timings.append(time.perf_counter() - started)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    timings.sort()
+    median = timings[len(timings) // 2] * 1000
+    print(f"{label:<12} {len(cards):>6} cards  {len(statements):>6} queries  "
+          f"median {median:8.2f} ms  best {timings[0] * 1000:8.2f} ms")
+    return cards, median
+
+
+def main():
+    auction_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    images_per_auction = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    with app.app_context():
+        db.create_all()
+        print(f"Seeding {auction_count} auctions with {images_per_auction} images each...")
+        user_id = seed(auction_count, images_per_auction)
+
+        orm, orm_ms = measure('orm per-row', orm_cards, user_id, rounds)
+        projected, projected_ms = measure('projection', projection_cards, user_id, rounds)
+        # Same cards either way, apart from description/price formatting that both paths share
+        assert [card['imageUrl'] for card in orm] == [card['imageUrl'] for card in projected]
+        assert [card['id'] for card in orm] == [card['id'] for card in projected]
+        print(f"\nSpeedup: {orm_ms / projected_ms:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
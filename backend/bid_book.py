@@ -0,0 +1,613 @@
+"""
+Bid Book for ZUBID
+Optional in-memory bid book for auctions under heavy bidding (BID_BOOK_ENABLED).
+
+Auctions are split into BID_BOOK_PARTITIONS partitions by id. Each partition is owned
+by one process at a time (a LeaderLock per partition, claimed by whichever worker first
+needs it), and a single thread in that process applies every bid for the partition's
+auctions in arrival order against an in-memory book: current price, increment, end time,
+leader, proxy maxima and the top bids. Bids are therefore validated and resolved with
+no row lock and no queries, and bids landing on another worker are forwarded to the
+owner over the event bus.
+
+Accepted bids are written behind in batches, one transaction per batch. With
+BID_BOOK_SYNC_ACK (default) a bid's response waits for its batch to commit, so
+acknowledged bids are durable and a burst of bids shares one commit; without it the
+response returns as soon as the book accepts the bid and the batch is flushed every
+BID_BOOK_FLUSH_INTERVAL seconds.
+
+A bid that gets no answer within BID_BOOK_TIMEOUT is cancelled if its partition hasn't
+started on it yet (the caller gets a retryable 503). Once the partition has taken it it
+may still commit, so the caller gets a 202 "pending" result instead, which keeps the
+request's Idempotency-Key from being reused for a retry. A forwarded bid is only
+reported pending once the owner acknowledged it; owners ignore requests older than half
+the timeout, so an unacknowledged bid is never applied and gets the retryable 503.
+
+Forwarding only works if the event bus reaches every process that can own a partition:
+partitions are claimed with a PostgreSQL advisory lock (any host) or a lock file (this
+host). A process whose bus can't reach that far (a local bus, a socket bus with
+PostgreSQL on several hosts, a bus that failed to start) disables its bid book on first
+use and places bids through the database instead.
+
+The database stays the system of record: books are loaded from it on first use,
+evicted when idle or when the auction changes elsewhere (buy-now, settlement, edits),
+and rebuilt whenever a partition changes owner.
+"""
+
+import os
+import logging
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+
+import proxy_bidding
+from auction_scheduler import LeaderLock
+from event_bus import SCOPES
+
+logger = logging.getLogger(__name__)
+
+# Bid book configuration
+BID_BOOK_ENABLED = os.getenv('BID_BOOK_ENABLED', 'false').lower() == 'true'
+BID_BOOK_PARTITIONS = int(os.getenv('BID_BOOK_PARTITIONS', '4'))
+BID_BOOK_SYNC_ACK = os.getenv('BID_BOOK_SYNC_ACK', 'true').lower() == 'true'
+BID_BOOK_FLUSH_INTERVAL = float(os.getenv('BID_BOOK_FLUSH_INTERVAL', '0.05'))
+BID_BOOK_MAX_BATCH = int(os.getenv('BID_BOOK_MAX_BATCH', '500'))
+BID_BOOK_MAX_AUCTIONS = int(os.getenv('BID_BOOK_MAX_AUCTIONS', '1000'))
+# Books with no bids for this long are dropped (they reload from the database on the next bid)
+BID_BOOK_IDLE_TTL = float(os.getenv('BID_BOOK_IDLE_TTL', '300'))
+BID_BOOK_TOP_BIDS = int(os.getenv('BID_BOOK_TOP_BIDS', '20'))
+BID_BOOK_TIMEOUT = float(os.getenv('BID_BOOK_TIMEOUT', '5'))
+BID_BOOK_LOCK_DIR = os.getenv('BID_BOOK_LOCK_DIR', os.path.join(tempfile.gettempdir(), 'zubid-bid-book'))
+# true: every worker runs on this host, so a Unix socket bus reaches partition owners even
+# though PostgreSQL advisory locks could be claimed from anywhere
+BID_BOOK_SINGLE_HOST = os.getenv('BID_BOOK_SINGLE_HOST', 'false').lower() == 'true'
+# How long a worker waits before trying again to claim a partition someone else owns
+BID_BOOK_ACQUIRE_RETRY = 1.0
+
+# Advisory lock keys BID_BOOK_LOCK_KEY + partition (the scheduler uses 482_163_001)
+BID_BOOK_LOCK_KEY = 482_164_000
+
+BUS_TOPIC = 'bid_book'
+
+
+class BidRejected(Exception):
+    """A bid the book refuses (below the minimum, auction ended, seller bidding...)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class Placement:
+    """A bid accepted by a book, waiting to be written behind"""
+
+    def __init__(self, auction_id, user_id, resolution, previous_leader_id, time_extended, end_time,
+                 placed_at, proxy=None):
+        self.auction_id = auction_id
+        self.user_id = user_id
+        self.placed_at = placed_at
+        self.resolution = resolution
+        self.previous_leader_id = previous_leader_id
+        self.time_extended = time_extended
+        self.end_time = end_time
+        # (max_amount, set_at) when the bidder stored or raised a maximum
+        self.proxy = proxy
+        self.bids = []
+        self.bid_ids = []
+        self.future = None
+
+    def result(self):
+        """JSON-safe outcome returned to the bidder (and across the bus)"""
+        first = self.resolution.ladder[0]
+        return {
+            'ok': True,
+            'auction_id': self.auction_id,
+            'current_bid': self.resolution.price,
+            'winner_id': self.resolution.winner_id,
+            'time_extended': self.time_extended,
+            'end_time': self.end_time.isoformat(),
+            'bid': {
+                'id': self.bid_ids[0] if self.bid_ids else None,
+                'amount': first.amount,
+                'timestamp': self.placed_at.isoformat(),
+                'is_auto_bid': first.is_auto_bid,
+                'max_auto_bid': first.max_auto_bid,
+            },
+        }
+
+
+def rejection(message, status=400):
+    return {'ok': False, 'error': message, 'status': status}
+
+
+def pending(message):
+    """A bid that timed out but may still be accepted"""
+    return {'ok': False, 'pending': True, 'message': message, 'status': 202}
+
+
+BUSY = 'Bidding is busy, please try again'
+PENDING = 'Your bid is still being processed; check the auction before bidding again'
+
+
+class BidBook:
+    """In-memory state of one auction; only ever touched by its partition's thread"""
+
+    def __init__(self, auction_id, price, increment, seller_id, end_time, status='active',
+                 leader_id=None, proxies=None, top_bids=()):
+        self.auction_id = auction_id
+        self.price = price
+        self.increment = increment
+        self.seller_id = seller_id
+        self.end_time = end_time
+        self.status = status
+        self.leader_id = leader_id
+        self.proxies = {proxy.user_id: proxy for proxy in proxies or ()}
+        self.top_bids = deque(top_bids, maxlen=BID_BOOK_TOP_BIDS)
+        self.last_used = time.monotonic()
+        self.bids_total = 0
+
+    def place(self, user_id, amount, max_amount, now, anti_snipe_threshold, extension):
+        """Validate and resolve a bid against the book. Returns a Placement or raises BidRejected."""
+        if self.status != 'active':
+            raise BidRejected('Auction is not active')
+        if self.end_time and self.end_time < now:
+            raise BidRejected('Auction has ended')
+        if self.seller_id == user_id:
+            raise BidRejected('Cannot bid on your own auction')
+        min_bid = self.price + self.increment
+        if amount < min_bid:
+            raise BidRejected(f'Bid must be at least ${min_bid:.2f}')
+
+        proxy_update = None
+        own = self.proxies.get(user_id)
+        if max_amount is not None and (own is None or max_amount > own.max_amount):
+            own = self.proxies[user_id] = proxy_bidding.Proxy(user_id, max_amount, (now.timestamp(), float('inf')))
+            proxy_update = (max_amount, now)
+        if own is not None and own.max_amount > amount:
+            bidder = own
+        else:
+            bidder = proxy_bidding.Proxy(user_id, amount, (now.timestamp(), float('inf')))
+        competitors = [proxy for proxy in self.proxies.values()
+                       if proxy.user_id != user_id and proxy.max_amount >= amount + self.increment]
+        resolution = proxy_bidding.resolve(bidder, amount, self.increment, competitors, bidder_max=max_amount)
+
+        previous_leader_id = self.leader_id
+        self.price = resolution.price
+        self.leader_id = resolution.winner_id
+        for step in resolution.ladder:
+            self.top_bids.appendleft((step.user_id, step.amount))
+        self.bids_total += len(resolution.ladder)
+        self.last_used = time.monotonic()
+
+        time_extended = False
+        time_until_end = (self.end_time - now).total_seconds() if self.end_time else 0
+        if 0 < time_until_end < anti_snipe_threshold:
+            self.end_time = now + timedelta(seconds=extension)
+            time_extended = True
+        return Placement(self.auction_id, user_id, resolution, previous_leader_id, time_extended,
+                         self.end_time, now, proxy=proxy_update)
+
+
+class BidFuture:
+    """Outcome of a submitted bid, completed by the partition thread (or a bus reply)"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._claimed = False
+        self._cancelled = False
+        # Forwarded bids: the owner has received the request and may apply it
+        self.acknowledged = False
+        self.value = None
+
+    @property
+    def done(self):
+        return self._event.is_set()
+
+    def set(self, value):
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.value = value
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(value)
+            except Exception as e:
+                logger.error(f"Bid book callback failed: {e}", exc_info=True)
+        return True
+
+    def claim(self):
+        """Taken by the partition before applying the command; False if it was cancelled"""
+        with self._lock:
+            if self._cancelled:
+                return False
+            self._claimed = True
+            return True
+
+    def cancel(self):
+        """Withdraw a command the partition hasn't started on. Returns False if it may still commit."""
+        with self._lock:
+            if self._claimed or self._event.is_set():
+                return False
+            self._cancelled = True
+        self.set(rejection(BUSY, 503))
+        return True
+
+    def add_callback(self, callback):
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self.value)
+
+    def wait(self, timeout=BID_BOOK_TIMEOUT):
+        if not self._event.wait(timeout):
+            return None
+        return self.value
+
+
+class BidBookPartition:
+    """The books of one partition plus the thread that owns them"""
+
+    def __init__(self, manager, index):
+        self.manager = manager
+        self.index = index
+        self.lock = None
+        self.books = OrderedDict()
+        self._commands = queue.Queue()
+        self._pending = []
+        self._thread = None
+        self._guard = threading.Lock()
+        self._retry_at = 0.0
+        self._last_flush = time.monotonic()
+        self.flushed_batches = 0
+        self.flushed_bids = 0
+        self.failed_bids = 0
+        self.cancelled_bids = 0
+
+    @property
+    def owned(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def acquire(self):
+        """Claim the partition if nobody owns it. Returns True if this process owns it."""
+        if self.owned:
+            return True
+        with self._guard:
+            if self.owned:
+                return True
+            if time.monotonic() < self._retry_at:
+                return False
+            if self.lock is None:
+                self.lock = LeaderLock(
+                    engine=self.manager.get_engine(),
+                    lock_file=os.path.join(BID_BOOK_LOCK_DIR, f'partition-{self.index}.lock'),
+                    key=BID_BOOK_LOCK_KEY + self.index
+                )
+            if not self.lock.acquire():
+                self._retry_at = time.monotonic() + BID_BOOK_ACQUIRE_RETRY
+                return False
+            # New owner: whatever another process knew is reloaded from the database
+            self.books.clear()
+            self._thread = threading.Thread(target=self._run, name=f'bid-book-{self.index}', daemon=True)
+            self._thread.start()
+            logger.info(f"Bid book partition {self.index} owned by this worker")
+            return True
+
+    def submit(self, kind, auction_id, **params):
+        future = BidFuture()
+        self._commands.put((kind, auction_id, params, future))
+        return future
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'partition': self.index,
+            'owned': self.owned,
+            'books': len(self.books),
+            'pending': len(self._pending),
+            'queued': self._commands.qsize(),
+            'flushed_batches': self.flushed_batches,
+            'flushed_bids': self.flushed_bids,
+            'failed_bids': self.failed_bids,
+            'cancelled_bids': self.cancelled_bids,
+        }
+
+    def _run(self):
+        stopping = self.manager.stopping
+        while not stopping.is_set():
+            timeout = BID_BOOK_FLUSH_INTERVAL if self._pending else 1.0
+            try:
+                commands = [self._commands.get(timeout=timeout)]
+            except queue.Empty:
+                commands = []
+            # Drain whatever queued up meanwhile: the whole burst shares one flush
+            while len(commands) < BID_BOOK_MAX_BATCH:
+                try:
+                    commands.append(self._commands.get_nowait())
+                except queue.Empty:
+                    break
+            for command in commands:
+                try:
+                    self._apply(*command)
+                except Exception as e:
+                    logger.error(f"Bid book command failed: {e}", exc_info=True)
+                    command[3].set(rejection('Failed to place bid', 500))
+            if self._pending and (self.manager.sync_ack or
+                                  time.monotonic() - self._last_flush >= BID_BOOK_FLUSH_INTERVAL):
+                self._flush()
+            self._evict_idle()
+        if self._pending:
+            self._flush()
+        self.lock.release()
+
+    def _apply(self, kind, auction_id, params, future):
+        if kind == 'evict':
+            # auction_id None drops every book in the partition
+            if any(auction_id in (None, placement.auction_id) for placement in self._pending):
+                self._flush()
+            if auction_id is None:
+                self.books.clear()
+            else:
+                self.books.pop(auction_id, None)
+            future.set(True)
+            return
+
+        if not future.claim():
+            # The bidder already got a timeout answer for this one
+            self.cancelled_bids += 1
+            return
+        book = self._book(auction_id)
+        if book is None:
+            future.set(rejection('Auction not found', 404))
+            return
+        try:
+            placement = book.place(
+                params['user_id'], params['amount'], params.get('max_amount'), params['now'],
+                self.manager.anti_snipe_threshold, self.manager.anti_snipe_extension
+            )
+        except BidRejected as e:
+            future.set(rejection(e.message, e.status))
+            return
+        placement.future = future
+        self._pending.append(placement)
+        if not self.manager.sync_ack:
+            future.set(placement.result())
+
+    def _book(self, auction_id):
+        book = self.books.get(auction_id)
+        if book is not None:
+            self.books.move_to_end(auction_id)
+            return book
+        # A reload must see this auction's unflushed bids
+        if any(placement.auction_id == auction_id for placement in self._pending):
+            self._flush()
+        book = self.manager.load(auction_id)
+        if book is None:
+            return None
+        self.books[auction_id] = book
+        while len(self.books) > BID_BOOK_MAX_AUCTIONS:
+            self.books.popitem(last=False)
+        return book
+
+    def _flush(self):
+        placements, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        try:
+            # {auction_id: reason} for auctions the database refused (e.g. bought now or settled meanwhile)
+            failed = {auction_id: rejection(reason) for auction_id, reason in self.manager.persist(placements).items()}
+        except Exception as e:
+            logger.error(f"Bid book flush of {len(placements)} bid(s) failed: {e}", exc_info=True)
+            failed = {placement.auction_id: rejection('Failed to place bid', 500) for placement in placements}
+        for placement in placements:
+            error = failed.get(placement.auction_id)
+            if error:
+                # The book disagrees with the database: reload it on the next bid
+                self.books.pop(placement.auction_id, None)
+                self.failed_bids += 1
+                if not placement.future.set(error):
+                    logger.warning(f"Dropped an acknowledged bid on auction {placement.auction_id}: {error['error']}")
+            else:
+                self.flushed_bids += 1
+                placement.future.set(placement.result())
+        self.flushed_batches += 1
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - BID_BOOK_IDLE_TTL
+        pending_ids = {placement.auction_id for placement in self._pending}
+        for auction_id in [auction_id for auction_id, book in self.books.items()
+                           if book.last_used < cutoff and auction_id not in pending_ids]:
+            del self.books[auction_id]
+
+
+class BidBookManager:
+    """Routes bids to the owning partition, locally or over the event bus"""
+
+    def __init__(self, app, load_fn, persist_fn, engine_fn, bus=None, partitions=BID_BOOK_PARTITIONS,
+                 enabled=BID_BOOK_ENABLED, sync_ack=BID_BOOK_SYNC_ACK, timeout=BID_BOOK_TIMEOUT,
+                 anti_snipe_threshold=120, anti_snipe_extension=120):
+        self.app = app
+        self.load_fn = load_fn
+        self.persist_fn = persist_fn
+        self.engine_fn = engine_fn
+        self.bus = bus
+        self.enabled = enabled
+        self.sync_ack = sync_ack
+        self.timeout = timeout
+        self._verified = False
+        self.anti_snipe_threshold = anti_snipe_threshold
+        self.anti_snipe_extension = anti_snipe_extension
+        self.partitions = [BidBookPartition(self, index) for index in range(max(1, partitions))]
+        self.stopping = threading.Event()
+        self._forwarded = {}
+        self._forwarded_lock = threading.Lock()
+        # Forwarded bids this process owns and hasn't answered yet, by request id (for cancels)
+        self._remote = {}
+        # Cancels that arrived before their request
+        self._cancelled = OrderedDict()
+        if bus is not None:
+            bus.subscribe(BUS_TOPIC, self._on_message)
+
+    def partition_for(self, auction_id):
+        return self.partitions[auction_id % len(self.partitions)]
+
+    def get_engine(self):
+        with self.app.app_context():
+            return self.engine_fn()
+
+    def ready(self):
+        """Whether bids go through the book. The first call checks that partition owners are reachable
+        over the bus and otherwise disables the book, so this process uses the database path."""
+        if not self.enabled or self._verified:
+            return self.enabled
+        with self._forwarded_lock:
+            if not self._verified:
+                problem = self.forwarding_problem()
+                if problem:
+                    logger.error(f"Bid book disabled, bids use the database: {problem}")
+                    self.enabled = False
+                self._verified = True
+        return self.enabled
+
+    def forwarding_problem(self):
+        """Why bids couldn't be forwarded to every possible partition owner, or None"""
+        if self.bus is None:
+            return 'no event bus to forward bids over'
+        if not self.bus.started:
+            self.bus.start()
+        reach = self.bus.reach()
+        owners = 'cluster' if self.get_engine().dialect.name == 'postgresql' and not BID_BOOK_SINGLE_HOST else 'host'
+        if SCOPES.index(reach) < SCOPES.index(owners):
+            return (f"partitions can be owned by any process in the {owners} but the "
+                    f"{self.bus.backend} event bus only reaches this {reach}")
+        return None
+
+    def place(self, auction_id, user_id, amount, max_amount, now):
+        """Place a bid through the book that owns the auction. Returns a result dict."""
+        partition = self.partition_for(auction_id)
+        if partition.acquire():
+            future = partition.submit('bid', auction_id, user_id=user_id, amount=amount,
+                                      max_amount=max_amount, now=now)
+            result = future.wait(self.timeout)
+            if result is None:
+                # Only a bid the partition never started on is safe to retry
+                if future.cancel():
+                    return future.value
+                return future.value if future.done else pending(PENDING)
+            return result
+        request_id, future = self._forward(auction_id, user_id, amount, max_amount, now)
+        result = future.wait(self.timeout)
+        self._forget(request_id)
+        if result is None:
+            # Withdraw it if the owner hasn't started on it (or hasn't even received it)
+            self.bus.publish(BUS_TOPIC, {'kind': 'cancel', 'request_id': request_id})
+            if future.acknowledged:
+                return pending(PENDING)
+            return rejection(BUSY, 503)
+        return result
+
+    def evict(self, auction_id):
+        """Drop a book after the auction changed outside it (after flushing its pending bids)"""
+        partition = self.partition_for(auction_id)
+        if partition.owned:
+            partition.submit('evict', auction_id)
+
+    def clear(self, timeout=BID_BOOK_TIMEOUT):
+        """Flush and drop every book this process owns (e.g. after bulk changes to auctions)"""
+        futures = [partition.submit('evict', None) for partition in self.partitions if partition.owned]
+        for future in futures:
+            future.wait(timeout)
+
+    def load(self, auction_id):
+        with self.app.app_context():
+            return self.load_fn(auction_id)
+
+    def persist(self, placements):
+        with self.app.app_context():
+            return self.persist_fn(placements)
+
+    def stop(self, timeout=5):
+        """Stop the partition threads, flushing their pending bids"""
+        self.stopping.set()
+        for partition in self.partitions:
+            partition.join(timeout)
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'sync_ack': self.sync_ack,
+            'partitions': [partition.stats() for partition in self.partitions],
+            'forwarding': len(self._forwarded),
+        }
+
+    def _forward(self, auction_id, user_id, amount, max_amount, now):
+        future = BidFuture()
+        request_id = uuid.uuid4().hex
+        with self._forwarded_lock:
+            self._forwarded[request_id] = future
+        self.bus.publish(BUS_TOPIC, {
+            'kind': 'request', 'request_id': request_id, 'auction_id': auction_id, 'user_id': user_id,
+            'amount': amount, 'max_amount': max_amount, 'now': now.timestamp(), 'sent_at': time.time(),
+        })
+        return request_id, future
+
+    def _forget(self, request_id):
+        with self._forwarded_lock:
+            self._forwarded.pop(request_id, None)
+
+    def _on_message(self, data):
+        kind = data.get('kind')
+        if kind == 'request':
+            partition = self.partition_for(data['auction_id'])
+            if not partition.owned:
+                return
+            request_id = data['request_id']
+            with self._forwarded_lock:
+                cancelled = self._cancelled.pop(request_id, None) is not None
+            if cancelled or time.time() - data.get('sent_at', 0) > self.timeout / 2:
+                # Too late to acknowledge before the requester gives up and tells the bidder to retry
+                return
+            self.bus.publish(BUS_TOPIC, {'kind': 'ack', 'request_id': request_id})
+            future = partition.submit(
+                'bid', data['auction_id'], user_id=data['user_id'], amount=data['amount'],
+                max_amount=data.get('max_amount'), now=datetime.fromtimestamp(data['now'], timezone.utc)
+            )
+            with self._forwarded_lock:
+                self._remote[request_id] = future
+
+            def reply(value):
+                with self._forwarded_lock:
+                    self._remote.pop(request_id, None)
+                self.bus.publish(BUS_TOPIC, {'kind': 'reply', 'request_id': request_id, 'result': value})
+            future.add_callback(reply)
+        elif kind == 'ack':
+            with self._forwarded_lock:
+                future = self._forwarded.get(data.get('request_id'))
+            if future is not None:
+                future.acknowledged = True
+        elif kind == 'cancel':
+            request_id = data.get('request_id')
+            with self._forwarded_lock:
+                future = self._remote.get(request_id)
+                if future is None:
+                    self._cancelled[request_id] = True
+                    while len(self._cancelled) > 10000:
+                        self._cancelled.popitem(last=False)
+            if future is not None:
+                future.cancel()
+        elif kind == 'reply':
+            with self._forwarded_lock:
+                future = self._forwarded.get(data.get('request_id'))
+            if future is not None:
+                future.set(data.get('result'))
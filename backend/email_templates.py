@@ -0,0 +1,230 @@
+"""
+Email Templates for ZUBID
+Message templates in every supported language (UserPreference.language: en, ku, ar),
+compiled once at import. Compiling splits each template into its static text and
+its fields and pre-renders everything static - the HTML-escaped text, line breaks
+and the per-language layout (direction, footer, styles) - so rendering a message
+only escapes and joins the personalised values.
+
+Templates use str.format field names: render('password_reset', 'ar', username=..., code=..., minutes=15).
+"""
+
+import html
+from collections import namedtuple
+from string import Formatter
+
+DEFAULT_LANGUAGE = 'en'
+RTL_LANGUAGES = {'ar', 'ku'}
+
+RenderedMessage = namedtuple('RenderedMessage', ['subject', 'text', 'html', 'sms'])
+
+LAYOUT = """<!DOCTYPE html>
+<html lang="{lang}" dir="{dir}">
+<head>
+    <meta charset="utf-8">
+    <style>
+        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+        .header {{ background: linear-gradient(135deg, #f97316, #ea580c); color: white; padding: 20px; text-align: center; border-radius: 8px 8px 0 0; }}
+        .content {{ background: #f8fafc; padding: 30px; border-radius: 0 0 8px 8px; }}
+        .code {{ font-size: 32px; font-weight: bold; color: #f97316; letter-spacing: 8px; text-align: center; padding: 20px; background: white; border-radius: 8px; margin: 20px 0; direction: ltr; }}
+        .footer {{ text-align: center; color: #64748b; font-size: 12px; margin-top: 20px; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🔐 ZUBID Auction</h1>
+        </div>
+        <div class="content">
+{{content}}
+        </div>
+        <div class="footer">
+            <p>{footer_automated}</p>
+            <p>{footer_ignore}</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+FOOTERS = {
+    'en': ("This is an automated message from ZUBID Auction Platform.",
+           "If you didn't request this, please ignore this email."),
+    'ar': ("هذه رسالة تلقائية من منصة مزادات ZUBID.",
+           "إذا لم تطلب ذلك، يرجى تجاهل هذه الرسالة."),
+    'ku': ("ئەمە نامەیەکی خۆکارە لە پلاتفۆرمی مەزادی ZUBID.",
+           "ئەگەر تۆ داوات نەکردووە، تکایە ئەم ئیمەیڵە پشتگوێ بخە."),
+}
+
+# name -> language -> {'subject', 'body', 'sms'}; fields listed in HIGHLIGHT are shown as a code box
+TEMPLATES = {
+    'password_reset': {
+        'en': {
+            'subject': "🔐 ZUBID - Password Reset Code",
+            'body': """Hello {username},
+
+You requested to reset your password for your ZUBID Auction account.
+
+Your verification code is:
+
+{code}
+
+This code will expire in {minutes} minutes.
+
+If you didn't request this, please ignore this email and your password will remain unchanged.
+
+Best regards,
+ZUBID Auction Team""",
+            'sms': "ZUBID: Your password reset code is {code}. This code expires in {minutes} minutes.",
+        },
+        'ar': {
+            'subject': "🔐 ZUBID - رمز إعادة تعيين كلمة المرور",
+            'body': """مرحباً {username}،
+
+لقد طلبت إعادة تعيين كلمة المرور لحسابك في مزادات ZUBID.
+
+رمز التحقق الخاص بك هو:
+
+{code}
+
+تنتهي صلاحية هذا الرمز خلال {minutes} دقيقة.
+
+إذا لم تطلب ذلك، يرجى تجاهل هذه الرسالة وستبقى كلمة المرور الخاصة بك دون تغيير.
+
+مع أطيب التحيات،
+فريق مزادات ZUBID""",
+            'sms': "ZUBID: رمز إعادة تعيين كلمة المرور هو {code}. تنتهي صلاحيته خلال {minutes} دقيقة.",
+        },
+        'ku': {
+            'subject': "🔐 ZUBID - کۆدی گۆڕینی وشەی نهێنی",
+            'body': """سڵاو {username}،
+
+داوای گۆڕینی وشەی نهێنیت کردووە بۆ هەژمارەکەت لە مەزادی ZUBID.
+
+کۆدی پشتڕاستکردنەوەکەت:
+
+{code}
+
+ئەم کۆدە دوای {minutes} خولەک بەسەردەچێت.
+
+ئەگەر تۆ ئەم داواکارییەت نەکردووە، تکایە ئەم ئیمەیڵە پشتگوێ بخە و وشەی نهێنییەکەت وەک خۆی دەمێنێتەوە.
+
+لەگەڵ ڕێزدا،
+تیمی مەزادی ZUBID""",
+            'sms': "ZUBID: کۆدی گۆڕینی وشەی نهێنییەکەت: {code}. دوای {minutes} خولەک بەسەردەچێت.",
+        },
+    },
+}
+
+HIGHLIGHT = {'code'}
+
+
+def normalize_language(language):
+    """Map a preference or header value ('ar', 'ar-IQ', None) to a supported language"""
+    language = (language or DEFAULT_LANGUAGE).split('-')[0].lower()
+    return language if language in FOOTERS else DEFAULT_LANGUAGE
+
+
+class CompiledTemplate:
+    """A str.format template split once into (static, field) parts"""
+
+    __slots__ = ('parts', 'html')
+
+    def __init__(self, source, as_html=False):
+        self.html = as_html
+        self.parts = []
+        for literal, field, _, _ in Formatter().parse(source):
+            if as_html:
+                literal = html.escape(literal, quote=False).replace('\n', '<br>')
+            self.parts.append((literal, field))
+
+    @property
+    def fields(self):
+        return {field for _, field in self.parts if field is not None}
+
+    def render(self, context):
+        out = []
+        for static, field in self.parts:
+            out.append(static)
+            if field is None:
+                continue
+            value = str(context[field])
+            if self.html:
+                value = html.escape(value)
+                if field in HIGHLIGHT:
+                    value = f'<div class="code">{value}</div>'
+            out.append(value)
+        return ''.join(out)
+
+
+class Layout:
+    """The per-language HTML document around a message, rendered once"""
+
+    __slots__ = ('head', 'tail')
+
+    def __init__(self, language):
+        automated, ignore = FOOTERS[language]
+        document = LAYOUT.format(
+            lang=language,
+            dir='rtl' if language in RTL_LANGUAGES else 'ltr',
+            footer_automated=html.escape(automated),
+            footer_ignore=html.escape(ignore),
+        )
+        self.head, self.tail = document.split('{content}')
+
+    def wrap(self, fragment):
+        return self.head + fragment + self.tail
+
+
+class EmailTemplate:
+    """One message in one language: subject, plain text, HTML and SMS variants"""
+
+    def __init__(self, name, language, source, layout):
+        self.name = name
+        self.language = language
+        self.layout = layout
+        self.subject = CompiledTemplate(source['subject'])
+        self.text = CompiledTemplate(source['body'])
+        self.html = CompiledTemplate(source['body'], as_html=True)
+        self.sms = CompiledTemplate(source['sms']) if source.get('sms') else None
+
+    def render(self, **context):
+        return RenderedMessage(
+            subject=self.subject.render(context),
+            text=self.text.render(context),
+            html=self.layout.wrap(self.html.render(context)),
+            sms=self.sms.render(context) if self.sms else None,
+        )
+
+
+class TemplateRegistry:
+    """Every template compiled for every language it has"""
+
+    def __init__(self, templates=TEMPLATES):
+        self.layouts = {language: Layout(language) for language in FOOTERS}
+        self.templates = {
+            (name, language): EmailTemplate(name, language, source, self.layouts[language])
+            for name, variants in templates.items()
+            for language, source in variants.items()
+        }
+
+    def get(self, name, language=DEFAULT_LANGUAGE):
+        """The template in the user's language, falling back to English"""
+        template = self.templates.get((name, normalize_language(language)))
+        if template is None:
+            template = self.templates[(name, DEFAULT_LANGUAGE)]
+        return template
+
+    def render(self, name, language=DEFAULT_LANGUAGE, **context):
+        return self.get(name, language).render(**context)
+
+    def wrap_plain(self, body, language=DEFAULT_LANGUAGE):
+        """HTML version of a free-form plain-text body in the standard layout"""
+        fragment = html.escape(body, quote=False).replace('\n', '<br>')
+        return self.layouts[normalize_language(language)].wrap(fragment)
+
+
+registry = TemplateRegistry()
+render = registry.render
+wrap_plain = registry.wrap_plain
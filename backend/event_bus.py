@@ -0,0 +1,312 @@
+"""
+Event Bus for ZUBID
+Cross-worker publish/subscribe for auction, notification and admin events.
+gunicorn runs several worker processes, so in-process state (SSE hub, settlement
+heap, caches) needs every worker to hear about changes made by the others.
+
+Backends (selected by EVENT_BUS_URL):
+    local                   - in-process only (tests, single worker)
+    unix:///path/to/dir     - Unix datagram sockets between workers on one host
+    redis://host:6379/0     - Redis pub/sub for multi-host deployments
+Unset defaults to unix sockets where supported, otherwise local.
+
+The socket directory is private to one deployment: by default it is
+zubid-events-<id> in the temp dir, where the id is derived from the app's
+instance path and secret key, so two deployments on one host never hear each
+other. It is created with mode 0700 and refused (local delivery only) if it
+already exists owned by another user or open to group/others, so no other
+local user can read events or inject them.
+"""
+
+import os
+import hashlib
+import json
+import logging
+import socket
+import stat
+import tempfile
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+EVENT_BUS_URL = os.getenv('EVENT_BUS_URL', '')
+EVENT_BUS_CHANNEL = os.getenv('EVENT_BUS_CHANNEL', 'zubid:events')
+SOCKET_DIR_PREFIX = os.path.join(tempfile.gettempdir(), 'zubid-events')
+# Linux default datagram limit is ~208KB; larger messages are delivered locally only
+MAX_DATAGRAM_SIZE = 200 * 1024
+# Which processes a bus reaches, narrowest first
+SCOPES = ('process', 'host', 'cluster')
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+def deployment_id(*parts):
+    """Short stable id for one deployment (e.g. from its instance path and secret key)"""
+    return hashlib.sha256('\0'.join(str(part) for part in parts).encode()).hexdigest()[:16]
+
+
+def private_directory(path):
+    """Create path with mode 0700, or check an existing one is ours and private. Raises OSError."""
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise OSError(f"{path} is not a directory")
+    if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+        raise OSError(f"{path} is owned by uid {info.st_uid}, not this user")
+    if info.st_mode & 0o077:
+        raise OSError(f"{path} is accessible to other users (mode {stat.S_IMODE(info.st_mode):o})")
+    return path
+
+
+class LocalEventBus:
+    """In-process bus: handlers run synchronously in the publisher's thread"""
+
+    backend = 'local'
+    scope = 'process'
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self.started = False
+        self.published_total = 0
+        self.received_total = 0
+        self.errors_total = 0
+
+    def subscribe(self, topic, handler):
+        """Call handler(data) for every message published on topic, from any worker"""
+        with self._lock:
+            self._handlers.setdefault(topic, []).append(handler)
+
+    def unsubscribe(self, topic, handler):
+        with self._lock:
+            handlers = self._handlers.get(topic, [])
+            if handler in handlers:
+                handlers.remove(handler)
+
+    def publish(self, topic, data):
+        """Deliver to local handlers, then to the other workers"""
+        self.published_total += 1
+        self._dispatch(topic, data)
+        self._send(topic, data)
+
+    def start(self):
+        self.started = True
+        return True
+
+    def stop(self):
+        self.started = False
+
+    def reach(self):
+        """Processes this bus actually delivers to (see SCOPES); a bus that failed to start is local only"""
+        return self.scope if self.started else 'process'
+
+    def stats(self):
+        return {
+            'backend': self.backend,
+            'started': self.started,
+            'published_total': self.published_total,
+            'received_total': self.received_total,
+            'errors_total': self.errors_total,
+        }
+
+    def _send(self, topic, data):
+        pass
+
+    def _encode(self, topic, data):
+        return json.dumps(
+            {'topic': topic, 'data': data, 'origin': self.origin, 'ts': time.time()},
+            default=str, separators=(',', ':')
+        ).encode('utf-8')
+
+    def _receive(self, raw):
+        """Handle a message from another worker"""
+        try:
+            message = json.loads(raw)
+        except (TypeError, ValueError):
+            self.errors_total += 1
+            return
+        if message.get('origin') == self.origin:
+            return
+        self.received_total += 1
+        self._dispatch(message.get('topic'), message.get('data'))
+
+    def _dispatch(self, topic, data):
+        with self._lock:
+            handlers = list(self._handlers.get(topic, ()))
+        for handler in handlers:
+            try:
+                handler(data)
+            except Exception as e:
+                # One broken subscriber must not stop the others (or fail the publishing request)
+                self.errors_total += 1
+                logger.error(f"Event bus handler for '{topic}' failed: {e}", exc_info=True)
+
+
+class SocketEventBus(LocalEventBus):
+    """Single-host bus: each worker binds a Unix datagram socket in the deployment's directory"""
+
+    backend = 'unix'
+    scope = 'host'
+
+    def __init__(self, directory=SOCKET_DIR_PREFIX):
+        super().__init__()
+        self.directory = directory
+        self.path = None
+        self._sock = None
+        self._send_sock = None
+        self._thread = None
+
+    def start(self):
+        # Called after fork: the socket path must be unique per worker process
+        if self.started:
+            return True
+        try:
+            private_directory(self.directory)
+            self.path = os.path.join(self.directory, f'{os.getpid()}-{self.origin[:8]}.sock')
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.bind(self.path)
+            self._send_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._send_sock.setblocking(False)
+        except OSError as e:
+            logger.warning(f"Event bus socket unavailable ({self.directory}): {e}. Using local delivery only.")
+            self._sock = None
+            return False
+        self.started = True
+        self._thread = threading.Thread(target=self._listen, name='event-bus', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self.started = False
+        for sock in (self._sock, self._send_sock):
+            if sock is not None:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+        self._sock = self._send_sock = None
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def peers(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [os.path.join(self.directory, name) for name in names
+                if name.endswith('.sock') and os.path.join(self.directory, name) != self.path]
+
+    def _send(self, topic, data):
+        if self._send_sock is None:
+            return
+        raw = self._encode(topic, data)
+        if len(raw) > MAX_DATAGRAM_SIZE:
+            logger.warning(f"Event '{topic}' too large for the socket bus ({len(raw)} bytes)")
+            return
+        for peer in self.peers():
+            try:
+                self._send_sock.sendto(raw, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker exited without cleaning up (e.g. killed) - remove its socket
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except OSError as e:
+                # Peer's buffer is full; it catches up from the database
+                self.errors_total += 1
+                logger.warning(f"Event bus send to {peer} failed: {e}")
+
+    def _listen(self):
+        while self.started and self._sock is not None:
+            try:
+                raw = self._sock.recv(MAX_DATAGRAM_SIZE + 1024)
+            except OSError:
+                break
+            self._receive(raw)
+
+
+class RedisEventBus(LocalEventBus):
+    """Multi-host bus over Redis pub/sub"""
+
+    backend = 'redis'
+    scope = 'cluster'
+
+    def __init__(self, url, channel=EVENT_BUS_CHANNEL):
+        super().__init__()
+        self.url = url
+        self.channel = channel
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = None
+        self._thread = None
+
+    def start(self):
+        if self.started:
+            return True
+        try:
+            self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(self.channel)
+        except Exception as e:
+            logger.warning(f"Event bus could not subscribe to Redis: {e}. Using local delivery only.")
+            return False
+        self.started = True
+        self._thread = threading.Thread(target=self._listen, name='event-bus', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self.started = False
+        if self._pubsub is not None:
+            try:
+                self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = None
+
+    def _send(self, topic, data):
+        try:
+            self._client.publish(self.channel, self._encode(topic, data))
+        except Exception as e:
+            self.errors_total += 1
+            logger.warning(f"Event bus publish to Redis failed: {e}")
+
+    def _listen(self):
+        while self.started:
+            try:
+                for message in self._pubsub.listen():
+                    if not self.started:
+                        return
+                    if message.get('type') == 'message':
+                        self._receive(message['data'])
+            except Exception as e:
+                if not self.started:
+                    return
+                logger.warning(f"Event bus Redis connection lost: {e}. Reconnecting...")
+                time.sleep(1)
+
+
+def create_event_bus(url=EVENT_BUS_URL, namespace=''):
+    """Build the bus configured by EVENT_BUS_URL; namespace (see deployment_id) names the default socket dir"""
+    if url.startswith(('redis://', 'rediss://')):
+        if redis is None:
+            logger.warning("EVENT_BUS_URL is a Redis URL but the redis package is not installed. Using local bus.")
+            return LocalEventBus()
+        return RedisEventBus(url)
+    default_directory = f'{SOCKET_DIR_PREFIX}-{namespace}' if namespace else SOCKET_DIR_PREFIX
+    if url.startswith('unix://'):
+        return SocketEventBus(url[len('unix://'):] or default_directory)
+    if url == 'local' or not hasattr(socket, 'AF_UNIX'):
+        return LocalEventBus()
+    return SocketEventBus(default_directory)
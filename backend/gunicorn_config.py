@@ -10,8 +10,14 @@ backlog = 2048
 
 # Worker processes
 workers = int(os.getenv('WORKERS', multiprocessing.cpu_count() * 2 + 1))
-worker_class = 'sync'
-worker_connections = 1000
+# Threaded workers so long-lived SSE streams (/api/auctions/<id>/stream) don't pin a whole process.
+# A stream still holds one thread for up to SSE_MAX_DURATION, so realtime.py caps streams per worker
+# at SSE_MAX_STREAMS (default threads // 2) and sends further viewers back to polling.
+# Use 'gevent' (pip install gevent) for hundreds of concurrent viewers per worker.
+worker_class = os.getenv('WORKER_CLASS', 'gthread')
+threads = int(os.getenv('THREADS', '8'))
+# Connections per worker on gevent/eventlet; bounds SSE_MAX_STREAMS there
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', '1000'))
 timeout = int(os.getenv('TIMEOUT', '120'))
 keepalive = 5
 
@@ -0,0 +1,184 @@
+"""
+Idempotency Keys for ZUBID
+Replays the stored response when a client retries a POST with the same Idempotency-Key,
+so a bid, buy-now or payment retried over a flaky network is applied exactly once and
+the retry never reaches the auction row lock.
+
+Keys are scoped per user and kept for IDEMPOTENCY_TTL seconds in a bounded in-process
+LRU, optionally shared through Redis (IDEMPOTENCY_STORE_URL) so a retry that lands on
+another worker is still recognised. A key reused for a different request is refused,
+and a retry that arrives while the first attempt is still running gets a conflict
+instead of running twice.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Idempotency configuration
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '3600'))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv('IDEMPOTENCY_MAX_KEYS', '10000'))
+IDEMPOTENCY_STORE_URL = os.getenv('IDEMPOTENCY_STORE_URL', '')
+# An attempt that never completed (worker killed mid-request) stops blocking retries after this
+IDEMPOTENCY_PENDING_TTL = int(os.getenv('IDEMPOTENCY_PENDING_TTL', '60'))
+MAX_KEY_LENGTH = 255
+
+# begin() outcomes
+NEW = 'new'
+REPLAY = 'replay'
+IN_PROGRESS = 'in_progress'
+MISMATCH = 'mismatch'
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+def fingerprint(method, path, body):
+    """Identify the request a key was first used for"""
+    digest = hashlib.sha256()
+    digest.update(f'{method} {path}\n'.encode('utf-8'))
+    digest.update(body or b'')
+    return digest.hexdigest()
+
+
+class StoredResponse:
+    """Enough of a response to replay it"""
+
+    __slots__ = ('status', 'body', 'mimetype')
+
+    def __init__(self, status, body, mimetype='application/json'):
+        self.status = status
+        self.body = body
+        self.mimetype = mimetype
+
+    def to_dict(self):
+        return {'status': self.status, 'body': self.body, 'mimetype': self.mimetype}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['status'], data['body'], data.get('mimetype', 'application/json'))
+
+
+class IdempotencyStore:
+    """Bounded TTL map of scope -> (fingerprint, response or None while in flight)"""
+
+    def __init__(self, ttl=IDEMPOTENCY_TTL, max_keys=IDEMPOTENCY_MAX_KEYS, shared_url=IDEMPOTENCY_STORE_URL,
+                 pending_ttl=IDEMPOTENCY_PENDING_TTL, namespace='zubid:idempotency'):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.pending_ttl = pending_ttl
+        self.namespace = namespace
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.replays = 0
+        self._shared = None
+        if shared_url:
+            if redis is None:
+                logger.warning("IDEMPOTENCY_STORE_URL is set but the redis package is not installed. Using in-process store only.")
+            else:
+                try:
+                    self._shared = redis.Redis.from_url(shared_url)
+                except Exception as e:
+                    logger.warning(f"Idempotency shared store unavailable: {e}")
+
+    def begin(self, scope, request_fingerprint):
+        """Claim a key for a new attempt. Returns (NEW|REPLAY|IN_PROGRESS|MISMATCH, StoredResponse or None)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(scope)
+            if entry is not None and entry[0] <= now:
+                del self._entries[scope]
+                entry = None
+            if entry is None:
+                if self._shared is None:
+                    self._put(scope, now + self.pending_ttl, request_fingerprint, None)
+                    return NEW, None
+            else:
+                return self._outcome(entry[1], entry[2], request_fingerprint)
+        return self._shared_begin(scope, request_fingerprint, now)
+
+    def complete(self, scope, request_fingerprint, response):
+        """Store the response of a finished attempt for replay"""
+        with self._lock:
+            self._put(scope, time.monotonic() + self.ttl, request_fingerprint, response)
+        if self._shared is not None:
+            try:
+                self._shared.set(self._shared_key(scope), json.dumps({'f': request_fingerprint, 'r': response.to_dict()}),
+                                 ex=self.ttl)
+            except Exception as e:
+                logger.warning(f"Idempotency shared store write failed: {e}")
+
+    def release(self, scope):
+        """Forget an attempt that failed, so the client's retry runs again"""
+        with self._lock:
+            self._entries.pop(scope, None)
+        if self._shared is not None:
+            try:
+                self._shared.delete(self._shared_key(scope))
+            except Exception as e:
+                logger.warning(f"Idempotency shared store delete failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            'keys': len(self._entries),
+            'max_keys': self.max_keys,
+            'replays': self.replays,
+            'shared_store': self._shared is not None,
+        }
+
+    def _outcome(self, stored_fingerprint, response, request_fingerprint):
+        if stored_fingerprint != request_fingerprint:
+            return MISMATCH, None
+        if response is None:
+            return IN_PROGRESS, None
+        self.replays += 1
+        return REPLAY, response
+
+    def _put(self, scope, expires_at, request_fingerprint, response):
+        self._entries[scope] = (expires_at, request_fingerprint, response)
+        self._entries.move_to_end(scope)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    def _shared_key(self, scope):
+        return f'{self.namespace}:{scope}'
+
+    def _shared_begin(self, scope, request_fingerprint, now):
+        key = self._shared_key(scope)
+        try:
+            # SET NX claims the key atomically across workers; the loser reads the winner's entry
+            if self._shared.set(key, json.dumps({'f': request_fingerprint}), nx=True, ex=self.pending_ttl):
+                with self._lock:
+                    self._put(scope, now + self.pending_ttl, request_fingerprint, None)
+                return NEW, None
+            raw = self._shared.get(key)
+        except Exception as e:
+            logger.warning(f"Idempotency shared store unavailable, using in-process store: {e}")
+            with self._lock:
+                self._put(scope, now + self.pending_ttl, request_fingerprint, None)
+            return NEW, None
+        if not raw:
+            # Expired between SET and GET; treat as in flight rather than risk a double apply
+            return IN_PROGRESS, None
+        data = json.loads(raw)
+        response = StoredResponse.from_dict(data['r']) if 'r' in data else None
+        if response is not None:
+            with self._lock:
+                self._put(scope, now + self.ttl, data['f'], response)
+        with self._lock:
+            return self._outcome(data['f'], response, request_fingerprint)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""Migration script to add and backfill the denormalized bid counter columns on Auction"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app import app, db, Auction, refresh_auction_bid_stats
+from sqlalchemy import inspect, text
+
+BATCH_SIZE = int(os.getenv('BACKFILL_BATCH_SIZE', '500'))
+
+COUNTER_COLUMNS = {
+    'bid_count': 'INTEGER NOT NULL DEFAULT 0',
+    'unique_bidder_count': 'INTEGER NOT NULL DEFAULT 0',
+    'highest_bidder_id': 'INTEGER',
+}
+
+def migrate_bid_counters():
+    """Add bid_count, unique_bidder_count and highest_bidder_id columns and recompute them from bids"""
+    with app.app_context():
+        try:
+            inspector = inspect(db.engine)
+            tables = inspector.get_table_names()
+
+            if 'auction' not in tables:
+                print("Auction table doesn't exist!")
+                return False
+
+            columns = [col['name'] for col in inspector.get_columns('auction')]
+            for col_name, col_type in COUNTER_COLUMNS.items():
+                if col_name not in columns:
+                    print(f"Adding {col_name} column to Auction table...")
+                    with db.engine.connect() as conn:
+                        with conn.begin():
+                            conn.execute(text(f"ALTER TABLE auction ADD COLUMN {col_name} {col_type}"))
+                    print(f"[OK] {col_name} column added successfully!")
+                else:
+                    print(f"[OK] {col_name} column already exists")
+
+            # Recompute in batches, one transaction per batch, so a large table doesn't hold long locks
+            auction_ids = [row[0] for row in db.session.query(Auction.id).order_by(Auction.id).all()]
+            print(f"\nBackfilling bid counters for {len(auction_ids)} auctions...")
+            updated = 0
+            for start in range(0, len(auction_ids), BATCH_SIZE):
+                batch = auction_ids[start:start + BATCH_SIZE]
+                updated += refresh_auction_bid_stats(batch)
+                db.session.commit()
+                print(f"  [OK] {updated}/{len(auction_ids)} auctions updated")
+
+            print(f"\n[OK] Bid counters backfilled for {updated} auctions!")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERROR] Error during migration: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+    return True
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Bid Counter Backfill Script")
+    print("=" * 60)
+    print()
+
+    if migrate_bid_counters():
+        print("\n[OK] Migration completed successfully!")
+        print("\nRe-run this script at any time to repair drifted counters.")
+    else:
+        print("\n[ERROR] Migration failed. Please check the error messages above.")
+        sys.exit(1)
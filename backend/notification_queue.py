@@ -0,0 +1,206 @@
+"""
+Notification Queue for ZUBID
+Producers (bids, buy-now, admin broadcasts) hand notifications to an in-process queue
+and return immediately; a single worker thread per process drains it and writes the
+rows in bulk, NOTIFICATION_BATCH_SIZE per statement and one commit per batch.
+
+A bid request therefore no longer pays for a second commit to tell the previous
+leader they were outbid, and a broadcast to every user is one job expanded into
+batched inserts instead of one commit per user inside the HTTP request.
+
+The queue is bounded (NOTIFICATION_QUEUE_MAX jobs). When it is full, or with
+NOTIFICATION_QUEUE_ASYNC=false, the producer writes its job inline instead.
+Queued notifications are held in memory only; the worker drains them on shutdown.
+"""
+
+import os
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Notification queue configuration
+NOTIFICATION_QUEUE_ASYNC = os.getenv('NOTIFICATION_QUEUE_ASYNC', 'true').lower() == 'true'
+NOTIFICATION_BATCH_SIZE = int(os.getenv('NOTIFICATION_BATCH_SIZE', '1000'))
+NOTIFICATION_QUEUE_MAX = int(os.getenv('NOTIFICATION_QUEUE_MAX', '10000'))
+
+
+class NotificationJob:
+    """One notification addressed to one or many users"""
+
+    __slots__ = ('user_ids', 'title', 'message', 'type', 'auction_id', 'created_at')
+
+    def __init__(self, user_ids, title, message, notification_type='info', auction_id=None, created_at=None):
+        self.user_ids = user_ids
+        self.title = title
+        self.message = message
+        self.type = notification_type
+        self.auction_id = auction_id
+        self.created_at = created_at or datetime.now(timezone.utc)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def rows(self, start=0, stop=None):
+        """Insert parameters for user_ids[start:stop]"""
+        return [
+            {
+                'user_id': user_id,
+                'title': self.title,
+                'message': self.message,
+                'type': self.type,
+                'auction_id': self.auction_id,
+                'is_read': False,
+                'created_at': self.created_at,
+            }
+            for user_id in self.user_ids[start:stop]
+        ]
+
+
+class NotificationQueue:
+    """Bounded job queue plus the worker thread that bulk-writes it through write_fn(rows)"""
+
+    def __init__(self, app, write_fn, asynchronous=NOTIFICATION_QUEUE_ASYNC,
+                 batch_size=NOTIFICATION_BATCH_SIZE, max_jobs=NOTIFICATION_QUEUE_MAX):
+        self.app = app
+        self.write_fn = write_fn
+        self.asynchronous = asynchronous
+        self.batch_size = max(1, batch_size)
+        self._jobs = queue.Queue(maxsize=max_jobs)
+        self._thread = None
+        self._guard = threading.Lock()
+        self._idle = threading.Condition()
+        self._unfinished = 0
+        self.stopping = threading.Event()
+        self.enqueued_total = 0
+        self.written_total = 0
+        self.failed_total = 0
+        self.batches_total = 0
+        self.inline_total = 0
+
+    def enqueue(self, user_ids, title, message, notification_type='info', auction_id=None):
+        """Queue a notification for one user id or a list of them. Returns the number of recipients."""
+        if not isinstance(user_ids, (list, tuple)):
+            user_ids = [user_ids]
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+        job = NotificationJob(user_ids, title, message, notification_type, auction_id)
+        self.enqueued_total += len(job)
+        if self.asynchronous and not self.stopping.is_set() and self._start():
+            with self._idle:
+                self._unfinished += 1
+            try:
+                self._jobs.put_nowait(job)
+                return len(job)
+            except queue.Full:
+                self._done(1)
+                logger.warning("Notification queue full, writing inline")
+        self.inline_total += 1
+        self._write_jobs([job])
+        return len(job)
+
+    def flush(self, timeout=10):
+        """Wait until every queued job has been written. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._unfinished:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def stop(self, timeout=10):
+        """Stop the worker after it drains the queue"""
+        self.stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def depth(self):
+        return self._jobs.qsize()
+
+    def stats(self):
+        return {
+            'asynchronous': self.asynchronous,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'queued_jobs': self._jobs.qsize(),
+            'batch_size': self.batch_size,
+            'enqueued_total': self.enqueued_total,
+            'written_total': self.written_total,
+            'failed_total': self.failed_total,
+            'batches_total': self.batches_total,
+            'inline_total': self.inline_total,
+        }
+
+    def _start(self):
+        # Started lazily so each gunicorn worker gets its own thread after the fork
+        if self._thread is not None and self._thread.is_alive():
+            return True
+        with self._guard:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='notification-writer', daemon=True)
+                self._thread.start()
+        return True
+
+    def _run(self):
+        while True:
+            try:
+                jobs = [self._jobs.get(timeout=1.0)]
+            except queue.Empty:
+                if self.stopping.is_set():
+                    return
+                continue
+            # Whatever queued up meanwhile shares the same batches
+            pending = len(jobs[0])
+            while pending < self.batch_size:
+                try:
+                    job = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                jobs.append(job)
+                pending += len(job)
+            try:
+                self._write_jobs(jobs)
+            finally:
+                self._done(len(jobs))
+
+    def _write_jobs(self, jobs):
+        batch = []
+        for job in jobs:
+            start = 0
+            while start < len(job):
+                stop = start + self.batch_size - len(batch)
+                batch.extend(job.rows(start, stop))
+                start = stop
+                if len(batch) >= self.batch_size:
+                    self._write_batch(batch)
+                    batch = []
+        if batch:
+            self._write_batch(batch)
+
+    def _write_batch(self, rows):
+        try:
+            with self.app.app_context():
+                self.write_fn(rows)
+            self.written_total += len(rows)
+            self.batches_total += 1
+        except Exception as e:
+            if len(rows) == 1:
+                self.failed_total += 1
+                logger.error(f"Failed to write notification for user {rows[0]['user_id']}: {e}")
+                return
+            # Split the batch so one bad row (e.g. a user deleted meanwhile) doesn't drop the rest
+            middle = len(rows) // 2
+            self._write_batch(rows[:middle])
+            self._write_batch(rows[middle:])
+
+    def _done(self, count):
+        with self._idle:
+            self._unfinished -= count
+            if not self._unfinished:
+                self._idle.notify_all()
@@ -0,0 +1,335 @@
+"""
+Outbound Email/SMS for ZUBID
+Password reset codes and other messages are queued by the request handler and sent
+by one background thread per process, so forgot-password returns without waiting on
+an SMTP handshake or a Twilio call.
+
+The worker keeps one SMTP session open and reuses it for every email (one connect,
+STARTTLS and login instead of one per message), reconnecting when the server drops
+it or after SMTP_IDLE_TIMEOUT seconds without traffic. The Twilio client is created
+once. Messages are sent up to OUTBOUND_BATCH_SIZE at a time and failed ones are
+retried with exponential backoff up to OUTBOUND_MAX_RETRIES times.
+
+For local development any SMTP debugging server works, e.g.
+    python -m aiosmtpd -n -l localhost:1025
+with SMTP_HOST=localhost, SMTP_PORT=1025, SMTP_USE_TLS=false and no SMTP_USER.
+"""
+
+import os
+import heapq
+import itertools
+import logging
+import queue
+import smtplib
+import threading
+import time
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+
+import email_templates
+
+logger = logging.getLogger(__name__)
+
+# Outbound configuration
+OUTBOUND_QUEUE_ASYNC = os.getenv('OUTBOUND_QUEUE_ASYNC', 'true').lower() == 'true'
+OUTBOUND_BATCH_SIZE = int(os.getenv('OUTBOUND_BATCH_SIZE', '50'))
+OUTBOUND_MAX_RETRIES = int(os.getenv('OUTBOUND_MAX_RETRIES', '3'))
+OUTBOUND_RETRY_BACKOFF = float(os.getenv('OUTBOUND_RETRY_BACKOFF', '2'))
+OUTBOUND_QUEUE_MAX = int(os.getenv('OUTBOUND_QUEUE_MAX', '10000'))
+SMTP_IDLE_TIMEOUT = float(os.getenv('SMTP_IDLE_TIMEOUT', '60'))
+SMTP_TIMEOUT = float(os.getenv('SMTP_TIMEOUT', '30'))
+
+EMAIL = 'email'
+SMS = 'sms'
+
+class OutboundMessage:
+    """One email or SMS waiting to be sent"""
+
+    __slots__ = ('kind', 'to', 'subject', 'body', 'html', 'attempts')
+
+    def __init__(self, kind, to, body, subject=None, html_body=None):
+        self.kind = kind
+        self.to = to
+        self.subject = subject
+        self.body = body
+        self.html = html_body
+        self.attempts = 0
+
+
+class SmtpSender:
+    """Sends emails over one reused SMTP session"""
+
+    def __init__(self, host=None, port=None, user=None, password=None, sender=None, use_tls=None,
+                 idle_timeout=SMTP_IDLE_TIMEOUT, timeout=SMTP_TIMEOUT):
+        self.host = host if host is not None else os.getenv('SMTP_HOST')
+        self.port = int(port if port is not None else os.getenv('SMTP_PORT', '587'))
+        self.user = user if user is not None else os.getenv('SMTP_USER')
+        self.password = password if password is not None else os.getenv('SMTP_PASSWORD')
+        self.sender = sender or os.getenv('SMTP_FROM') or self.user or 'no-reply@localhost'
+        if use_tls is None:
+            use_tls = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+        self.use_tls = use_tls
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._session = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self.connections_total = 0
+
+    @property
+    def configured(self):
+        # A local debugging server needs no credentials; a real relay needs both
+        return bool(self.host) and bool(self.user) == bool(self.password)
+
+    def build(self, to, subject, body, html_body=None):
+        message = MIMEMultipart('alternative')
+        message['Subject'] = subject
+        message['From'] = f"ZUBID Auction <{self.sender}>"
+        message['To'] = to
+        message.attach(MIMEText(body, 'plain'))
+        message.attach(MIMEText(html_body if html_body is not None else email_templates.wrap_plain(body), 'html'))
+        return message
+
+    def send(self, to, subject, body, html_body=None):
+        """Send one email, reconnecting once if the pooled session was dropped"""
+        message = self.build(to, subject, body, html_body)
+        with self._lock:
+            for attempt in range(2):
+                session = self._connect()
+                try:
+                    session.send_message(message)
+                    self._last_used = time.monotonic()
+                    return
+                except smtplib.SMTPServerDisconnected:
+                    self._discard()
+                    if attempt:
+                        raise
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused):
+                    # The session is still usable; only this message failed
+                    raise
+                except Exception:
+                    self._discard()
+                    raise
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                try:
+                    self._session.quit()
+                except Exception:
+                    pass
+                self._session = None
+
+    def close_if_idle(self):
+        if self._session is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+
+    def _connect(self):
+        if self._session is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self._discard()
+        if self._session is None:
+            session = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_tls:
+                session.starttls()
+            if self.user and self.password:
+                session.login(self.user, self.password)
+            self._session = session
+            self._last_used = time.monotonic()
+            self.connections_total += 1
+        return self._session
+
+    def _discard(self):
+        session, self._session = self._session, None
+        if session is not None:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+
+class SmsSender:
+    """Sends SMS through Twilio with one client for the life of the process"""
+
+    def __init__(self, account_sid=None, auth_token=None, from_phone=None):
+        self.account_sid = account_sid or os.getenv('TWILIO_ACCOUNT_SID')
+        self.auth_token = auth_token or os.getenv('TWILIO_AUTH_TOKEN')
+        self.from_phone = from_phone or os.getenv('TWILIO_PHONE_NUMBER')
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self):
+        return all([self.account_sid, self.auth_token, self.from_phone])
+
+    def send(self, to_phone, body):
+        """Send one SMS. Returns the provider message id."""
+        # Ensure phone number has country code
+        if not to_phone.startswith('+'):
+            # Default to Iraq country code if not provided
+            to_phone = '+964' + to_phone.lstrip('0')
+        sms = self._get_client().messages.create(body=body, from_=self.from_phone, to=to_phone)
+        return sms.sid
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                from twilio.rest import Client
+                self._client = Client(self.account_sid, self.auth_token)
+            return self._client
+
+
+class OutboundQueue:
+    """Bounded queue of OutboundMessages plus the thread that sends and retries them"""
+
+    def __init__(self, smtp=None, sms=None, asynchronous=OUTBOUND_QUEUE_ASYNC, batch_size=OUTBOUND_BATCH_SIZE,
+                 max_retries=OUTBOUND_MAX_RETRIES, backoff=OUTBOUND_RETRY_BACKOFF, max_queue=OUTBOUND_QUEUE_MAX):
+        self.smtp = smtp or SmtpSender()
+        self.sms = sms or SmsSender()
+        self.asynchronous = asynchronous
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._messages = queue.Queue(maxsize=max_queue)
+        # (due, sequence, message) awaiting another attempt
+        self._retries = []
+        self._sequence = itertools.count()
+        self._thread = None
+        self._guard = threading.Lock()
+        self._idle = threading.Condition()
+        self._unfinished = 0
+        self.stopping = threading.Event()
+        self.sent_total = 0
+        self.failed_total = 0
+        self.retried_total = 0
+
+    def configured(self, kind):
+        return self.smtp.configured if kind == EMAIL else self.sms.configured
+
+    def enqueue(self, message):
+        """Queue a message. Returns False if its channel isn't configured (nothing will be sent)."""
+        if not self.configured(message.kind):
+            logger.warning(f"{'SMTP' if message.kind == EMAIL else 'Twilio'} not configured. {message.kind} not sent.")
+            return False
+        if not self.asynchronous or self.stopping.is_set():
+            return self.send_now(message)
+        self._start()
+        with self._idle:
+            self._unfinished += 1
+        try:
+            self._messages.put_nowait(message)
+        except queue.Full:
+            self._done(1)
+            logger.warning("Outbound queue full, sending inline")
+            return self.send_now(message)
+        return True
+
+    def flush(self, timeout=30):
+        """Wait until every queued message was sent or gave up (including retries)"""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._unfinished:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def stop(self, timeout=10):
+        self.stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.smtp.close()
+
+    def stats(self):
+        return {
+            'asynchronous': self.asynchronous,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'queued': self._messages.qsize(),
+            'retrying': len(self._retries),
+            'sent_total': self.sent_total,
+            'failed_total': self.failed_total,
+            'retried_total': self.retried_total,
+            'smtp_connections_total': self.smtp.connections_total,
+        }
+
+    def _start(self):
+        # Started lazily so each gunicorn worker gets its own thread after the fork
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._guard:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='outbound-sender', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            timeout = max(0.0, min(1.0, self._retries[0][0] - time.monotonic())) if self._retries else 1.0
+            batch = []
+            try:
+                batch.append(self._messages.get(timeout=timeout))
+            except queue.Empty:
+                pass
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._messages.get_nowait())
+                except queue.Empty:
+                    break
+            now = time.monotonic()
+            while self._retries and self._retries[0][0] <= now and len(batch) < self.batch_size:
+                batch.append(heapq.heappop(self._retries)[2])
+            if not batch:
+                if self.stopping.is_set() and not self._retries:
+                    self.smtp.close()
+                    return
+                self.smtp.close_if_idle()
+                continue
+            finished = 0
+            for message in batch:
+                if self._attempt(message):
+                    finished += 1
+            self._done(finished)
+
+    def _attempt(self, message):
+        """Send from the worker. Returns True when the message is finished (sent or given up)."""
+        try:
+            self._deliver(message)
+            self.sent_total += 1
+            return True
+        except Exception as e:
+            message.attempts += 1
+            if message.attempts > self.max_retries or self.stopping.is_set():
+                self.failed_total += 1
+                logger.error(f"Failed to send {message.kind} to {message.to} after {message.attempts} attempts: {e}")
+                return True
+            self.retried_total += 1
+            delay = self.backoff * (2 ** (message.attempts - 1))
+            logger.warning(f"Failed to send {message.kind} to {message.to}, retrying in {delay:.1f}s: {e}")
+            heapq.heappush(self._retries, (time.monotonic() + delay, next(self._sequence), message))
+            return False
+
+    def send_now(self, message):
+        """Send in the caller's thread, without retries. Returns True on success."""
+        try:
+            self._deliver(message)
+            self.sent_total += 1
+            return True
+        except Exception as e:
+            self.failed_total += 1
+            logger.error(f"Failed to send {message.kind} to {message.to}: {e}")
+            return False
+
+    def _deliver(self, message):
+        if message.kind == EMAIL:
+            self.smtp.send(message.to, message.subject, message.body, message.html)
+            logger.info(f"Email sent successfully to {message.to}")
+        else:
+            sid = self.sms.send(message.to, message.body)
+            logger.info(f"SMS sent successfully to {message.to}, SID: {sid}")
+
+    def _done(self, count):
+        if not count:
+            return
+        with self._idle:
+            self._unfinished -= count
+            if not self._unfinished:
+                self._idle.notify_all()
@@ -0,0 +1,164 @@
+"""
+Keyset Pagination for ZUBID
+Cursor-based paging over an ordered tuple of columns ending in the primary key,
+e.g. (end_time, id) or (created_at, id). A page is fetched with
+WHERE (end_time, id) > (:last_end_time, :last_id) ... LIMIT n+1, so deep pages and
+infinite scroll cost the same as the first page - no OFFSET scan and no COUNT(*).
+
+Cursors are opaque URL-safe strings; totals are optional and served from a short-lived
+count cache (LISTING_COUNT_TTL) when requested.
+"""
+
+import os
+import json
+import base64
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+LISTING_COUNT_TTL = float(os.getenv('LISTING_COUNT_TTL', '30'))
+MAX_COUNT_CACHE_ENTRIES = 1000
+
+
+class CursorError(ValueError):
+    """Raised for a malformed cursor or one issued for a different sort order"""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and 'dt' in value:
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(values, sort=None):
+    """Encode the sort-key values of the last row on a page"""
+    payload = {'k': [_encode_value(value) for value in values]}
+    if sort:
+        payload['s'] = sort
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort=None, size=None):
+    """Decode a cursor back into sort-key values"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_decode_value(value) for value in payload['k']]
+    except (ValueError, TypeError, KeyError):
+        raise CursorError('Invalid cursor')
+    if payload.get('s') != sort:
+        raise CursorError('Cursor does not match the requested sort order')
+    if size is not None and len(values) != size:
+        raise CursorError('Invalid cursor')
+    return values
+
+
+def _is_nullable(column):
+    try:
+        return bool(column.property.columns[0].nullable)
+    except (AttributeError, IndexError):
+        return False
+
+
+def order_clauses(columns, descending=False):
+    """ORDER BY clauses for a keyset; NULLs always sort last so the cursor predicate can reach them"""
+    clauses = []
+    for column in columns:
+        clause = column.desc() if descending else column.asc()
+        if _is_nullable(column):
+            clause = clause.nullslast()
+        clauses.append(clause)
+    return clauses
+
+
+def after_cursor(columns, values, descending=False):
+    """WHERE predicate selecting rows strictly after the row with the given sort-key values"""
+    # Expanded form of the row comparison (c1, c2, ...) > (v1, v2, ...), which is portable
+    # across SQLite/PostgreSQL and lets the planner use an index on the leading column
+    alternatives = []
+    for position, (column, value) in enumerate(zip(columns, values)):
+        equal_prefix = [
+            previous.is_(None) if previous_value is None else previous == previous_value
+            for previous, previous_value in zip(columns[:position], values[:position])
+        ]
+        if value is None:
+            # NULLs sort last: nothing non-null comes after a NULL
+            continue
+        beyond = column < value if descending else column > value
+        if _is_nullable(column):
+            beyond = or_(beyond, column.is_(None))
+        alternatives.append(and_(*equal_prefix, beyond))
+    return or_(*alternatives)
+
+
+class KeysetPage:
+    """One page of rows plus the cursor for the next one"""
+
+    def __init__(self, items, next_cursor, has_more):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.has_more = has_more
+
+
+def keyset_page(query, columns, cursor=None, limit=20, descending=False, sort=None, offset=0, order=None):
+    """Fetch `limit` rows after `cursor` (or at `offset` for legacy page numbers) ordered by columns.
+    The last column must be unique (the primary key). An explicit `order` (e.g. a computed search
+    rank) can't be keyset-paged: it supports offsets only and yields no next cursor."""
+    if order is not None:
+        if cursor:
+            raise CursorError('Cursor paging is not available for this sort order')
+        rows = query.order_by(None).order_by(*order).offset(offset).limit(limit + 1).all()
+        return KeysetPage(rows[:limit], None, len(rows) > limit)
+    query = query.order_by(None).order_by(*order_clauses(columns, descending))
+    if cursor:
+        values = decode_cursor(cursor, sort=sort, size=len(columns))
+        query = query.filter(after_cursor(columns, values, descending))
+    elif offset:
+        query = query.offset(offset)
+    # One extra row tells us whether there is a next page without counting
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    next_cursor = None
+    if has_more and items:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns], sort=sort)
+    return KeysetPage(items, next_cursor, has_more)
+
+
+class CountCache:
+    """TTL cache of listing totals keyed on endpoint + filters"""
+
+    def __init__(self, ttl=LISTING_COUNT_TTL, max_entries=MAX_COUNT_CACHE_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+        count = loader()
+        with self._lock:
+            self._counts[key] = (now + self.ttl, count)
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+        return count
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
@@ -0,0 +1,79 @@
+"""
+Proxy Bidding for ZUBID
+Resolves a bid against every competing maximum (proxy) bid in one pass.
+
+Each bidder may leave a maximum; the engine bids on their behalf up to it. Rather
+than trading increments one request at a time, the outcome is computed directly:
+the highest maximum wins at one increment above the runner-up's maximum (capped at
+its own maximum), and ties go to whoever set that maximum first. Outbid proxies
+each appear once in the bid ladder at their maximum, so history still shows the war.
+"""
+
+
+class Proxy:
+    """A bidder's standing maximum; priority orders equal maximums (lower = earlier)"""
+
+    __slots__ = ('user_id', 'max_amount', 'priority')
+
+    def __init__(self, user_id, max_amount, priority):
+        self.user_id = user_id
+        self.max_amount = max_amount
+        self.priority = priority
+
+
+class LadderStep:
+    """One bid to insert, in order"""
+
+    __slots__ = ('user_id', 'amount', 'is_auto_bid', 'max_auto_bid')
+
+    def __init__(self, user_id, amount, is_auto_bid, max_auto_bid):
+        self.user_id = user_id
+        self.amount = amount
+        self.is_auto_bid = is_auto_bid
+        self.max_auto_bid = max_auto_bid
+
+    def __repr__(self):
+        return f'LadderStep(user_id={self.user_id}, amount={self.amount}, is_auto_bid={self.is_auto_bid})'
+
+
+class Resolution:
+    """Outcome of a bid: the bids to write, the leader and the resulting price"""
+
+    def __init__(self, ladder, winner_id, price):
+        self.ladder = ladder
+        self.winner_id = winner_id
+        self.price = price
+
+
+def resolve(bidder, amount, increment, competitors, bidder_max=None):
+    """Resolve a new bid of `amount` by `bidder` (a Proxy whose max_amount is its effective
+    maximum) against the other bidders' proxies. Ladder amounts are strictly increasing."""
+    # Only proxies that can beat the new bid by a full increment take part
+    rivals = [proxy for proxy in competitors
+              if proxy.user_id != bidder.user_id and proxy.max_amount >= amount + increment]
+    ladder = [LadderStep(bidder.user_id, amount, bidder_max is not None, bidder_max)]
+    if not rivals:
+        return Resolution(ladder, bidder.user_id, amount)
+
+    # Winner and runner-up by (highest maximum, earliest priority) in a linear scan
+    def rank(proxy):
+        return (-proxy.max_amount, proxy.priority)
+
+    participants = rivals + [bidder]
+    winner = min(participants, key=rank)
+    runner_up = min((proxy for proxy in participants if proxy is not winner), key=rank)
+    price = max(amount, min(winner.max_amount, runner_up.max_amount + increment))
+
+    # Every outbid proxy bid its maximum along the way; only those above the new bid show up
+    losers = sorted(
+        (proxy for proxy in participants if proxy is not winner and proxy.max_amount > amount),
+        key=lambda proxy: (proxy.max_amount, proxy.priority)
+    )
+    last = amount
+    for proxy in losers:
+        if last < proxy.max_amount < price:
+            ladder.append(LadderStep(proxy.user_id, proxy.max_amount, True, proxy.max_amount))
+            last = proxy.max_amount
+    if price > last:
+        ladder.append(LadderStep(winner.user_id, price, True, winner.max_amount))
+    return Resolution(ladder, winner.user_id, price)
@@ -0,0 +1,354 @@
+"""
+Push Notification Delivery for ZUBID
+Sends notifications to the mobile app through Firebase Cloud Messaging (HTTP v1 API)
+using the tokens stored by /api/user/fcm-token, so outbid, won and broadcast
+notifications reach the device without the app polling for them.
+
+Notifications are queued by the process that created them and delivered by one
+background thread per process. Queued messages are expanded into one send per token,
+FCM_BATCH_SIZE sends per batch (FCM's multicast limit), each batch sent over
+FCM_CONCURRENCY keep-alive connections. Unavailable/quota errors are retried with
+exponential backoff (honouring Retry-After); tokens FCM reports as unregistered are
+handed back to the app to be cleared.
+
+Configuration:
+    FCM_PROJECT_ID          - Firebase project; pushes are disabled without it
+    FCM_CREDENTIALS_FILE    - service account JSON (needs the google-auth package)
+    FCM_ACCESS_TOKEN        - static OAuth token instead of a service account (dev/tests)
+    FCM_ENDPOINT            - API base URL, overridable to point at a fake server
+"""
+
+import os
+import json
+import queue
+import random
+import logging
+import threading
+import time
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Push configuration
+FCM_PROJECT_ID = os.getenv('FCM_PROJECT_ID', '')
+FCM_ENABLED = os.getenv('FCM_ENABLED', 'true' if FCM_PROJECT_ID else 'false').lower() == 'true'
+FCM_ENDPOINT = os.getenv('FCM_ENDPOINT', 'https://fcm.googleapis.com')
+FCM_CREDENTIALS_FILE = os.getenv('FCM_CREDENTIALS_FILE', '')
+FCM_ACCESS_TOKEN = os.getenv('FCM_ACCESS_TOKEN', '')
+FCM_BATCH_SIZE = int(os.getenv('FCM_BATCH_SIZE', '500'))
+FCM_CONCURRENCY = int(os.getenv('FCM_CONCURRENCY', '8'))
+FCM_MAX_RETRIES = int(os.getenv('FCM_MAX_RETRIES', '3'))
+FCM_BACKOFF = float(os.getenv('FCM_BACKOFF', '0.5'))
+FCM_QUEUE_MAX = int(os.getenv('FCM_QUEUE_MAX', '10000'))
+FCM_TIMEOUT = float(os.getenv('FCM_TIMEOUT', '10'))
+FCM_SCOPE = 'https://www.googleapis.com/auth/firebase.messaging'
+
+# FCM error codes meaning the token will never work again
+INVALID_TOKEN_ERRORS = {'UNREGISTERED', 'SENDER_ID_MISMATCH'}
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Send outcomes
+SENT = 'sent'
+INVALID = 'invalid'
+RETRY = 'retry'
+FAILED = 'failed'
+
+try:
+    from google.oauth2 import service_account
+    from google.auth.transport.requests import Request as GoogleAuthRequest
+except ImportError:
+    service_account = None
+    GoogleAuthRequest = None
+
+
+class PushMessage:
+    """A notification addressed to some users, or (user_ids None) every user with audience_role"""
+
+    __slots__ = ('user_ids', 'audience_role', 'title', 'body', 'data')
+
+    def __init__(self, title, body, user_ids=None, audience_role=None, data=None):
+        self.title = title
+        self.body = body
+        self.user_ids = user_ids
+        self.audience_role = audience_role
+        # FCM data payload values must be strings
+        self.data = {key: str(value) for key, value in (data or {}).items() if value is not None}
+
+    @classmethod
+    def from_event(cls, notification_data):
+        """Build a push from a 'notification' bus event"""
+        user_id = notification_data.get('user_id')
+        return cls(
+            notification_data['title'],
+            notification_data['message'],
+            user_ids=[user_id] if user_id is not None else None,
+            audience_role=notification_data.get('audience_role') if user_id is None else None,
+            data={
+                'notification_id': notification_data.get('id'),
+                'type': notification_data.get('type'),
+                'auction_id': notification_data.get('auction_id'),
+            }
+        )
+
+
+class SendResult:
+    __slots__ = ('outcome', 'retry_after', 'error')
+
+    def __init__(self, outcome, retry_after=None, error=None):
+        self.outcome = outcome
+        self.retry_after = retry_after
+        self.error = error
+
+
+class FcmClient:
+    """Minimal FCM HTTP v1 client with one keep-alive connection per sending thread"""
+
+    def __init__(self, project_id=FCM_PROJECT_ID, endpoint=FCM_ENDPOINT, access_token=FCM_ACCESS_TOKEN,
+                 credentials_file=FCM_CREDENTIALS_FILE, timeout=FCM_TIMEOUT):
+        self.project_id = project_id
+        self.endpoint = urlsplit(endpoint)
+        self.timeout = timeout
+        self.path = f"{self.endpoint.path.rstrip('/')}/v1/projects/{project_id}/messages:send"
+        self._static_token = access_token
+        self._credentials = None
+        self._token_lock = threading.Lock()
+        self._local = threading.local()
+        if credentials_file and not access_token:
+            if service_account is None:
+                logger.warning("FCM_CREDENTIALS_FILE is set but the google-auth package is not installed. Pushes will fail.")
+            else:
+                self._credentials = service_account.Credentials.from_service_account_file(
+                    credentials_file, scopes=[FCM_SCOPE]
+                )
+
+    def send(self, token, title, body, data=None):
+        """Send one message. Returns a SendResult; never raises for delivery errors."""
+        payload = json.dumps({'message': {
+            'token': token,
+            'notification': {'title': title, 'body': body},
+            'data': data or {},
+        }})
+        try:
+            status, headers, response = self._post(payload, refresh=False)
+            if status == 401 and self._credentials is not None:
+                status, headers, response = self._post(payload, refresh=True)
+        except (OSError, http.client.HTTPException) as e:
+            self._local.connection = None
+            return SendResult(RETRY, error=str(e))
+
+        if status == 200:
+            return SendResult(SENT)
+        error_code = self._error_code(response)
+        if error_code in INVALID_TOKEN_ERRORS:
+            return SendResult(INVALID, error=error_code)
+        if status in RETRYABLE_STATUSES:
+            retry_after = headers.get('retry-after')
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            return SendResult(RETRY, retry_after=retry_after, error=error_code or str(status))
+        return SendResult(FAILED, error=error_code or str(status))
+
+    def _post(self, payload, refresh):
+        connection = self._connection()
+        connection.request('POST', self.path, body=payload, headers={
+            'Authorization': f'Bearer {self._access_token(refresh)}',
+            'Content-Type': 'application/json; UTF-8',
+        })
+        response = connection.getresponse()
+        body = response.read()
+        return response.status, {key.lower(): value for key, value in response.getheaders()}, body
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            cls = http.client.HTTPSConnection if self.endpoint.scheme == 'https' else http.client.HTTPConnection
+            connection = cls(self.endpoint.hostname, self.endpoint.port, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def _access_token(self, refresh=False):
+        if self._static_token or self._credentials is None:
+            return self._static_token
+        with self._token_lock:
+            if refresh or not self._credentials.valid:
+                self._credentials.refresh(GoogleAuthRequest())
+            return self._credentials.token
+
+    @staticmethod
+    def _error_code(response):
+        try:
+            error = json.loads(response)['error']
+        except (ValueError, KeyError, TypeError):
+            return None
+        for detail in error.get('details') or []:
+            if detail.get('errorCode'):
+                return detail['errorCode']
+        return error.get('status')
+
+
+class PushDispatcher:
+    """Queue of PushMessages plus the thread that resolves their tokens and sends them in batches"""
+
+    def __init__(self, app, token_loader, invalid_token_handler, client=None, enabled=FCM_ENABLED,
+                 batch_size=FCM_BATCH_SIZE, concurrency=FCM_CONCURRENCY, max_retries=FCM_MAX_RETRIES,
+                 backoff=FCM_BACKOFF, max_queue=FCM_QUEUE_MAX):
+        self.app = app
+        self.token_loader = token_loader
+        self.invalid_token_handler = invalid_token_handler
+        self.client = client
+        self.enabled = enabled
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._messages = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._pool = None
+        self._guard = threading.Lock()
+        self._idle = threading.Condition()
+        self._unfinished = 0
+        self.stopping = threading.Event()
+        self.sent_total = 0
+        self.failed_total = 0
+        self.retried_total = 0
+        self.invalid_total = 0
+        self.dropped_total = 0
+        self.batches_total = 0
+
+    def enqueue(self, message):
+        """Queue a message for delivery. Returns False if pushes are off or the queue is full."""
+        if not self.enabled or self.stopping.is_set():
+            return False
+        self._start()
+        with self._idle:
+            self._unfinished += 1
+        try:
+            self._messages.put_nowait(message)
+            return True
+        except queue.Full:
+            self._done(1)
+            self.dropped_total += 1
+            logger.warning("Push queue full, dropping push notification")
+            return False
+
+    def flush(self, timeout=10):
+        """Wait until every queued message has been delivered or given up on"""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._unfinished:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def stop(self, timeout=10):
+        self.stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'queued': self._messages.qsize(),
+            'sent_total': self.sent_total,
+            'failed_total': self.failed_total,
+            'retried_total': self.retried_total,
+            'invalid_tokens_total': self.invalid_total,
+            'dropped_total': self.dropped_total,
+            'batches_total': self.batches_total,
+        }
+
+    def _start(self):
+        # Started lazily so each gunicorn worker gets its own thread after the fork
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._guard:
+            if self._thread is None or not self._thread.is_alive():
+                if self.client is None:
+                    self.client = FcmClient()
+                self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='fcm-send')
+                self._thread = threading.Thread(target=self._run, name='push-dispatcher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                messages = [self._messages.get(timeout=1.0)]
+            except queue.Empty:
+                if self.stopping.is_set():
+                    return
+                continue
+            # Messages queued meanwhile (e.g. a burst of outbid notices) share batches
+            while len(messages) < self.batch_size:
+                try:
+                    messages.append(self._messages.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._deliver(messages)
+            except Exception as e:
+                logger.error(f"Push delivery failed: {e}", exc_info=True)
+            finally:
+                self._done(len(messages))
+
+    def _deliver(self, messages):
+        sends = []
+        for message in messages:
+            with self.app.app_context():
+                tokens = self.token_loader(message)
+            sends.extend((token, message) for token in tokens)
+            while len(sends) >= self.batch_size:
+                self._send_batch(sends[:self.batch_size])
+                sends = sends[self.batch_size:]
+        if sends:
+            self._send_batch(sends)
+
+    def _send_batch(self, sends):
+        self.batches_total += 1
+        invalid = []
+        for attempt in range(self.max_retries + 1):
+            results = list(self._pool.map(
+                lambda send: self.client.send(send[0], send[1].title, send[1].body, send[1].data), sends
+            ))
+            retry, retry_after = [], 0.0
+            for send, result in zip(sends, results):
+                if result.outcome == SENT:
+                    self.sent_total += 1
+                elif result.outcome == INVALID:
+                    invalid.append(send[0])
+                elif result.outcome == RETRY and attempt < self.max_retries:
+                    retry.append(send)
+                    retry_after = max(retry_after, result.retry_after or 0.0)
+                else:
+                    self.failed_total += 1
+                    logger.warning(f"Push to a device failed: {result.error}")
+            if not retry:
+                break
+            self.retried_total += len(retry)
+            sends = retry
+            # Exponential backoff with jitter, or longer if FCM asked for it
+            delay = max(retry_after, self.backoff * (2 ** attempt) * (1 + random.random()))
+            if self.stopping.wait(delay):
+                self.failed_total += len(retry)
+                break
+        if invalid:
+            self.invalid_total += len(invalid)
+            try:
+                with self.app.app_context():
+                    self.invalid_token_handler(invalid)
+            except Exception as e:
+                logger.error(f"Failed to clear invalid push tokens: {e}")
+
+    def _done(self, count):
+        with self._idle:
+            self._unfinished -= count
+            if not self._unfinished:
+                self._idle.notify_all()
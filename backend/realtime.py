@@ -0,0 +1,229 @@
+"""
+Real-time Event Hub for ZUBID
+Fans out auction events (bid_placed, time_extended, auction_ended) to
+Server-Sent Events subscribers. Each event is serialized once into an SSE
+frame and shared by every viewer of the channel, and the connect snapshot is
+cached per channel until the next event, so a hot auction costs one DB read
+per event rather than one per viewer.
+
+A stream holds a worker thread for its whole life on threaded (gthread) workers, so each
+process serves at most SSE_MAX_STREAMS streams at once; by default half its THREADS,
+leaving the rest for API requests. Viewers past the cap get a 503 with Retry-After and
+the page falls back to polling. Async workers (gevent/eventlet) hold a greenlet per
+stream instead, and default to a much higher cap.
+"""
+
+import os
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Stream configuration
+SSE_HEARTBEAT_INTERVAL = float(os.getenv('SSE_HEARTBEAT_INTERVAL', '15'))
+# Streams are closed after this long so threaded workers are recycled; EventSource reconnects
+# automatically and replays missed events via Last-Event-ID
+SSE_MAX_DURATION = float(os.getenv('SSE_MAX_DURATION', '300'))
+SSE_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', '100'))
+SSE_HISTORY_SIZE = int(os.getenv('SSE_HISTORY_SIZE', '50'))
+SSE_RETRY_MS = int(os.getenv('SSE_RETRY_MS', '3000'))
+# Upper bound on snapshot staleness for changes that don't publish an event
+SSE_SNAPSHOT_TTL = float(os.getenv('SSE_SNAPSHOT_TTL', '5'))
+MAX_TRACKED_CHANNELS = 10000
+# Snapshot loads of one channel are serialized on one of this many shared locks
+SNAPSHOT_LOCK_STRIPES = 64
+
+# Concurrent streams per worker process; must stay below gunicorn's THREADS on gthread workers
+ASYNC_WORKER = os.getenv('WORKER_CLASS', 'gthread') in ('gevent', 'eventlet')
+_DEFAULT_MAX_STREAMS = 1000 if ASYNC_WORKER else max(1, int(os.getenv('THREADS', '8')) // 2)
+SSE_MAX_STREAMS = int(os.getenv('SSE_MAX_STREAMS', str(_DEFAULT_MAX_STREAMS)))
+# Retry-After (seconds) sent to viewers refused because the worker is at SSE_MAX_STREAMS
+SSE_BUSY_RETRY_AFTER = int(os.getenv('SSE_BUSY_RETRY_AFTER', '30'))
+
+
+def format_sse(event, data, event_id=None):
+    """Encode one Server-Sent Events frame"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+    payload = data if isinstance(data, str) else json.dumps(data, default=str, separators=(',', ':'))
+    for line in payload.splitlines() or ['']:
+        lines.append(f'data: {line}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscriber:
+    """One connected viewer; frames are queued by publishers and drained by the stream generator"""
+
+    def __init__(self, channel, maxsize=SSE_QUEUE_SIZE, extra_channels=()):
+        self.channel = channel
+        self.channels = (channel,) + tuple(extra_channels)
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def put(self, frame):
+        try:
+            self.queue.put_nowait(frame)
+        except queue.Full:
+            # Slow client - drop the stream; it reconnects and replays from Last-Event-ID
+            self.overflowed = True
+
+
+class EventHub:
+    """In-process pub/sub hub keyed by channel name (e.g. 'auction:42')"""
+
+    def __init__(self, history_size=SSE_HISTORY_SIZE, snapshot_ttl=SSE_SNAPSHOT_TTL, max_streams=SSE_MAX_STREAMS):
+        self.history_size = history_size
+        self.snapshot_ttl = snapshot_ttl
+        self.max_streams = max_streams
+        self.open_streams = 0
+        self.refused_streams = 0
+        self._subscribers = {}
+        self._history = {}
+        self._snapshots = {}
+        # Fixed pool, so channels that never load (unknown auctions) leave nothing behind
+        self._snapshot_locks = [threading.Lock() for _ in range(SNAPSHOT_LOCK_STRIPES)]
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self.published_total = 0
+
+    def next_event_id(self):
+        # Microsecond clock, forced monotonic, so ids from different workers still order sensibly
+        with self._lock:
+            self._last_id = max(self._last_id + 1, time.time_ns() // 1000)
+            return self._last_id
+
+    def open_stream(self):
+        """Reserve one of this worker's stream slots. Returns False when all are taken."""
+        with self._lock:
+            if self.open_streams >= self.max_streams:
+                self.refused_streams += 1
+                return False
+            self.open_streams += 1
+            return True
+
+    def close_stream(self):
+        with self._lock:
+            self.open_streams = max(0, self.open_streams - 1)
+
+    def subscribe(self, channel, last_event_id=None, extra_channels=()):
+        """Register a subscriber, pre-filled with any events it missed since last_event_id.
+        extra_channels are merged into the same stream (e.g. a user's channel plus broadcasts)."""
+        subscriber = Subscriber(channel, extra_channels=extra_channels)
+        with self._lock:
+            for name in subscriber.channels:
+                self._subscribers.setdefault(name, set()).add(subscriber)
+            if last_event_id:
+                try:
+                    last_event_id = int(last_event_id)
+                except (TypeError, ValueError):
+                    last_event_id = None
+            if last_event_id:
+                missed = [
+                    (event_id, frame)
+                    for name in subscriber.channels
+                    for event_id, frame in self._history.get(name, ())
+                    if event_id > last_event_id
+                ]
+                for event_id, frame in sorted(missed, key=lambda item: item[0]):
+                    subscriber.put(frame)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            for name in subscriber.channels:
+                subscribers = self._subscribers.get(name)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._subscribers[name]
+
+    def publish(self, channel, event, data, event_id=None):
+        """Serialize an event once and queue it for every subscriber of the channel"""
+        event_id = event_id or self.next_event_id()
+        frame = format_sse(event, data, event_id)
+        with self._lock:
+            history = self._history.get(channel)
+            if history is None:
+                history = self._history[channel] = deque(maxlen=self.history_size)
+                if len(self._history) > MAX_TRACKED_CHANNELS:
+                    # Forget replay history of the least recently created channel
+                    self._history.pop(next(iter(self._history)))
+            history.append((event_id, frame))
+            # The connect snapshot is stale now; the next subscriber reloads it once
+            self._snapshots.pop(channel, None)
+            subscribers = list(self._subscribers.get(channel, ()))
+            self.published_total += 1
+        for subscriber in subscribers:
+            subscriber.put(frame)
+        return event_id
+
+    def snapshot(self, channel, loader):
+        """Return the cached connect frame for a channel, loading it at most once per event (or TTL)"""
+        frame = self._cached_snapshot(channel)
+        if frame is not None:
+            return frame
+        with self._snapshot_locks[hash(channel) % len(self._snapshot_locks)]:
+            # Another subscriber may have loaded it while we waited
+            frame = self._cached_snapshot(channel)
+            if frame is not None:
+                return frame
+            data = loader()
+            if data is None:
+                return None
+            frame = format_sse('snapshot', data)
+            with self._lock:
+                self._snapshots[channel] = (time.monotonic() + self.snapshot_ttl, frame)
+                # Bounded: only channels with recent connects keep a snapshot
+                if len(self._snapshots) > MAX_TRACKED_CHANNELS:
+                    self._snapshots.pop(next(iter(self._snapshots)))
+            return frame
+
+    def _cached_snapshot(self, channel):
+        cached = self._snapshots.get(channel)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        return None
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._subscribers.get(channel, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'channels': len(self._subscribers),
+                'subscribers': sum(len(subscribers) for subscribers in self._subscribers.values()),
+                'published_total': self.published_total,
+                'open_streams': self.open_streams,
+                'max_streams': self.max_streams,
+                'refused_streams': self.refused_streams,
+            }
+
+    def stream(self, subscriber, initial_frame=None, heartbeat=SSE_HEARTBEAT_INTERVAL,
+               max_duration=SSE_MAX_DURATION):
+        """Generator yielding SSE frames for one subscriber until timeout, overflow or disconnect"""
+        deadline = time.monotonic() + max_duration
+        try:
+            yield f'retry: {SSE_RETRY_MS}\n\n'
+            if initial_frame:
+                yield initial_frame
+            while not subscriber.overflowed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    yield subscriber.queue.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ': ping\n\n'
+        finally:
+            self.unsubscribe(subscriber)
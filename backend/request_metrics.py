@@ -0,0 +1,281 @@
+"""
+Request Metrics for ZUBID
+Per-endpoint latency histograms, SQL query counts and SQL time, collected by Flask
+request hooks plus SQLAlchemy before/after_cursor_execute events, and exposed in the
+Prometheus text format on /api/metrics.
+
+Every response carries a Server-Timing header (app, db and query count) so the
+browser's network panel shows where a request spent its time. A request that runs
+the same statement shape more than METRICS_N_PLUS_ONE_THRESHOLD times is counted as
+an N+1 and logged once on the zubid.metrics logger with the repeated statement.
+
+Metrics are kept per process; with several gunicorn workers each scrape sees the
+worker that answered it, so scrape every worker or aggregate with rate() over time.
+"""
+
+import os
+import re
+import logging
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+logger = logging.getLogger('zubid.metrics')
+
+# Metrics configuration
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_SERVER_TIMING = os.getenv('METRICS_SERVER_TIMING', 'true').lower() == 'true'
+METRICS_N_PLUS_ONE_THRESHOLD = int(os.getenv('METRICS_N_PLUS_ONE_THRESHOLD', '10'))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+BACKGROUND = '(background)'
+UNMATCHED = '(unmatched)'
+
+_IN_LIST = re.compile(r'\(\s*(?:\?|%\([^)]*\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\([^)]*\)s|%s|:\w+))+\s*\)')
+_NUMBER = re.compile(r'\b\d+\b')
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement):
+    """A statement with literal numbers and expanded IN lists collapsed, so repeats group together"""
+    shape = _IN_LIST.sub('(?)', statement)
+    shape = _NUMBER.sub('N', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestStats:
+    """What one request did so far"""
+
+    __slots__ = ('started', 'queries', 'sql_seconds', 'shapes')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.shapes = Counter()
+
+
+class EndpointMetrics:
+    __slots__ = ('latency', 'queries', 'sql_seconds', 'statuses', 'n_plus_one')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.sql_seconds = 0.0
+        self.statuses = Counter()
+        self.n_plus_one = 0
+
+
+class RequestMetrics:
+    """Collects request and query metrics for one process"""
+
+    def __init__(self, n_plus_one_threshold=METRICS_N_PLUS_ONE_THRESHOLD, server_timing=METRICS_SERVER_TIMING):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.server_timing = server_timing
+        self._endpoints = {}
+        self._gauges = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.background_queries = 0
+        self.background_sql_seconds = 0.0
+        self.started_at = time.time()
+
+    # --- collection -------------------------------------------------------
+
+    @property
+    def current(self):
+        """Stats of the request running on this thread, or None"""
+        return getattr(self._local, 'stats', None)
+
+    def begin(self):
+        self._local.stats = RequestStats()
+        return self._local.stats
+
+    def end(self):
+        self._local.stats = None
+
+    def record_query(self, statement, seconds):
+        stats = self.current
+        if stats is None:
+            with self._lock:
+                self.background_queries += 1
+                self.background_sql_seconds += seconds
+            return
+        stats.queries += 1
+        stats.sql_seconds += seconds
+        stats.shapes[statement] += 1
+
+    def finish(self, method, endpoint, status, stats):
+        """Fold a finished request into its endpoint's metrics. Returns the elapsed seconds."""
+        elapsed = time.perf_counter() - stats.started
+        repeated = self.repeated_statements(stats)
+        with self._lock:
+            metrics = self._endpoints.get((method, endpoint))
+            if metrics is None:
+                metrics = self._endpoints[(method, endpoint)] = EndpointMetrics()
+            metrics.latency.observe(elapsed)
+            metrics.queries.observe(stats.queries)
+            metrics.sql_seconds += stats.sql_seconds
+            metrics.statuses[f'{status // 100}xx'] += 1
+            if repeated:
+                metrics.n_plus_one += 1
+        if repeated:
+            shape, count = repeated[0]
+            logger.warning(
+                "Possible N+1 on %s %s: statement ran %d times: %s",
+                method, endpoint, count, shape[:500],
+                extra={'endpoint': endpoint, 'repeat_count': count},
+            )
+        return elapsed
+
+    def repeated_statements(self, stats):
+        """[(shape, count)] run more than the threshold, most repeated first"""
+        if stats.queries <= self.n_plus_one_threshold:
+            return []
+        shapes = Counter()
+        for statement, count in stats.shapes.items():
+            shapes[statement_shape(statement)] += count
+        return [(shape, count) for shape, count in shapes.most_common() if count > self.n_plus_one_threshold]
+
+    def server_timing_header(self, stats, elapsed):
+        return (f'app;dur={elapsed * 1000:.1f}, '
+                f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.queries} queries"')
+
+    def register_gauge(self, name, help_text, read):
+        """Expose read() -> number as a gauge, e.g. a queue depth"""
+        self._gauges.append((name, help_text, read))
+
+    # --- integration ------------------------------------------------------
+
+    def init_app(self, app, engine_class=None):
+        """Install the request hooks on app and the cursor hooks on every SQLAlchemy engine"""
+        from flask import request
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        @event.listens_for(engine_class or Engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+        @event.listens_for(engine_class or Engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info.get('query_started')
+            if started:
+                self.record_query(statement, time.perf_counter() - started.pop())
+
+        @app.before_request
+        def start_request_metrics():
+            self.begin()
+
+        @app.after_request
+        def finish_request_metrics(response):
+            stats = self.current
+            if stats is None:
+                return response
+            endpoint = request.url_rule.rule if request.url_rule is not None else UNMATCHED
+            elapsed = self.finish(request.method, endpoint, response.status_code, stats)
+            if self.server_timing:
+                response.headers['Server-Timing'] = self.server_timing_header(stats, elapsed)
+            return response
+
+        @app.teardown_request
+        def clear_request_metrics(exception=None):
+            self.end()
+
+    # --- exposition -------------------------------------------------------
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = []
+
+            def family(name, kind, help_text):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+
+            family('zubid_http_requests_total', 'counter', 'HTTP requests by endpoint and status class.')
+            for (method, endpoint), metrics in endpoints:
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append(f'zubid_http_requests_total{{{labels(method, endpoint)},status="{status}"}} {count}')
+
+            family('zubid_http_request_duration_seconds', 'histogram', 'Time from request start to response.')
+            for (method, endpoint), metrics in endpoints:
+                histogram_lines(lines, 'zubid_http_request_duration_seconds', labels(method, endpoint), metrics.latency)
+
+            family('zubid_db_queries_per_request', 'histogram', 'SQL statements executed per request.')
+            for (method, endpoint), metrics in endpoints:
+                histogram_lines(lines, 'zubid_db_queries_per_request', labels(method, endpoint), metrics.queries)
+
+            family('zubid_db_query_seconds_total', 'counter', 'Time spent in SQL statements.')
+            for (method, endpoint), metrics in endpoints:
+                lines.append(f'zubid_db_query_seconds_total{{{labels(method, endpoint)}}} {metrics.sql_seconds:.6f}')
+            lines.append(f'zubid_db_query_seconds_total{{method="",endpoint="{BACKGROUND}"}} '
+                         f'{self.background_sql_seconds:.6f}')
+
+            family('zubid_db_queries_background_total', 'counter', 'SQL statements run outside a request.')
+            lines.append(f'zubid_db_queries_background_total {self.background_queries}')
+
+            family('zubid_n_plus_one_requests_total', 'counter',
+                   'Requests that repeated one statement shape more than the N+1 threshold.')
+            for (method, endpoint), metrics in endpoints:
+                if metrics.n_plus_one:
+                    lines.append(f'zubid_n_plus_one_requests_total{{{labels(method, endpoint)}}} {metrics.n_plus_one}')
+
+        family('zubid_process_start_time_seconds', 'gauge', 'Start time of this worker process.')
+        lines.append(f'zubid_process_start_time_seconds {self.started_at:.3f}')
+        for name, help_text, read in self._gauges:
+            try:
+                value = read()
+            except Exception as e:
+                logger.warning("Gauge %s failed: %s", name, e)
+                continue
+            family(name, 'gauge', help_text)
+            lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def labels(method, endpoint):
+    return f'method="{method}",endpoint="{escape_label(endpoint)}"'
+
+
+def histogram_lines(lines, name, label_text, histogram):
+    for bound, count in histogram.cumulative():
+        lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {count}')
+    lines.append(f'{name}_bucket{{{label_text},le="+Inf"}} {histogram.count}')
+    lines.append(f'{name}_sum{{{label_text}}} {histogram.sum:.6f}')
+    lines.append(f'{name}_count{{{label_text}}} {histogram.count}')
@@ -0,0 +1,333 @@
+"""
+Auction Search for ZUBID
+Indexed full-text search over auction titles and descriptions, replacing LIKE '%term%'.
+
+PostgreSQL: GIN expression index over to_tsvector('simple', ...) of the normalized text,
+            ranked with ts_rank (title weighted above description).
+SQLite:     FTS5 table (auction_fts) kept in sync by ORM events, ranked with bm25.
+Other databases (or SQLite builds without FTS5) fall back to LIKE.
+
+Every search term is prefix-matched, so the mobile search-as-you-type box works on
+partial words. Text is normalized the same way on both sides (index and query) so
+Arabic and Kurdish (Sorani) spellings typed on different keyboards match: letter
+variants are folded, diacritics/tatweel/ZWNJ dropped and Eastern digits mapped to ASCII.
+The 'simple' configuration is used because PostgreSQL ships no Kurdish stemmer.
+"""
+
+import re
+import bisect
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event, text, func, literal_column, or_, Integer, Float
+from sqlalchemy.orm.attributes import get_history
+
+logger = logging.getLogger(__name__)
+
+# Single-character folds applied before indexing and querying (kept 1:1 so PostgreSQL's
+# translate() can apply exactly the same mapping inside the index expression)
+CHARACTER_FOLDS = {
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',   # alef variants
+    'ى': 'ی', 'ي': 'ی',                        # Arabic yeh / alef maqsura -> Farsi/Kurdish yeh
+    'ك': 'ک',                                  # Arabic kaf -> keheh (Kurdish/Persian keyboards)
+    'ة': 'ه', 'ە': 'ه', 'ھ': 'ه',              # teh marbuta, Kurdish ae, heh doachashmee
+    'ؤ': 'و',
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+    '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
+    '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
+}
+# Characters removed entirely: harakat, superscript alef, tatweel, zero-width (non-)joiners
+DROPPED_CHARACTERS = ''.join(chr(c) for c in range(0x064B, 0x0660)) + 'ٰـ‌‍'
+
+_TRANSLATION = str.maketrans({
+    **CHARACTER_FOLDS,
+    **{char: None for char in DROPPED_CHARACTERS},
+})
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_QUERY_TOKENS = 8
+
+# Suggestion index configuration
+SUGGEST_LIMIT = int(os.getenv('SUGGEST_LIMIT', '8'))
+# Full reload from the database to heal any missed events (events keep it current in between)
+SUGGEST_REBUILD_INTERVAL = float(os.getenv('SUGGEST_REBUILD_INTERVAL', '900'))
+# Categories outrank auction titles with the same prefix
+CATEGORY_SCORE = 1_000_000
+MAX_LABEL_WORDS = 12
+# Bound on index entries examined per lookup so one-letter prefixes stay fast
+MAX_SUGGEST_SCAN = 500
+
+
+def normalize_text(value):
+    """Lowercase and fold Arabic/Kurdish letter variants (mirrors the PostgreSQL index expression)"""
+    if not value:
+        return ''
+    return value.lower().translate(_TRANSLATION)
+
+
+def tokenize(value):
+    """Normalized search tokens; only word characters, so they are safe inside FTS/tsquery syntax"""
+    return _TOKEN_RE.findall(normalize_text(value))[:MAX_QUERY_TOKENS]
+
+
+def _pg_normalized(column):
+    fold_from = ''.join(CHARACTER_FOLDS) + DROPPED_CHARACTERS
+    fold_to = ''.join(CHARACTER_FOLDS.values())
+    return f"translate(lower(coalesce({column}, '')), '{fold_from}', '{fold_to}')"
+
+
+def pg_document_sql(prefix=''):
+    """Weighted tsvector expression; the query must use the same expression as the GIN index"""
+    return (
+        f"setweight(to_tsvector('simple'::regconfig, {_pg_normalized(prefix + 'item_name')}), 'A') || "
+        f"setweight(to_tsvector('simple'::regconfig, {_pg_normalized(prefix + 'description')}), 'B')"
+    )
+
+
+class AuctionSearch:
+    """Dialect-specific search index for the Auction model"""
+
+    FTS_TABLE = 'auction_fts'
+    PG_INDEX = 'idx_auction_search'
+
+    def __init__(self):
+        self.backend = 'like'
+        self._model = None
+
+    def setup(self, engine, model):
+        """Create the index structures for this database and keep them in sync with the model"""
+        self._model = model
+        dialect = engine.dialect.name
+        try:
+            if dialect == 'postgresql':
+                with engine.begin() as conn:
+                    conn.execute(text(
+                        f"CREATE INDEX IF NOT EXISTS {self.PG_INDEX} ON auction USING GIN (({pg_document_sql()}))"
+                    ))
+                self.backend = 'postgresql'
+            elif dialect == 'sqlite':
+                with engine.begin() as conn:
+                    exists = conn.execute(text(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+                    ), {'name': self.FTS_TABLE}).first()
+                    if not exists:
+                        conn.execute(text(
+                            f"CREATE VIRTUAL TABLE {self.FTS_TABLE} USING fts5("
+                            f"item_name, description, tokenize = 'unicode61', prefix = '2 3')"
+                        ))
+                    self.backend = 'sqlite'
+                    self._watch_model()
+                    if not exists:
+                        self.rebuild(conn)
+        except Exception as e:
+            # e.g. SQLite compiled without FTS5: searching still works, just unindexed
+            logger.warning(f"Search index unavailable on {dialect}, using LIKE search: {e}")
+            self.backend = 'like'
+        return self.backend
+
+    def rebuild(self, conn):
+        """Reindex every auction (SQLite FTS only). Returns the number of rows indexed."""
+        if self.backend != 'sqlite':
+            return 0
+        rows = conn.execute(text("SELECT id, item_name, description FROM auction")).all()
+        conn.execute(text(f"DELETE FROM {self.FTS_TABLE}"))
+        if rows:
+            conn.execute(
+                text(f"INSERT INTO {self.FTS_TABLE} (rowid, item_name, description) VALUES (:id, :item_name, :description)"),
+                [{'id': row[0], 'item_name': normalize_text(row[1]), 'description': normalize_text(row[2])} for row in rows]
+            )
+        return len(rows)
+
+    def apply(self, query, term):
+        """Filter query to auctions matching term. Returns (query, rank) where lower rank is more relevant
+        (rank is None when the backend can't rank)."""
+        model = self._model
+        tokens = tokenize(term)
+        if not tokens:
+            return query, None
+
+        if self.backend == 'postgresql':
+            tsquery = func.to_tsquery(literal_column("'simple'::regconfig"), ' & '.join(f'{token}:*' for token in tokens))
+            document = literal_column(pg_document_sql('auction.'))
+            query = query.filter(document.op('@@')(tsquery))
+            return query, -func.ts_rank(document, tsquery)
+
+        if self.backend == 'sqlite':
+            match = ' '.join(f'"{token}"*' for token in tokens)
+            matches = text(
+                f"SELECT rowid AS auction_id, bm25({self.FTS_TABLE}, 10.0, 1.0) AS rank "
+                f"FROM {self.FTS_TABLE} WHERE {self.FTS_TABLE} MATCH :match"
+            ).bindparams(match=match).columns(auction_id=Integer, rank=Float).subquery('search_matches')
+            query = query.join(matches, model.id == matches.c.auction_id)
+            return query, matches.c.rank
+
+        for token in tokens:
+            query = query.filter(or_(model.item_name.contains(token), model.description.contains(token)))
+        return query, None
+
+    def _watch_model(self):
+        model = self._model
+        if event.contains(model, 'after_insert', self._after_save):
+            return
+        event.listen(model, 'after_insert', self._after_save)
+        event.listen(model, 'after_update', self._after_update)
+        event.listen(model, 'after_delete', self._after_delete)
+
+    def _after_update(self, mapper, connection, target):
+        # Most updates are bids and status changes; only reindex when the text changed
+        if get_history(target, 'item_name').has_changes() or get_history(target, 'description').has_changes():
+            self._after_save(mapper, connection, target)
+
+    def _after_save(self, mapper, connection, target):
+        if self.backend != 'sqlite':
+            return
+        # Delete + insert: FTS5 has no upsert, and ids can be reused after bulk deletes
+        connection.execute(text(f"DELETE FROM {self.FTS_TABLE} WHERE rowid = :id"), {'id': target.id})
+        connection.execute(
+            text(f"INSERT INTO {self.FTS_TABLE} (rowid, item_name, description) VALUES (:id, :item_name, :description)"),
+            {'id': target.id, 'item_name': normalize_text(target.item_name), 'description': normalize_text(target.description)}
+        )
+
+    def _after_delete(self, mapper, connection, target):
+        if self.backend != 'sqlite':
+            return
+        connection.execute(text(f"DELETE FROM {self.FTS_TABLE} WHERE rowid = :id"), {'id': target.id})
+
+
+class SuggestionIndex:
+    """In-memory prefix index of active auction titles and category names for autocomplete.
+
+    Each label is indexed at every word start ("vintage telephone" is found by "vin",
+    "tel" and "vintage tel") in a sorted array searched with bisect, so a lookup is
+    O(log n + matches) and never touches the database. Updates are incremental; removed
+    entries are skipped lazily and compacted once they dominate the array.
+    """
+
+    def __init__(self, rebuild_interval=SUGGEST_REBUILD_INTERVAL):
+        self.rebuild_interval = rebuild_interval
+        self._terms = []      # sorted [(term, kind, id)]
+        self._entries = {}    # (kind, id) -> (label, score, terms)
+        self._stale_terms = 0
+        self._lock = threading.Lock()
+        self._loading = False
+        self._pending = []
+        self.loaded_at = None
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    def needs_rebuild(self):
+        return not self.loaded or time.monotonic() - self.loaded_at > self.rebuild_interval
+
+    def begin_rebuild(self):
+        """Start buffering incremental updates while a snapshot is read from the database"""
+        with self._lock:
+            self._loading = True
+            self._pending = []
+
+    def rebuild(self, entries):
+        """Replace the index with (kind, id, label, score) rows, then replay updates that raced the load"""
+        terms, index = [], {}
+        for kind, item_id, label, score in entries:
+            item_terms = self._terms_for(label)
+            if item_terms:
+                index[(kind, item_id)] = (label, score, item_terms)
+                terms.extend((term, kind, item_id) for term in item_terms)
+        terms.sort()
+        with self._lock:
+            self._terms, self._entries, self._stale_terms = terms, index, 0
+            pending, self._pending, self._loading = self._pending, [], False
+            self.loaded_at = time.monotonic()
+        for method, args in pending:
+            method(*args)
+
+    def upsert(self, kind, item_id, label, score=None):
+        """Add or rename an item; score None keeps the current score"""
+        with self._lock:
+            if self._defer(self.upsert, (kind, item_id, label, score)):
+                return
+            existing = self._entries.get((kind, item_id))
+            if score is None:
+                score = existing[1] if existing else 0
+            if existing and existing[0] == label:
+                # Title unchanged (e.g. a new bid): only the score moves
+                self._entries[(kind, item_id)] = (label, score, existing[2])
+                return
+            if existing:
+                self._stale_terms += len(existing[2])
+            item_terms = self._terms_for(label)
+            if not item_terms:
+                self._entries.pop((kind, item_id), None)
+                return
+            self._entries[(kind, item_id)] = (label, score, item_terms)
+            for term in item_terms:
+                bisect.insort(self._terms, (term, kind, item_id))
+            self._compact()
+
+    def remove(self, kind, item_id):
+        with self._lock:
+            if self._defer(self.remove, (kind, item_id)):
+                return
+            existing = self._entries.pop((kind, item_id), None)
+            if existing:
+                self._stale_terms += len(existing[2])
+                self._compact()
+
+    def suggest(self, prefix, limit=SUGGEST_LIMIT):
+        """Top `limit` suggestions whose label has a word starting with prefix, best score first"""
+        prefix = ' '.join(tokenize(prefix))
+        if not prefix:
+            return []
+        with self._lock:
+            start = bisect.bisect_left(self._terms, (prefix,))
+            matches = {}
+            for term, kind, item_id in self._terms[start:start + MAX_SUGGEST_SCAN]:
+                if not term.startswith(prefix):
+                    break
+                entry = self._entries.get((kind, item_id))
+                # Skip removed items and terms left behind by a renamed item
+                if entry is None or term not in entry[2]:
+                    continue
+                matches[(kind, item_id)] = entry
+        ranked = sorted(matches.items(), key=lambda item: (-item[1][1], item[1][0]))
+        suggestions, seen = [], set()
+        for (kind, item_id), (label, score, _) in ranked:
+            if (kind, label) in seen:
+                continue
+            seen.add((kind, label))
+            suggestions.append({'type': kind, 'id': item_id, 'text': label})
+            if len(suggestions) >= limit:
+                break
+        return suggestions
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'terms': len(self._terms),
+                'stale_terms': self._stale_terms,
+                'age': round(time.monotonic() - self.loaded_at, 1) if self.loaded_at else None,
+            }
+
+    def _defer(self, method, args):
+        if self._loading:
+            self._pending.append((method, args))
+            return True
+        return not self.loaded
+
+    @staticmethod
+    def _terms_for(label):
+        words = _TOKEN_RE.findall(normalize_text(label))[:MAX_LABEL_WORDS]
+        return frozenset(' '.join(words[i:]) for i in range(len(words)))
+
+    def _compact(self):
+        if self._stale_terms > 1024 and self._stale_terms > len(self._terms) // 2:
+            self._terms = sorted(
+                (term, kind, item_id)
+                for (kind, item_id), (_, _, item_terms) in self._entries.items()
+                for term in item_terms
+            )
+            self._stale_terms = 0
@@ -13,7 +13,7 @@ from werkzeug.security import generate_password_hash
 # Add backend directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, User, Auction, Bid, Category, Image, Invoice
+from app import app, db, User, Auction, Bid, Category, Image, Invoice, refresh_auction_bid_stats
 
 def clear_database():
     """Clear all existing data from the database"""
@@ -442,6 +442,8 @@ def create_bids(users, auctions):
         # Update auction current bid
         auction.current_bid = current_price
 
+    db.session.flush()
+    refresh_auction_bid_stats([auction.id for auction in auctions])
     db.session.commit()
     print(f"✅ Created {len(created_bids)} bids")
     return created_bids
@@ -13,7 +13,7 @@ from werkzeug.security import generate_password_hash
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Import Flask app and models
-from app import app, db, User, Category, Auction, Bid
+from app import app, db, User, Category, Auction, Bid, refresh_auction_bid_stats
 
 def clear_existing_data():
     """Clear existing data from the database"""
@@ -290,6 +290,8 @@ def create_bids(auctions, users):
         # Update auction current bid
         auction.current_bid = current_price
 
+    db.session.flush()
+    refresh_auction_bid_stats([auction.id for auction in auctions[:5]])
     db.session.commit()
     print(f"✅ Created {len(bids)} bids")
     return bids
@@ -0,0 +1,161 @@
+"""
+Settlement Queue for ZUBID
+In-process min-heap of auction deadlines keyed on end_time.
+The auction scheduler sleeps until the earliest deadline instead of polling,
+so auctions are settled within a fraction of a second of ending. Anti-snipe
+extensions simply reschedule the auction; superseded heap entries are skipped
+lazily when they reach the top.
+"""
+
+import heapq
+import threading
+import time
+from datetime import datetime, timezone
+
+# Number of recent settlement lags kept for metrics
+LAG_SAMPLE_SIZE = 500
+
+
+def to_timestamp(value):
+    """Convert a datetime (naive values are UTC, as stored by SQLite) or number to epoch seconds"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value)
+
+
+class SettlementQueue:
+    """Thread-safe min-heap of (deadline, auction_id) with lazy invalidation"""
+
+    def __init__(self):
+        self._heap = []
+        self._deadlines = {}
+        self._condition = threading.Condition()
+        # Only the scheduler leader keeps a heap; other processes ignore schedule() calls
+        self.enabled = False
+        self._lags = []
+        self.settled_total = 0
+        self.max_lag = 0.0
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    @property
+    def depth(self):
+        return len(self._deadlines)
+
+    def schedule(self, auction_id, end_time):
+        """Add or move an auction's deadline (e.g. after an anti-snipe extension)"""
+        deadline = to_timestamp(end_time)
+        if not self.enabled or deadline is None:
+            return
+        with self._condition:
+            if self._deadlines.get(auction_id) == deadline:
+                return
+            self._discard_stale()
+            previous_head = self._heap[0][0] if self._heap else None
+            self._deadlines[auction_id] = deadline
+            heapq.heappush(self._heap, (deadline, auction_id))
+            self._compact()
+            if previous_head is None or deadline < previous_head:
+                # New earliest deadline - wake the scheduler so it doesn't oversleep
+                self._condition.notify_all()
+
+    def cancel(self, auction_id):
+        """Forget an auction (ended early by buy-now or deleted); its heap entry is dropped lazily"""
+        with self._condition:
+            self._deadlines.pop(auction_id, None)
+
+    def rebuild(self, deadlines):
+        """Replace the queue contents with (auction_id, end_time) pairs loaded from the database"""
+        with self._condition:
+            self._deadlines = {}
+            for auction_id, end_time in deadlines:
+                deadline = to_timestamp(end_time)
+                if deadline is not None:
+                    self._deadlines[auction_id] = deadline
+            self._heap = [(deadline, auction_id) for auction_id, deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
+            self._condition.notify_all()
+
+    def next_deadline(self):
+        """Earliest live deadline, or None if the queue is empty"""
+        with self._condition:
+            self._discard_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        """Remove and return {auction_id: deadline} for every auction whose deadline has passed"""
+        now = time.time() if now is None else now
+        due = {}
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, auction_id = heapq.heappop(self._heap)
+                if self._deadlines.get(auction_id) == deadline:
+                    del self._deadlines[auction_id]
+                    due[auction_id] = deadline
+        return due
+
+    def wait(self, timeout):
+        """Sleep until timeout elapses or an earlier deadline is scheduled"""
+        with self._condition:
+            if timeout > 0:
+                self._condition.wait(timeout)
+
+    def wait_until_due(self, max_sleep):
+        """Sleep until the earliest deadline, at most max_sleep, or until an earlier one is scheduled.
+
+        The head is read and waited on under one hold of the condition, so a
+        schedule() that lands in between can't lose its notify_all().
+        """
+        with self._condition:
+            self._discard_stale()
+            timeout = max_sleep
+            if self._heap:
+                timeout = min(timeout, self._heap[0][0] - time.time())
+            if timeout > 0:
+                self._condition.wait(timeout)
+
+    def wake(self):
+        with self._condition:
+            self._condition.notify_all()
+
+    def record_settlement(self, deadline, settled_at=None):
+        """Record how long after its deadline an auction was actually settled"""
+        settled_at = time.time() if settled_at is None else settled_at
+        lag = max(0.0, settled_at - deadline)
+        with self._condition:
+            self._lags.append(lag)
+            if len(self._lags) > LAG_SAMPLE_SIZE:
+                del self._lags[:len(self._lags) - LAG_SAMPLE_SIZE]
+            self.settled_total += 1
+            self.max_lag = max(self.max_lag, lag)
+
+    def stats(self):
+        """Queue depth and settlement lag metrics"""
+        with self._condition:
+            lags = sorted(self._lags)
+            next_deadline = self._heap[0][0] if self._heap else None
+            return {
+                'enabled': self.enabled,
+                'depth': len(self._deadlines),
+                'heap_size': len(self._heap),
+                'next_deadline_in': round(next_deadline - time.time(), 3) if next_deadline else None,
+                'settled_total': self.settled_total,
+                'lag_avg': round(sum(lags) / len(lags), 4) if lags else 0.0,
+                'lag_p95': round(lags[min(len(lags) - 1, int(len(lags) * 0.95))], 4) if lags else 0.0,
+                'lag_max': round(self.max_lag, 4),
+            }
+
+    def _discard_stale(self):
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        # Frequent anti-snipe extensions leave superseded entries behind; rebuild once they dominate
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._deadlines):
+            self._heap = [(deadline, auction_id) for auction_id, deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
@@ -0,0 +1,255 @@
+"""
+Structured Logging for ZUBID
+Log records are put on an in-memory queue by the request thread and written to the
+rotating log file and the console by one listener thread per process, so a request
+never waits on disk.
+
+Records are JSON by default (LOG_FORMAT=text for the old one-line format) and carry
+the request id, method and path of the request that logged them; every response
+returns its id in X-Request-ID and the access logger records status and latency.
+
+LOG_LEVELS sets per-logger levels, e.g. "werkzeug=WARNING,zubid.auth=DEBUG", so
+chatty loggers like the auth checks cost a level check and nothing else when they
+are off. LOG_SAMPLING keeps one in N records below WARNING for noisy loggers,
+e.g. "zubid.access=0.1" keeps every tenth access line. Warnings and errors are
+never sampled.
+"""
+
+import os
+import copy
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Logging configuration
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_DIR = os.getenv('LOG_DIR', 'logs')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+LOG_LEVELS = os.getenv('LOG_LEVELS', 'werkzeug=WARNING,zubid.auth=WARNING')
+LOG_SAMPLING = os.getenv('LOG_SAMPLING', '')
+LOG_QUEUE_MAX = int(os.getenv('LOG_QUEUE_MAX', '10000'))
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+# Attributes every LogRecord has; anything else was passed in extra= and goes into the JSON
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def parse_mapping(value, convert):
+    """'a=1,b=2' -> {'a': convert('1'), 'b': convert('2')}, skipping malformed entries"""
+    mapping = {}
+    for item in (value or '').split(','):
+        name, _, setting = item.partition('=')
+        if not name.strip() or not setting.strip():
+            continue
+        try:
+            mapping[name.strip()] = convert(setting.strip())
+        except (ValueError, KeyError):
+            continue
+    return mapping
+
+
+def parse_level(value):
+    level = logging.getLevelName(value.upper())
+    if not isinstance(level, int):
+        raise ValueError(value)
+    return level
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the current request's id, method and path (runs on the request thread)"""
+
+    def filter(self, record):
+        from flask import g, has_request_context, request
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.method = request.method
+            record.path = request.path
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in round(1 / rate) records below WARNING for the configured loggers"""
+
+    def __init__(self, rates):
+        super().__init__()
+        # Longest prefix first so 'zubid.auth.admin' beats 'zubid.auth'
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+        self._counters = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def every(self, name):
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + '.'):
+                return max(1, round(1 / rate)) if rate > 0 else 0
+        return 1
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        every = self.every(record.name)
+        if every == 1:
+            return True
+        with self._lock:
+            seen = self._counters.get(record.name, 0)
+            self._counters[record.name] = seen + 1
+            if every and seen % every == 0:
+                return True
+            self.dropped += 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """The original one-line format with the request id appended"""
+
+    def format(self, record):
+        line = super().format(record)
+        request_id = getattr(record, 'request_id', None)
+        return f"{line} [request {request_id}]" if request_id else line
+
+
+class AsyncQueueHandler(QueueHandler):
+    """QueueHandler whose listener thread starts on first use in each process.
+    Started lazily so each gunicorn worker gets its own thread after the fork."""
+
+    def __init__(self, handlers, max_records=LOG_QUEUE_MAX):
+        super().__init__(queue.Queue(maxsize=max_records))
+        self.handlers = handlers
+        self.listener = None
+        self._pid = None
+        self._guard = threading.Lock()
+        self.dropped = 0
+
+    def start(self):
+        if self._pid == os.getpid():
+            return
+        with self._guard:
+            if self._pid != os.getpid():
+                self.listener = QueueListener(self.queue, respect_handler_level=True)
+                # Shares the list, so handlers added later are written too
+                self.listener.handlers = self.handlers
+                self.listener.start()
+                self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Merge the args now, while they can't change under us; the listener does the formatting
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Losing a log line beats blocking the request behind a stalled disk
+            self.dropped += 1
+
+    def flush(self, timeout=5):
+        """Wait until the listener has written every queued record. Returns False on timeout."""
+        if self.listener is None or self._pid != os.getpid():
+            return True
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def stop(self):
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+            self._pid = None
+        for handler in self.handlers:
+            handler.close()
+
+
+def configure(app, level=LOG_LEVEL, log_dir=LOG_DIR, log_format=LOG_FORMAT,
+              levels=LOG_LEVELS, sampling=LOG_SAMPLING):
+    """Route the app's and every module's logging through the queue. Returns the queue handler."""
+    level = getattr(logging, level, logging.INFO)
+    os.makedirs(log_dir, exist_ok=True)
+
+    if log_format == 'text':
+        file_formatter = TextFormatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
+        console_formatter = TextFormatter('%(asctime)s %(levelname)s: %(message)s')
+    else:
+        file_formatter = console_formatter = JsonFormatter()
+
+    file_handler = RotatingFileHandler(
+        os.path.join(log_dir, 'zubid.log'),
+        maxBytes=10240000,  # 10MB
+        backupCount=10
+    )
+    file_handler.setFormatter(file_formatter)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(console_formatter)
+
+    handler = AsyncQueueHandler([file_handler, console_handler])
+    handler.addFilter(RequestContextFilter())
+    handler.addFilter(SamplingFilter(parse_mapping(sampling, float)))
+
+    # Everything propagates to the root logger; the app logger loses Flask's synchronous default handler
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(handler)
+    app.logger.handlers.clear()
+    app.logger.setLevel(level)
+    for name, logger_level in parse_mapping(levels, parse_level).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    access_logger = logging.getLogger('zubid.access')
+
+    @app.before_request
+    def start_request_log():
+        from flask import g, request
+        g.request_started = time.perf_counter()
+        g.request_id = (request.headers.get(REQUEST_ID_HEADER) or '')[:64] or uuid.uuid4().hex
+
+    @app.after_request
+    def finish_request_log(response):
+        from flask import g, request
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        started = g.get('request_started')
+        if started is not None and access_logger.isEnabledFor(logging.INFO):
+            latency_ms = round((time.perf_counter() - started) * 1000, 2)
+            access_logger.info(
+                '%s %s %s %.2fms', request.method, request.path, response.status_code, latency_ms,
+                extra={'status': response.status_code, 'latency_ms': latency_ms},
+            )
+        return response
+
+    return handler
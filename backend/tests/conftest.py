@@ -1,16 +1,24 @@
 """
 Pytest Configuration and Fixtures for ZUBID Backend Tests
 """
+import json
 import os
 import sys
 import pytest
 import tempfile
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
 # Add backend directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import app, db, User, Auction, Bid, Category
+from app import app, db, User, Auction, Bid, Category, notifications_outbox, unread_counter
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'max_queries(n): fail if any request made by the test runs more than n SQL statements'
+    )
 
 
 @pytest.fixture(scope='session')
@@ -20,6 +28,8 @@ def test_app():
     app.config['WTF_CSRF_ENABLED'] = False
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     app.config['SECRET_KEY'] = 'test-secret-key'
+    # Write notifications inline so each test sees its own before cleanup
+    notifications_outbox.asynchronous = False
     
     with app.app_context():
         db.create_all()
@@ -44,6 +54,8 @@ def db_session(test_app):
         for table in reversed(db.metadata.sorted_tables):
             db.session.execute(table.delete())
         db.session.commit()
+        # Cached counts are keyed on user ids, which are reused once the tables are emptied
+        unread_counter.clear()
 
 
 @pytest.fixture
@@ -132,6 +144,60 @@ def test_auction(db_session, test_user, test_category):
     return auction
 
 
+@pytest.fixture
+def bidder_user(db_session):
+    """Create a second user who bids on other users' auctions"""
+    from datetime import timezone, date
+    from werkzeug.security import generate_password_hash
+    bidder = User(
+        username='bidderuser',
+        email='bidder@example.com',
+        phone='5551234567',
+        id_number='BIDDER123456',
+        password_hash=generate_password_hash('BidderPassword123!'),
+        birth_date=date(1990, 1, 1),
+        address='Bidder Address',
+        email_verified=True,
+        phone_verified=True,
+        is_active=True,
+        created_at=datetime.now(timezone.utc)
+    )
+    db_session.session.add(bidder)
+    db_session.session.commit()
+    db_session.session.refresh(bidder)
+    return bidder
+
+
+@pytest.fixture
+def live_auction(db_session, test_user, test_category):
+    """Create an active auction using the real Auction columns"""
+    from datetime import timezone
+    auction = Auction(
+        item_name='Live Auction',
+        description='An active auction item',
+        starting_bid=100.0,
+        current_bid=100.0,
+        bid_increment=10.0,
+        start_time=datetime.now(timezone.utc) - timedelta(hours=1),
+        end_time=datetime.now(timezone.utc) + timedelta(days=7),
+        seller_id=test_user.id,
+        category_id=test_category.id,
+        status='active',
+        qr_code_url='/uploads/qrcodes/test.png'
+    )
+    db_session.session.add(auction)
+    db_session.session.commit()
+    return auction
+
+
+@pytest.fixture
+def bidder_client(client, bidder_user, db_session):
+    """Create a test client authenticated as the bidder"""
+    with client.session_transaction() as sess:
+        sess['user_id'] = bidder_user.id
+    return client
+
+
 @pytest.fixture
 def authenticated_client(client, test_user, db_session):
     """Create an authenticated test client"""
@@ -152,6 +218,153 @@ def admin_client(client, admin_user, db_session):
     return client
 
 
+# ==========================================
+# QUERY COUNTING
+# ==========================================
+
+class QueryCounter:
+    """Records the SQL statements each request runs.
+    Statements outside a request (fixtures, direct model access) are not counted."""
+
+    def __init__(self):
+        self.requests = []  # [(method, path, [statements])]
+        self._current = None
+
+    def install(self, flask_app):
+        from flask import request_started, request_finished
+        from sqlalchemy import event
+        event.listen(db.engine, 'before_cursor_execute', self._on_query)
+        request_started.connect(self._on_request_started, flask_app)
+        request_finished.connect(self._on_request_finished, flask_app)
+        self._app = flask_app
+
+    def uninstall(self):
+        from flask import request_started, request_finished
+        from sqlalchemy import event
+        event.remove(db.engine, 'before_cursor_execute', self._on_query)
+        request_started.disconnect(self._on_request_started, self._app)
+        request_finished.disconnect(self._on_request_finished, self._app)
+
+    def _on_query(self, conn, cursor, statement, parameters, context, executemany):
+        if self._current is not None:
+            self._current[2].append(statement)
+
+    def _on_request_started(self, sender, **extra):
+        from flask import request
+        self._current = (request.method, request.full_path.rstrip('?'), [])
+
+    def _on_request_finished(self, sender, response, **extra):
+        if self._current is not None:
+            self.requests.append(self._current)
+            self._current = None
+
+    def counts(self):
+        return [len(statements) for _, _, statements in self.requests]
+
+    def check(self, limit, requests=None):
+        """Fail with the offending statements if a request ran more than limit"""
+        for method, path, statements in (self.requests if requests is None else requests):
+            if len(statements) > limit:
+                listing = '\n'.join(f'  {i + 1}. {" ".join(sql.split())[:200]}' for i, sql in enumerate(statements))
+                pytest.fail(f'{method} {path} ran {len(statements)} queries (max_queries={limit}):\n{listing}',
+                            pytrace=False)
+
+
+@pytest.fixture
+def query_counter(test_app):
+    """Count the SQL statements each request runs"""
+    counter = QueryCounter()
+    counter.install(test_app)
+    yield counter
+    counter.uninstall()
+
+
+@pytest.fixture
+def max_queries(query_counter):
+    """Context manager asserting every request in the block stays within a query budget:
+
+        with max_queries(5):
+            client.get('/api/wishlist')
+    """
+    @contextmanager
+    def budget(limit):
+        start = len(query_counter.requests)
+        yield query_counter
+        made = query_counter.requests[start:]
+        assert made, 'no requests were made inside max_queries()'
+        query_counter.check(limit, made)
+    return budget
+
+
+@pytest.fixture(autouse=True)
+def _max_queries_marker(request):
+    """Apply @pytest.mark.max_queries(n) to every request the test makes"""
+    marker = request.node.get_closest_marker('max_queries')
+    if marker is None:
+        yield
+        return
+    counter = request.getfixturevalue('query_counter')
+    yield
+    counter.check(marker.args[0])
+
+
+# Large enough that anything loaded per row shows up as dozens of extra queries
+SEED_AUCTIONS = 25
+SEED_BIDDERS = 8
+
+
+@pytest.fixture
+def seeded_marketplace(db_session, test_user, admin_user, test_category):
+    """A marketplace with many auctions, bids, images, wishlist entries and notifications.
+    test_user bids on, watches and gets notified about every auction."""
+    from datetime import timezone, date
+    from app import Image, Wishlist, Notification
+    now = datetime.now(timezone.utc)
+    session = db_session.session
+
+    bidders = [
+        User(
+            username=f'seedbidder{i}', email=f'seedbidder{i}@example.com', phone=f'77000000{i:02d}',
+            id_number=f'SEED{i:06d}', password_hash='x', birth_date=date(1990, 1, 1),
+            address='Seed Address', is_active=True, created_at=now - timedelta(days=i),
+        )
+        for i in range(SEED_BIDDERS)
+    ]
+    session.add_all(bidders)
+    session.flush()
+
+    auctions = []
+    for i in range(SEED_AUCTIONS):
+        seller = bidders[i % SEED_BIDDERS]
+        auctions.append(Auction(
+            item_name=f'Seed Auction {i}', description='Seeded auction item',
+            starting_bid=100.0, current_bid=100.0 + 10 * SEED_BIDDERS, bid_increment=10.0,
+            start_time=now - timedelta(hours=1), end_time=now + timedelta(days=1, minutes=i),
+            seller_id=seller.id, category_id=test_category.id,
+            status='active' if i % 5 else 'ended', winner_id=test_user.id if i % 5 == 0 else None,
+        ))
+    session.add_all(auctions)
+    session.flush()
+
+    rows = []
+    for auction in auctions:
+        rows.append(Image(auction_id=auction.id, url=f'/uploads/seed-{auction.id}-1.jpg', is_primary=True))
+        rows.append(Image(auction_id=auction.id, url=f'/uploads/seed-{auction.id}-2.jpg', is_primary=False))
+        for j, bidder in enumerate(bidders):
+            if bidder.id != auction.seller_id:
+                rows.append(Bid(auction_id=auction.id, user_id=bidder.id, amount=100.0 + 10 * j,
+                                timestamp=now - timedelta(minutes=60 - j)))
+        rows.append(Bid(auction_id=auction.id, user_id=test_user.id, amount=auction.current_bid, timestamp=now))
+        rows.append(Wishlist(user_id=test_user.id, auction_id=auction.id))
+        rows.append(Notification(user_id=test_user.id, title='Outbid', message=f'Outbid on {auction.item_name}',
+                                 type='outbid', auction_id=auction.id, created_at=now))
+        rows.append(Notification(user_id=auction.seller_id, title='New bid', message='New bid',
+                                 type='info', auction_id=auction.id, created_at=now))
+    session.add_all(rows)
+    session.commit()
+    return {'users': len(bidders) + 2, 'auctions': SEED_AUCTIONS, 'bidders': SEED_BIDDERS}
+
+
 # API Response helpers
 def assert_success_response(response, status_code=200):
     """Assert response is successful"""
@@ -166,3 +379,20 @@ def assert_error_response(response, status_code=400):
     assert 'error' in data or 'message' in data
     return data
 
+
+def get_auction(db_session, auction_id):
+    """Fresh copy of an auction, bypassing the session's identity map"""
+    db_session.session.expire_all()
+    return db_session.session.get(Auction, auction_id)
+
+
+# SSE helpers
+def parse_frame(frame):
+    """Split an SSE frame into (event, data)"""
+    event, data = None, []
+    for line in frame.strip().splitlines():
+        if line.startswith('event: '):
+            event = line[len('event: '):]
+        elif line.startswith('data: '):
+            data.append(line[len('data: '):])
+    return event, json.loads('\n'.join(data)) if data else None
@@ -0,0 +1,98 @@
+"""
+Auction Detail Cache Tests for ZUBID Backend
+Tests: Versioned LRU, Version-derived ETags, Invalidation on writes
+"""
+import pytest
+
+
+class TestVersionedCache:
+    """Test the in-process versioned LRU"""
+
+    def test_hit_requires_matching_version(self):
+        """Test a lookup for another version misses"""
+        from auction_cache import VersionedCache
+        cache = VersionedCache(max_entries=10, shared_url='', enabled=True)
+        cache.set(1, 3, {'id': 1})
+        assert cache.get(1, 3) == {'id': 1}
+        assert cache.get(1, 4) is None
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_newer_version_replaces_entry(self):
+        """Test one slot is kept per key"""
+        from auction_cache import VersionedCache
+        cache = VersionedCache(max_entries=10, shared_url='', enabled=True)
+        cache.set(1, 1, 'old')
+        cache.set(1, 2, 'new')
+        assert len(cache) == 1
+        assert cache.get(1, 1) is None
+        assert cache.get(1, 2) == 'new'
+
+    def test_lru_is_bounded(self):
+        """Test the least recently used entry is evicted first"""
+        from auction_cache import VersionedCache
+        cache = VersionedCache(max_entries=2, shared_url='', enabled=True)
+        cache.set(1, 1, 'a')
+        cache.set(2, 1, 'b')
+        cache.get(1, 1)
+        cache.set(3, 1, 'c')
+        assert len(cache) == 2
+        assert cache.get(2, 1) is None
+        assert cache.get(1, 1) == 'a'
+
+
+class TestAuctionDetailCaching:
+    """Test get_auction ETags and invalidation"""
+
+    def test_etag_stable_until_change(self, client, db_session, live_auction):
+        """Test an unchanged auction keeps its ETag and returns 304"""
+        auction_id = live_auction.id
+        first = client.get(f'/api/auctions/{auction_id}')
+        assert first.status_code == 200
+        etag = first.headers['ETag']
+        assert client.get(f'/api/auctions/{auction_id}').headers['ETag'] == etag
+
+        revalidated = client.get(f'/api/auctions/{auction_id}', headers={'If-None-Match': etag})
+        assert revalidated.status_code == 304
+
+    def test_bid_changes_etag(self, client, bidder_client, db_session, live_auction):
+        """Test placing a bid invalidates the ETag and the cached detail"""
+        auction_id = live_auction.id
+        etag = client.get(f'/api/auctions/{auction_id}').headers['ETag']
+
+        response = bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0})
+        assert response.status_code == 201
+
+        fresh = client.get(f'/api/auctions/{auction_id}', headers={'If-None-Match': etag})
+        assert fresh.status_code == 200
+        assert fresh.headers['ETag'] != etag
+        assert fresh.get_json()['current_bid'] == 110.0
+        assert fresh.get_json()['bid_count'] == 1
+
+    def test_detail_served_from_cache(self, client, db_session, live_auction):
+        """Test a repeat request reuses the serialized detail"""
+        from app import auction_detail_cache
+        auction_id = live_auction.id
+        client.get(f'/api/auctions/{auction_id}')
+        hits = auction_detail_cache.hits
+        data = client.get(f'/api/auctions/{auction_id}').get_json()
+        assert auction_detail_cache.hits == hits + 1
+        assert data['item_name'] == live_auction.item_name
+        assert data['time_left'] > 0
+
+    def test_category_rename_invalidates(self, client, admin_client, db_session, live_auction):
+        """Test renaming a category bumps the version of its auctions"""
+        auction_id = live_auction.id
+        category_id = live_auction.category_id
+        etag = client.get(f'/api/auctions/{auction_id}').headers['ETag']
+
+        response = admin_client.put(f'/api/admin/categories/{category_id}', json={'name': 'Renamed Category'})
+        assert response.status_code == 200
+
+        fresh = client.get(f'/api/auctions/{auction_id}')
+        assert fresh.headers['ETag'] != etag
+        assert fresh.get_json()['category_name'] == 'Renamed Category'
+
+    def test_missing_auction(self, client, db_session):
+        """Test a nonexistent auction returns 404"""
+        assert client.get('/api/auctions/999999').status_code == 404
@@ -0,0 +1,128 @@
+"""
+Auction Card Tests for ZUBID Backend
+Tests: Card projection, Primary image selection, Card endpoints issue one query
+"""
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def statements(db_session):
+    """Record SQL statements executed while the fixture is active"""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    engine = db_session.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(engine, 'before_cursor_execute', record)
+
+
+class TestCardProjection:
+    """Test cards built from the column projection"""
+
+    def test_primary_image_preferred(self, db_session, live_auction):
+        """Test the primary image wins over earlier images"""
+        from app import Image, Auction, auction_card_query, serialize_auction_card
+        auction_id = live_auction.id
+        db_session.session.add_all([
+            Image(auction_id=auction_id, url='https://img.test/first.jpg', is_primary=False),
+            Image(auction_id=auction_id, url='https://img.test/primary.jpg', is_primary=True),
+        ])
+        db_session.session.commit()
+
+        row = auction_card_query().filter(Auction.id == auction_id).one()
+        card = serialize_auction_card(row)
+        assert card['imageUrl'] == 'https://img.test/primary.jpg'
+        assert card['id'] == str(auction_id)
+        assert card['isWishlisted'] is False
+
+    def test_featured_image_fallback(self, db_session, live_auction):
+        """Test auctions without images fall back to the featured image"""
+        from app import Auction, auction_card_query, serialize_auction_card
+        auction_id = live_auction.id
+        live_auction.featured_image_url = 'https://img.test/featured.jpg'
+        db_session.session.commit()
+
+        row = auction_card_query().filter(Auction.id == auction_id).one()
+        assert serialize_auction_card(row)['imageUrl'] == 'https://img.test/featured.jpg'
+
+    def test_description_truncated_in_sql(self, db_session, live_auction):
+        """Test listing descriptions are cut to 100 characters plus an ellipsis"""
+        from app import Auction, auction_card_query, serialize_auction_card
+        auction_id = live_auction.id
+        live_auction.description = 'x' * 250
+        db_session.session.commit()
+
+        row = auction_card_query(description_length=100).filter(Auction.id == auction_id).one()
+        assert len(row.description) == 101
+        assert serialize_auction_card(row, description_length=100)['description'] == 'x' * 100 + '...'
+
+
+class TestCardEndpoints:
+    """Test card endpoints fetch each page in a single statement"""
+
+    def test_wishlist_single_query(self, bidder_client, db_session, live_auction, statements):
+        """Test the wishlist is one SELECT regardless of size"""
+        from app import Auction
+        second = Auction(
+            item_name='Second Auction', description='Another item', starting_bid=50.0,
+            end_time=live_auction.end_time, seller_id=live_auction.seller_id,
+            category_id=live_auction.category_id, status='active'
+        )
+        db_session.session.add(second)
+        db_session.session.commit()
+        auction_ids = [live_auction.id, second.id]
+        for auction_id in auction_ids:
+            assert bidder_client.post(f'/api/wishlist/{auction_id}').status_code == 201
+
+        statements.clear()
+        response = bidder_client.get('/api/wishlist')
+        assert response.status_code == 200
+        cards = response.get_json()
+        assert [card['id'] for card in cards] == [str(auction_id) for auction_id in auction_ids]
+        assert all(card['isWishlisted'] for card in cards)
+        assert len([s for s in statements if 'from auction' in s.lower()]) == 1
+
+    def test_my_bids_single_query(self, bidder_client, db_session, live_auction, statements):
+        """Test my-bids lists each auction once in one SELECT"""
+        auction_id = live_auction.id
+        bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0})
+        bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 120.0})
+
+        statements.clear()
+        cards = bidder_client.get('/api/my-bids').get_json()
+        assert [card['id'] for card in cards] == [str(auction_id)]
+        assert cards[0]['currentPrice'] == 120.0
+        assert len([s for s in statements if 'from auction' in s.lower()]) == 1
+
+
+class TestWishlistedFlag:
+    """Test isWishlisted is resolved for the whole page"""
+
+    def test_listing_marks_wishlisted_auctions(self, bidder_client, db_session, live_auction, statements):
+        """Test a logged-in listing reports wishlist membership with a single extra lookup"""
+        auction_id = live_auction.id
+        category_id = live_auction.category_id
+        assert bidder_client.post(f'/api/wishlist/{auction_id}').status_code == 201
+
+        statements.clear()
+        cards = bidder_client.get(f'/api/auctions?category_id={category_id}&include_total=false').get_json()['auctions']
+        assert [card['isWishlisted'] for card in cards] == [True]
+        assert len([s for s in statements if 'wishlist' in s.lower()]) == 1
+
+        bidder_client.delete(f'/api/wishlist/{auction_id}')
+        cards = bidder_client.get(f'/api/auctions?category_id={category_id}').get_json()['auctions']
+        assert [card['isWishlisted'] for card in cards] == [False]
+
+    def test_anonymous_listing_skips_lookup(self, client, db_session, live_auction, statements):
+        """Test anonymous visitors get isWishlisted False without a wishlist query"""
+        category_id = live_auction.category_id
+        client.post('/api/logout')
+
+        statements.clear()
+        cards = client.get(f'/api/auctions?category_id={category_id}').get_json()['auctions']
+        assert [card['isWishlisted'] for card in cards] == [False]
+        assert not [s for s in statements if 'wishlist' in s.lower()]
@@ -0,0 +1,235 @@
+"""
+Auction Scheduler Tests for ZUBID Backend
+Tests: Batched settlement, Read-only listing endpoints, Leader election
+"""
+import threading
+import time
+
+import pytest
+from datetime import datetime, timedelta, timezone
+
+
+def end_auction(db_session, auction):
+    """Move an auction's end_time into the past without settling it"""
+    auction.end_time = datetime.now(timezone.utc) - timedelta(minutes=1)
+    db_session.session.commit()
+
+
+class TestSettlement:
+    """Test settling ended auctions"""
+
+    def test_settle_ended_auction_with_winner(self, db_session, live_auction, bidder_user):
+        """Test the highest bidder wins and gets an invoice and notification"""
+        from app import Bid, Invoice, Notification, Auction, settle_ended_auctions
+        db_session.session.add(Bid(auction_id=live_auction.id, user_id=bidder_user.id, amount=150.0))
+        db_session.session.commit()
+        end_auction(db_session, live_auction)
+
+        assert settle_ended_auctions() == 1
+
+        auction = db_session.session.get(Auction, live_auction.id)
+        assert auction.status == 'ended'
+        assert auction.winner_id == bidder_user.id
+        assert auction.current_bid == 150.0
+        assert Invoice.query.filter_by(auction_id=auction.id, user_id=bidder_user.id).count() == 1
+        assert Notification.query.filter_by(user_id=bidder_user.id, type='won').count() == 1
+
+    def test_settle_is_idempotent(self, db_session, live_auction, bidder_user):
+        """Test a second sweep does not settle the same auction again"""
+        from app import Bid, Invoice, settle_ended_auctions
+        db_session.session.add(Bid(auction_id=live_auction.id, user_id=bidder_user.id, amount=150.0))
+        db_session.session.commit()
+        end_auction(db_session, live_auction)
+
+        assert settle_ended_auctions() == 1
+        assert settle_ended_auctions() == 0
+        assert Invoice.query.filter_by(auction_id=live_auction.id).count() == 1
+
+    def test_settle_without_bids(self, db_session, live_auction):
+        """Test an auction without bids ends with no winner"""
+        from app import Auction, Invoice, settle_ended_auctions
+        end_auction(db_session, live_auction)
+
+        assert settle_ended_auctions() == 1
+        auction = db_session.session.get(Auction, live_auction.id)
+        assert auction.status == 'ended'
+        assert auction.winner_id is None
+        assert Invoice.query.count() == 0
+
+    def test_active_auction_not_settled(self, db_session, live_auction):
+        """Test auctions that haven't ended are left alone"""
+        from app import settle_ended_auctions
+        assert settle_ended_auctions() == 0
+
+
+class TestReadOnlyEndpoints:
+    """Test listing and detail endpoints no longer close auctions"""
+
+    def test_get_auctions_does_not_settle(self, client, db_session, live_auction):
+        """Test listing hides ended auctions without writing"""
+        from app import Auction
+        end_auction(db_session, live_auction)
+        auction_id = live_auction.id
+
+        response = client.get('/api/auctions')
+        assert response.status_code == 200
+        assert all(a['id'] != str(auction_id) for a in response.get_json()['auctions'])
+        assert db_session.session.get(Auction, auction_id).status == 'active'
+
+    def test_get_auction_reports_ended(self, client, db_session, live_auction):
+        """Test detail reports an ended auction as ended without writing"""
+        from app import Auction
+        end_auction(db_session, live_auction)
+        auction_id = live_auction.id
+
+        response = client.get(f'/api/auctions/{auction_id}')
+        assert response.status_code == 200
+        assert response.get_json()['status'] == 'ended'
+        assert db_session.session.get(Auction, auction_id).status == 'active'
+
+
+class TestLeaderLock:
+    """Test scheduler leader election"""
+
+    def test_only_one_leader(self, tmp_path):
+        """Test a second process cannot take the lock until it is released"""
+        from auction_scheduler import LeaderLock
+        lock_file = str(tmp_path / 'scheduler.lock')
+        first = LeaderLock(lock_file=lock_file)
+        second = LeaderLock(lock_file=lock_file)
+
+        assert first.acquire()
+        assert not second.acquire()
+        first.release()
+        assert second.acquire()
+        second.release()
+
+
+class TestSettlementQueue:
+    """Test the end_time min-heap"""
+
+    def make_queue(self):
+        from settlement_queue import SettlementQueue
+        queue = SettlementQueue()
+        queue.enabled = True
+        return queue
+
+    def test_pop_due_in_deadline_order(self):
+        """Test only auctions past their deadline are popped"""
+        queue = self.make_queue()
+        queue.schedule(1, 100.0)
+        queue.schedule(2, 50.0)
+        queue.schedule(3, 200.0)
+
+        assert queue.next_deadline() == 50.0
+        assert queue.pop_due(now=150.0) == {2: 50.0, 1: 100.0}
+        assert queue.depth == 1
+
+    def test_reschedule_supersedes_old_deadline(self):
+        """Test an anti-snipe extension moves the auction instead of settling early"""
+        queue = self.make_queue()
+        queue.schedule(1, 100.0)
+        queue.schedule(1, 220.0)
+
+        assert queue.pop_due(now=150.0) == {}
+        assert queue.next_deadline() == 220.0
+        assert queue.pop_due(now=250.0) == {1: 220.0}
+
+    def test_cancel(self):
+        """Test cancelled auctions are never popped"""
+        queue = self.make_queue()
+        queue.schedule(1, 100.0)
+        queue.cancel(1)
+
+        assert queue.pop_due(now=500.0) == {}
+        assert queue.next_deadline() is None
+
+    def test_wait_until_due_returns_for_due_head(self):
+        """Test an entry scheduled before the wait is honoured instead of sleeping to max_sleep"""
+        queue = self.make_queue()
+        queue.schedule(1, time.time() - 1)
+        started = time.monotonic()
+        queue.wait_until_due(5.0)
+        assert time.monotonic() - started < 1.0
+
+    def test_wait_until_due_woken_by_earlier_deadline(self):
+        """Test scheduling an earlier deadline wakes a waiting scheduler"""
+        queue = self.make_queue()
+        queue.schedule(1, time.time() + 30)
+        timer = threading.Timer(0.1, queue.schedule, args=(2, time.time()))
+        timer.start()
+        started = time.monotonic()
+        queue.wait_until_due(5.0)
+        timer.join()
+        assert time.monotonic() - started < 2.0
+
+    def test_disabled_queue_ignores_schedule(self):
+        """Test non-leader processes keep no heap"""
+        from settlement_queue import SettlementQueue
+        queue = SettlementQueue()
+        queue.schedule(1, 100.0)
+        assert queue.depth == 0
+
+    def test_rebuild_and_stats(self):
+        """Test rebuilding from database rows and lag metrics"""
+        queue = self.make_queue()
+        queue.rebuild([(1, datetime(2030, 1, 1)), (2, datetime(2030, 1, 2, tzinfo=timezone.utc))])
+        assert queue.depth == 2
+
+        queue.record_settlement(100.0, settled_at=100.25)
+        stats = queue.stats()
+        assert stats['depth'] == 2
+        assert stats['settled_total'] == 1
+        assert stats['lag_max'] == 0.25
+
+
+class TestSchedulerDueProcessing:
+    """Test the scheduler settling auctions from the heap"""
+
+    def make_scheduler(self):
+        from app import app, settle_ended_auctions, load_auction_deadlines
+        from auction_scheduler import AuctionScheduler
+        scheduler = AuctionScheduler(app, settle_ended_auctions, load_auction_deadlines)
+        scheduler.queue.enabled = True
+        return scheduler
+
+    def test_due_auction_settled(self, db_session, live_auction):
+        """Test an auction is settled once its heap deadline passes"""
+        from app import Auction
+        end_auction(db_session, live_auction)
+        scheduler = self.make_scheduler()
+        scheduler.queue.schedule(live_auction.id, live_auction.end_time)
+
+        assert scheduler.process_due() == 1
+        db_session.session.expire_all()
+        assert db_session.session.get(Auction, live_auction.id).status == 'ended'
+        assert scheduler.queue.stats()['settled_total'] == 1
+
+    def test_extended_auction_rescheduled(self, db_session, live_auction):
+        """Test a stale deadline reschedules to the auction's real end_time"""
+        from app import Auction
+        auction_id = live_auction.id
+        scheduler = self.make_scheduler()
+        scheduler.queue.schedule(auction_id, datetime.now(timezone.utc) - timedelta(seconds=1))
+
+        assert scheduler.process_due() == 0
+        assert db_session.session.get(Auction, auction_id).status == 'active'
+        assert scheduler.queue.depth == 1
+        assert scheduler.queue.next_deadline() > datetime.now(timezone.utc).timestamp()
+
+    def test_reconcile_loads_upcoming_deadlines(self, db_session, live_auction):
+        """Test startup rebuild only loads auctions inside the horizon"""
+        auction_id = live_auction.id
+        live_auction.end_time = datetime.now(timezone.utc) + timedelta(minutes=5)
+        db_session.session.commit()
+        scheduler = self.make_scheduler()
+
+        scheduler.reconcile(rebuild=True)
+        assert scheduler.queue.depth == 1
+        assert auction_id in scheduler.queue.pop_due(now=datetime.now(timezone.utc).timestamp() + 600)
+
+    def test_reconcile_skips_auctions_beyond_horizon(self, db_session, live_auction):
+        """Test auctions ending after the horizon stay out of the heap"""
+        scheduler = self.make_scheduler()
+        scheduler.reconcile(rebuild=True)
+        assert scheduler.queue.depth == 0
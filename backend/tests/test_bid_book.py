@@ -0,0 +1,285 @@
+"""
+Bid Book Tests for ZUBID Backend
+Tests: In-memory validation and resolution, Write-behind through the API, Cross-worker forwarding
+"""
+import time
+
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from bid_book import BidBook, BidBookManager, BidRejected, BidFuture
+from proxy_bidding import Proxy
+
+
+def make_book(**overrides):
+    now = datetime.now(timezone.utc)
+    params = dict(auction_id=1, price=100.0, increment=10.0, seller_id=9, end_time=now + timedelta(hours=1))
+    params.update(overrides)
+    return BidBook(**params)
+
+
+class TestBidBook:
+    """Test bids resolved against the in-memory book"""
+
+    def test_rejects_invalid_bids(self):
+        """Test the book enforces the same rules as the database path"""
+        book = make_book()
+        now = datetime.now(timezone.utc)
+        with pytest.raises(BidRejected, match='at least'):
+            book.place(1, 105.0, None, now, 120, 120)
+        with pytest.raises(BidRejected, match='own auction'):
+            book.place(9, 200.0, None, now, 120, 120)
+        with pytest.raises(BidRejected, match='ended'):
+            make_book(end_time=now - timedelta(seconds=1)).place(1, 200.0, None, now, 120, 120)
+        with pytest.raises(BidRejected, match='not active'):
+            make_book(status='ended').place(1, 200.0, None, now, 120, 120)
+
+    def test_accepts_and_resolves_proxies(self):
+        """Test accepted bids move the price and standing maximums counter at once"""
+        book = make_book(proxies=[Proxy(2, 300.0, (0, 1))], leader_id=2)
+        placement = book.place(1, 110.0, None, datetime.now(timezone.utc), 120, 120)
+        assert placement.resolution.winner_id == 2
+        assert book.price == 120.0
+        assert book.leader_id == 2
+        assert placement.previous_leader_id == 2
+        assert list(book.top_bids)[:2] == [(2, 120.0), (1, 110.0)]
+
+    def test_stores_bidder_maximum(self):
+        """Test a new maximum is kept in the book and reported for write-behind"""
+        book = make_book()
+        now = datetime.now(timezone.utc)
+        placement = book.place(1, 110.0, 500.0, now, 120, 120)
+        assert placement.proxy == (500.0, now)
+        assert book.proxies[1].max_amount == 500.0
+        # The next bidder is outbid by the stored maximum in the same step
+        assert book.place(2, 200.0, None, now, 120, 120).resolution.winner_id == 1
+        assert book.price == 210.0
+
+    def test_anti_snipe_extension(self):
+        """Test a late bid extends the book's end time"""
+        now = datetime.now(timezone.utc)
+        book = make_book(end_time=now + timedelta(seconds=30))
+        placement = book.place(1, 110.0, None, now, 120, 120)
+        assert placement.time_extended is True
+        assert book.end_time == now + timedelta(seconds=120)
+
+
+class FakeBus:
+    backend = 'fake'
+
+    def __init__(self, reach='cluster'):
+        self.handlers = []
+        self.published = []
+        self.started = True
+        self._reach = reach
+
+    def reach(self):
+        return self._reach
+
+    def subscribe(self, topic, handler):
+        self.handlers.append(handler)
+
+    def publish(self, topic, data):
+        self.published.append(data)
+
+
+class TestForwarding:
+    """Test bids forwarded to the partition owner over the bus"""
+
+    def test_reply_completes_forwarded_bid(self, test_app):
+        """Test a non-owner publishes the bid and the owner's reply resolves it"""
+        bus = FakeBus()
+        manager = BidBookManager(test_app, None, None, None, bus=bus, partitions=1)
+        request_id, future = manager._forward(7, 1, 110.0, None, datetime.now(timezone.utc))
+        request = bus.published[-1]
+        assert request['kind'] == 'request' and request['auction_id'] == 7
+
+        manager._on_message({'kind': 'reply', 'request_id': request_id, 'result': {'ok': True}})
+        assert future.wait(0) == {'ok': True}
+
+    def test_non_owner_ignores_requests(self, test_app):
+        """Test only the owning process answers a forwarded bid"""
+        bus = FakeBus()
+        manager = BidBookManager(test_app, None, None, None, bus=bus, partitions=1)
+        manager._on_message({'kind': 'request', 'request_id': 'x', 'auction_id': 7, 'user_id': 1,
+                             'amount': 110.0, 'now': 0})
+        assert bus.published == []
+
+    def test_unacknowledged_timeout_is_retryable(self, test_app):
+        """Test a forwarded bid nobody acknowledged answers 503, and is withdrawn"""
+        bus = FakeBus()
+        manager = BidBookManager(test_app, None, None, None, bus=bus, partitions=1, timeout=0.05)
+        manager.partitions[0]._retry_at = float('inf')  # owned elsewhere
+        result = manager.place(7, 1, 110.0, None, datetime.now(timezone.utc))
+        assert result['status'] == 503
+        assert bus.published[-1]['kind'] == 'cancel'
+
+    def test_acknowledged_timeout_is_pending(self, test_app):
+        """Test a forwarded bid the owner acknowledged answers pending"""
+        import threading
+        bus = FakeBus()
+        manager = BidBookManager(test_app, None, None, None, bus=bus, partitions=1, timeout=0.3)
+        manager.partitions[0]._retry_at = float('inf')
+
+        def acknowledge():
+            while not bus.published:
+                time.sleep(0.01)
+            manager._on_message({'kind': 'ack', 'request_id': bus.published[0]['request_id']})
+        threading.Thread(target=acknowledge, daemon=True).start()
+        result = manager.place(7, 1, 110.0, None, datetime.now(timezone.utc))
+        assert result['status'] == 202 and result['pending'] is True
+
+    def test_owner_ignores_stale_and_cancelled_requests(self, test_app):
+        """Test the owner never applies a request the requester may already have answered 503 for"""
+        bus = FakeBus()
+        manager = BidBookManager(test_app, None, None, None, bus=bus, partitions=1, timeout=1)
+        manager.partitions[0]._thread = type('Alive', (), {'is_alive': lambda self: True})()
+        request = {'kind': 'request', 'auction_id': 7, 'user_id': 1, 'amount': 110.0, 'now': 0}
+        manager._on_message({**request, 'request_id': 'stale', 'sent_at': time.time() - 0.6})
+        manager._on_message({'kind': 'cancel', 'request_id': 'early'})
+        manager._on_message({**request, 'request_id': 'early', 'sent_at': time.time()})
+        assert bus.published == []
+        assert manager.partitions[0]._commands.empty()
+
+    def test_disabled_when_owners_unreachable(self, test_app):
+        """Test the book turns itself off when the bus can't reach every partition owner"""
+        for reach, enabled in (('process', False), ('host', True), ('cluster', True)):
+            manager = BidBookManager(test_app, None, None, lambda: test_app.extensions['sqlalchemy'].engine,
+                                     bus=FakeBus(reach), enabled=True)
+            # SQLite: partitions are claimed with lock files, so owners are on this host
+            assert manager.ready() is enabled, reach
+
+    def test_future_callbacks(self):
+        """Test callbacks run once, even when added after completion"""
+        future = BidFuture()
+        seen = []
+        future.add_callback(seen.append)
+        assert future.set(1) is True
+        assert future.set(2) is False
+        future.add_callback(seen.append)
+        assert seen == [1, 1]
+
+    def test_cancel_before_claim(self):
+        """Test a cancelled command is never applied, and a claimed one can't be cancelled"""
+        cancelled, claimed = BidFuture(), BidFuture()
+        assert cancelled.cancel() is True
+        assert cancelled.claim() is False
+        assert cancelled.value['status'] == 503
+        assert claimed.claim() is True
+        assert claimed.cancel() is False
+        assert not claimed.done
+
+    def test_forwarded_cancel(self, test_app):
+        """Test a cancel from the requesting worker withdraws a queued forwarded bid"""
+        bus = FakeBus()
+        manager = BidBookManager(test_app, None, None, None, bus=bus, partitions=1)
+        manager.partitions[0]._thread = type('Alive', (), {'is_alive': lambda self: True})()
+        manager._on_message({'kind': 'request', 'request_id': 'x', 'auction_id': 7, 'user_id': 1,
+                             'amount': 110.0, 'now': 0, 'sent_at': time.time()})
+        manager._on_message({'kind': 'cancel', 'request_id': 'x'})
+        assert [message['kind'] for message in bus.published] == ['ack', 'reply']
+        assert bus.published[-1]['result']['status'] == 503
+        assert manager._remote == {}
+        future = manager.partitions[0]._commands.get_nowait()[3]
+        assert future.claim() is False
+
+
+@pytest.fixture
+def bid_books(db_session):
+    """Route bids through the bid book for one test"""
+    from app import bid_books
+    bid_books.enabled = True
+    # One test process owns every partition, so nothing needs forwarding
+    bid_books._verified = True
+    yield bid_books
+    bid_books.clear()
+    bid_books.enabled = False
+
+
+class TestBidBookEndpoint:
+    """Test place_bid through the bid book"""
+
+    def test_bids_written_behind(self, bidder_client, db_session, live_auction, bid_books):
+        """Test acknowledged bids are committed with counters and version"""
+        from app import Auction, Bid
+        auction_id = live_auction.id
+        version = live_auction.version
+
+        first = bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0})
+        second = bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 120.0})
+        assert first.status_code == 201 and second.status_code == 201
+        assert second.get_json()['current_bid'] == 120.0
+        assert second.get_json()['bid']['id'] is not None
+
+        db_session.session.expire_all()
+        auction = db_session.session.get(Auction, auction_id)
+        assert auction.current_bid == 120.0
+        assert auction.bid_count == 2
+        assert auction.unique_bidder_count == 1
+        assert auction.version > version
+        assert Bid.query.filter_by(auction_id=auction_id).count() == 2
+
+    def test_low_bid_rejected_from_memory(self, bidder_client, db_session, live_auction, bid_books):
+        """Test the book refuses a bid below the minimum"""
+        auction_id = live_auction.id
+        bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 150.0})
+        response = bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 155.0})
+        assert response.status_code == 400
+        assert 'at least' in response.get_json()['error']
+
+    def test_buy_now_evicts_book(self, bidder_client, db_session, live_auction, bid_books):
+        """Test a purchase outside the book stops further bids"""
+        auction_id = live_auction.id
+        live_auction.real_price = 500.0
+        db_session.session.commit()
+
+        assert bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0}).status_code == 201
+        assert bidder_client.post(f'/api/auctions/{auction_id}/buy-now').status_code == 200
+        response = bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 600.0})
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Auction is not active'
+
+
+class TestBidBookTimeout:
+    """Test bids that time out in the book are never placed twice"""
+
+    def test_retry_after_timeout_does_not_duplicate(self, bidder_client, db_session, live_auction, bid_books,
+                                                    monkeypatch):
+        """Test a stalled partition answers 202 (key kept) or cancels (key released), never both"""
+        import threading
+        from app import Bid
+        auction_id = live_auction.id
+        url = f'/api/auctions/{auction_id}/bids'
+        release = threading.Event()
+        persist = bid_books.persist_fn
+
+        def stalled_persist(placements):
+            release.wait(10)
+            return persist(placements)
+
+        monkeypatch.setattr(bid_books, 'persist_fn', stalled_persist)
+        monkeypatch.setattr(bid_books, 'timeout', 0.3)
+        try:
+            # Accepted by the book, stuck in write-behind: may still commit
+            first = bidder_client.post(url, json={'amount': 110.0}, headers={'Idempotency-Key': 'bid-1'})
+            assert first.status_code == 202
+            assert first.get_json()['pending'] is True
+            retry = bidder_client.post(url, json={'amount': 110.0}, headers={'Idempotency-Key': 'bid-1'})
+            assert retry.status_code == 202
+            assert retry.headers['Idempotent-Replayed'] == 'true'
+
+            # Queued behind the stalled flush: withdrawn, so the retry is safe
+            second = bidder_client.post(url, json={'amount': 120.0}, headers={'Idempotency-Key': 'bid-2'})
+            assert second.status_code == 503
+        finally:
+            release.set()
+
+        monkeypatch.setattr(bid_books, 'timeout', 5)
+        retry = bidder_client.post(url, json={'amount': 120.0}, headers={'Idempotency-Key': 'bid-2'})
+        assert retry.status_code == 201
+        bid_books.clear()
+
+        db_session.session.expire_all()
+        amounts = sorted(bid.amount for bid in Bid.query.filter_by(auction_id=auction_id).all())
+        assert amounts == [110.0, 120.0]
+        assert sum(partition.cancelled_bids for partition in bid_books.partitions) == 1
@@ -0,0 +1,81 @@
+"""
+Bid Counter Tests for ZUBID Backend
+Tests: Counters maintained by bidding, Backfill, Listings read the counters
+"""
+import pytest
+
+from tests.conftest import get_auction
+
+
+class TestBidCounters:
+    """Test bid_count / unique_bidder_count / highest_bidder_id maintenance"""
+
+    def test_place_bid_updates_counters(self, bidder_client, db_session, live_auction, bidder_user):
+        """Test repeat bids count once per bidder"""
+        auction_id = live_auction.id
+        bidder_id = bidder_user.id
+        assert bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0}).status_code == 201
+        assert bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 120.0}).status_code == 201
+
+        auction = get_auction(db_session, auction_id)
+        assert auction.bid_count == 2
+        assert auction.unique_bidder_count == 1
+        assert auction.highest_bidder_id == bidder_id
+
+    def test_buy_now_updates_counters(self, bidder_client, db_session, live_auction, bidder_user):
+        """Test buy-now records its bid"""
+        auction_id = live_auction.id
+        bidder_id = bidder_user.id
+        live_auction.real_price = 500.0
+        db_session.session.commit()
+
+        assert bidder_client.post(f'/api/auctions/{auction_id}/buy-now').status_code == 200
+
+        auction = get_auction(db_session, auction_id)
+        assert auction.bid_count == 1
+        assert auction.unique_bidder_count == 1
+        assert auction.highest_bidder_id == bidder_id
+
+    def test_refresh_recomputes_from_bids(self, db_session, live_auction, bidder_user, test_user):
+        """Test the backfill rebuilds drifted counters"""
+        from app import Bid, refresh_auction_bid_stats
+        auction_id = live_auction.id
+        bidder_id = bidder_user.id
+        db_session.session.add_all([
+            Bid(auction_id=auction_id, user_id=bidder_id, amount=110.0),
+            Bid(auction_id=auction_id, user_id=bidder_id, amount=130.0),
+            Bid(auction_id=auction_id, user_id=test_user.id, amount=120.0),
+        ])
+        db_session.session.commit()
+
+        assert refresh_auction_bid_stats([auction_id]) == 1
+        db_session.session.commit()
+
+        auction = get_auction(db_session, auction_id)
+        assert auction.bid_count == 3
+        assert auction.unique_bidder_count == 2
+        assert auction.highest_bidder_id == bidder_id
+
+
+class TestListingsUseCounters:
+    """Test listing endpoints report the stored counters"""
+
+    def test_listing_and_detail_report_unique_bidders(self, bidder_client, db_session, live_auction):
+        """Test web listings keep counting unique bidders"""
+        auction_id = live_auction.id
+        bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0})
+        bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 120.0})
+
+        listed = next(a for a in bidder_client.get('/api/auctions').get_json()['auctions'] if a['id'] == str(auction_id))
+        assert listed['bid_count'] == 1
+        assert listed['bidCount'] == 1
+        assert bidder_client.get(f'/api/auctions/{auction_id}').get_json()['bid_count'] == 1
+
+    def test_my_bids_reports_total_bids(self, bidder_client, db_session, live_auction):
+        """Test the Android my-bids list keeps counting total bids"""
+        auction_id = live_auction.id
+        bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0})
+        bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 120.0})
+
+        my_bids = bidder_client.get('/api/my-bids').get_json()
+        assert my_bids[0]['bidCount'] == 2
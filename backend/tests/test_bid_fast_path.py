@@ -0,0 +1,165 @@
+"""
+Optimistic Bid Tests for ZUBID Backend
+Tests: Single-UPDATE fast path, Fallback to the locked path, Previous leader lookup
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tests.conftest import get_auction
+
+
+@pytest.fixture(autouse=True)
+def _reset_bid_rate_limit(test_app):
+    """Bids here don't count against the 30/minute limit later tests share"""
+    from app import limiter
+    yield
+    limiter.reset()
+
+
+@pytest.fixture
+def fast_path_calls(monkeypatch):
+    """Results of place_bid_optimistic during the test (None = fell back to the locked path)"""
+    import app as app_module
+    calls = []
+    original = app_module.place_bid_optimistic
+
+    def spy(*args):
+        result = original(*args)
+        calls.append(result)
+        return result
+
+    monkeypatch.setattr(app_module, 'place_bid_optimistic', spy)
+    return calls
+
+
+class TestOptimisticUpdate:
+    """Test the conditional UPDATE itself"""
+
+    def test_plain_bid_accepted(self, db_session, live_auction, bidder_user):
+        """Test one UPDATE moves the price and maintains counters and version"""
+        from app import place_bid_optimistic
+        auction_id, version = live_auction.id, live_auction.version
+        bid, row = place_bid_optimistic(auction_id, bidder_user.id, 110.0, datetime.now(timezone.utc))
+        assert bid.id and bid.amount == 110.0
+        assert row.end_time is not None
+        assert (row.current_bid, row.version, row.bid_count, row.unique_bidder_count) == (110.0, version + 1, 1, 1)
+
+        auction = get_auction(db_session, auction_id)
+        assert auction.current_bid == 110.0
+        assert auction.highest_bidder_id == bidder_user.id
+        assert auction.bid_count == 1
+        assert auction.unique_bidder_count == 1
+        assert auction.version == version + 1
+
+    def test_returning_bidder_counted_once(self, db_session, live_auction, bidder_user):
+        """Test a bidder's second bid doesn't add a unique bidder"""
+        from app import place_bid_optimistic
+        now = datetime.now(timezone.utc)
+        place_bid_optimistic(live_auction.id, bidder_user.id, 110.0, now)
+        place_bid_optimistic(live_auction.id, bidder_user.id, 120.0, now)
+        auction = get_auction(db_session, live_auction.id)
+        assert (auction.bid_count, auction.unique_bidder_count) == (2, 1)
+
+    def test_stale_amount_rejected(self, db_session, live_auction, bidder_user):
+        """Test a bid that no longer beats the price matches no row"""
+        from app import place_bid_optimistic
+        auction_id = live_auction.id
+        now = datetime.now(timezone.utc)
+        assert place_bid_optimistic(auction_id, bidder_user.id, 150.0, now)
+        assert place_bid_optimistic(auction_id, bidder_user.id, 155.0, now) is None
+        auction = get_auction(db_session, auction_id)
+        assert (auction.current_bid, auction.bid_count) == (150.0, 1)
+
+    def test_seller_rejected(self, db_session, live_auction, test_user):
+        """Test the seller can't bid through the fast path"""
+        from app import place_bid_optimistic
+        assert place_bid_optimistic(live_auction.id, test_user.id, 200.0, datetime.now(timezone.utc)) is None
+
+
+class TestFallback:
+    """Test bids the fast path can't decide go through the locked path"""
+
+    def test_plain_bid_uses_fast_path(self, bidder_client, live_auction, fast_path_calls):
+        """Test an ordinary bid is accepted without the locked path"""
+        response = bidder_client.post(f'/api/auctions/{live_auction.id}/bids', json={'amount': 110.0})
+        assert response.status_code == 201
+        assert response.get_json()['current_bid'] == 110.0
+        assert len(fast_path_calls) == 1 and fast_path_calls[0] is not None
+
+    def test_event_built_from_returning_values(self, bidder_client, live_auction, fast_path_calls,
+                                               monkeypatch):
+        """Test bid_placed carries the state this bid produced, not a later re-read"""
+        import app as app_module
+        events = []
+        monkeypatch.setattr(app_module, 'publish_auction_event', lambda *args: events.append(args))
+        monkeypatch.setattr(app_module.db.session, 'get', lambda *args, **kwargs: pytest.fail('re-read'))
+        version = live_auction.version
+
+        response = bidder_client.post(f'/api/auctions/{live_auction.id}/bids', json={'amount': 110.0})
+        assert response.status_code == 201
+        (auction_id, event_type, payload), = events
+        assert event_type == 'bid_placed'
+        assert (payload['current_bid'], payload['version'], payload['bid_count']) == (110.0, version + 1, 1)
+        assert [bid['amount'] for bid in payload['bids']] == [110.0]
+
+    def test_too_low_rejected_before_lock(self, bidder_client, live_auction, fast_path_calls):
+        """Test a losing bid is answered by the unlocked read"""
+        response = bidder_client.post(f'/api/auctions/{live_auction.id}/bids', json={'amount': 105.0})
+        assert response.status_code == 400
+        assert '110.00' in response.get_json()['error']
+        assert fast_path_calls == []
+
+    def test_proxy_resolved_on_locked_path(self, bidder_client, db_session, live_auction, bidder_user,
+                                           fast_path_calls):
+        """Test a bidder's own maximum sends the bid to proxy resolution"""
+        from app import ProxyBid
+        auction_id = live_auction.id
+        db_session.session.add(ProxyBid(auction_id=auction_id, user_id=bidder_user.id, max_amount=300.0))
+        db_session.session.commit()
+
+        response = bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0})
+        assert response.status_code == 201
+        assert fast_path_calls == [None]
+        assert get_auction(db_session, auction_id).highest_bidder_id == bidder_user.id
+
+    def test_anti_snipe_window_extends(self, bidder_client, db_session, live_auction, fast_path_calls):
+        """Test a bid near the end still extends the auction"""
+        auction_id = live_auction.id
+        live_auction.end_time = datetime.now(timezone.utc) + timedelta(seconds=60)
+        db_session.session.commit()
+
+        response = bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0})
+        assert response.status_code == 201
+        assert response.get_json()['time_extended'] is True
+        assert fast_path_calls == [None]
+
+    def test_auto_bid_skips_fast_path(self, bidder_client, live_auction, fast_path_calls):
+        """Test bids with an auto-bid maximum always take the locked path"""
+        response = bidder_client.post(f'/api/auctions/{live_auction.id}/bids',
+                                      json={'amount': 110.0, 'auto_bid_amount': 200.0})
+        assert response.status_code == 201
+        assert fast_path_calls == []
+
+    def test_disabled(self, bidder_client, live_auction, fast_path_calls, monkeypatch):
+        """Test BID_OPTIMISTIC_FAST_PATH=false keeps every bid on the locked path"""
+        monkeypatch.setattr('app.BID_OPTIMISTIC_FAST_PATH', False)
+        response = bidder_client.post(f'/api/auctions/{live_auction.id}/bids', json={'amount': 110.0})
+        assert response.status_code == 201
+        assert fast_path_calls == []
+
+
+class TestPreviousLeader:
+    """Test who gets the outbid notification"""
+
+    def test_next_lower_bid(self, db_session, live_auction, bidder_user, test_user):
+        from app import Bid, previous_leader
+        auction_id = live_auction.id
+        db_session.session.add_all([
+            Bid(auction_id=auction_id, user_id=test_user.id, amount=110.0),
+            Bid(auction_id=auction_id, user_id=bidder_user.id, amount=120.0),
+        ])
+        db_session.session.commit()
+        assert previous_leader(auction_id, 130.0) == bidder_user.id
+        assert previous_leader(auction_id, 120.0) == test_user.id
+        assert previous_leader(auction_id, 110.0) is None
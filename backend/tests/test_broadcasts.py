@@ -0,0 +1,133 @@
+"""
+Broadcast Notification Tests for ZUBID Backend
+Tests: Single-row broadcasts, Merged listing, Read watermarks, Dismissal
+"""
+from datetime import datetime, timedelta, timezone
+
+
+def send_broadcast(client, admin_id, title):
+    with client.session_transaction() as sess:
+        sess['user_id'] = admin_id
+    return client.post('/api/admin/notifications/send', json={'title': title, 'message': 'For everyone'})
+
+
+def login(client, user_id):
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+
+
+class TestBroadcastNotifications:
+    """Test broadcasts stored once and merged at read time"""
+
+    def test_broadcast_is_one_row(self, client, db_session, admin_user, test_user, bidder_user):
+        """Test a broadcast writes no per-user notification rows"""
+        from app import Notification, BroadcastNotification
+        response = send_broadcast(client, admin_user.id, 'Maintenance')
+        assert response.status_code == 200
+        assert BroadcastNotification.query.count() == 1
+        assert Notification.query.count() == 0
+
+    def test_merged_into_list_and_unread_count(self, client, db_session, admin_user, test_user):
+        """Test a user sees broadcasts alongside their own notifications"""
+        from app import Notification
+        user_id, admin_id = test_user.id, admin_user.id
+        db_session.session.add(Notification(
+            user_id=user_id, title='Outbid', message='Bid again', type='outbid',
+            created_at=datetime.now(timezone.utc) - timedelta(minutes=1)
+        ))
+        db_session.session.commit()
+        send_broadcast(client, admin_id, 'Maintenance')
+
+        login(client, user_id)
+        items = client.get('/api/notifications').get_json()
+        assert [item['title'] for item in items] == ['Maintenance', 'Outbid']
+        assert items[0]['id'].startswith('b')
+        assert client.get('/api/notifications/unread-count').get_json()['count'] == 2
+
+        # Admins are not in the audience
+        login(client, admin_id)
+        assert client.get('/api/notifications').get_json() == []
+
+    def test_read_watermark(self, client, db_session, admin_user, test_user):
+        """Test reading a broadcast reads the older ones, and read-all reads the rest"""
+        user_id, admin_id = test_user.id, admin_user.id
+        for title in ('First', 'Second', 'Third'):
+            send_broadcast(client, admin_id, title)
+
+        login(client, user_id)
+        items = client.get('/api/notifications').get_json()
+        second = next(item for item in items if item['title'] == 'Second')
+        assert client.put(f"/api/notifications/{second['id']}/read").status_code == 200
+        read = {item['title']: item['isRead'] for item in client.get('/api/notifications').get_json()}
+        assert read == {'First': True, 'Second': True, 'Third': False}
+        assert client.get('/api/notifications/unread-count').get_json()['count'] == 1
+
+        client.put('/api/notifications/read-all')
+        assert client.get('/api/notifications/unread-count').get_json()['count'] == 0
+
+    def test_dismiss_broadcast(self, client, db_session, admin_user, test_user):
+        """Test deleting a broadcast hides it for that user only"""
+        from app import BroadcastNotification
+        user_id, admin_id = test_user.id, admin_user.id
+        send_broadcast(client, admin_id, 'Maintenance')
+
+        login(client, user_id)
+        broadcast_id = client.get('/api/notifications').get_json()[0]['id']
+        assert client.delete(f'/api/notifications/{broadcast_id}').status_code == 200
+        assert client.get('/api/notifications').get_json() == []
+        assert client.get('/api/notifications/unread-count').get_json()['count'] == 0
+        assert BroadcastNotification.query.count() == 1
+        assert client.delete('/api/notifications/bxyz').status_code == 404
+
+    def test_cursor_pages_across_both_sources(self, client, db_session, admin_user, test_user):
+        """Test cursor paging walks the merged list without gaps or repeats"""
+        from app import Notification, BroadcastNotification
+        user_id = test_user.id
+        base = datetime.now(timezone.utc)
+        for n in range(3):
+            db_session.session.add(Notification(user_id=user_id, title=f'p{n}', message='m',
+                                                created_at=base - timedelta(minutes=2 * n)))
+            db_session.session.add(BroadcastNotification(title=f'b{n}', message='m',
+                                                         created_at=base - timedelta(minutes=2 * n + 1)))
+        # Same timestamp in both sources
+        db_session.session.add(Notification(user_id=user_id, title='tie-p', message='m', created_at=base - timedelta(minutes=10)))
+        db_session.session.add(BroadcastNotification(title='tie-b', message='m', created_at=base - timedelta(minutes=10)))
+        db_session.session.commit()
+        # The user existed before every broadcast
+        test_user.created_at = base - timedelta(days=1)
+        db_session.session.commit()
+
+        login(client, user_id)
+        titles, cursor = [], None
+        while True:
+            response = client.get('/api/notifications', query_string={'limit': 3, **({'cursor': cursor} if cursor else {})})
+            titles += [item['title'] for item in response.get_json()]
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+        assert titles == ['p0', 'b0', 'p1', 'b1', 'p2', 'b2', 'tie-p', 'tie-b']
+
+    def test_deleted_user_session_unauthorized(self, client, db_session, admin_user, test_user):
+        """Test a session of a deleted account gets 401 (and is cleared), not a 500"""
+        from app import BroadcastNotification, User
+        broadcast = BroadcastNotification(title='b', message='m')
+        db_session.session.add(broadcast)
+        db_session.session.commit()
+        broadcast_id = broadcast.id
+        user_id = test_user.id
+        User.query.filter_by(id=user_id).delete()
+        db_session.session.commit()
+
+        requests = [
+            ('get', '/api/notifications'),
+            ('get', '/api/notifications/stream'),
+            ('put', f'/api/notifications/b{broadcast_id}/read'),
+            ('put', '/api/notifications/read-all'),
+            ('delete', f'/api/notifications/b{broadcast_id}'),
+        ]
+        for method, url in requests:
+            login(client, user_id)
+            response = getattr(client, method)(url)
+            assert response.status_code == 401, url
+            with client.session_transaction() as sess:
+                assert 'user_id' not in sess
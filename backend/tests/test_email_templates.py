@@ -0,0 +1,118 @@
+"""
+Email Template Tests for ZUBID Backend
+Tests: Compiled templates, Per-language variants and fallback, Escaping, Localised reset code
+"""
+import pytest
+
+import email_templates
+from email_templates import CompiledTemplate, TemplateRegistry
+
+
+class TestCompiledTemplate:
+    """Test templates are split once and only fields are formatted per render"""
+
+    def test_static_parts_prerendered(self):
+        """Test HTML literals are escaped and line-broken at compile time"""
+        template = CompiledTemplate('A & B\nHi {username}', as_html=True)
+        assert template.parts[0] == ('A &amp; B<br>Hi ', 'username')
+        assert template.fields == {'username'}
+
+    def test_values_escaped(self):
+        """Test personalised values are escaped in HTML but not in plain text"""
+        context = {'username': '<script>'}
+        assert CompiledTemplate('Hi {username}', as_html=True).render(context) == 'Hi &lt;script&gt;'
+        assert CompiledTemplate('Hi {username}').render(context) == 'Hi <script>'
+
+    def test_code_highlighted(self):
+        """Test the verification code is shown in the code box"""
+        rendered = CompiledTemplate('{code}', as_html=True).render({'code': '123456'})
+        assert rendered == '<div class="code">123456</div>'
+
+
+class TestTemplateRegistry:
+    """Test per-language lookup"""
+
+    def test_languages_compiled(self):
+        """Test every supported preference language has a reset template"""
+        for language in ('en', 'ku', 'ar'):
+            assert email_templates.registry.get('password_reset', language).language == language
+
+    @pytest.mark.parametrize('language', [None, '', 'fr', 'de-DE'])
+    def test_fallback_to_english(self, language):
+        """Test unknown languages get the English template"""
+        assert email_templates.registry.get('password_reset', language).language == 'en'
+
+    def test_region_suffix_ignored(self):
+        """Test a regional code maps to its language"""
+        assert email_templates.registry.get('password_reset', 'ar-IQ').language == 'ar'
+
+    def test_rtl_layout(self):
+        """Test Arabic and Kurdish emails render right-to-left"""
+        message = email_templates.render('password_reset', 'ar', username='u', code='111111', minutes=15)
+        assert '<html lang="ar" dir="rtl">' in message.html
+        assert 'رمز' in message.subject
+        english = email_templates.render('password_reset', 'en', username='u', code='111111', minutes=15)
+        assert '<html lang="en" dir="ltr">' in english.html
+
+    def test_render_variants(self):
+        """Test subject, text, HTML and SMS come from one render"""
+        message = email_templates.render('password_reset', 'en', username='bob', code='424242', minutes=15)
+        assert message.subject == '🔐 ZUBID - Password Reset Code'
+        assert message.text.startswith('Hello bob,')
+        assert '424242' in message.sms and '15 minutes' in message.sms
+        assert '<div class="code">424242</div>' in message.html
+        assert message.html.startswith('<!DOCTYPE html>')
+
+    def test_layout_shared(self):
+        """Test templates of one language share the prerendered layout"""
+        registry = TemplateRegistry({
+            'a': {'en': {'subject': 'A', 'body': '{x}'}},
+            'b': {'en': {'subject': 'B', 'body': '{x}'}},
+        })
+        assert registry.get('a').layout is registry.get('b').layout
+        assert registry.get('a').render(x=1).sms is None
+
+    def test_wrap_plain_escapes_body(self):
+        """Test a free-form body is escaped into the layout"""
+        rendered = email_templates.wrap_plain('Hi <b>\nCode: 123')
+        assert 'Hi &lt;b&gt;<br>Code: 123' in rendered
+        assert rendered.startswith('<!DOCTYPE html>')
+
+
+class TestLocalisedResetCode:
+    """Test the reset code goes out in the user's preferred language"""
+
+    def sent(self, monkeypatch, user, method='email'):
+        import app as app_module
+        captured = []
+        monkeypatch.setattr(app_module, 'queue_email', lambda *args: captured.append(args) or True)
+        monkeypatch.setattr(app_module, 'queue_sms', lambda *args: captured.append(args) or True)
+        assert app_module.send_verification_code(user, '987654', method) is True
+        return captured[0]
+
+    def test_preferred_language_used(self, monkeypatch, db_session, test_user):
+        """Test a Kurdish preference gets the Kurdish email"""
+        from app import UserPreference
+        db_session.session.add(UserPreference(user_id=test_user.id, language='ku'))
+        db_session.session.commit()
+        to, subject, body, html_body = self.sent(monkeypatch, test_user)
+        assert to == test_user.email
+        assert subject == email_templates.TEMPLATES['password_reset']['ku']['subject']
+        assert '987654' in body
+        assert 'dir="rtl"' in html_body
+
+    def test_default_english(self, monkeypatch, db_session, test_user):
+        """Test a user without preferences gets English"""
+        _, subject, body, _ = self.sent(monkeypatch, test_user)
+        assert subject == '🔐 ZUBID - Password Reset Code'
+        assert f'Hello {test_user.username},' in body
+
+    def test_sms_localised(self, monkeypatch, db_session, test_user):
+        """Test the SMS uses the same language"""
+        from app import UserPreference
+        db_session.session.add(UserPreference(user_id=test_user.id, language='ar'))
+        test_user.phone = '+9647500000000'
+        db_session.session.commit()
+        to, text = self.sent(monkeypatch, test_user, method='phone')
+        assert to == '+9647500000000'
+        assert '987654' in text and 'دقيقة' in text
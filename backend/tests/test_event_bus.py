@@ -0,0 +1,177 @@
+"""
+Event Bus Tests for ZUBID Backend
+Tests: Local delivery, Cross-worker socket delivery, App event publishing
+"""
+import json
+import socket
+import time
+import pytest
+
+
+def wait_for(predicate, timeout=2.0):
+    """Poll until predicate() is true or the timeout passes"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class TestLocalEventBus:
+    """Test in-process delivery"""
+
+    def test_publish_reaches_subscribers(self):
+        """Test handlers for the topic are called with the data"""
+        from event_bus import LocalEventBus
+        bus = LocalEventBus()
+        received = []
+        bus.subscribe('auction', received.append)
+        bus.subscribe('other', lambda data: pytest.fail('wrong topic'))
+
+        bus.publish('auction', {'auction_id': 1})
+        assert received == [{'auction_id': 1}]
+
+    def test_failing_handler_does_not_block_others(self):
+        """Test one broken subscriber doesn't stop delivery"""
+        from event_bus import LocalEventBus
+        bus = LocalEventBus()
+        received = []
+
+        def broken(data):
+            raise RuntimeError('boom')
+
+        bus.subscribe('auction', broken)
+        bus.subscribe('auction', received.append)
+        bus.publish('auction', {'auction_id': 1})
+        assert received == [{'auction_id': 1}]
+        assert bus.errors_total == 1
+
+    def test_own_messages_ignored_on_receive(self):
+        """Test a worker doesn't handle its own message twice"""
+        from event_bus import LocalEventBus
+        bus = LocalEventBus()
+        received = []
+        bus.subscribe('auction', received.append)
+        bus._receive(bus._encode('auction', {'auction_id': 1}))
+        assert received == []
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix sockets not available')
+class TestSocketEventBus:
+    """Test delivery between workers over Unix datagram sockets"""
+
+    def test_cross_worker_delivery(self, tmp_path):
+        """Test a message published by one worker reaches the other"""
+        from event_bus import SocketEventBus
+        first = SocketEventBus(str(tmp_path))
+        second = SocketEventBus(str(tmp_path))
+        received = []
+        second.subscribe('auction', received.append)
+        try:
+            assert first.start() and second.start()
+            first.publish('auction', {'auction_id': 7})
+            assert wait_for(lambda: received == [{'auction_id': 7}])
+        finally:
+            first.stop()
+            second.stop()
+
+    def test_stale_peer_socket_removed(self, tmp_path):
+        """Test sockets left by dead workers are cleaned up on send"""
+        from event_bus import SocketEventBus
+        stale = tmp_path / 'dead.sock'
+        dead = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        dead.bind(str(stale))
+        dead.close()
+
+        bus = SocketEventBus(str(tmp_path))
+        try:
+            bus.start()
+            bus.publish('auction', {'auction_id': 1})
+            assert not stale.exists()
+        finally:
+            bus.stop()
+
+
+    def test_directory_created_private(self, tmp_path):
+        """Test the socket directory is created readable by this user only"""
+        import stat
+        from event_bus import SocketEventBus
+        bus = SocketEventBus(str(tmp_path / 'events'))
+        try:
+            assert bus.start()
+            assert stat.S_IMODE((tmp_path / 'events').stat().st_mode) == 0o700
+        finally:
+            bus.stop()
+
+    def test_open_directory_refused(self, tmp_path):
+        """Test a pre-created world-writable directory isn't used"""
+        from event_bus import SocketEventBus
+        directory = tmp_path / 'events'
+        directory.mkdir()
+        directory.chmod(0o777)
+        bus = SocketEventBus(str(directory))
+        assert bus.start() is False
+        assert list(directory.iterdir()) == []
+
+    def test_foreign_owner_refused(self, tmp_path, monkeypatch):
+        """Test a directory owned by another user isn't used"""
+        from event_bus import private_directory
+        directory = tmp_path / 'events'
+        directory.mkdir(mode=0o700)
+        monkeypatch.setattr('os.getuid', lambda: directory.stat().st_uid + 1)
+        with pytest.raises(OSError, match='owned by'):
+            private_directory(str(directory))
+
+
+class TestCreateEventBus:
+    """Test backend selection"""
+
+    def test_backend_from_url(self, tmp_path):
+        """Test EVENT_BUS_URL picks the backend"""
+        from event_bus import create_event_bus
+        assert create_event_bus('local').backend == 'local'
+        assert create_event_bus(f'unix://{tmp_path}').backend == 'unix'
+
+    @pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix sockets not available')
+    def test_default_directory_per_deployment(self):
+        """Test deployments with different instance paths or secrets get different socket dirs"""
+        from event_bus import create_event_bus, deployment_id
+        first = create_event_bus('', namespace=deployment_id('/srv/prod/instance', 'secret'))
+        second = create_event_bus('', namespace=deployment_id('/srv/staging/instance', 'secret'))
+        third = create_event_bus('', namespace=deployment_id('/srv/prod/instance', 'other'))
+        assert len({first.directory, second.directory, third.directory}) == 3
+
+
+class TestAppEvents:
+    """Test app publishers and subscribers"""
+
+    def test_bid_published_on_bus(self, bidder_client, db_session, live_auction):
+        """Test place_bid publishes an auction event to other workers"""
+        from app import message_bus
+        auction_id = live_auction.id
+        received = []
+        message_bus.subscribe('auction', received.append)
+        try:
+            response = bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0})
+            assert response.status_code == 201
+            assert [m['type'] for m in received if m['auction_id'] == auction_id] == ['bid_placed']
+        finally:
+            message_bus.unsubscribe('auction', received.append)
+
+    def test_remote_extension_reschedules_settlement(self, db_session):
+        """Test an anti-snipe event from another worker moves the leader's heap entry"""
+        from app import message_bus, settlement_timers
+        remote = json.dumps({
+            'topic': 'auction',
+            'origin': 'another-worker',
+            'data': {'auction_id': 4242, 'type': 'time_extended', 'event_id': 1,
+                     'payload': {'auction_id': 4242, 'end_time': '2030-01-01T00:02:00+00:00'}}
+        })
+        settlement_timers.enabled = True
+        try:
+            message_bus._receive(remote)
+            assert settlement_timers.next_deadline() is not None
+            assert settlement_timers.pop_due(now=float('inf')) == {4242: 1893456120.0}
+        finally:
+            settlement_timers.enabled = False
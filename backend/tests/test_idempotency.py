@@ -0,0 +1,86 @@
+"""
+Idempotency Key Tests for ZUBID Backend
+Tests: Key store, Replayed bid and buy-now responses
+"""
+import time
+
+from idempotency import (IdempotencyStore, StoredResponse, fingerprint,
+                         NEW, REPLAY, IN_PROGRESS, MISMATCH)
+
+
+class TestIdempotencyStore:
+    """Test the bounded TTL key store"""
+
+    def test_replay_after_complete(self):
+        """Test a finished attempt is replayed for the same request"""
+        store = IdempotencyStore(shared_url='')
+        request = fingerprint('POST', '/api/x', b'{"a":1}')
+        assert store.begin('1:key', request) == (NEW, None)
+        assert store.begin('1:key', request) == (IN_PROGRESS, None)
+
+        store.complete('1:key', request, StoredResponse(201, '{"ok":true}'))
+        outcome, response = store.begin('1:key', request)
+        assert outcome == REPLAY
+        assert (response.status, response.body) == (201, '{"ok":true}')
+
+    def test_mismatch_and_release(self):
+        """Test a reused key for another request is refused, and released keys run again"""
+        store = IdempotencyStore(shared_url='')
+        store.begin('1:key', 'first')
+        assert store.begin('1:key', 'second')[0] == MISMATCH
+        store.release('1:key')
+        assert store.begin('1:key', 'second')[0] == NEW
+
+    def test_ttl_and_bound(self):
+        """Test keys expire and the store never exceeds max_keys"""
+        store = IdempotencyStore(ttl=0.05, max_keys=3, shared_url='')
+        for n in range(5):
+            store.begin(f'1:{n}', 'f')
+            store.complete(f'1:{n}', 'f', StoredResponse(200, '{}'))
+        assert len(store) == 3
+        time.sleep(0.06)
+        assert store.begin('1:4', 'f')[0] == NEW
+
+
+class TestIdempotentEndpoints:
+    """Test Idempotency-Key on bid placement and buy-now"""
+
+    def test_retried_bid_applied_once(self, bidder_client, db_session, live_auction):
+        """Test a retry returns the first response without a second bid"""
+        from app import Bid
+        auction_id = live_auction.id
+        headers = {'Idempotency-Key': 'bid-retry-1'}
+
+        first = bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0}, headers=headers)
+        retry = bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0}, headers=headers)
+        assert first.status_code == retry.status_code == 201
+        assert retry.headers.get('Idempotent-Replayed') == 'true'
+        assert retry.get_json()['bid_id'] == first.get_json()['bid_id']
+        assert Bid.query.filter_by(auction_id=auction_id).count() == 1
+
+    def test_key_reused_for_other_request(self, bidder_client, db_session, live_auction):
+        """Test the same key with a different body is refused"""
+        auction_id = live_auction.id
+        headers = {'Idempotency-Key': 'bid-retry-2'}
+        bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0}, headers=headers)
+        response = bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 130.0}, headers=headers)
+        assert response.status_code == 422
+
+    def test_retried_buy_now(self, bidder_client, db_session, live_auction):
+        """Test a retried purchase gets the original success instead of 'not active'"""
+        auction_id = live_auction.id
+        live_auction.real_price = 500.0
+        db_session.session.commit()
+        headers = {'Idempotency-Key': 'buy-retry-1'}
+
+        first = bidder_client.post(f'/api/auctions/{auction_id}/buy-now', headers=headers)
+        retry = bidder_client.post(f'/api/auctions/{auction_id}/buy-now', headers=headers)
+        assert first.status_code == retry.status_code == 200
+        assert retry.get_json() == first.get_json()
+
+    def test_without_key_unchanged(self, bidder_client, db_session, live_auction):
+        """Test requests without the header are not deduplicated"""
+        auction_id = live_auction.id
+        bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0})
+        response = bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0})
+        assert response.status_code == 400
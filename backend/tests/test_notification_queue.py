@@ -0,0 +1,104 @@
+"""
+Notification Queue Tests for ZUBID Backend
+Tests: Batched background writes, Failure isolation, Bulk and outbid producers
+"""
+import threading
+
+from notification_queue import NotificationQueue
+
+
+class RecordingWriter:
+    def __init__(self, fail_user=None):
+        self.batches = []
+        self.fail_user = fail_user
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, rows):
+        self.entered.set()
+        self.release.wait(5)
+        if any(row['user_id'] == self.fail_user for row in rows):
+            raise ValueError('bad row')
+        self.batches.append([row['user_id'] for row in rows])
+
+
+class TestNotificationQueue:
+    """Test the queue and its writer thread"""
+
+    def test_broadcast_split_into_batches(self, test_app):
+        """Test one large job is written batch_size rows per call"""
+        writer = RecordingWriter()
+        outbox = NotificationQueue(test_app, writer, asynchronous=True, batch_size=1000)
+        assert outbox.enqueue(list(range(2500)), 'Title', 'Message') == 2500
+        assert outbox.flush()
+        assert [len(batch) for batch in writer.batches] == [1000, 1000, 500]
+        assert outbox.stats()['written_total'] == 2500
+        outbox.stop()
+
+    def test_queued_jobs_share_a_batch(self, test_app):
+        """Test jobs queued while the writer is busy are written together"""
+        writer = RecordingWriter()
+        writer.release.clear()
+        outbox = NotificationQueue(test_app, writer, asynchronous=True, batch_size=100)
+        outbox.enqueue(1, 'First', 'Message')
+        assert writer.entered.wait(5)
+        for user_id in range(2, 6):
+            outbox.enqueue(user_id, 'Outbid', 'Message')
+        writer.release.set()
+        assert outbox.flush()
+        assert writer.batches == [[1], [2, 3, 4, 5]]
+        outbox.stop()
+
+    def test_bad_row_does_not_drop_batch(self, test_app):
+        """Test a failing row is isolated and the rest of its batch is written"""
+        writer = RecordingWriter(fail_user=3)
+        outbox = NotificationQueue(test_app, writer, asynchronous=False, batch_size=10)
+        outbox.enqueue(list(range(1, 9)), 'Title', 'Message')
+        assert sorted(user_id for batch in writer.batches for user_id in batch) == [1, 2, 4, 5, 6, 7, 8]
+        assert outbox.failed_total == 1
+
+
+class TestNotificationProducers:
+    """Test endpoints hand notifications to the queue"""
+
+    def test_many_recipients_written_in_bulk(self, db_session, test_user, bidder_user):
+        """Test a notification for several users is written with one insert statement"""
+        from sqlalchemy import event
+        from app import Notification, queue_notification
+        recipients = {test_user.id, bidder_user.id}
+        inserts = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lower().startswith('insert into notification'):
+                inserts.append(statement)
+
+        event.listen(db_session.engine, 'before_cursor_execute', record)
+        try:
+            assert queue_notification(sorted(recipients), 'Maintenance', 'Back soon') == 2
+        finally:
+            event.remove(db_session.engine, 'before_cursor_execute', record)
+        assert len(inserts) == 1
+        db_session.session.expire_all()
+        written = {n.user_id for n in Notification.query.filter_by(title='Maintenance')}
+        assert written == recipients
+
+    def test_outbid_notification_queued(self, client, db_session, live_auction, bidder_user, admin_user):
+        """Test the previous leader's outbid notice is written by the worker after the bid"""
+        from app import Notification, notifications_outbox
+        auction_id = live_auction.id
+        first_id, second_id = bidder_user.id, admin_user.id
+
+        notifications_outbox.asynchronous = True
+        try:
+            with client.session_transaction() as sess:
+                sess['user_id'] = first_id
+            client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0})
+            with client.session_transaction() as sess:
+                sess['user_id'] = second_id
+            assert client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 120.0}).status_code == 201
+            assert notifications_outbox.flush()
+        finally:
+            notifications_outbox.asynchronous = False
+        db_session.session.expire_all()
+        assert Notification.query.filter_by(user_id=first_id, type='outbid', auction_id=auction_id).count() == 1
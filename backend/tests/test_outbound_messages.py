@@ -0,0 +1,149 @@
+"""
+Outbound Message Tests for ZUBID Backend
+Tests: Pooled SMTP session against a local SMTP server, Retries, Queued password reset email
+"""
+import socketserver
+import threading
+
+import pytest
+
+from outbound_messages import OutboundQueue, OutboundMessage, SmtpSender, EMAIL
+
+
+class FakeSmtpServer:
+    """Minimal local SMTP server that records messages and connections.
+    fail_data makes the next DATA commands fail with 451; drop_after closes a
+    connection after that many messages."""
+
+    def __init__(self, fail_data=0, drop_after=None):
+        self.messages = []
+        self.connections = 0
+        self.fail_data = fail_data
+        self.drop_after = drop_after
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write((line + '\r\n').encode())
+
+            def handle(self):
+                server.connections += 1
+                delivered = 0
+                self.reply('220 localhost ESMTP fake')
+                while True:
+                    line = self.rfile.readline().decode().strip()
+                    if not line:
+                        return
+                    command = line.split(' ', 1)[0].upper()
+                    if command in ('EHLO', 'HELO'):
+                        self.reply('250 localhost')
+                    elif command in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                        self.reply('250 OK')
+                    elif command == 'DATA':
+                        self.reply('354 End data with <CR><LF>.<CR><LF>')
+                        lines = []
+                        while True:
+                            data = self.rfile.readline().decode()
+                            if data in ('.\r\n', ''):
+                                break
+                            lines.append(data)
+                        if server.fail_data:
+                            server.fail_data -= 1
+                            self.reply('451 Try again later')
+                            continue
+                        server.messages.append(''.join(lines))
+                        self.reply('250 Queued')
+                        delivered += 1
+                        if server.drop_after and delivered >= server.drop_after:
+                            return
+                    elif command == 'QUIT':
+                        self.reply('221 Bye')
+                        return
+                    else:
+                        self.reply('502 Not implemented')
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.httpd = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def sender(self):
+        return SmtpSender(host='127.0.0.1', port=self.port, user='', password='', sender='noreply@zubid.test',
+                          use_tls=False)
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def smtp_server():
+    server = FakeSmtpServer()
+    yield server
+    server.close()
+
+
+def email(to='user@example.com', body='Hello'):
+    return OutboundMessage(EMAIL, to, body, subject='Subject')
+
+
+class TestOutboundQueue:
+    """Test the queue against a local SMTP server"""
+
+    def test_emails_share_one_session(self, smtp_server):
+        """Test a burst of emails is sent over a single SMTP connection"""
+        outbound = OutboundQueue(smtp=smtp_server.sender(), asynchronous=True)
+        for n in range(5):
+            assert outbound.enqueue(email(f'user{n}@example.com'))
+        assert outbound.flush()
+        outbound.stop()
+        assert len(smtp_server.messages) == 5
+        assert smtp_server.connections == 1
+
+    def test_failed_send_retried(self, smtp_server):
+        """Test a temporary failure is retried after a backoff"""
+        smtp_server.fail_data = 1
+        outbound = OutboundQueue(smtp=smtp_server.sender(), asynchronous=True, backoff=0.01)
+        outbound.enqueue(email())
+        assert outbound.flush()
+        outbound.stop()
+        assert len(smtp_server.messages) == 1
+        assert outbound.stats()['retried_total'] == 1
+        assert outbound.stats()['failed_total'] == 0
+
+    def test_reconnects_after_server_drop(self, smtp_server):
+        """Test the pooled session is reopened when the server closes it"""
+        smtp_server.drop_after = 1
+        sender = smtp_server.sender()
+        sender.send('a@example.com', 'One', 'First')
+        sender.send('b@example.com', 'Two', 'Second')
+        sender.close()
+        assert len(smtp_server.messages) == 2
+        assert smtp_server.connections == 2
+
+    def test_unconfigured_channel_not_queued(self):
+        """Test nothing is queued without SMTP settings"""
+        outbound = OutboundQueue(smtp=SmtpSender(host=''), asynchronous=True)
+        assert outbound.enqueue(email()) is False
+        assert outbound.stats()['running'] is False
+
+
+class TestPasswordResetEmail:
+    """Test forgot-password hands its email to the queue"""
+
+    def test_reset_code_emailed(self, client, db_session, test_user, smtp_server):
+        """Test the handler returns and the worker delivers the code"""
+        from app import outbound, PasswordResetToken
+        previous = outbound.smtp
+        outbound.smtp = smtp_server.sender()
+        try:
+            response = client.post('/api/forgot-password', json={'email': test_user.email})
+            assert response.status_code == 200
+            assert 'reset_code' not in response.get_json()
+            assert outbound.flush()
+        finally:
+            outbound.smtp = previous
+        code = PasswordResetToken.query.filter_by(user_id=test_user.id).one().token
+        assert len(smtp_server.messages) == 1
+        assert code in smtp_server.messages[0]
@@ -0,0 +1,142 @@
+"""
+Pagination Tests for ZUBID Backend
+Tests: Cursor encoding, Keyset paging of listings, Optional totals
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+
+
+@pytest.fixture
+def many_auctions(db_session, test_user, test_category):
+    """Create 7 active auctions, two sharing an end_time to exercise the id tie-breaker"""
+    from app import Auction
+    base = datetime.now(timezone.utc) + timedelta(days=1)
+    end_times = [base, base, base + timedelta(hours=1), base + timedelta(hours=2),
+                 base + timedelta(hours=3), base + timedelta(hours=4), base + timedelta(hours=5)]
+    auctions = []
+    for i, end_time in enumerate(end_times):
+        auctions.append(Auction(
+            item_name=f'Paged Auction {i}',
+            description='Paged auction item',
+            starting_bid=10.0 * (i + 1),
+            current_bid=10.0 * (i + 1),
+            bid_increment=1.0,
+            end_time=end_time,
+            seller_id=test_user.id,
+            category_id=test_category.id,
+            status='active',
+            qr_code_url='/uploads/qrcodes/test.png'
+        ))
+    db_session.session.add_all(auctions)
+    db_session.session.commit()
+    return [auction.id for auction in auctions]
+
+
+@pytest.fixture
+def listing_url(test_category):
+    """Listing URL scoped to the test category (the app seeds its own sample auctions)"""
+    from app import listing_counts
+    listing_counts.clear()
+    return f'/api/auctions?category_id={test_category.id}'
+
+
+class TestCursor:
+    """Test opaque cursor encoding"""
+
+    def test_round_trip(self):
+        """Test datetimes and numbers survive encoding"""
+        from pagination import encode_cursor, decode_cursor
+        moment = datetime(2025, 1, 2, 3, 4, 5, 600000)
+        cursor = encode_cursor([moment, 42], sort='end_time')
+        assert decode_cursor(cursor, sort='end_time') == [moment, 42]
+
+    def test_rejects_other_sort(self):
+        """Test a cursor can't be replayed against another ordering"""
+        from pagination import encode_cursor, decode_cursor, CursorError
+        cursor = encode_cursor([1.0, 42], sort='price')
+        with pytest.raises(CursorError):
+            decode_cursor(cursor, sort='end_time')
+
+    def test_rejects_garbage(self):
+        """Test a malformed cursor is rejected"""
+        from pagination import decode_cursor, CursorError
+        with pytest.raises(CursorError):
+            decode_cursor('not-a-cursor')
+
+
+class TestAuctionListingCursor:
+    """Test keyset paging of /api/auctions"""
+
+    def walk(self, client, url):
+        ids, cursor, pages = [], '', 0
+        while True:
+            data = client.get(f'{url}&cursor={cursor}').get_json()
+            ids.extend(int(a['id']) for a in data['auctions'])
+            pages += 1
+            if not data['has_more']:
+                return ids, pages, data
+            cursor = data['next_cursor']
+
+    def test_cursor_walk_matches_order(self, client, db_session, many_auctions, listing_url):
+        """Test walking all pages by cursor visits every auction once, in order"""
+        ids, pages, _ = self.walk(client, f'{listing_url}&per_page=3')
+        assert ids == many_auctions
+        assert pages == 3
+
+    def test_cursor_walk_by_price(self, client, db_session, many_auctions, listing_url):
+        """Test descending sorts page correctly"""
+        ids, _, _ = self.walk(client, f'{listing_url}&per_page=2&sort_by=price')
+        assert ids == list(reversed(many_auctions))
+
+    def test_cursor_pages_skip_total(self, client, db_session, many_auctions, listing_url):
+        """Test cursor pages don't count unless asked"""
+        data = client.get(f'{listing_url}&per_page=3&cursor=').get_json()
+        cursor_data = client.get(f"{listing_url}&per_page=3&cursor={data['next_cursor']}").get_json()
+        assert cursor_data['total'] is None
+        with_total = client.get(f"{listing_url}&per_page=3&cursor={data['next_cursor']}&include_total=true").get_json()
+        assert with_total['total'] == len(many_auctions)
+
+    def test_page_numbers_still_work(self, client, db_session, many_auctions, listing_url):
+        """Test legacy ?page= requests keep total and pages"""
+        data = client.get(f'{listing_url}&per_page=3&page=2').get_json()
+        assert [int(a['id']) for a in data['auctions']] == many_auctions[3:6]
+        assert data['total'] == len(many_auctions)
+        assert data['pages'] == 3
+
+    def test_bad_cursor(self, client, db_session):
+        """Test a malformed cursor returns 400"""
+        assert client.get('/api/auctions?cursor=%%%').status_code == 400
+
+
+class TestNotificationCursor:
+    """Test keyset paging of notification listings"""
+
+    def test_user_notifications_next_cursor_header(self, authenticated_client, db_session, test_user):
+        """Test the bare-list endpoint carries its cursor in X-Next-Cursor"""
+        from app import Notification
+        db_session.session.add_all([
+            Notification(user_id=test_user.id, title=f'N{i}', message='m', type='info') for i in range(3)
+        ])
+        db_session.session.commit()
+
+        first = authenticated_client.get('/api/notifications?limit=2')
+        assert len(first.get_json()) == 2
+        cursor = first.headers['X-Next-Cursor']
+
+        second = authenticated_client.get(f'/api/notifications?limit=2&cursor={cursor}')
+        assert [n['title'] for n in second.get_json()] == ['N0']
+        assert 'X-Next-Cursor' not in second.headers
+
+    def test_admin_notifications_cursor(self, admin_client, db_session, test_user):
+        """Test admin notifications page by cursor"""
+        from app import Notification
+        db_session.session.add_all([
+            Notification(user_id=test_user.id, title=f'N{i}', message='m', type='info') for i in range(3)
+        ])
+        db_session.session.commit()
+
+        first = admin_client.get('/api/admin/notifications?per_page=2&cursor=').get_json()
+        assert first['has_more']
+        second = admin_client.get(f"/api/admin/notifications?per_page=2&cursor={first['next_cursor']}").get_json()
+        seen = [n['id'] for n in first['notifications'] + second['notifications']]
+        assert len(seen) == len(set(seen)) >= 3
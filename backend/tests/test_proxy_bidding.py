@@ -0,0 +1,116 @@
+"""
+Proxy Bidding Tests for ZUBID Backend
+Tests: Second-price resolution, Bid ladder, Auto-bid wars through the API
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+from werkzeug.security import generate_password_hash
+
+from proxy_bidding import Proxy, resolve
+
+
+class TestResolve:
+    """Test the pure proxy-bidding engine"""
+
+    def test_no_rivals(self):
+        """Test a bid with no competing proxies stands as placed"""
+        result = resolve(Proxy(1, 110.0, (2, 0)), 110.0, 10.0, [Proxy(2, 115.0, (1, 0))])
+        assert result.winner_id == 1
+        assert result.price == 110.0
+        assert [(step.user_id, step.amount) for step in result.ladder] == [(1, 110.0)]
+
+    def test_higher_proxy_wins_at_second_price(self):
+        """Test the highest maximum wins one increment above the runner-up"""
+        rivals = [Proxy(2, 300.0, (1, 0)), Proxy(3, 200.0, (1, 1))]
+        result = resolve(Proxy(1, 150.0, (2, 0)), 120.0, 10.0, rivals, bidder_max=150.0)
+        assert result.winner_id == 2
+        assert result.price == 210.0
+        assert [(step.user_id, step.amount) for step in result.ladder] == [
+            (1, 120.0), (1, 150.0), (3, 200.0), (2, 210.0)
+        ]
+
+    def test_bidder_proxy_wins(self):
+        """Test the new bidder's own maximum can win the war"""
+        result = resolve(Proxy(1, 500.0, (2, 0)), 120.0, 10.0, [Proxy(2, 300.0, (1, 0))], bidder_max=500.0)
+        assert result.winner_id == 1
+        assert result.price == 310.0
+        assert [step.user_id for step in result.ladder] == [1, 2, 1]
+
+    def test_winner_capped_at_own_maximum(self):
+        """Test the price never exceeds the winner's maximum"""
+        result = resolve(Proxy(1, 295.0, (2, 0)), 120.0, 10.0, [Proxy(2, 300.0, (1, 0))], bidder_max=295.0)
+        assert result.winner_id == 2
+        assert result.price == 300.0
+
+    def test_tie_goes_to_earlier_maximum(self):
+        """Test equal maximums go to whoever set theirs first, with no equal-amount bids"""
+        result = resolve(Proxy(1, 300.0, (2, 0)), 120.0, 10.0, [Proxy(2, 300.0, (1, 0))], bidder_max=300.0)
+        assert result.winner_id == 2
+        assert result.price == 300.0
+        amounts = [step.amount for step in result.ladder]
+        assert amounts == sorted(set(amounts))
+
+
+@pytest.fixture
+def third_user(db_session):
+    from app import User
+    user = User(
+        username='thirdbidder',
+        email='third@example.com',
+        password_hash=generate_password_hash('password123'),
+        id_number='THIRD123',
+        birth_date=datetime(1992, 3, 3).date(),
+        phone='+1555000333',
+        address='3 Bidder St',
+        role='user'
+    )
+    db_session.session.add(user)
+    db_session.session.commit()
+    return user
+
+
+class TestProxyBidEndpoint:
+    """Test place_bid resolves auto-bid wars in one request"""
+
+    def test_counter_bids_resolved_in_one_request(self, client, db_session, live_auction, bidder_user, third_user):
+        """Test a standing maximum outbids a new bid immediately at second price"""
+        from app import ProxyBid, Bid, Auction
+        auction_id = live_auction.id
+        bidder_id = bidder_user.id
+        third_id = third_user.id
+        db_session.session.add(ProxyBid(
+            auction_id=auction_id, user_id=third_id, max_amount=400.0,
+            updated_at=datetime.now(timezone.utc) - timedelta(minutes=5)
+        ))
+        db_session.session.commit()
+
+        with client.session_transaction() as sess:
+            sess['user_id'] = bidder_id
+        response = client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0, 'auto_bid_amount': 250.0})
+        assert response.status_code == 201
+        data = response.get_json()
+        assert data['current_bid'] == 260.0
+        assert data['bid']['is_winning'] is False
+
+        db_session.session.expire_all()
+        bids = Bid.query.filter_by(auction_id=auction_id).order_by(Bid.amount).all()
+        assert [(bid.user_id, bid.amount) for bid in bids] == [(bidder_id, 110.0), (bidder_id, 250.0), (third_id, 260.0)]
+        auction = db_session.session.get(Auction, auction_id)
+        assert auction.highest_bidder_id == third_id
+        assert auction.bid_count == 3
+        assert auction.unique_bidder_count == 2
+        assert ProxyBid.query.filter_by(auction_id=auction_id, user_id=bidder_id).one().max_amount == 250.0
+
+    def test_raising_maximum_retakes_lead(self, client, db_session, live_auction, bidder_user, third_user):
+        """Test the later, higher maximum wins one increment over the standing one"""
+        from app import ProxyBid
+        auction_id = live_auction.id
+        bidder_id = bidder_user.id
+        db_session.session.add(ProxyBid(auction_id=auction_id, user_id=third_user.id, max_amount=200.0))
+        db_session.session.commit()
+
+        with client.session_transaction() as sess:
+            sess['user_id'] = bidder_id
+        data = client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0, 'auto_bid_amount': 500.0}).get_json()
+        assert data['current_bid'] == 210.0
+        assert data['bid']['is_winning'] is True
@@ -0,0 +1,177 @@
+"""
+Push Delivery Tests for ZUBID Backend
+Tests: FCM client against a fake FCM server, Batching and retries, Token invalidation
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from push_delivery import FcmClient, PushDispatcher, PushMessage, SENT, INVALID, RETRY
+
+
+class FakeFcmServer:
+    """Local stand-in for the FCM HTTP v1 send endpoint.
+    Tokens starting with 'stale' are unregistered; 'flaky' tokens fail once with 503."""
+
+    def __init__(self):
+        self.requests = []
+        self.failed_once = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                message = body['message']
+                token = message['token']
+                server.requests.append((self.path, self.headers.get('Authorization'), message))
+                if token.startswith('stale'):
+                    self.reply(404, {'error': {'code': 404, 'status': 'NOT_FOUND', 'details': [
+                        {'@type': 'type.googleapis.com/google.firebase.fcm.v1.FcmError', 'errorCode': 'UNREGISTERED'}
+                    ]}})
+                elif token.startswith('flaky') and token not in server.failed_once:
+                    server.failed_once.add(token)
+                    self.reply(503, {'error': {'code': 503, 'status': 'UNAVAILABLE'}}, {'Retry-After': '0'})
+                else:
+                    self.reply(200, {'name': 'projects/test/messages/1'})
+
+            def reply(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tokens(self):
+        return [message['token'] for _, _, message in self.requests]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def fake_fcm():
+    server = FakeFcmServer()
+    yield server
+    server.close()
+
+
+def make_client(fake_fcm):
+    return FcmClient(project_id='test', endpoint=fake_fcm.url, access_token='test-token')
+
+
+class TestFcmClient:
+    """Test single sends against the fake server"""
+
+    def test_send_outcomes(self, fake_fcm):
+        """Test success, unregistered and retryable responses are told apart"""
+        client = make_client(fake_fcm)
+        assert client.send('good-1', 'Title', 'Body', {'type': 'won'}).outcome == SENT
+        assert client.send('stale-1', 'Title', 'Body').outcome == INVALID
+        assert client.send('flaky-1', 'Title', 'Body').outcome == RETRY
+        path, authorization, message = fake_fcm.requests[0]
+        assert path == '/v1/projects/test/messages:send'
+        assert authorization == 'Bearer test-token'
+        assert message['notification'] == {'title': 'Title', 'body': 'Body'}
+        assert message['data'] == {'type': 'won'}
+
+
+class TestPushDispatcher:
+    """Test batching, retries and invalid token handling"""
+
+    def make_dispatcher(self, test_app, fake_fcm, tokens, invalid, **options):
+        return PushDispatcher(test_app, lambda message: tokens, invalid.extend, client=make_client(fake_fcm),
+                              enabled=True, backoff=0.01, **options)
+
+    def test_batches_retries_and_invalidates(self, test_app, fake_fcm):
+        """Test every token is sent once, flaky ones retried and stale ones reported"""
+        invalid = []
+        tokens = ['good-1', 'flaky-1', 'stale-1', 'good-2', 'good-3']
+        dispatcher = self.make_dispatcher(test_app, fake_fcm, tokens, invalid, batch_size=2)
+        assert dispatcher.enqueue(PushMessage('Sale', 'Everything must go', audience_role='user'))
+        assert dispatcher.flush()
+        dispatcher.stop()
+
+        assert sorted(fake_fcm.tokens()) == sorted(tokens + ['flaky-1'])
+        assert invalid == ['stale-1']
+        stats = dispatcher.stats()
+        assert stats['sent_total'] == 4
+        assert stats['retried_total'] == 1
+        assert stats['batches_total'] == 3
+
+    def test_disabled_dispatcher_sends_nothing(self, test_app, fake_fcm):
+        """Test pushes are off without FCM configuration"""
+        dispatcher = PushDispatcher(test_app, lambda message: ['good-1'], lambda tokens: None)
+        assert dispatcher.enqueue(PushMessage('Title', 'Body', user_ids=[1])) is False
+        assert fake_fcm.requests == []
+
+
+@pytest.fixture
+def push_dispatcher(fake_fcm):
+    """Deliver pushes from the app to the fake server for one test"""
+    from app import push_dispatcher
+    previous = push_dispatcher.client
+    push_dispatcher.client = make_client(fake_fcm)
+    push_dispatcher.enabled = True
+    push_dispatcher.backoff = 0.01
+    yield push_dispatcher
+    push_dispatcher.flush()
+    push_dispatcher.enabled = False
+    push_dispatcher.client = previous
+
+
+class TestNotificationPushes:
+    """Test notifications are pushed to registered devices"""
+
+    def test_outbid_pushed_and_stale_token_cleared(self, db_session, test_user, bidder_user, fake_fcm, push_dispatcher):
+        """Test a notification reaches the device and an unregistered token is cleared"""
+        from app import User, queue_notification
+        test_user.fcm_token = 'good-' + 'x' * 60
+        bidder_user.fcm_token = 'stale-' + 'x' * 60
+        db_session.session.commit()
+        user_id, bidder_id = test_user.id, bidder_user.id
+
+        queue_notification([user_id, bidder_id], 'You\'ve been outbid!', 'Bid again', 'outbid', None)
+        assert push_dispatcher.flush()
+
+        pushed = {message['token']: message for _, _, message in fake_fcm.requests}
+        assert pushed[test_user.fcm_token]['data']['type'] == 'outbid'
+        db_session.session.expire_all()
+        assert db_session.session.get(User, bidder_id).fcm_token is None
+        assert db_session.session.get(User, user_id).fcm_token is not None
+
+    def test_respects_preferences(self, db_session, test_user, fake_fcm, push_dispatcher):
+        """Test users who turned notifications off get no push"""
+        from app import UserPreference, queue_notification
+        test_user.fcm_token = 'good-' + 'x' * 60
+        db_session.session.add(UserPreference(user_id=test_user.id, notifications_enabled=False))
+        db_session.session.commit()
+
+        queue_notification(test_user.id, 'Won', 'You won', 'won')
+        assert push_dispatcher.flush()
+        assert fake_fcm.requests == []
+
+    def test_broadcast_pushed_to_audience(self, admin_client, db_session, admin_user, test_user, fake_fcm, push_dispatcher):
+        """Test a broadcast is pushed to every user in its audience"""
+        test_user.fcm_token = 'good-user-' + 'x' * 60
+        admin_user.fcm_token = 'good-admin-' + 'x' * 60
+        db_session.session.commit()
+
+        admin_client.post('/api/admin/notifications/send', json={'title': 'Maintenance', 'message': 'Back soon'})
+        assert push_dispatcher.flush()
+        assert fake_fcm.tokens() == ['good-user-' + 'x' * 60]
@@ -0,0 +1,68 @@
+"""
+Query Count Tests for ZUBID Backend
+Tests: Listing endpoints run a fixed number of SQL statements however many rows they return
+"""
+import pytest
+
+
+class TestQueryCounter:
+    """Test the counting fixtures themselves"""
+
+    def test_counts_per_request(self, client, query_counter, test_category):
+        """Test statements are attributed to the request that ran them"""
+        client.get('/api/categories')
+        client.get('/api/categories')
+        assert len(query_counter.requests) == 2
+        method, path, statements = query_counter.requests[0]
+        assert (method, path) == ('GET', '/api/categories')
+        assert statements and all(isinstance(sql, str) for sql in statements)
+
+    def test_budget_exceeded_fails(self, client, query_counter, test_category):
+        """Test a request over budget fails the test with its statements"""
+        client.get('/api/categories')
+        with pytest.raises(pytest.fail.Exception, match='ran .* queries'):
+            query_counter.check(0)
+
+    def test_seeded_dataset(self, seeded_marketplace, db_session):
+        """Test the dataset is big enough to expose per-row loading"""
+        from app import Auction, Bid, Wishlist
+        assert Auction.query.count() == seeded_marketplace['auctions'] >= 20
+        assert Bid.query.count() > 100
+        assert Wishlist.query.count() == seeded_marketplace['auctions']
+
+
+class TestListingQueryBudgets:
+    """Test listings don't load relationships per row"""
+
+    def test_wishlist(self, authenticated_client, seeded_marketplace, max_queries):
+        with max_queries(2):
+            response = authenticated_client.get('/api/wishlist')
+        assert len(response.get_json()) == seeded_marketplace['auctions']
+
+    def test_my_bids(self, authenticated_client, seeded_marketplace, max_queries):
+        with max_queries(3):
+            response = authenticated_client.get('/api/my-bids')
+        assert len(response.get_json()) == seeded_marketplace['auctions']
+
+    def test_user_bids(self, authenticated_client, seeded_marketplace, max_queries):
+        with max_queries(3):
+            response = authenticated_client.get('/api/user/bids')
+        bids = response.get_json()
+        assert len(bids) == seeded_marketplace['auctions']
+        assert sum(bid['is_winning'] for bid in bids) == seeded_marketplace['auctions'] * 4 // 5
+        assert sum(bid['is_winner'] for bid in bids) == seeded_marketplace['auctions'] // 5
+
+    @pytest.mark.max_queries(4)
+    def test_notifications(self, authenticated_client, seeded_marketplace):
+        response = authenticated_client.get('/api/notifications')
+        assert len(response.get_json()) == seeded_marketplace['auctions']
+
+    @pytest.mark.max_queries(4)
+    def test_admin_notifications(self, admin_client, seeded_marketplace):
+        response = admin_client.get('/api/admin/notifications?per_page=100')
+        assert len(response.get_json()['notifications']) == seeded_marketplace['auctions'] * 2
+
+    @pytest.mark.max_queries(6)
+    def test_admin_users(self, admin_client, seeded_marketplace):
+        response = admin_client.get('/api/admin/users?per_page=50')
+        assert len(response.get_json()['users']) == seeded_marketplace['users']
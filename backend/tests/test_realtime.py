@@ -0,0 +1,158 @@
+"""
+Real-time Event Tests for ZUBID Backend
+Tests: Event hub fan-out, SSE stream endpoint, Bid events
+"""
+import pytest
+
+from tests.conftest import parse_frame
+
+
+def _text(frame):
+    return frame.decode() if isinstance(frame, bytes) else frame
+
+
+class TestEventHub:
+    """Test the in-process fan-out hub"""
+
+    def test_publish_fans_out_one_frame(self):
+        """Test every subscriber receives the same pre-serialized frame"""
+        from realtime import EventHub
+        hub = EventHub()
+        first = hub.subscribe('auction:1')
+        second = hub.subscribe('auction:1')
+        other = hub.subscribe('auction:2')
+
+        hub.publish('auction:1', 'bid_placed', {'current_bid': 120})
+
+        frame = first.queue.get_nowait()
+        assert frame is second.queue.get_nowait()
+        assert other.queue.empty()
+        assert parse_frame(frame) == ('bid_placed', {'current_bid': 120})
+
+    def test_replay_after_last_event_id(self):
+        """Test a reconnecting client gets the events it missed"""
+        from realtime import EventHub
+        hub = EventHub()
+        first_id = hub.publish('auction:1', 'bid_placed', {'n': 1})
+        hub.publish('auction:1', 'bid_placed', {'n': 2})
+
+        subscriber = hub.subscribe('auction:1', last_event_id=str(first_id))
+        assert subscriber.queue.qsize() == 1
+        assert parse_frame(subscriber.queue.get_nowait())[1] == {'n': 2}
+
+    def test_snapshot_loaded_once_per_event(self):
+        """Test viewers share one snapshot load until the next event"""
+        from realtime import EventHub
+        hub = EventHub()
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return {'current_bid': len(loads)}
+
+        hub.snapshot('auction:1', loader)
+        hub.snapshot('auction:1', loader)
+        assert len(loads) == 1
+
+        hub.publish('auction:1', 'bid_placed', {})
+        assert parse_frame(hub.snapshot('auction:1', loader))[1] == {'current_bid': 2}
+        assert len(loads) == 2
+
+    def test_failed_snapshot_loads_leave_no_state(self):
+        """Test unknown or failing channels don't grow the hub"""
+        from realtime import EventHub, SNAPSHOT_LOCK_STRIPES
+        hub = EventHub()
+        for n in range(SNAPSHOT_LOCK_STRIPES * 2):
+            assert hub.snapshot(f'auction:{n}', lambda: None) is None
+        with pytest.raises(RuntimeError):
+            hub.snapshot('auction:x', lambda: (_ for _ in ()).throw(RuntimeError('db down')))
+        assert hub._snapshots == {}
+        assert len(hub._snapshot_locks) == SNAPSHOT_LOCK_STRIPES
+
+    def test_slow_subscriber_overflows(self):
+        """Test a full queue marks the subscriber for disconnect"""
+        from realtime import Subscriber
+        subscriber = Subscriber('auction:1', maxsize=1)
+        subscriber.put('a')
+        subscriber.put('b')
+        assert subscriber.overflowed
+
+    def test_stream_ends_and_unsubscribes(self):
+        """Test the stream yields queued frames and cleans up at max duration"""
+        from realtime import EventHub
+        hub = EventHub()
+        subscriber = hub.subscribe('auction:1')
+        hub.publish('auction:1', 'bid_placed', {'n': 1})
+
+        frames = list(hub.stream(subscriber, 'event: snapshot\ndata: {}\n\n', heartbeat=0.01, max_duration=0.05))
+        assert frames[0].startswith('retry:')
+        assert frames[1].startswith('event: snapshot')
+        assert parse_frame(frames[2]) == ('bid_placed', {'n': 1})
+        assert hub.subscriber_count('auction:1') == 0
+
+    def test_stream_slots_capped(self):
+        """Test a worker refuses streams past max_streams until one closes"""
+        from realtime import EventHub
+        hub = EventHub(max_streams=2)
+        assert hub.open_stream() and hub.open_stream()
+        assert not hub.open_stream()
+        hub.close_stream()
+        assert hub.open_stream()
+        assert hub.stats()['refused_streams'] == 1
+
+
+class TestAuctionStream:
+    """Test the SSE endpoint and event publishing"""
+
+    def test_stream_missing_auction(self, client, db_session):
+        """Test streaming a nonexistent auction returns 404"""
+        response = client.get('/api/auctions/999999/stream')
+        assert response.status_code == 404
+
+    def test_stream_starts_with_snapshot(self, client, db_session, live_auction):
+        """Test the stream opens with the current auction state"""
+        response = client.get(f'/api/auctions/{live_auction.id}/stream', buffered=False)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+
+        frames = iter(response.response)
+        next(frames)  # retry hint
+        event, data = parse_frame(_text(next(frames)))
+        response.close()
+        assert event == 'snapshot'
+        assert data['current_bid'] == 100.0
+
+    def test_stream_over_capacity_polls(self, client, db_session, live_auction, monkeypatch):
+        """Test viewers past the per-worker cap are sent back to polling"""
+        from app import event_hub
+        monkeypatch.setattr(event_hub, 'max_streams', 1)
+        first = client.get(f'/api/auctions/{live_auction.id}/stream', buffered=False)
+        assert first.status_code == 200
+        assert event_hub.open_streams == 1
+
+        refused = client.get(f'/api/auctions/{live_auction.id}/stream', buffered=False)
+        assert refused.status_code == 503
+        assert refused.headers['Retry-After'].isdigit()
+        assert refused.get_json()['poll'] is True
+
+        # Closing before any frame was read still frees the slot
+        first.close()
+        assert event_hub.open_streams == 0
+        assert event_hub.subscriber_count(f'auction:{live_auction.id}') == 0
+
+    def test_bid_publishes_event(self, bidder_client, db_session, live_auction):
+        """Test placing a bid pushes bid_placed with the updated bid history"""
+        from app import event_hub
+        auction_id = live_auction.id
+        subscriber = event_hub.subscribe(f'auction:{auction_id}')
+        try:
+            response = bidder_client.post(f'/api/auctions/{auction_id}/bids', json={'amount': 110.0})
+            assert response.status_code == 201
+
+            event, data = parse_frame(subscriber.queue.get_nowait())
+            assert event == 'bid_placed'
+            assert data['current_bid'] == 110.0
+            assert data['bid_count'] == 1
+            assert data['bids'][0]['amount'] == 110.0
+        finally:
+            event_hub.unsubscribe(subscriber)
@@ -0,0 +1,126 @@
+"""
+Request Metrics Tests for ZUBID Backend
+Tests: Statement shapes, Histograms, N+1 detection, Server-Timing header, /api/metrics access
+"""
+from request_metrics import Histogram, RequestMetrics, statement_shape
+
+
+class TestStatementShape:
+    """Test repeated statements group under one shape"""
+
+    def test_in_lists_collapse(self):
+        """Test expanded IN lists of any length share a shape"""
+        assert statement_shape('SELECT * FROM bid WHERE id IN (?, ?, ?)') == \
+            statement_shape('SELECT * FROM bid WHERE id IN (?,?)')
+        assert statement_shape('SELECT a FROM t WHERE id IN (%(id_1)s, %(id_2)s)') == 'SELECT a FROM t WHERE id IN (?)'
+
+    def test_literals_and_whitespace(self):
+        """Test numbers and layout don't split shapes"""
+        assert statement_shape('SELECT 1\n  LIMIT 10') == statement_shape('SELECT 2 LIMIT 20')
+
+
+class TestHistogram:
+    """Test cumulative buckets"""
+
+    def test_cumulative(self):
+        """Test observations land in the first bucket that fits; overflow only in +Inf"""
+        histogram = Histogram((1, 5))
+        for value in (0.5, 3, 3, 9):
+            histogram.observe(value)
+        assert list(histogram.cumulative()) == [(1, 1), (5, 3)]
+        assert histogram.count == 4
+        assert histogram.sum == 15.5
+
+
+class TestRequestMetrics:
+    """Test per-request collection"""
+
+    def test_n_plus_one_detected(self):
+        """Test a statement repeated past the threshold flags the request"""
+        metrics = RequestMetrics(n_plus_one_threshold=3)
+        stats = metrics.begin()
+        for auction_id in range(5):
+            metrics.record_query(f'SELECT * FROM bid WHERE auction_id = {auction_id}', 0.001)
+        metrics.record_query('SELECT * FROM auction', 0.001)
+        metrics.finish('GET', '/api/x', 200, stats)
+        metrics.end()
+        assert metrics.repeated_statements(stats) == [('SELECT * FROM bid WHERE auction_id = N', 5)]
+        assert 'zubid_n_plus_one_requests_total{method="GET",endpoint="/api/x"} 1' in metrics.render()
+
+    def test_under_threshold_not_flagged(self):
+        """Test a few repeats are fine"""
+        metrics = RequestMetrics(n_plus_one_threshold=3)
+        stats = metrics.begin()
+        for _ in range(3):
+            metrics.record_query('SELECT 1', 0.0)
+        metrics.finish('GET', '/api/x', 200, stats)
+        assert 'zubid_n_plus_one_requests_total{' not in metrics.render()
+
+    def test_background_queries(self):
+        """Test queries outside a request are counted separately"""
+        metrics = RequestMetrics()
+        metrics.record_query('SELECT 1', 0.5)
+        assert metrics.background_queries == 1
+        assert 'zubid_db_queries_background_total 1' in metrics.render()
+
+    def test_render_format(self):
+        """Test histogram series and gauges in the exposition"""
+        metrics = RequestMetrics()
+        metrics.register_gauge('zubid_test_depth', 'Depth.', lambda: 7)
+        metrics.register_gauge('zubid_broken', 'Broken.', lambda: 1 / 0)
+        stats = metrics.begin()
+        metrics.record_query('SELECT 1', 0.002)
+        metrics.finish('POST', '/api/a"b', 201, stats)
+        text = metrics.render()
+        assert 'zubid_http_requests_total{method="POST",endpoint="/api/a\\"b",status="2xx"} 1' in text
+        assert 'zubid_http_request_duration_seconds_bucket{method="POST",endpoint="/api/a\\"b",le="+Inf"} 1' in text
+        assert 'zubid_db_queries_per_request_bucket{method="POST",endpoint="/api/a\\"b",le="1"} 1' in text
+        assert 'zubid_test_depth 7' in text
+        assert 'zubid_broken' not in text
+        assert text.endswith('\n')
+
+
+class TestMetricsIntegration:
+    """Test the hooks on the app"""
+
+    def test_server_timing_header(self, client):
+        """Test responses carry app and db timings"""
+        response = client.get('/api/categories')
+        timing = response.headers['Server-Timing']
+        assert timing.startswith('app;dur=')
+        assert 'db;dur=' in timing and 'queries"' in timing
+
+    def test_queries_counted_per_endpoint(self, client, db_session):
+        """Test SQL run by a request is attributed to its route"""
+        client.get('/api/categories')
+        from app import app_metrics
+        endpoint = app_metrics._endpoints[('GET', '/api/categories')]
+        assert endpoint.queries.count >= 1
+        assert endpoint.latency.count >= 1
+
+    def test_unmatched_routes_grouped(self, client):
+        """Test requests no route matched don't create a series per URL"""
+        client.delete('/api/does-not-exist/123')
+        from app import app_metrics
+        assert ('DELETE', '(unmatched)') in app_metrics._endpoints
+        assert not any('does-not-exist' in endpoint for _, endpoint in app_metrics._endpoints)
+
+    def test_metrics_requires_admin(self, authenticated_client):
+        """Test regular users can't read metrics"""
+        assert authenticated_client.get('/api/metrics').status_code == 403
+
+    def test_metrics_for_admin(self, admin_client):
+        """Test admins get the Prometheus text"""
+        response = admin_client.get('/api/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        body = response.get_data(as_text=True)
+        assert '# TYPE zubid_http_request_duration_seconds histogram' in body
+        assert 'zubid_notification_queue_jobs' in body
+
+    def test_metrics_bearer_token(self, client, monkeypatch):
+        """Test a scraper authenticates with METRICS_TOKEN"""
+        monkeypatch.setenv('METRICS_TOKEN', 'scrape-secret')
+        assert client.get('/api/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+        response = client.get('/api/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+        assert response.status_code == 200
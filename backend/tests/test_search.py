@@ -0,0 +1,175 @@
+"""
+Search Tests for ZUBID Backend
+Tests: Arabic/Kurdish normalization, Indexed prefix search, Relevance ranking
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+
+
+@pytest.fixture
+def make_auction(db_session, test_user, test_category):
+    """Factory for active auctions with a given title/description"""
+    from app import Auction
+
+    def make(item_name, description='Item'):
+        auction = Auction(
+            item_name=item_name,
+            description=description,
+            starting_bid=10.0,
+            current_bid=10.0,
+            bid_increment=1.0,
+            end_time=datetime.now(timezone.utc) + timedelta(days=1),
+            seller_id=test_user.id,
+            category_id=test_category.id,
+            status='active',
+            qr_code_url='/uploads/qrcodes/test.png'
+        )
+        db_session.session.add(auction)
+        db_session.session.commit()
+        return auction.id
+    return make
+
+
+def search_ids(client, term, **params):
+    query = '&'.join(f'{k}={v}' for k, v in params.items())
+    data = client.get(f'/api/auctions?search={term}&{query}').get_json()
+    return [int(a['id']) for a in data['auctions']]
+
+
+class TestNormalization:
+    """Test text normalization shared by index and query"""
+
+    def test_folds_arabic_variants(self):
+        """Test alef, yeh and kaf variants and diacritics fold together"""
+        from search_index import normalize_text
+        assert normalize_text('أحمد') == normalize_text('احمد')
+        assert normalize_text('كتاب') == normalize_text('کتاب')
+        assert normalize_text('عَلِي') == normalize_text('علی')
+
+    def test_maps_eastern_digits(self):
+        """Test Arabic-Indic and Extended Arabic-Indic digits become ASCII"""
+        from search_index import tokenize
+        assert tokenize('آيفون ١٥') == tokenize('ایفون ۱۵') == ['ایفون', '15']
+
+    def test_tokens_are_query_safe(self):
+        """Test FTS/tsquery operators are stripped from search input"""
+        from search_index import tokenize
+        assert tokenize('iphone" OR * -case') == ['iphone', 'or', 'case']
+
+
+class TestAuctionSearch:
+    """Test /api/auctions?search= against the index"""
+
+    def test_prefix_match(self, client, db_session, make_auction):
+        """Test partial words match for search-as-you-type"""
+        phone = make_auction('Vintage Telephone')
+        make_auction('Garden Chair')
+        assert search_ids(client, 'telep') == [phone]
+
+    def test_all_terms_required(self, client, db_session, make_auction):
+        """Test every search term must match"""
+        red = make_auction('Red Bicycle')
+        make_auction('Blue Bicycle')
+        assert search_ids(client, 'red bic') == [red]
+
+    def test_arabic_spelling_variants_match(self, client, db_session, make_auction):
+        """Test a title typed with Arabic kaf/yeh matches a Kurdish-keyboard query"""
+        auction_id = make_auction('كرسي خشبي')
+        assert search_ids(client, 'کورسی') == []
+        assert search_ids(client, 'کرسی') == [auction_id]
+
+    def test_title_ranks_above_description(self, client, db_session, make_auction):
+        """Test relevance ordering is the default when searching"""
+        in_description = make_auction('Old Box', description='Contains a camera lens')
+        in_title = make_auction('Camera Body', description='Mirrorless')
+        assert search_ids(client, 'camera') == [in_title, in_description]
+
+    def test_edit_reindexes(self, admin_client, db_session, make_auction):
+        """Test renaming an auction updates the index"""
+        auction_id = make_auction('Wooden Table')
+        response = admin_client.put(f'/api/admin/auctions/{auction_id}', json={'item_name': 'Oak Desk'})
+        assert response.status_code == 200
+        assert search_ids(admin_client, 'table') == []
+        assert search_ids(admin_client, 'oak') == [auction_id]
+
+
+class TestSuggestionIndex:
+    """Test the in-memory prefix index"""
+
+    def make_index(self, entries):
+        from search_index import SuggestionIndex
+        index = SuggestionIndex()
+        index.rebuild(entries)
+        return index
+
+    def test_matches_any_word_start(self):
+        """Test a prefix matches the start of any word, and multi-word prefixes"""
+        index = self.make_index([('auction', 1, 'Vintage Telephone', 0), ('auction', 2, 'Television Stand', 0)])
+        assert {s['id'] for s in index.suggest('tele')} == {1, 2}
+        assert [s['id'] for s in index.suggest('vintage tel')] == [1]
+        assert index.suggest('phone') == []
+
+    def test_ranks_categories_then_popular_auctions(self):
+        """Test categories come first, then auctions by bidder count"""
+        from search_index import CATEGORY_SCORE
+        index = self.make_index([
+            ('auction', 1, 'Camera Lens', 1),
+            ('auction', 2, 'Camera Bag', 9),
+            ('category', 7, 'Cameras', CATEGORY_SCORE),
+        ])
+        assert [(s['type'], s['id']) for s in index.suggest('cam')] == [('category', 7), ('auction', 2), ('auction', 1)]
+        assert len(index.suggest('cam', limit=2)) == 2
+
+    def test_incremental_updates(self):
+        """Test add, rename and remove without a rebuild"""
+        index = self.make_index([])
+        index.upsert('auction', 1, 'Oak Table')
+        assert [s['text'] for s in index.suggest('oak')] == ['Oak Table']
+        index.upsert('auction', 1, 'Pine Table')
+        assert index.suggest('oak') == []
+        assert [s['text'] for s in index.suggest('table')] == ['Pine Table']
+        index.remove('auction', 1)
+        assert index.suggest('table') == []
+
+    def test_updates_during_rebuild_are_replayed(self):
+        """Test events that race a database load are applied after it"""
+        from search_index import SuggestionIndex
+        index = SuggestionIndex()
+        index.begin_rebuild()
+        index.upsert('auction', 2, 'Brass Lamp')
+        index.rebuild([('auction', 1, 'Brass Clock', 0)])
+        assert {s['id'] for s in index.suggest('brass')} == {1, 2}
+
+    def test_arabic_prefix(self):
+        """Test suggestions use the same Arabic/Kurdish normalization as search"""
+        index = self.make_index([('auction', 1, 'كرسي خشبي', 0)])
+        assert [s['id'] for s in index.suggest('کر')] == [1]
+
+
+class TestSuggestEndpoint:
+    """Test /api/search/suggest"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_index(self):
+        from app import search_suggestions
+        search_suggestions.loaded_at = None
+
+    def test_suggests_active_titles_and_categories(self, client, db_session, make_auction, test_category):
+        """Test active auctions and categories are suggested"""
+        category_id = test_category.id
+        auction_id = make_auction('Test Tube Rack')
+        data = client.get('/api/search/suggest?q=test').get_json()
+        assert {(s['type'], s['id']) for s in data['suggestions']} == {('auction', auction_id), ('category', category_id)}
+
+    def test_follows_auction_events(self, admin_client, db_session, make_auction):
+        """Test an edit reaches the index through the event bus, without a reload"""
+        auction_id = make_auction('Wooden Table')
+        assert admin_client.get('/api/search/suggest?q=wood').get_json()['suggestions']
+
+        admin_client.put(f'/api/admin/auctions/{auction_id}', json={'item_name': 'Oak Desk'})
+        assert admin_client.get('/api/search/suggest?q=wood').get_json()['suggestions'] == []
+        assert admin_client.get('/api/search/suggest?q=oak').get_json()['suggestions'][0]['id'] == auction_id
+
+    def test_empty_query(self, client, db_session):
+        """Test a blank query returns no suggestions"""
+        assert client.get('/api/search/suggest?q=').get_json()['suggestions'] == []
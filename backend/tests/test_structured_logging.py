@@ -0,0 +1,160 @@
+"""
+Structured Logging Tests for ZUBID Backend
+Tests: JSON records, Request ids, Sampling, Per-logger levels, Auth checks not logging sessions
+"""
+import json
+import logging
+import os
+
+import pytest
+
+from structured_logging import (
+    AsyncQueueHandler, JsonFormatter, SamplingFilter, parse_level, parse_mapping,
+)
+
+
+class ListHandler(logging.Handler):
+    """Collects formatted records"""
+
+    def __init__(self, formatter=None):
+        super().__init__()
+        self.lines = []
+        self.records = []
+        if formatter:
+            self.setFormatter(formatter)
+
+    def emit(self, record):
+        self.records.append(record)
+        self.lines.append(self.format(record))
+
+
+@pytest.fixture
+def captured():
+    """Records reaching the app's queue handler during a test"""
+    from app import log_handler
+    collector = ListHandler(JsonFormatter())
+    log_handler.handlers.append(collector)
+    yield collector
+    log_handler.flush()
+    log_handler.handlers.remove(collector)
+
+
+def make_record(name='zubid.test', level=logging.INFO, msg='hello %s', args=('world',), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestJsonFormatter:
+    """Test records become one JSON object with their extra fields"""
+
+    def test_fields(self):
+        """Test message args are merged and extras included"""
+        entry = json.loads(JsonFormatter().format(make_record(request_id='abc', latency_ms=1.5)))
+        assert entry['message'] == 'hello world'
+        assert entry['level'] == 'INFO'
+        assert entry['logger'] == 'zubid.test'
+        assert entry['request_id'] == 'abc'
+        assert entry['latency_ms'] == 1.5
+
+    def test_exception(self):
+        """Test a traceback is carried as a field"""
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            import sys
+            record = logging.LogRecord('x', logging.ERROR, __file__, 1, 'failed', (), sys.exc_info())
+        entry = json.loads(JsonFormatter().format(record))
+        assert 'ValueError: boom' in entry['exception']
+
+
+class TestSamplingFilter:
+    """Test noisy loggers are thinned below WARNING"""
+
+    def test_keeps_one_in_n(self):
+        """Test a 0.25 rate keeps every fourth record"""
+        sampler = SamplingFilter({'zubid.access': 0.25})
+        kept = [sampler.filter(make_record('zubid.access')) for _ in range(8)]
+        assert kept.count(True) == 2
+        assert sampler.dropped == 6
+
+    def test_warnings_never_sampled(self):
+        """Test warnings and errors always pass"""
+        sampler = SamplingFilter({'zubid.access': 0.0})
+        assert sampler.filter(make_record('zubid.access', logging.WARNING))
+        assert not sampler.filter(make_record('zubid.access'))
+
+    def test_prefix_match(self):
+        """Test child loggers inherit the rate, other loggers are untouched"""
+        sampler = SamplingFilter({'zubid': 0.5, 'zubid.auth': 0.1})
+        assert sampler.every('zubid.auth.admin') == 10
+        assert sampler.every('zubid.access') == 2
+        assert sampler.every('zubidx') == 1
+
+
+class TestConfiguration:
+    """Test env setting parsing"""
+
+    def test_parse_levels(self):
+        """Test malformed and unknown entries are skipped"""
+        levels = parse_mapping('werkzeug=WARNING, zubid.auth=debug,bad,x=LOUD', parse_level)
+        assert levels == {'werkzeug': logging.WARNING, 'zubid.auth': logging.DEBUG}
+
+    def test_auth_logger_quiet(self, test_app):
+        """Test auth checks are off at the default levels"""
+        assert not logging.getLogger('zubid.auth').isEnabledFor(logging.INFO)
+
+
+class TestAsyncQueueHandler:
+    """Test records are written by the listener thread"""
+
+    def test_written_off_thread(self):
+        """Test the listener formats and writes queued records"""
+        import threading
+        collector = ListHandler(JsonFormatter())
+        handler = AsyncQueueHandler([collector])
+        try:
+            handler.handle(make_record())
+            assert handler.flush()
+            assert json.loads(collector.lines[0])['message'] == 'hello world'
+            assert collector.records[0].args is None
+            assert threading.current_thread() is not handler.listener._thread
+        finally:
+            handler.stop()
+
+    def test_full_queue_drops(self):
+        """Test a full queue drops records instead of blocking"""
+        handler = AsyncQueueHandler([ListHandler()], max_records=1)
+        handler._pid = os.getpid()  # listener not running: nothing drains
+        handler.handle(make_record())
+        handler.handle(make_record())
+        assert handler.dropped == 1
+
+
+class TestRequestLogging:
+    """Test request ids and latency on records"""
+
+    def test_request_id_generated(self, client):
+        """Test every response carries a request id"""
+        response = client.get('/api/categories')
+        assert len(response.headers['X-Request-ID']) == 32
+
+    def test_request_id_propagated(self, client, captured):
+        """Test a caller's id is echoed and stamped on the access record"""
+        response = client.get('/api/categories', headers={'X-Request-ID': 'trace-123'})
+        assert response.headers['X-Request-ID'] == 'trace-123'
+        from app import log_handler
+        assert log_handler.flush()
+        access = [json.loads(line) for line in captured.lines if '"zubid.access"' in line]
+        assert access and access[-1]['request_id'] == 'trace-123'
+        assert access[-1]['status'] == response.status_code
+        assert access[-1]['path'] == '/api/categories'
+        assert access[-1]['latency_ms'] >= 0
+
+    def test_auth_check_does_not_log_session(self, authenticated_client, captured):
+        """Test authenticated requests don't write session contents to the log"""
+        authenticated_client.get('/api/user/profile')
+        from app import log_handler
+        assert log_handler.flush()
+        assert not any('Session data' in line or 'cookies' in line.lower() for line in captured.lines)
@@ -0,0 +1,131 @@
+"""
+Unread Counter Tests for ZUBID Backend
+Tests: Counter cache, Incremental badge updates, Live badge stream
+"""
+import threading
+
+from tests.conftest import parse_frame
+from unread_counts import UnreadCounter
+
+
+class TestUnreadCounter:
+    """Test the in-memory counter cache"""
+
+    def test_loads_once_then_applies_changes(self):
+        """Test a count is loaded once and kept current by deltas"""
+        counter = UnreadCounter()
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return 3, 'user'
+
+        assert counter.get(1, loader) == 3
+        assert counter.add(1, 1) == 4
+        assert counter.add(1, -10) == 0
+        assert counter.set(1, 2) == 2
+        counter.add_role('user', 1)
+        counter.add_role('admin', 1)
+        assert counter.get(1, loader) == 3
+        assert len(loads) == 1
+        assert counter.add(2, 1) is None
+
+    def test_change_during_load_not_cached(self):
+        """Test a count that may have missed a concurrent change is not cached"""
+        counter = UnreadCounter()
+        started, release = threading.Event(), threading.Event()
+
+        def slow_loader():
+            started.set()
+            release.wait(5)
+            return 1, 'user'
+
+        thread = threading.Thread(target=counter.get, args=(1, slow_loader))
+        thread.start()
+        assert started.wait(5)
+        counter.add(1, 1)
+        release.set()
+        thread.join(5)
+        assert counter.peek(1) is None
+
+    def test_ttl_reconciles(self):
+        """Test an expired count is reloaded from the database"""
+        counter = UnreadCounter(ttl=0)
+        counter.get(1, lambda: (1, 'user'))
+        assert counter.get(1, lambda: (5, 'user')) == 5
+
+
+class TestUnreadCountEndpoint:
+    """Test the badge endpoint stays correct without recounting"""
+
+    def count_queries(self, db_session, action):
+        from sqlalchemy import event
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db_session.engine, 'before_cursor_execute', record)
+        try:
+            result = action()
+        finally:
+            event.remove(db_session.engine, 'before_cursor_execute', record)
+        return result, [s for s in statements if 'count(' in s.lower()]
+
+    def test_badge_maintained_incrementally(self, authenticated_client, db_session, test_user):
+        """Test new, read, deleted and read-all notifications adjust the cached count"""
+        from app import Notification, queue_notification
+        client, user_id = authenticated_client, test_user.id
+        for title in ('One', 'Two'):
+            db_session.session.add(Notification(user_id=user_id, title=title, message='m'))
+        db_session.session.commit()
+        ids = [n.id for n in Notification.query.filter_by(user_id=user_id).order_by(Notification.id)]
+
+        assert client.get('/api/notifications/unread-count').get_json()['count'] == 2
+        queue_notification(user_id, 'Three', 'm')
+        response, counts = self.count_queries(db_session, lambda: client.get('/api/notifications/unread-count'))
+        assert response.get_json()['count'] == 3
+        assert counts == []
+
+        client.put(f'/api/notifications/{ids[0]}/read')
+        client.put(f'/api/notifications/{ids[0]}/read')
+        assert client.get('/api/notifications/unread-count').get_json()['count'] == 2
+        client.delete(f'/api/notifications/{ids[1]}')
+        assert client.get('/api/notifications/unread-count').get_json()['count'] == 1
+        client.put('/api/notifications/read-all')
+        response, counts = self.count_queries(db_session, lambda: client.get('/api/notifications/unread-count'))
+        assert response.get_json()['count'] == 0
+        assert counts == []
+
+    def test_broadcast_counted_for_audience(self, client, db_session, test_user, admin_user):
+        """Test a broadcast raises cached counts of its audience only"""
+        user_id, admin_id = test_user.id, admin_user.id
+        for session_user in (user_id, admin_id):
+            with client.session_transaction() as sess:
+                sess['user_id'] = session_user
+            assert client.get('/api/notifications/unread-count').get_json()['count'] == 0
+
+        client.post('/api/admin/notifications/send', json={'title': 'Maintenance', 'message': 'Back soon'})
+        assert client.get('/api/notifications/unread-count').get_json()['count'] == 0
+        with client.session_transaction() as sess:
+            sess['user_id'] = user_id
+        assert client.get('/api/notifications/unread-count').get_json()['count'] == 1
+
+
+class TestNotificationStream:
+    """Test the live notification and badge channel"""
+
+    def test_stream_pushes_badge(self, authenticated_client, db_session, test_user):
+        """Test the stream opens with the count and pushes updates"""
+        from app import queue_notification
+        user_id = test_user.id
+        response = authenticated_client.get('/api/notifications/stream', buffered=False)
+        assert response.status_code == 200
+        frames = iter(response.response)
+        next(frames)  # retry hint
+        assert parse_frame(next(frames).decode()) == ('snapshot', {'unread_count': 0})
+
+        queue_notification(user_id, 'Outbid', 'm', 'outbid')
+        assert parse_frame(next(frames).decode())[0] == 'notification'
+        assert parse_frame(next(frames).decode()) == ('unread_count', {'count': 1})
+        response.close()
@@ -0,0 +1,125 @@
+"""
+Unread Notification Counters for ZUBID
+Per-user unread counts kept in memory so the badge endpoint the mobile app polls is
+a dictionary lookup instead of a COUNT(*) over the user's notifications.
+
+A count is loaded from the database on first use and then maintained incrementally:
+new notifications add one, reads and deletes subtract, read-all sets it to zero, and a
+broadcast adds one to every cached user in its audience. Every worker applies the same
+changes from the event bus, so the counters agree across processes, and each entry is
+reloaded from the database after UNREAD_COUNT_TTL seconds to correct any drift.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Counter configuration
+UNREAD_COUNT_TTL = float(os.getenv('UNREAD_COUNT_TTL', '300'))
+UNREAD_COUNT_MAX_USERS = int(os.getenv('UNREAD_COUNT_MAX_USERS', '50000'))
+
+
+class UnreadCounter:
+    """Bounded LRU of user_id -> [count, role, reload_at]"""
+
+    def __init__(self, ttl=UNREAD_COUNT_TTL, max_users=UNREAD_COUNT_MAX_USERS):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._entries = OrderedDict()
+        # user_id -> True once a change arrived while the user's count was being loaded
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, user_id, loader):
+        """Return the user's unread count; loader() -> (count, role) reads it from the database"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[2] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            self._loading[user_id] = False
+        try:
+            count, role = loader()
+        except Exception:
+            with self._lock:
+                self._loading.pop(user_id, None)
+            raise
+        with self._lock:
+            self.loads += 1
+            # A change that raced the load may or may not be in the count; don't cache a guess
+            if not self._loading.pop(user_id, True):
+                self._store(user_id, count, role)
+        return count
+
+    def peek(self, user_id):
+        """Cached count or None, without loading"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            return entry[0] if entry is not None else None
+
+    def add(self, user_id, delta):
+        """Apply a change to a cached count. Returns the new count, or None if the user isn't cached."""
+        with self._lock:
+            self._mark_loading(user_id)
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            entry[0] = max(0, entry[0] + delta)
+            return entry[0]
+
+    def set(self, user_id, count):
+        """Overwrite a cached count with a known value (e.g. zero after read-all)"""
+        with self._lock:
+            self._mark_loading(user_id)
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            entry[0] = count
+            return count
+
+    def add_role(self, role, delta):
+        """Apply a change to every cached user with the given role (a broadcast to that audience)"""
+        with self._lock:
+            for user_id in self._loading:
+                self._loading[user_id] = True
+            for entry in self._entries.values():
+                if entry[1] == role:
+                    entry[0] = max(0, entry[0] + delta)
+
+    def discard(self, user_id):
+        """Forget a count so the next lookup reloads it from the database"""
+        with self._lock:
+            self._mark_loading(user_id)
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._loading.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.loads
+        return {
+            'users': len(self._entries),
+            'max_users': self.max_users,
+            'hits': self.hits,
+            'loads': self.loads,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _mark_loading(self, user_id):
+        if user_id in self._loading:
+            self._loading[user_id] = True
+
+    def _store(self, user_id, count, role):
+        self._entries[user_id] = [count, role, time.monotonic() + self.ttl]
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
@@ -3,6 +3,7 @@ let auctionId = null;
 let auctionData = null;
 let bidInterval = null;
 let countdownInterval = null;
+let auctionEventSource = null;
 
 // SVG Placeholder for missing images
 const SVG_PLACEHOLDER = 'data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iNjAwIiBoZWlnaHQ9IjQwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMTAwJSIgaGVpZ2h0PSIxMDAlIiBmaWxsPSIjZmY2NjAwIi8+PHRleHQgeD0iNTAlIiB5PSI1MCUiIGZvbnQtZmFtaWx5PSJBcmlhbCIgZm9udC1zaXplPSIyNCIgZmlsbD0iI2ZmZmZmZiIgdGV4dC1hbmNob3I9Im1pZGRsZSIgZHk9Ii4zZW0iPk5vIEltYWdlPC90ZXh0Pjwvc3ZnPg==';
@@ -924,6 +925,15 @@ async function placeBid() {
 async function loadBidHistory() {
     try {
         const bids = await BidAPI.getByAuctionId(auctionId);
+        renderBidHistory(bids);
+    } catch (error) {
+        if (window.utils) window.utils.debugError('Error loading bid history:', error);
+    }
+}
+
+// Render bid history (from GET /bids or a pushed bid_placed event)
+function renderBidHistory(bids) {
+    try {
         const container = document.getElementById('bidHistory');
         
         if (!container) return;
@@ -1004,7 +1014,7 @@ async function loadBidHistory() {
             container.innerHTML = '<p>No bids yet. Be the first to bid!</p>';
         }
     } catch (error) {
-        if (window.utils) window.utils.debugError('Error loading bid history:', error);
+        if (window.utils) window.utils.debugError('Error rendering bid history:', error);
     }
 }
 
@@ -1036,9 +1046,104 @@ function updateCurrentWinner(winnerBid) {
     }
 }
 
-// Real-time updates with enhanced notifications
+// Real-time updates: server push (SSE) with polling as a fallback
 function startRealTimeUpdates() {
     if (bidInterval) clearInterval(bidInterval);
+    if (auctionEventSource) auctionEventSource.close();
+
+    if (!window.EventSource || !auctionId || auctionData?.status === 'ended') {
+        startPolling();
+        return;
+    }
+
+    const streamUrl = `${API_BASE_URL}/auctions/${auctionId}/stream`;
+    auctionEventSource = new EventSource(streamUrl, { withCredentials: true });
+
+    auctionEventSource.addEventListener('snapshot', (e) => applyAuctionEvent(JSON.parse(e.data), 'snapshot'));
+    auctionEventSource.addEventListener('bid_placed', (e) => applyAuctionEvent(JSON.parse(e.data), 'bid_placed'));
+    auctionEventSource.addEventListener('time_extended', (e) => applyAuctionEvent(JSON.parse(e.data), 'time_extended'));
+    auctionEventSource.addEventListener('auction_ended', (e) => applyAuctionEvent(JSON.parse(e.data), 'auction_ended'));
+
+    auctionEventSource.onerror = () => {
+        // EventSource retries on its own after a dropped stream; it only gives up
+        // (CLOSED) on a non-200 response such as a rate limit - fall back to polling then
+        if (auctionEventSource && auctionEventSource.readyState === EventSource.CLOSED) {
+            auctionEventSource = null;
+            startPolling();
+        }
+    };
+}
+
+// Apply a pushed auction event to the page without re-fetching
+function applyAuctionEvent(event, type) {
+    if (!auctionData || String(event.auction_id) !== String(auctionData.id)) return;
+
+    const oldCurrentBid = auctionData.current_bid;
+    const oldBidCount = auctionData.bid_count;
+    const oldBids = auctionData.bids || [];
+    const wasWinning = currentUser && oldBids.some(b => b.user_id === currentUser.id && b.is_winning);
+
+    if (event.end_time) {
+        const timeExtended = new Date(event.end_time).getTime() > new Date(auctionData.end_time).getTime();
+        auctionData.end_time = event.end_time;
+        if (timeExtended && type === 'time_extended') {
+            updateCountdown();
+            showToast('⏰ Auction time extended by 2 minutes!', 'info');
+        }
+    }
+    if (event.current_bid !== undefined) auctionData.current_bid = event.current_bid;
+    if (event.bid_count !== undefined) auctionData.bid_count = event.bid_count;
+
+    if (event.bids) {
+        auctionData.bids = event.bids;
+        renderBidHistory(event.bids);
+        updateBidForm();
+    }
+
+    if (auctionData.current_bid !== oldCurrentBid) {
+        const currentBidEl = document.getElementById('currentBid');
+        if (currentBidEl) {
+            currentBidEl.style.transition = 'all 0.3s';
+            currentBidEl.style.transform = 'scale(1.1)';
+            currentBidEl.textContent = `$${auctionData.current_bid.toFixed(2)}`;
+            setTimeout(() => {
+                currentBidEl.style.transform = 'scale(1)';
+            }, 300);
+        }
+    }
+
+    const bidCountEl = document.getElementById('bidCount');
+    if (bidCountEl && auctionData.bid_count !== oldBidCount) {
+        bidCountEl.textContent = auctionData.bid_count;
+    }
+
+    if (type === 'bid_placed' && currentUser && event.bids) {
+        const nowWinning = event.bids.some(b => b.user_id === currentUser.id && b.is_winning);
+        if (wasWinning && !nowWinning) {
+            showToast('⚠️ You have been outbid! Someone placed a higher bid.', 'error');
+        } else if (!wasWinning && nowWinning) {
+            showToast('🎉 You are now the highest bidder!', 'success');
+        } else if (!nowWinning && event.bid && event.bid.user_id !== currentUser.id) {
+            showToast('💰 New bid placed!', 'info');
+        }
+    }
+
+    if (type === 'auction_ended' || event.status === 'ended') {
+        if (auctionEventSource) {
+            auctionEventSource.close();
+            auctionEventSource = null;
+        }
+        clearInterval(countdownInterval);
+        // Reload to show the final winner and payment options
+        setTimeout(() => {
+            window.location.reload();
+        }, 2000);
+    }
+}
+
+// Polling fallback when server push is unavailable
+function startPolling() {
+    if (bidInterval) clearInterval(bidInterval);
 
     let lastBidCount = auctionData ? auctionData.bid_count : 0;
     let lastCurrentBid = auctionData ? auctionData.current_bid : 0;
@@ -1390,6 +1495,7 @@ async function checkWinnerStatus() {
 
 // Cleanup on page unload
 window.addEventListener('beforeunload', () => {
+    if (auctionEventSource) auctionEventSource.close();
     if (bidInterval) clearInterval(bidInterval);
     if (countdownInterval) clearInterval(countdownInterval);
 });